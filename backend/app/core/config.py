@@ -49,6 +49,124 @@ class QueueConfig:
         except ValueError:
             return 100
 
+    @staticmethod
+    def get_reject_duplicates() -> bool:
+        """キュー内に既に存在する楽曲IDの追加を拒否するかを取得
+
+        Returns:
+            bool: 重複拒否を有効にする場合True（デフォルト: False）
+        """
+        value = os.getenv("QUEUE_REJECT_DUPLICATES", "false")
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    @staticmethod
+    def get_lease_ttl_ms() -> int:
+        """取り出した楽曲のリース有効期間（ミリ秒）を取得
+
+        Returns:
+            int: リース有効期間（デフォルト: 30000ms、0でリース無効）
+        """
+        value = os.getenv("QUEUE_LEASE_TTL_MS", "30000")
+        try:
+            return max(0, int(value))
+        except ValueError:
+            return 30000
+
+    @staticmethod
+    def get_backend() -> str:
+        """キューのバックエンド種別を取得
+
+        Returns:
+            str: "memory"（プロセス内）、"shm"（同一ホストの共有メモリ）
+                または "redis"（共有ストア）（デフォルト: "memory"）
+        """
+        value = os.getenv("QUEUE_BACKEND", "memory").strip().lower()
+        return value if value in ("memory", "shm", "redis") else "memory"
+
+    @staticmethod
+    def get_redis_url() -> str:
+        """共有キューバックエンドの接続URLを取得
+
+        Returns:
+            str: 接続URL（デフォルト: "redis://localhost:6379/0"）
+        """
+        return os.getenv("QUEUE_REDIS_URL", "redis://localhost:6379/0")
+
+    @staticmethod
+    def get_redis_prefix() -> str:
+        """共有キューバックエンドのキー名プレフィックスを取得
+
+        Returns:
+            str: キー名プレフィックス（デフォルト: "otodoki:queue"）
+        """
+        return os.getenv("QUEUE_REDIS_PREFIX", "otodoki:queue")
+
+    @staticmethod
+    def get_shm_name() -> str:
+        """共有メモリキューのセグメント名を取得
+
+        Returns:
+            str: セグメント名（デフォルト: "otodoki_queue"）
+        """
+        return os.getenv("QUEUE_SHM_NAME", "otodoki_queue")
+
+    @staticmethod
+    def get_shm_slot_bytes() -> int:
+        """共有メモリキューの1スロットあたりのバイト数を取得
+
+        Returns:
+            int: スロットサイズ（デフォルト: 2048）
+        """
+        try:
+            return int(os.getenv("QUEUE_SHM_SLOT_BYTES", "2048"))
+        except ValueError:
+            return 2048
+
+    @staticmethod
+    def get_worker_role_ttl_ms() -> int:
+        """共有キュー利用時の補充ワーカー担当権の有効期間を取得
+
+        Returns:
+            int: 有効期間（ミリ秒、デフォルト: 15000）
+        """
+        try:
+            return int(os.getenv("QUEUE_WORKER_ROLE_TTL_MS", "15000"))
+        except ValueError:
+            return 15000
+
+    @staticmethod
+    def get_snapshot_path() -> str:
+        """キューのスナップショットファイルのパスを取得
+
+        Returns:
+            str: ファイルパス（デフォルト: ""、空の場合はスナップショット無効）
+        """
+        return os.getenv("QUEUE_SNAPSHOT_PATH", "").strip()
+
+    @staticmethod
+    def get_snapshot_interval_s() -> float:
+        """キューのスナップショット保存間隔を取得
+
+        Returns:
+            float: 保存間隔（秒、デフォルト: 30.0）
+        """
+        try:
+            return float(os.getenv("QUEUE_SNAPSHOT_INTERVAL_S", "30"))
+        except ValueError:
+            return 30.0
+
+    @staticmethod
+    def get_snapshot_full_every() -> int:
+        """差分追記を何回行うごとに全体スナップショットで書き直すかを取得
+
+        Returns:
+            int: 保存回数（デフォルト: 10）
+        """
+        try:
+            return int(os.getenv("QUEUE_SNAPSHOT_FULL_EVERY", "10"))
+        except ValueError:
+            return 10
+
     @staticmethod
     def get_all_settings() -> dict:
         """すべての設定値を辞書で取得
@@ -60,6 +178,9 @@ class QueueConfig:
             "max_capacity": QueueConfig.get_max_capacity(),
             "dequeue_default_n": QueueConfig.get_dequeue_default_n(),
             "low_watermark": QueueConfig.get_low_watermark(),
+            "reject_duplicates": QueueConfig.get_reject_duplicates(),
+            "lease_ttl_ms": QueueConfig.get_lease_ttl_ms(),
+            "backend": QueueConfig.get_backend(),
         }
 
 
@@ -157,6 +278,34 @@ class WorkerConfig:
         """
         return os.getenv("OTODOKI_COUNTRY", "JP")
 
+    @staticmethod
+    def get_itunes_search_url() -> str:
+        """iTunes Search APIのURLを取得（負荷試験ではスタンドインサーバーを指す）
+
+        Returns:
+            str: 検索APIのURL（デフォルト: "https://itunes.apple.com/search"）
+        """
+        return os.getenv("OTODOKI_ITUNES_SEARCH_URL", "").strip() or "https://itunes.apple.com/search"
+
+    @staticmethod
+    def get_itunes_lookup_url() -> str:
+        """iTunes Lookup APIのURLを取得（楽曲キャッシュの一括更新に使う）
+
+        Returns:
+            str: Lookup APIのURL（デフォルト: "https://itunes.apple.com/lookup"）
+        """
+        return os.getenv("OTODOKI_ITUNES_LOOKUP_URL", "").strip() or "https://itunes.apple.com/lookup"
+
+    @staticmethod
+    def get_apple_rss_base_url() -> str:
+        """Apple Music RSSフィードのベースURLを取得（負荷試験ではスタンドインサーバーを指す）
+
+        Returns:
+            str: ベースURL（デフォルト: "https://rss.applemarketingtools.com/api/v2"）
+        """
+        value = os.getenv("OTODOKI_APPLE_RSS_BASE_URL", "").strip().rstrip("/")
+        return value or "https://rss.applemarketingtools.com/api/v2"
+
     @staticmethod
     def get_min_threshold() -> int:
         """キューの最小閾値を取得
@@ -209,6 +358,62 @@ class WorkerConfig:
         except ValueError:
             return 1500
 
+    @staticmethod
+    def get_fallback_interval_ms() -> int:
+        """キューが閾値以上の間に低水位通知を待つ最大時間（ミリ秒）を取得
+
+        通知を取りこぼした場合の予備の確認間隔。共有キューの補充担当権を
+        延長し続けられるよう、担当権の有効期間の半分以下に制限する
+
+        Returns:
+            int: 確認間隔（デフォルト: 5000ms）
+        """
+        value = os.getenv("OTODOKI_FALLBACK_INTERVAL_MS", "5000")
+        try:
+            interval_ms = max(100, int(value))
+        except ValueError:
+            interval_ms = 5000
+        return min(interval_ms, max(100, QueueConfig.get_worker_role_ttl_ms() // 2))
+
+    @staticmethod
+    def get_refill_horizon_s() -> float:
+        """1回の補充でまかなう需要の期間（秒）を取得
+
+        Returns:
+            float: 予測期間（デフォルト: 60秒）
+        """
+        value = os.getenv("OTODOKI_REFILL_HORIZON_S", "60")
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return 60.0
+
+    @staticmethod
+    def get_refill_max_concurrency() -> int:
+        """補充の最大並行数を取得
+
+        Returns:
+            int: 最大並行数（デフォルト: 3）
+        """
+        value = os.getenv("OTODOKI_REFILL_MAX_CONCURRENCY", "3")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 3
+
+    @staticmethod
+    def get_ingest_queue_size() -> int:
+        """取り込みパイプラインの段階間キューの上限を取得
+
+        Returns:
+            int: キューの上限（デフォルト: 4）
+        """
+        value = os.getenv("OTODOKI_INGEST_QUEUE_SIZE", "4")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 4
+
     @staticmethod
     def get_http_timeout_s() -> float:
         """HTTPタイムアウト（秒）を取得
@@ -222,6 +427,304 @@ class WorkerConfig:
         except ValueError:
             return 5.0
 
+    @staticmethod
+    def get_http_max_connections() -> int:
+        """共有HTTPクライアントの最大同時接続数を取得
+
+        Returns:
+            int: 最大接続数（デフォルト: 20）
+        """
+        value = os.getenv("OTODOKI_HTTP_MAX_CONNECTIONS", "20")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 20
+
+    @staticmethod
+    def get_http_max_keepalive() -> int:
+        """共有HTTPクライアントが保持するkeep-alive接続数の上限を取得
+
+        Returns:
+            int: keep-alive接続数の上限（デフォルト: 10、最大接続数以下）
+        """
+        value = os.getenv("OTODOKI_HTTP_MAX_KEEPALIVE", "10")
+        try:
+            keepalive = max(0, int(value))
+        except ValueError:
+            keepalive = 10
+        return min(keepalive, WorkerConfig.get_http_max_connections())
+
+    @staticmethod
+    def get_http_keepalive_expiry_s() -> float:
+        """アイドル状態のkeep-alive接続を保持する秒数を取得
+
+        Returns:
+            float: 保持秒数（デフォルト: 30.0）
+        """
+        value = os.getenv("OTODOKI_HTTP_KEEPALIVE_EXPIRY_S", "30")
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return 30.0
+
+    @staticmethod
+    def get_http2_enabled() -> bool:
+        """共有HTTPクライアントでHTTP/2を使うかを取得（h2パッケージがある場合のみ有効）
+
+        Returns:
+            bool: HTTP/2を有効にする場合True（デフォルト: True）
+        """
+        value = os.getenv("OTODOKI_HTTP2", "true")
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    @staticmethod
+    def get_itunes_rate_initial() -> float:
+        """iTunes Search APIへの初期送信レート（リクエスト/秒）を取得
+
+        Returns:
+            float: 初期レート（デフォルト: 0.5、下限〜上限の範囲）
+        """
+        value = os.getenv("OTODOKI_ITUNES_RATE_INITIAL", "0.5")
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = 0.5
+        return min(
+            WorkerConfig.get_itunes_rate_max(),
+            max(WorkerConfig.get_itunes_rate_min(), rate),
+        )
+
+    @staticmethod
+    def get_itunes_rate_min() -> float:
+        """iTunes Search APIへの送信レートの下限（リクエスト/秒）を取得
+
+        Returns:
+            float: 下限（デフォルト: 0.05）
+        """
+        value = os.getenv("OTODOKI_ITUNES_RATE_MIN", "0.05")
+        try:
+            return max(0.001, float(value))
+        except ValueError:
+            return 0.05
+
+    @staticmethod
+    def get_itunes_rate_max() -> float:
+        """iTunes Search APIへの送信レートの上限（リクエスト/秒）を取得
+
+        Returns:
+            float: 上限（デフォルト: 2.0、下限以上）
+        """
+        value = os.getenv("OTODOKI_ITUNES_RATE_MAX", "2.0")
+        try:
+            rate = float(value)
+        except ValueError:
+            rate = 2.0
+        return max(WorkerConfig.get_itunes_rate_min(), rate)
+
+    @staticmethod
+    def get_itunes_max_concurrency() -> int:
+        """iTunes Search APIへの同時リクエスト数の上限を取得
+
+        Returns:
+            int: 同時リクエスト数の上限（デフォルト: 3）
+        """
+        value = os.getenv("OTODOKI_ITUNES_MAX_CONCURRENCY", "3")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 3
+
+    @staticmethod
+    def get_hedge_percentile() -> float:
+        """ヘッジリクエストを送るまで待つレイテンシのパーセンタイルを取得
+
+        Returns:
+            float: パーセンタイル（デフォルト: 95.0、50〜99.9）
+        """
+        value = os.getenv("OTODOKI_HEDGE_PERCENTILE", "95")
+        try:
+            return min(99.9, max(50.0, float(value)))
+        except ValueError:
+            return 95.0
+
+    @staticmethod
+    def get_hedge_budget_pct() -> float:
+        """元のリクエスト数に対するヘッジリクエスト数の上限（%）を取得
+
+        Returns:
+            float: 上限（デフォルト: 5.0、0でヘッジ無効）
+        """
+        value = os.getenv("OTODOKI_HEDGE_BUDGET_PCT", "5")
+        try:
+            return min(100.0, max(0.0, float(value)))
+        except ValueError:
+            return 5.0
+
+    @staticmethod
+    def get_dedup_window_s() -> float:
+        """取得済み楽曲を重複として除外する期間（秒）を取得
+
+        Returns:
+            float: 期間（デフォルト: 21600.0 = 6時間）
+        """
+        value = os.getenv("OTODOKI_DEDUP_WINDOW_S", "21600")
+        try:
+            return max(1.0, float(value))
+        except ValueError:
+            return 21600.0
+
+    @staticmethod
+    def get_dedup_capacity() -> int:
+        """重複排除インデックスの1期間あたりの想定件数を取得
+
+        1楽曲につきトラックIDとシグネチャの2件を記録する
+
+        Returns:
+            int: 想定件数（デフォルト: 200000）
+        """
+        value = os.getenv("OTODOKI_DEDUP_CAPACITY", "200000")
+        try:
+            return max(100, int(value))
+        except ValueError:
+            return 200000
+
+    @staticmethod
+    def get_dedup_fp_rate() -> float:
+        """重複排除インデックスの偽陽性率（未取得の楽曲を誤って除外する確率）を取得
+
+        Returns:
+            float: 偽陽性率（デフォルト: 0.001）
+        """
+        value = os.getenv("OTODOKI_DEDUP_FP_RATE", "0.001")
+        try:
+            return min(0.1, max(1e-6, float(value)))
+        except ValueError:
+            return 0.001
+
+    @staticmethod
+    def get_clean_executor() -> str:
+        """検索結果の整形処理を実行する場所を取得
+
+        Returns:
+            str: "inline"（イベントループ上）、"thread"（スレッドプール）
+                または "process"（プロセスプール）（デフォルト: "thread"）
+        """
+        value = os.getenv("OTODOKI_CLEAN_EXECUTOR", "thread").strip().lower()
+        return value if value in ("inline", "thread", "process") else "thread"
+
+    @staticmethod
+    def get_clean_workers() -> int:
+        """検索結果の整形処理に使うスレッド・プロセスの数を取得
+
+        Returns:
+            int: ワーカー数（デフォルト: 2）
+        """
+        value = os.getenv("OTODOKI_CLEAN_WORKERS", "2")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 2
+
+    @staticmethod
+    def get_track_refresh_interval_s() -> float:
+        """楽曲キャッシュ（TrackCache）の一括更新の実行間隔（秒）を取得
+
+        Returns:
+            float: 実行間隔（デフォルト: 3600.0、0の場合は無効）
+        """
+        value = os.getenv("OTODOKI_TRACK_REFRESH_INTERVAL_S", "3600")
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return 3600.0
+
+    @staticmethod
+    def get_track_refresh_max_age_s() -> float:
+        """楽曲キャッシュのプレビュー・アートワークURLを再検証するまでの期間（秒）を取得
+
+        Returns:
+            float: 最終更新からの期間（デフォルト: 86400.0 = 1日）
+        """
+        value = os.getenv("OTODOKI_TRACK_REFRESH_MAX_AGE_S", "86400")
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return 86400.0
+
+    @staticmethod
+    def get_track_refresh_batch_size() -> int:
+        """Lookup API 1回あたりの楽曲ID数を取得
+
+        Returns:
+            int: 楽曲ID数（デフォルト: 200、1〜200の範囲）
+        """
+        value = os.getenv("OTODOKI_TRACK_REFRESH_BATCH_SIZE", "200")
+        try:
+            return min(200, max(1, int(value)))
+        except ValueError:
+            return 200
+
+    @staticmethod
+    def get_track_refresh_concurrency() -> int:
+        """楽曲キャッシュの一括更新で同時に実行するバッチ数を取得
+
+        Returns:
+            int: 同時実行数（デフォルト: 2）
+        """
+        value = os.getenv("OTODOKI_TRACK_REFRESH_CONCURRENCY", "2")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 2
+
+    @staticmethod
+    def get_track_refresh_max_rows() -> int:
+        """楽曲キャッシュの一括更新1回あたりの最大行数を取得
+
+        Returns:
+            int: 最大行数（デフォルト: 5000）
+        """
+        value = os.getenv("OTODOKI_TRACK_REFRESH_MAX_ROWS", "5000")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 5000
+
+    @staticmethod
+    def get_search_cache_ttl_s() -> float:
+        """iTunes検索結果キャッシュの有効期間（秒）を取得
+
+        Returns:
+            float: 有効期間（デフォルト: 1800.0、0でキャッシュ無効）
+        """
+        value = os.getenv("OTODOKI_SEARCH_CACHE_TTL_S", "1800")
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return 1800.0
+
+    @staticmethod
+    def get_search_cache_max_entries() -> int:
+        """iTunes検索結果キャッシュがメモリに保持するエントリ数の上限を取得
+
+        Returns:
+            int: エントリ数の上限（デフォルト: 256）
+        """
+        value = os.getenv("OTODOKI_SEARCH_CACHE_MAX_ENTRIES", "256")
+        try:
+            return max(1, int(value))
+        except ValueError:
+            return 256
+
+    @staticmethod
+    def get_search_cache_path() -> str:
+        """iTunes検索結果キャッシュのSQLiteファイルのパスを取得
+
+        Returns:
+            str: ファイルパス（デフォルト: 空 = メモリのみ）
+        """
+        return os.getenv("OTODOKI_SEARCH_CACHE_PATH", "").strip()
+
     @staticmethod
     def get_retry_max() -> int:
         """最大リトライ回数を取得
@@ -286,11 +789,41 @@ class WorkerConfig:
         return {
             "itunes_terms": WorkerConfig.get_itunes_terms(),
             "country": WorkerConfig.get_country(),
+            "itunes_search_url": WorkerConfig.get_itunes_search_url(),
+            "itunes_lookup_url": WorkerConfig.get_itunes_lookup_url(),
+            "apple_rss_base_url": WorkerConfig.get_apple_rss_base_url(),
             "min_threshold": WorkerConfig.get_min_threshold(),
             "batch_size": WorkerConfig.get_batch_size(),
             "max_cap": WorkerConfig.get_max_cap(),
             "poll_interval_ms": WorkerConfig.get_poll_interval_ms(),
+            "fallback_interval_ms": WorkerConfig.get_fallback_interval_ms(),
+            "refill_horizon_s": WorkerConfig.get_refill_horizon_s(),
+            "refill_max_concurrency": WorkerConfig.get_refill_max_concurrency(),
+            "ingest_queue_size": WorkerConfig.get_ingest_queue_size(),
             "http_timeout_s": WorkerConfig.get_http_timeout_s(),
+            "http_max_connections": WorkerConfig.get_http_max_connections(),
+            "http_max_keepalive": WorkerConfig.get_http_max_keepalive(),
+            "http_keepalive_expiry_s": WorkerConfig.get_http_keepalive_expiry_s(),
+            "http2_enabled": WorkerConfig.get_http2_enabled(),
+            "itunes_rate_initial": WorkerConfig.get_itunes_rate_initial(),
+            "itunes_rate_min": WorkerConfig.get_itunes_rate_min(),
+            "itunes_rate_max": WorkerConfig.get_itunes_rate_max(),
+            "itunes_max_concurrency": WorkerConfig.get_itunes_max_concurrency(),
+            "hedge_percentile": WorkerConfig.get_hedge_percentile(),
+            "hedge_budget_pct": WorkerConfig.get_hedge_budget_pct(),
+            "dedup_window_s": WorkerConfig.get_dedup_window_s(),
+            "dedup_capacity": WorkerConfig.get_dedup_capacity(),
+            "dedup_fp_rate": WorkerConfig.get_dedup_fp_rate(),
+            "clean_executor": WorkerConfig.get_clean_executor(),
+            "clean_workers": WorkerConfig.get_clean_workers(),
+            "track_refresh_interval_s": WorkerConfig.get_track_refresh_interval_s(),
+            "track_refresh_max_age_s": WorkerConfig.get_track_refresh_max_age_s(),
+            "track_refresh_batch_size": WorkerConfig.get_track_refresh_batch_size(),
+            "track_refresh_concurrency": WorkerConfig.get_track_refresh_concurrency(),
+            "track_refresh_max_rows": WorkerConfig.get_track_refresh_max_rows(),
+            "search_cache_ttl_s": WorkerConfig.get_search_cache_ttl_s(),
+            "search_cache_max_entries": WorkerConfig.get_search_cache_max_entries(),
+            "search_cache_path": WorkerConfig.get_search_cache_path(),
             "retry_max": WorkerConfig.get_retry_max(),
             "search_strategy": WorkerConfig.get_search_strategy(),
             "search_genres": WorkerConfig.get_search_genres(),
@@ -357,6 +890,19 @@ class SuggestionsConfig:
         except ValueError:
             return 20
 
+    @staticmethod
+    def get_max_wait_ms() -> int:
+        """ロングポーリング（wait_ms）で待機できる最大時間を取得
+
+        Returns:
+            int: 最大待機時間（ミリ秒、デフォルト: 10000）
+        """
+        value = os.getenv("OTODOKI_SUGGESTIONS_MAX_WAIT_MS", "10000")
+        try:
+            return max(0, int(value))
+        except ValueError:
+            return 10000
+
     @staticmethod
     def get_all_settings() -> dict:
         """すべての設定値を辞書で取得
@@ -368,6 +914,7 @@ class SuggestionsConfig:
             "default_limit": SuggestionsConfig.get_default_limit(),
             "max_limit": SuggestionsConfig.get_max_limit(),
             "rate_limit_per_sec": SuggestionsConfig.get_rate_limit_per_sec(),
+            "max_wait_ms": SuggestionsConfig.get_max_wait_ms(),
         }
 
 
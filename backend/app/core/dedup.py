@@ -0,0 +1,202 @@
+"""
+スライディングウィンドウ重複排除モジュール
+交互に切り替える2つのBloomフィルタで、一定期間内に見たキーを固定のメモリ量で記録する
+"""
+
+import functools
+import hashlib
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def bloom_positions(key: str, num_bits: int, num_hashes: int) -> Tuple[int, ...]:
+    """キーに対応するビット位置を計算
+
+    フィルタの状態を参照しないため、スレッドやプロセスのプールでも実行できる
+
+    Args:
+        key: キー
+        num_bits: フィルタのビット数
+        num_hashes: ハッシュ関数の数
+
+    Returns:
+        Tuple[int, ...]: ビット位置
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return tuple((h1 + i * h2) % num_bits for i in range(num_hashes))
+
+
+class BloomFilter:
+    """固定サイズのBloomフィルタ
+
+    想定件数と偽陽性率からビット数とハッシュ関数の数を決める。
+    ハッシュは blake2b の128ビットを2つに分けたダブルハッシュ
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        """Bloomフィルタを初期化
+
+        Args:
+            capacity: 想定する追加件数
+            fp_rate: 想定件数を追加した時点の偽陽性率
+        """
+        self.capacity = max(1, capacity)
+        self.fp_rate = min(0.5, max(1e-9, fp_rate))
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(self.fp_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains_positions(self.positions(key))
+
+    def add(self, key: str) -> None:
+        """キーを追加
+
+        Args:
+            key: 追加するキー
+        """
+        self.add_positions(self.positions(key))
+
+    def positions(self, key: str) -> Tuple[int, ...]:
+        """キーに対応するビット位置を計算"""
+        return bloom_positions(key, self.num_bits, self.num_hashes)
+
+    def contains_positions(self, positions: Sequence[int]) -> bool:
+        """positions() で計算したビット位置がすべて立っているか"""
+        bits = self._bits
+        for position in positions:
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add_positions(self, positions: Sequence[int]) -> None:
+        """positions() で計算したビット位置を立てる"""
+        bits = self._bits
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    @property
+    def size_bytes(self) -> int:
+        """ビット配列のバイト数"""
+        return len(self._bits)
+
+
+
+class SlidingWindowDedup:
+    """一定期間内に見たキーを記録する重複排除インデックス
+
+    現在と1つ前の2世代のBloomフィルタを持ち、window_s ごと（または現在の世代が
+    想定件数に達した時点）で古い世代を捨てて新しい世代に切り替える。
+    追加したキーは少なくとも window_s の間（想定件数を超えない限り）は重複と判定され、
+    メモリ使用量は想定件数と偽陽性率で決まる一定の大きさに収まる。
+    偽陽性（未見のキーを重複と判定）は fp_rate 程度の確率で起こる
+    """
+
+    def __init__(
+        self,
+        window_s: float,
+        capacity: int,
+        fp_rate: float = 0.001,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """インデックスを初期化
+
+        Args:
+            window_s: キーを記録しておく期間（秒）
+            capacity: 1世代（window_s）あたりの想定件数
+            fp_rate: 1世代あたりの偽陽性率
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.window_s = window_s
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self._clock = clock
+        self._current = BloomFilter(self.capacity, fp_rate)
+        self._previous = BloomFilter(self.capacity, fp_rate)
+        self._rotated_at = clock()
+        self._rotations = 0
+        self._early_rotations = 0
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains_positions(self._current.positions(key))
+
+    def add(self, key: str) -> None:
+        """キーを記録
+
+        Args:
+            key: 記録するキー
+        """
+        self.add_positions(self._current.positions(key))
+
+    def hasher(self) -> Callable[[str], Tuple[int, ...]]:
+        """キーをビット位置に変換する関数を取得
+
+        どの世代も同じ大きさのため、計算したビット位置はどの世代にも使える。
+        pickle できるため、ハッシュ計算をプロセスのプールで行う場合にも渡せる
+
+        Returns:
+            Callable[[str], Tuple[int, ...]]: キーからビット位置を計算する関数
+        """
+        return functools.partial(
+            bloom_positions, num_bits=self._current.num_bits, num_hashes=self._current.num_hashes
+        )
+
+    def contains_positions(self, positions: Sequence[int]) -> bool:
+        """hasher() で計算したビット位置のキーを記録しているか"""
+        self._maybe_rotate()
+        return self._current.contains_positions(positions) or self._previous.contains_positions(positions)
+
+    def add_positions(self, positions: Sequence[int]) -> None:
+        """hasher() で計算したビット位置のキーを記録"""
+        self._maybe_rotate()
+        if self._current.count >= self.capacity:
+            # 想定件数を超えると偽陽性率が上がるため、期間の途中でも世代を切り替える
+            self._early_rotations += 1
+            logger.warning(
+                f"Dedup window reached capacity ({self.capacity}) before "
+                f"{self.window_s:.0f}s; rotating early"
+            )
+            self._rotate()
+        self._current.add_positions(positions)
+
+    def stats(self) -> Dict[str, Any]:
+        """世代ごとの件数とメモリ使用量を取得
+
+        Returns:
+            dict: 統計情報
+        """
+        return {
+            "window_s": self.window_s,
+            "capacity": self.capacity,
+            "fp_rate": self.fp_rate,
+            "current_count": self._current.count,
+            "previous_count": self._previous.count,
+            "rotations": self._rotations,
+            "early_rotations": self._early_rotations,
+            "memory_bytes": self._current.size_bytes + self._previous.size_bytes,
+        }
+
+    def _maybe_rotate(self) -> None:
+        now = self._clock()
+        elapsed = now - self._rotated_at
+        if elapsed >= 2 * self.window_s:
+            # 2世代分以上経過した場合はどちらの世代も期限切れ
+            self._rotate(now)
+            self._rotate(now)
+        elif elapsed >= self.window_s:
+            # 確認の間隔によらず、記録期間が最長でも2世代分になるよう予定時刻で切り替える
+            self._rotate(self._rotated_at + self.window_s)
+
+    def _rotate(self, at: Optional[float] = None) -> None:
+        self._previous = self._current
+        self._current = BloomFilter(self.capacity, self.fp_rate)
+        self._rotated_at = self._clock() if at is None else at
+        self._rotations += 1
@@ -0,0 +1,207 @@
+"""
+ヘッジリクエストモジュール
+応答が最近のレイテンシの上位パーセンタイルを超えて遅れた場合に同じリクエストをもう1本送り、
+先に返った応答を使う（テールレイテンシの削減）
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgeDeclined(Exception):
+    """ヘッジをすぐに送れない（送信枠がない）ためヘッジしなかったことを示す"""
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """最近傍法のパーセンタイル"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _censored_percentile(samples: List[Tuple[float, bool]], pct: float) -> Optional[float]:
+    """打ち切りを含むレイテンシのパーセンタイル（Kaplan-Meier推定）
+
+    ヘッジに負けてキャンセルされたリクエストは「少なくともその時間はかかった」という
+    打ち切りデータとして扱う。推定できない（裾がすべて打ち切り）場合はNone
+    """
+    survival = 1.0
+    at_risk = len(samples)
+    target = 1.0 - pct / 100
+    # 同じ時間では完了を打ち切りより先に数える
+    for latency, observed in sorted(samples, key=lambda s: (s[0], not s[1])):
+        if observed:
+            survival *= 1.0 - 1.0 / at_risk
+            if survival <= target + 1e-9:
+                return latency
+        at_risk -= 1
+    return None
+
+
+class RequestHedger:
+    """ヘッジリクエストの実行と予算管理
+
+    最近のレイテンシの指定パーセンタイルを待っても応答がなければ2本目を送る。
+    ヘッジの本数は元のリクエスト数の budget_pct % までに制限し、上流への負荷の増加を抑える。
+    先に成功した応答を採用し、残りのリクエストはキャンセルする
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        budget_pct: float = 5.0,
+        min_samples: int = 20,
+        min_delay_s: float = 0.05,
+        window: int = 500,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """ヘッジを初期化
+
+        Args:
+            percentile: ヘッジを送るまで待つレイテンシのパーセンタイル
+            budget_pct: 元のリクエスト数に対するヘッジ本数の上限（%、0で無効）
+            min_samples: ヘッジを始めるのに必要なレイテンシの観測数
+            min_delay_s: ヘッジを送るまでの最短待ち時間（秒）
+            window: 保持する最近のレイテンシの件数
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.percentile = min(99.9, max(1.0, percentile))
+        self.budget_pct = max(0.0, budget_pct)
+        self.min_samples = max(1, min_samples)
+        self.min_delay_s = min_delay_s
+        self._clock = clock
+
+        # 1本ごとのレイテンシ（キャンセルされたものは打ち切り）と、呼び出し元から見たレイテンシ
+        self._request_latencies: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._effective_latencies: Deque[float] = deque(maxlen=window)
+
+        self._calls = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._budget_exhausted = 0
+        self._declined = 0
+
+    @property
+    def enabled(self) -> bool:
+        """ヘッジが有効か"""
+        return self.budget_pct > 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """ヘッジを送るまでの待ち時間を取得
+
+        Returns:
+            Optional[float]: 待ち時間（秒、観測数が足りないか無効の場合はNone）
+        """
+        observed = [latency for latency, done in self._request_latencies if done]
+        if not self.enabled or len(observed) < self.min_samples:
+            return None
+        delay = _percentile(observed, self.percentile)
+        return max(self.min_delay_s, delay) if delay is not None else None
+
+    async def run(self, fn: Callable[[bool], Awaitable[T]]) -> T:
+        """リクエストを実行し、遅れた場合はヘッジを送る
+
+        Args:
+            fn: リクエストを実行するコルーチン関数（引数はヘッジか）。
+                ヘッジをすぐに送れない場合は HedgeDeclined を送出する
+
+        Returns:
+            T: 先に成功したリクエストの結果
+
+        Raises:
+            Exception: すべてのリクエストが失敗した場合は最後に失敗したリクエストの例外
+        """
+        self._calls += 1
+        started = self._clock()
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(fn(False))
+        tasks = {primary: started}
+        hedge: Optional[asyncio.Future] = None
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    if not self._within_budget():
+                        self._budget_exhausted += 1
+                    else:
+                        self._hedges += 1
+                        hedge = asyncio.ensure_future(fn(True))
+                        tasks[hedge] = self._clock()
+                        logger.debug(f"Hedged request after {delay:.3f}s")
+
+            pending = set(tasks)
+            error: BaseException = RuntimeError("No request completed")
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is hedge and isinstance(task.exception(), HedgeDeclined):
+                        self._hedges -= 1
+                        self._declined += 1
+                        continue
+                    self._request_latencies.append((self._clock() - tasks[task], True))
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._hedge_wins += 1
+                        self._effective_latencies.append(self._clock() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            now = self._clock()
+            for task, task_started in tasks.items():
+                if not task.done():
+                    # 負けたリクエストは「少なくともここまではかかった」として記録
+                    task.cancel()
+                    self._request_latencies.append((now - task_started, False))
+
+    def stats(self) -> Dict[str, Any]:
+        """ヘッジ率とレイテンシの統計を取得
+
+        unhedged_p99_s はキャンセルしたリクエストを打ち切りデータとして推定した
+        ヘッジなしの場合のp99（裾がすべて打ち切りの場合はNone）
+
+        Returns:
+            dict: 統計情報
+        """
+        effective = list(self._effective_latencies)
+        p99 = _percentile(effective, 99)
+        unhedged_p99 = _censored_percentile(list(self._request_latencies), 99)
+        delay = self.hedge_delay()
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget_pct": self.budget_pct,
+            "hedge_delay_s": round(delay, 3) if delay is not None else None,
+            "calls": self._calls,
+            "hedges": self._hedges,
+            "hedge_rate": round(self._hedges / self._calls, 4) if self._calls else 0.0,
+            "hedge_wins": self._hedge_wins,
+            "budget_exhausted": self._budget_exhausted,
+            "declined": self._declined,
+            "p50_s": _round(_percentile(effective, 50)),
+            "p99_s": _round(p99),
+            "unhedged_p99_s": _round(unhedged_p99),
+            "p99_improvement_s": (
+                _round(unhedged_p99 - p99)
+                if unhedged_p99 is not None and p99 is not None
+                else None
+            ),
+        }
+
+    def _within_budget(self) -> bool:
+        return (self._hedges + 1) <= self._calls * self.budget_pct / 100
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
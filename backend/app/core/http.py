@@ -0,0 +1,121 @@
+"""
+共有HTTPクライアントモジュール
+iTunes Search APIやApple Music RSSへの接続をアプリケーション全体で使い回す
+keep-alive付きのコネクションプールを管理する
+"""
+
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from .config import WorkerConfig
+
+logger = logging.getLogger(__name__)
+
+# アプリケーションのライフサイクルで管理する共有クライアント
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def http2_available() -> bool:
+    """HTTP/2に必要なh2パッケージが利用可能かを確認
+
+    Returns:
+        bool: 利用可能な場合True
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(**kwargs: Any) -> httpx.AsyncClient:
+    """設定値に基づいてコネクションプール付きのHTTPクライアントを作成
+
+    HTTP/2は OTODOKI_HTTP2 が有効かつh2パッケージがある場合のみ使う
+
+    Args:
+        **kwargs: httpx.AsyncClient に渡す追加の引数（設定値より優先）
+
+    Returns:
+        httpx.AsyncClient: 作成したクライアント
+    """
+    options: Dict[str, Any] = {
+        "timeout": httpx.Timeout(
+            connect=2.0,
+            read=WorkerConfig.get_http_timeout_s(),
+            write=5.0,
+            pool=5.0,
+        ),
+        "limits": httpx.Limits(
+            max_connections=WorkerConfig.get_http_max_connections(),
+            max_keepalive_connections=WorkerConfig.get_http_max_keepalive(),
+            keepalive_expiry=WorkerConfig.get_http_keepalive_expiry_s(),
+        ),
+        "http2": WorkerConfig.get_http2_enabled() and http2_available(),
+        "follow_redirects": True,
+    }
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    """共有HTTPクライアントを取得
+
+    Returns:
+        Optional[httpx.AsyncClient]: 共有クライアント（未開始・終了済みの場合はNone）
+    """
+    if _http_client is None or _http_client.is_closed:
+        return None
+    return _http_client
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """共有HTTPクライアントを開始（アプリケーション起動時に呼び出す）
+
+    Returns:
+        httpx.AsyncClient: 共有クライアント
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+        logger.info(
+            "Shared HTTP client started "
+            f"(max_connections={WorkerConfig.get_http_max_connections()}, "
+            f"max_keepalive={WorkerConfig.get_http_max_keepalive()}, "
+            f"http2={WorkerConfig.get_http2_enabled() and http2_available()})"
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """共有HTTPクライアントを閉じる（アプリケーション終了時に呼び出す）"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        logger.info("Shared HTTP client closed")
+        _http_client = None
+
+
+@asynccontextmanager
+async def borrow_http_client(
+    client: Optional[httpx.AsyncClient] = None, **kwargs: Any
+) -> AsyncIterator[httpx.AsyncClient]:
+    """リクエストに使うHTTPクライアントを借りる
+
+    注入されたクライアント、共有クライアントの順に使い（いずれも閉じない）、
+    どちらもない場合（スクリプトやテストなど）は呼び出しごとにクライアントを作成して閉じる
+
+    Args:
+        client: 注入されたクライアント
+        **kwargs: 呼び出しごとに作成する場合に httpx.AsyncClient に渡す引数
+
+    Yields:
+        httpx.AsyncClient: リクエストに使うクライアント
+    """
+    pooled = client if client is not None and not client.is_closed else get_http_client()
+    if pooled is not None:
+        yield pooled
+        return
+
+    async with httpx.AsyncClient(**kwargs) as temporary:
+        yield temporary
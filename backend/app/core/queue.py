@@ -3,57 +3,470 @@
 スレッドセーフなFIFOキューでTrackオブジェクトを管理する
 """
 
+import asyncio
+import inspect
 import logging
 import random
 import threading
 import time
+import uuid
 from collections import deque
-from typing import List, Optional, Dict, Any, Union
+from typing import AbstractSet, Awaitable, Callable, Iterator, List, Optional, Dict, Any, Set, Tuple, Union
 
-from ..models.track import Track
+from ..models.track import QueuedTrack, Track
 from ..core.config import QueueConfig
 
 logger = logging.getLogger(__name__)
 
 
+def filter_valid_tracks(items: List[Any]) -> List[QueuedTrack]:
+    """キューに投入可能な有効な楽曲のみを抽出し、キュー保持用レコードに変換
+
+    Args:
+        items: 投入候補のリスト（TrackまたはQueuedTrack）
+
+    Returns:
+        List[QueuedTrack]: 有効な楽曲のリスト
+    """
+    valid_items = []
+
+    for item in items:
+        if item is None:
+            continue
+        if not isinstance(item, (Track, QueuedTrack)):
+            logger.warning(f"Invalid item type: {type(item)}, skipping")
+            continue
+        if not item.id or not item.title or not item.artist:
+            logger.warning(f"Invalid Track data: {item}, skipping")
+            continue
+        if isinstance(item, Track):
+            item = QueuedTrack.from_track(item)
+        valid_items.append(item)
+
+    return valid_items
+
+
+async def poll_for_size(
+    size: Callable[[], Union[int, Awaitable[int]]], n: int, timeout: float, interval: float = 0.05
+) -> bool:
+    """キューサイズを一定間隔で確認し、n件以上揃うまで待機
+
+    他プロセスからの追加を通知で受け取れない共有バックエンド向け
+
+    Args:
+        size: 現在のキューサイズを返す関数（awaitableを返す場合は完了を待つ）
+        n: 必要な件数
+        timeout: 最大待機時間（秒）
+        interval: 確認間隔（秒）
+
+    Returns:
+        bool: n件以上揃った場合True、タイムアウトした場合False
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        current = size()
+        if inspect.isawaitable(current):
+            current = await current
+        if current >= n:
+            return True
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(interval, remaining))
+
+
+def _wake_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class LowWatermarkListeners:
+    """キューサイズが閾値を下回ったことを通知するリスナーの登録簿
+
+    取り出しによってキューサイズが閾値以上から閾値未満に変わったときのみ通知する
+    （閾値未満のまま取り出しが続いても再通知しない）。コールバックは取り出しを
+    行ったスレッドでロックの外から呼び出される
+    """
+
+    def __init__(self) -> None:
+        self._listeners: List[Tuple[int, Callable[[int], None]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, threshold: int, callback: Callable[[int], None]) -> None:
+        """リスナーを登録
+
+        Args:
+            threshold: 通知する閾値（キューサイズがこの値を下回ったら通知）
+            callback: 取り出し後のキューサイズを受け取るコールバック
+        """
+        with self._lock:
+            self._listeners.append((threshold, callback))
+
+    def remove(self, callback: Callable[[int], None]) -> None:
+        """リスナーの登録を解除"""
+        with self._lock:
+            self._listeners = [
+                listener for listener in self._listeners if listener[1] != callback
+            ]
+
+    def __bool__(self) -> bool:
+        return bool(self._listeners)
+
+    def publish(self, previous_size: int, current_size: int) -> None:
+        """閾値をまたいだリスナーに通知
+
+        Args:
+            previous_size: 取り出し前のキューサイズ
+            current_size: 取り出し後のキューサイズ
+        """
+        if current_size >= previous_size:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        for threshold, callback in listeners:
+            if previous_size >= threshold > current_size:
+                try:
+                    callback(current_size)
+                except Exception as e:
+                    logger.error(f"Low watermark listener failed: {e}")
+
+
+class _TrackSlots:
+    """配列ベースの楽曲スロット
+
+    密な配列に楽曲を保持し、末尾追加とスワップ削除により
+    追加・ランダム取り出しをいずれもO(1)で行う。
+    FIFO順序はシーケンス番号のキューで管理し、ランダム取り出しで
+    抜けたシーケンス番号は遅延削除（墓標）として扱う。
+    楽曲IDごとの件数インデックスも保持し、所属判定をO(1)で行う。
+
+    スレッドセーフではないため、呼び出し側でロックを保持すること。
+    """
+
+    # 墓標がこの件数を超えて生存要素の2倍を上回ったら順序キューを詰め直す
+    _COMPACT_MIN_TOMBSTONES = 64
+
+    def __init__(self) -> None:
+        self._items: List[QueuedTrack] = []
+        self._seqs: List[int] = []
+        self._ids: List[str] = []
+        # 楽曲ID -> キュー内の件数
+        self._id_counts: Dict[str, int] = {}
+        # エントリのシーケンス番号 -> 配列上のスロット位置
+        self._slot_by_seq: Dict[int, int] = {}
+        # 追加順のシーケンス番号（取り出し済みの墓標を含む）
+        self._order: deque[int] = deque()
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[QueuedTrack]:
+        """追加順（FIFO順）で生存中の楽曲を列挙"""
+        for seq in self._order:
+            slot = self._slot_by_seq.get(seq)
+            if slot is not None:
+                yield self._items[slot]
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._id_counts
+
+    def append(self, item: QueuedTrack, track_id: str) -> None:
+        """末尾に楽曲を追加
+
+        Args:
+            item: 追加する楽曲
+            track_id: 文字列化済みの楽曲ID
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        self._slot_by_seq[seq] = len(self._items)
+        self._items.append(item)
+        self._seqs.append(seq)
+        self._ids.append(track_id)
+        self._order.append(seq)
+        self._id_counts[track_id] = self._id_counts.get(track_id, 0) + 1
+
+    def pop_oldest(self) -> Optional[QueuedTrack]:
+        """最も古い楽曲を取り出す（償却O(1)）"""
+        while self._order:
+            seq = self._order.popleft()
+            slot = self._slot_by_seq.get(seq)
+            if slot is not None:
+                return self._remove_slot(slot)
+        return None
+
+    def pop_random(self, k: int) -> List[QueuedTrack]:
+        """ランダムにk件を取り出す（O(k)）"""
+        result = []
+        for _ in range(min(k, len(self._items))):
+            result.append(self._remove_slot(random.randrange(len(self._items))))
+        self._maybe_compact()
+        return result
+
+    def pop_random_excluding(
+        self, k: int, exclude_ids: AbstractSet[str]
+    ) -> Tuple[List[QueuedTrack], int]:
+        """除外IDに該当しない楽曲をランダムにk件取り出す
+
+        疎なFisher-Yatesで配列を無作為順に走査し、除外対象は取り出さずに
+        読み飛ばす。コストは取り出し件数と読み飛ばした件数に比例する。
+
+        Args:
+            k: 取り出す件数
+            exclude_ids: 取り出し対象から外す楽曲IDの集合
+
+        Returns:
+            Tuple[List[QueuedTrack], int]: (取り出した楽曲, 読み飛ばした件数)
+        """
+        size = len(self._items)
+        swapped: Dict[int, int] = {}
+        chosen: List[int] = []
+        skipped = 0
+
+        for i in range(size):
+            if len(chosen) >= k:
+                break
+            j = random.randrange(i, size)
+            slot = swapped.get(j, j)
+            swapped[j] = swapped.get(i, i)
+
+            if self._ids[slot] in exclude_ids:
+                skipped += 1
+                continue
+            chosen.append(slot)
+
+        # 大きいスロットから削除すれば、スワップで移動する末尾要素は
+        # 未処理の選択スロットと衝突しない
+        chosen.sort(reverse=True)
+        result = [self._remove_slot(slot) for slot in chosen]
+        random.shuffle(result)
+        self._maybe_compact()
+        return result, skipped
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._seqs.clear()
+        self._ids.clear()
+        self._id_counts.clear()
+        self._slot_by_seq.clear()
+        self._order.clear()
+
+    def _remove_slot(self, slot: int) -> QueuedTrack:
+        """指定スロットの楽曲を末尾要素とのスワップで削除"""
+        item = self._items[slot]
+        seq = self._seqs[slot]
+        track_id = self._ids[slot]
+        last = len(self._items) - 1
+
+        if slot != last:
+            moved_seq = self._seqs[last]
+            self._items[slot] = self._items[last]
+            self._seqs[slot] = moved_seq
+            self._ids[slot] = self._ids[last]
+            self._slot_by_seq[moved_seq] = slot
+
+        self._items.pop()
+        self._seqs.pop()
+        self._ids.pop()
+        del self._slot_by_seq[seq]
+
+        remaining = self._id_counts[track_id] - 1
+        if remaining:
+            self._id_counts[track_id] = remaining
+        else:
+            del self._id_counts[track_id]
+        return item
+
+    def _maybe_compact(self) -> None:
+        """墓標が溜まった順序キューを詰め直す（償却O(1)）"""
+        tombstones = len(self._order) - len(self._items)
+        if (
+            tombstones > self._COMPACT_MIN_TOMBSTONES
+            and tombstones > 2 * len(self._items)
+        ):
+            self._order = deque(
+                seq for seq in self._order if seq in self._slot_by_seq
+            )
+
+
+class LeaseTable:
+    """リース中の楽曲をタイマーホイールで管理するテーブル
+
+    取り出した楽曲を期限付きで保持し、ack されないまま期限切れになった
+    リースを回収する。期限はtick単位のバケットに振り分けるため、
+    回収処理は経過tick数と該当バケット内のリース数に比例するコストで済む。
+
+    スレッドセーフではないため、呼び出し側でロックを保持すること。
+    """
+
+    _WHEEL_SIZE = 64
+
+    def __init__(self, ttl_s: float, clock: Callable[[], float] = time.monotonic):
+        """リーステーブルを初期化
+
+        Args:
+            ttl_s: リースの既定有効期間（秒）
+            clock: 単調増加する現在時刻（秒）を返す関数
+        """
+        self._ttl_s = ttl_s
+        self._clock = clock
+        # ホイール1周で既定TTLの4倍をカバーする
+        self._tick_s = max(0.01, ttl_s * 4 / self._WHEEL_SIZE)
+        self._wheel: List[Set[str]] = [set() for _ in range(self._WHEEL_SIZE)]
+        self._leases: Dict[str, Tuple[float, List[QueuedTrack]]] = {}
+        self._swept_tick = self._tick_of(self._clock()) - 1
+        self._leased_tracks = 0
+
+    @property
+    def ttl_s(self) -> float:
+        return self._ttl_s
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    @property
+    def leased_tracks(self) -> int:
+        """リース中の楽曲数"""
+        return self._leased_tracks
+
+    def tracks(self) -> List[QueuedTrack]:
+        """リース中の楽曲をリースの登録順で取得"""
+        return [track for _, tracks in self._leases.values() for track in tracks]
+
+    def add(self, tracks: List[QueuedTrack], ttl_s: Optional[float] = None) -> str:
+        """楽曲をリースとして登録
+
+        Args:
+            tracks: リース対象の楽曲
+            ttl_s: 有効期間（None時は既定値）
+
+        Returns:
+            str: リースID
+        """
+        lease_id = uuid.uuid4().hex
+        deadline = self._clock() + (ttl_s if ttl_s is not None else self._ttl_s)
+        self._leases[lease_id] = (deadline, tracks)
+        self._wheel[self._tick_of(deadline) % self._WHEEL_SIZE].add(lease_id)
+        self._leased_tracks += len(tracks)
+        return lease_id
+
+    def pop(self, lease_id: str) -> Optional[List[QueuedTrack]]:
+        """リースを解除して楽曲を返す（存在しない場合None）"""
+        entry = self._leases.pop(lease_id, None)
+        if entry is None:
+            return None
+        deadline, tracks = entry
+        self._wheel[self._tick_of(deadline) % self._WHEEL_SIZE].discard(lease_id)
+        self._leased_tracks -= len(tracks)
+        return tracks
+
+    def expire(self) -> List[QueuedTrack]:
+        """期限切れのリースを回収し、対象楽曲をまとめて返す"""
+        now = self._clock()
+        current_tick = self._tick_of(now)
+        elapsed = current_tick - self._swept_tick
+        if elapsed <= 0 or not self._leases:
+            self._swept_tick = max(self._swept_tick, current_tick - 1)
+            return []
+
+        expired: List[QueuedTrack] = []
+        for tick in range(current_tick - min(elapsed, self._WHEEL_SIZE) + 1, current_tick + 1):
+            bucket = self._wheel[tick % self._WHEEL_SIZE]
+            # ホイールを一周以上先の期限を持つリースは次の周回まで残す
+            due = [
+                lease_id for lease_id in bucket
+                if self._leases[lease_id][0] <= now
+            ]
+            for lease_id in due:
+                tracks = self.pop(lease_id)
+                if tracks:
+                    expired.extend(tracks)
+
+        # 現在のtickは期限未到来のリースが残りうるため次回も走査する
+        self._swept_tick = current_tick - 1
+        return expired
+
+    def _tick_of(self, timestamp: float) -> int:
+        return int(timestamp / self._tick_s)
+
+
 class QueueManager:
     """楽曲データのキューマネージャー
 
-    スレッドセーフなFIFOキューでTrackオブジェクトを管理し、
-    容量制御と基本的な統計情報を提供する
+    スレッドセーフなFIFOキューで楽曲を軽量レコード（QueuedTrack）として管理し、
+    容量制御と基本的な統計情報を提供する。
+    内部は配列ベースのスロットで保持するため、ランダム取り出しは
+    キューサイズによらず取り出し件数に比例するコストで済む
     """
 
-    def __init__(self, max_capacity: Optional[int] = None, low_watermark: Optional[int] = None):
+    def __init__(
+        self,
+        max_capacity: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        reject_duplicates: Optional[bool] = None,
+        lease_ttl_s: Optional[float] = None,
+    ):
         """QueueManagerを初期化
 
         Args:
             max_capacity: キューの最大容量（None時は設定から取得）
             low_watermark: 低水位マーク（None時は設定から取得）
+            reject_duplicates: キュー内に既に存在する楽曲IDの追加を拒否するか
+                （None時は設定から取得）
+            lease_ttl_s: リースの有効期間（秒、0でリース無効。None時は設定から取得）
         """
         self._max_capacity = max_capacity or QueueConfig.get_max_capacity()
         self._low_watermark = low_watermark or QueueConfig.get_low_watermark()
+        self._reject_duplicates = (
+            reject_duplicates
+            if reject_duplicates is not None
+            else QueueConfig.get_reject_duplicates()
+        )
 
         # スレッドセーフなキューとロック
-        self._queue: deque[Track] = deque()
+        self._queue = _TrackSlots()
         self._lock = threading.Lock()
 
+        # リース管理（ack されなかった楽曲は期限切れでキューに戻す）
+        if lease_ttl_s is None:
+            lease_ttl_s = QueueConfig.get_lease_ttl_ms() / 1000.0
+        self._leases: Optional[LeaseTable] = (
+            LeaseTable(lease_ttl_s) if lease_ttl_s > 0 else None
+        )
+        self._lease_acked_count = 0
+        self._lease_returned_count = 0
+
+        # キューサイズが閾値を下回ったことを通知するリスナー
+        self._low_watermark_listeners = LowWatermarkListeners()
+
+        # 楽曲の追加を待つ待機者（イベントループとFuture）
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
         # 統計情報
         self._enqueue_count = 0
         self._dequeue_count = 0
         self._dropped_count = 0
+        self._duplicate_rejected_count = 0
         self._last_warning_time = 0
 
         logger.info(
             f"QueueManager initialized - "
             f"max_capacity: {self._max_capacity}, "
-            f"low_watermark: {self._low_watermark}"
+            f"low_watermark: {self._low_watermark}, "
+            f"reject_duplicates: {self._reject_duplicates}"
         )
 
-    def enqueue(self, items: List[Track]) -> int:
+    def enqueue(
+        self, items: List[Union[Track, QueuedTrack]], reject_duplicates: Optional[bool] = None
+    ) -> int:
         """複数のTrackアイテムをキューに追加
 
         Args:
-            items: 追加するTrackのリスト
+            items: 追加するTrackのリスト（キュー保持用レコードに変換して保持）
+            reject_duplicates: キュー内（および同一バッチ内）に既に存在する
+                楽曲IDを拒否するか（None時はインスタンスの設定に従う）
 
         Returns:
             int: 実際に追加された件数
@@ -61,25 +474,35 @@ class QueueManager:
         if not items:
             return 0
 
-        valid_items = []
+        if reject_duplicates is None:
+            reject_duplicates = self._reject_duplicates
 
-        # 有効なTrackアイテムのみをフィルタリング
-        for item in items:
-            if item is None:
-                continue
-            if not isinstance(item, Track):
-                logger.warning(f"Invalid item type: {type(item)}, skipping")
-                continue
-            if not item.id or not item.title or not item.artist:
-                logger.warning(f"Invalid Track data: {item}, skipping")
-                continue
-            valid_items.append(item)
+        valid_items = filter_valid_tracks(items)
 
         if not valid_items:
             logger.debug("No valid items to enqueue")
             return 0
 
+        # レスポンス用JSONをロック外で事前生成（配信時はキャッシュを連結するだけにする）
+        for item in valid_items:
+            item.suggestion_json()
+
         with self._lock:
+            # 重複IDの拒否（キュー内および同一バッチ内）
+            rejected_count = 0
+            if reject_duplicates:
+                seen_ids = set()
+                accepted = []
+                for item in valid_items:
+                    track_id = str(item.id)
+                    if track_id in self._queue or track_id in seen_ids:
+                        rejected_count += 1
+                        continue
+                    seen_ids.add(track_id)
+                    accepted.append(item)
+                valid_items = accepted
+                self._duplicate_rejected_count += rejected_count
+
             # 容量超過時のドロップ処理
             total_after_add = len(self._queue) + len(valid_items)
             drop_count = max(0, total_after_add - self._max_capacity)
@@ -88,7 +511,10 @@ class QueueManager:
                 # 古いデータから削除
                 dropped_items = []
                 for _ in range(min(drop_count, len(self._queue))):
-                    dropped_items.append(self._queue.popleft())
+                    dropped = self._queue.pop_oldest()
+                    if dropped is None:
+                        break
+                    dropped_items.append(dropped)
 
                 self._dropped_count += len(dropped_items)
                 logger.debug(
@@ -96,15 +522,18 @@ class QueueManager:
 
             # 新しいアイテムを追加
             for item in valid_items:
-                self._queue.append(item)
+                self._queue.append(item, str(item.id))
 
             self._enqueue_count += len(valid_items)
             current_size = len(self._queue)
+            if valid_items:
+                self._notify_waiters_locked()
 
         logger.debug(
             f"Enqueued {len(valid_items)} items, "
             f"current size: {current_size}, "
-            f"dropped: {drop_count}"
+            f"dropped: {drop_count}, "
+            f"duplicates rejected: {rejected_count}"
         )
 
         # 低水位警告チェック（頻度制限あり）
@@ -112,14 +541,14 @@ class QueueManager:
 
         return len(valid_items)
 
-    def dequeue(self, n: Optional[int] = None) -> List[Track]:
+    def dequeue(self, n: Optional[int] = None) -> List[QueuedTrack]:
         """キューから指定件数のTrackを取り出し
 
         Args:
             n: 取り出す件数（None時はデフォルト値を使用）
 
         Returns:
-            List[Track]: 取り出されたTrackのリスト
+            List[QueuedTrack]: 取り出されたTrackのリスト
         """
         if n is None:
             n = QueueConfig.get_dequeue_default_n()
@@ -133,7 +562,10 @@ class QueueManager:
 
             result = []
             for _ in range(actual_count):
-                result.append(self._queue.popleft())
+                item = self._queue.pop_oldest()
+                if item is None:
+                    break
+                result.append(item)
 
             self._dequeue_count += actual_count
             current_size = len(self._queue)
@@ -145,17 +577,18 @@ class QueueManager:
 
         # 低水位警告チェック
         self._check_low_watermark()
+        self._low_watermark_listeners.publish(current_size + actual_count, current_size)
 
         return result
 
-    def dequeue_random(self, n: Optional[int] = None) -> List[Track]:
+    def dequeue_random(self, n: Optional[int] = None) -> List[QueuedTrack]:
         """キューから指定件数のTrackをランダムに取り出し
 
         Args:
             n: 取り出す件数（None時はデフォルト値を使用）
 
         Returns:
-            List[Track]: 取り出されたTrackのリスト
+            List[QueuedTrack]: 取り出されたTrackのリスト
         """
         if n is None:
             n = QueueConfig.get_dequeue_default_n()
@@ -170,39 +603,209 @@ class QueueManager:
             if actual_count == 0:
                 return []
 
-            # デキューからリストに変換してランダムサンプリング
-            queue_as_list = list(self._queue)
-            random_samples = random.sample(queue_as_list, actual_count)
-
-            # サンプリングした要素を効率的に削除するためにsetを使用
-            sampled_ids = {item.id for item in random_samples}
-
-            # 新しいデキューを構築
-            self._queue = deque(item for item in self._queue if item.id not in sampled_ids)
+            # スワップ削除でランダムに取り出す（O(actual_count)）
+            random_samples = self._queue.pop_random(actual_count)
 
             self._dequeue_count += actual_count
+            current_size = len(self._queue)
 
         logger.debug(
             f"Randomly dequeued {actual_count} items (requested: {n}), "
-            f"current size: {len(self._queue)}"
+            f"current size: {current_size}"
         )
 
         # 低水位警告チェック
         self._check_low_watermark()
+        self._low_watermark_listeners.publish(current_size + actual_count, current_size)
 
         return random_samples
 
-    def bulk_dequeue(self, count: int) -> List[Track]:
+    def bulk_dequeue(self, count: int) -> List[QueuedTrack]:
         """指定された数の楽曲をキューから一括取得（ランダム）
 
         Args:
             count: 取得したい楽曲数
 
         Returns:
-            List[Track]: 取得された楽曲リスト
+            List[QueuedTrack]: 取得された楽曲リスト
         """
         return self.dequeue_random(count)
 
+    def dequeue_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str]
+    ) -> List[QueuedTrack]:
+        """除外IDを読み飛ばしながらランダムにn件を取り出し
+
+        単一のロック区間で実行し、除外対象の楽曲はキューから取り出さない。
+        そのため再エンキューによる順序の入れ替わりや統計の水増しが起きない
+
+        Args:
+            n: 取り出す件数
+            exclude_ids: 取り出し対象から外す楽曲IDの集合（文字列）
+
+        Returns:
+            List[QueuedTrack]: 取り出されたTrackのリスト（最大n件）
+        """
+        if n <= 0:
+            return []
+
+        with self._lock:
+            result, skipped = self._queue.pop_random_excluding(n, exclude_ids)
+            self._dequeue_count += len(result)
+            current_size = len(self._queue)
+
+        logger.debug(
+            f"Randomly dequeued {len(result)} items excluding "
+            f"{len(exclude_ids)} ids (requested: {n}, skipped: {skipped}), "
+            f"current size: {current_size}"
+        )
+
+        # 低水位警告チェック
+        self._check_low_watermark()
+        self._low_watermark_listeners.publish(current_size + len(result), current_size)
+
+        return result
+
+    def lease_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str], ttl_s: Optional[float] = None
+    ) -> Tuple[Optional[str], List[QueuedTrack]]:
+        """除外IDを読み飛ばしながらランダムにn件をリースとして取り出し
+
+        取り出した楽曲は ack されるまでリースとして保持され、期限までに
+        ack されなければキューに戻される。リース無効時は通常の取り出しと同じ
+
+        Args:
+            n: 取り出す件数
+            exclude_ids: 取り出し対象から外す楽曲IDの集合（文字列）
+            ttl_s: リースの有効期間（None時は既定値）
+
+        Returns:
+            Tuple[Optional[str], List[QueuedTrack]]: (リースID, 取り出されたTrackのリスト)
+                リース無効時または0件時のリースIDはNone
+        """
+        if self._leases is None:
+            return None, self.dequeue_random_excluding(n, exclude_ids)
+
+        if n <= 0:
+            return None, []
+
+        with self._lock:
+            self._expire_leases_locked()
+            result, skipped = self._queue.pop_random_excluding(n, exclude_ids)
+            self._dequeue_count += len(result)
+            lease_id = self._leases.add(result, ttl_s) if result else None
+            current_size = len(self._queue)
+
+        logger.debug(
+            f"Leased {len(result)} items (requested: {n}, skipped: {skipped}), "
+            f"lease: {lease_id}, current size: {current_size}"
+        )
+
+        self._check_low_watermark()
+        self._low_watermark_listeners.publish(current_size + len(result), current_size)
+
+        return lease_id, result
+
+    def ack(self, lease_id: Optional[str]) -> int:
+        """リースを確定し、楽曲を配信済みとして破棄
+
+        Args:
+            lease_id: lease_random_excludingが返したリースID
+
+        Returns:
+            int: 確定した楽曲数（期限切れ・不明なリースは0）
+        """
+        if lease_id is None or self._leases is None:
+            return 0
+
+        with self._lock:
+            tracks = self._leases.pop(lease_id)
+            if tracks is None:
+                return 0
+            self._lease_acked_count += len(tracks)
+            self._expire_leases_locked()
+
+        return len(tracks)
+
+    def release(self, lease_id: Optional[str]) -> int:
+        """リースを取り消し、楽曲をキューに戻す
+
+        Args:
+            lease_id: lease_random_excludingが返したリースID
+
+        Returns:
+            int: キューに戻した楽曲数
+        """
+        if lease_id is None or self._leases is None:
+            return 0
+
+        with self._lock:
+            tracks = self._leases.pop(lease_id)
+            returned = self._return_tracks_locked(tracks) if tracks else 0
+            self._expire_leases_locked()
+
+        if returned:
+            logger.debug(f"Released lease {lease_id}, returned {returned} items")
+        return returned
+
+    async def wait_for_size(self, n: int, timeout: float) -> bool:
+        """キューにn件以上が揃うまで待機（楽曲の追加で起こされる）
+
+        Args:
+            n: 必要な件数
+            timeout: 最大待機時間（秒）
+
+        Returns:
+            bool: n件以上揃った場合True、タイムアウトした場合False
+        """
+        n = min(n, self._max_capacity)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            with self._lock:
+                self._expire_leases_locked()
+                if len(self._queue) >= n:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+
+    async def take(
+        self,
+        n: int,
+        timeout: float,
+        exclude_ids: AbstractSet[str] = frozenset(),
+    ) -> List[QueuedTrack]:
+        """n件揃うまで（最大timeout秒）待ってからランダムに取り出し
+
+        待機中は楽曲を確保しないため、同時に待機する他のリクエストの取り分を奪わない。
+        タイムアウトした場合はその時点で取り出せる分だけを返す
+
+        Args:
+            n: 取り出す件数
+            timeout: 最大待機時間（秒）
+            exclude_ids: 取り出し対象から除外する楽曲ID
+
+        Returns:
+            List[QueuedTrack]: 取り出された楽曲のリスト（最大n件）
+        """
+        if n <= 0:
+            return []
+        await self.wait_for_size(n, timeout)
+        return self.dequeue_random_excluding(n, exclude_ids)
+
     def contains(self, track_id: Union[str, int]) -> bool:
         """指定されたIDの楽曲がキューに含まれているかチェック
 
@@ -212,16 +815,25 @@ class QueueManager:
         Returns:
             bool: 楽曲がキューに含まれる場合True
         """
-        track_id_str = str(track_id)
-
         with self._lock:
-            for track in self._queue:
-                if str(track.id) == track_id_str:
-                    return True
+            return str(track_id) in self._queue
 
-        return False
+    def snapshot(self, include_leased: bool = False) -> List[QueuedTrack]:
+        """キュー内の楽曲を取り出さずに追加順で取得
 
-    def re_enqueue(self, items: List[Track]) -> int:
+        Args:
+            include_leased: Trueの場合はリース中（ack前）の楽曲も末尾に含める
+
+        Returns:
+            List[QueuedTrack]: 楽曲のリスト
+        """
+        with self._lock:
+            tracks = list(self._queue)
+            if include_leased and self._leases is not None:
+                tracks.extend(self._leases.tracks())
+            return tracks
+
+    def re_enqueue(self, items: List[Union[Track, QueuedTrack]]) -> int:
         """楽曲を再度キューに戻す（末尾に追加）
 
         Args:
@@ -247,6 +859,7 @@ class QueueManager:
             int: キューの現在の要素数
         """
         with self._lock:
+            self._expire_leases_locked()
             return len(self._queue)
 
     def capacity(self) -> int:
@@ -268,8 +881,28 @@ class QueueManager:
             self._queue.clear()
 
         logger.info(f"Queue cleared, removed {previous_size} items")
+        self._low_watermark_listeners.publish(previous_size, 0)
         return previous_size
 
+    def add_low_watermark_listener(
+        self, threshold: int, callback: Callable[[int], None]
+    ) -> None:
+        """キューサイズが閾値を下回ったときに呼び出すリスナーを登録
+
+        補充ワーカーが一定間隔でキューサイズを確認する代わりに、
+        取り出しで閾値をまたいだ時点で通知を受け取るために使う
+
+        Args:
+            threshold: 通知する閾値
+            callback: 取り出し後のキューサイズを受け取るコールバック
+                （取り出しを行ったスレッドから呼び出される）
+        """
+        self._low_watermark_listeners.add(threshold, callback)
+
+    def remove_low_watermark_listener(self, callback: Callable[[int], None]) -> None:
+        """登録したリスナーを解除"""
+        self._low_watermark_listeners.remove(callback)
+
     def stats(self) -> Dict[str, Any]:
         """キューの統計情報を取得
 
@@ -277,19 +910,84 @@ class QueueManager:
             dict: 統計情報の辞書
         """
         with self._lock:
+            self._expire_leases_locked()
             current_size = len(self._queue)
+            lease_active = len(self._leases) if self._leases is not None else 0
+            leased_tracks = self._leases.leased_tracks if self._leases is not None else 0
 
         return {
+            "backend": "memory",
             "current_size": current_size,
             "max_capacity": self._max_capacity,
             "low_watermark": self._low_watermark,
             "enqueue_count": self._enqueue_count,
             "dequeue_count": self._dequeue_count,
             "dropped_count": self._dropped_count,
+            "duplicate_rejected": self._duplicate_rejected_count,
             "is_low": current_size <= self._low_watermark,
             "utilization": round(current_size / self._max_capacity * 100, 2) if self._max_capacity > 0 else 0,
+            "lease_enabled": self._leases is not None,
+            "lease_ttl_s": self._leases.ttl_s if self._leases is not None else 0,
+            "lease_active": lease_active,
+            "leased_tracks": leased_tracks,
+            "lease_acked": self._lease_acked_count,
+            "lease_returned": self._lease_returned_count,
         }
 
+    def try_acquire_worker_role(self) -> bool:
+        """補充ワーカーの担当権を取得
+
+        プロセス内キューは他プロセスと共有しないため常に担当する
+
+        Returns:
+            bool: 常にTrue
+        """
+        return True
+
+    def _expire_leases_locked(self) -> None:
+        """期限切れリースの楽曲をキューに戻す（ロック保持中に呼び出すこと）"""
+        if self._leases is None:
+            return
+        expired = self._leases.expire()
+        if expired:
+            returned = self._return_tracks_locked(expired)
+            logger.info(
+                f"Returned {returned}/{len(expired)} tracks from expired leases")
+
+    def _return_tracks_locked(self, tracks: List[QueuedTrack]) -> int:
+        """リースから外れた楽曲をキュー末尾に戻す（ロック保持中に呼び出すこと）
+
+        既にキューにあるIDは戻さず、容量を超える分は新しい楽曲を押し出さずに破棄する
+        """
+        returned = 0
+        for track in tracks:
+            track_id = str(track.id)
+            if track_id in self._queue:
+                continue
+            if len(self._queue) >= self._max_capacity:
+                self._dropped_count += 1
+                continue
+            self._queue.append(track, track_id)
+            returned += 1
+        self._lease_returned_count += returned
+        if returned:
+            self._notify_waiters_locked()
+        return returned
+
+    def _notify_waiters_locked(self) -> None:
+        """楽曲の追加を待つ待機者を起こす（ロック保持中に呼び出すこと）
+
+        待機者のイベントループ以外のスレッドから追加された場合でも安全に起こせるよう、
+        call_soon_threadsafe で各ループに通知する
+        """
+        for loop, waiter in self._waiters:
+            try:
+                loop.call_soon_threadsafe(_wake_waiter, waiter)
+            except RuntimeError:
+                # ループが既に閉じている
+                pass
+        self._waiters.clear()
+
     def _check_low_watermark(self) -> None:
         """低水位マークのチェックと警告出力
 
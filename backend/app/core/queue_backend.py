@@ -0,0 +1,129 @@
+"""
+キューバックエンド定義モジュール
+QueueManagerと共有ストア実装が満たすべきインターフェースと、設定に応じた生成処理を提供する
+"""
+
+import asyncio
+import logging
+from typing import (
+    AbstractSet, Any, Callable, Dict, List, Optional, Protocol, Tuple, TypeVar, Union, runtime_checkable,
+)
+
+from ..models.track import QueuedTrack, Track
+from .config import QueueConfig
+from .queue import QueueManager
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+
+@runtime_checkable
+class QueueBackend(Protocol):
+    """楽曲キューのバックエンドインターフェース
+
+    プロセス内のQueueManagerと、複数プロセス・複数ノードで共有する
+    外部ストア実装の双方がこのインターフェースを満たす。
+    追加はTrackを受け付け、取り出しはキュー保持用レコード（QueuedTrack）を返す。
+    呼び出しがネットワーク越しのI/Oで待たされる実装は blocking_io を True にし、
+    イベントループ上からは call_backend() 経由で呼び出す
+    """
+
+    def enqueue(
+        self, items: List[Union[Track, QueuedTrack]], reject_duplicates: Optional[bool] = None
+    ) -> int: ...
+
+    def dequeue(self, n: Optional[int] = None) -> List[QueuedTrack]: ...
+
+    def dequeue_random(self, n: Optional[int] = None) -> List[QueuedTrack]: ...
+
+    def bulk_dequeue(self, count: int) -> List[QueuedTrack]: ...
+
+    def dequeue_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str]
+    ) -> List[QueuedTrack]: ...
+
+    def lease_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str], ttl_s: Optional[float] = None
+    ) -> Tuple[Optional[str], List[QueuedTrack]]: ...
+
+    async def wait_for_size(self, n: int, timeout: float) -> bool: ...
+
+    async def take(
+        self, n: int, timeout: float, exclude_ids: AbstractSet[str] = frozenset()
+    ) -> List[QueuedTrack]: ...
+
+    def ack(self, lease_id: Optional[str]) -> int: ...
+
+    def release(self, lease_id: Optional[str]) -> int: ...
+
+    def contains(self, track_id: Union[str, int]) -> bool: ...
+
+    def snapshot(self, include_leased: bool = False) -> List[QueuedTrack]: ...
+
+    def re_enqueue(self, items: List[Union[Track, QueuedTrack]]) -> int: ...
+
+    def max_cap(self) -> int: ...
+
+    def size(self) -> int: ...
+
+    def capacity(self) -> int: ...
+
+    def clear(self) -> int: ...
+
+    def add_low_watermark_listener(
+        self, threshold: int, callback: Callable[[int], None]
+    ) -> None: ...
+
+    def remove_low_watermark_listener(self, callback: Callable[[int], None]) -> None: ...
+
+    def stats(self) -> Dict[str, Any]: ...
+
+    def try_acquire_worker_role(self) -> bool: ...
+
+
+async def call_backend(method: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """キューバックエンドのメソッドをイベントループから呼び出す
+
+    blocking_io なバックエンドのメソッドはスレッドで実行し、応答を待つ間も
+    イベントループが他のリクエストを処理できるようにする。
+    プロセス内のバックエンドはそのまま呼び出す
+
+    Args:
+        method: キューバックエンドのメソッド（バインド済み）
+        *args: メソッドの引数
+        **kwargs: メソッドのキーワード引数
+
+    Returns:
+        メソッドの戻り値
+    """
+    if getattr(getattr(method, "__self__", None), "blocking_io", False):
+        return await asyncio.to_thread(method, *args, **kwargs)
+    return method(*args, **kwargs)
+
+
+def create_queue_backend() -> QueueBackend:
+    """設定（QUEUE_BACKEND）に応じたキューバックエンドを生成
+
+    Returns:
+        QueueBackend: キューバックエンドのインスタンス
+    """
+    backend = QueueConfig.get_backend()
+
+    if backend == "shm":
+        from .shm_queue import SharedMemoryQueueBackend
+
+        logger.info("Using shared memory queue backend")
+        return SharedMemoryQueueBackend()
+
+    if backend == "redis":
+        # redisパッケージは共有バックエンド利用時のみ必要
+        from .redis_queue import RedisQueueBackend
+
+        logger.info("Using Redis queue backend")
+        return RedisQueueBackend.from_url(
+            QueueConfig.get_redis_url(),
+            prefix=QueueConfig.get_redis_prefix(),
+        )
+
+    return QueueManager()
@@ -1,12 +1,14 @@
 """
 レート制限機能モジュール
 短時間での過剰なAPIアクセスを制御する
+（受信リクエストの制限と、外部APIへの送信レートの適応的な制御）
 """
 
+import asyncio
 import time
 import threading
 from collections import deque
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -178,3 +180,244 @@ class GlobalRateLimiter:
 
 # グローバルインスタンス
 global_rate_limiter = GlobalRateLimiter()
+
+
+class AdaptiveRateLimiter:
+    """外部APIへの送信を制御する適応型レート制限器（AIMD）
+
+    トークンバケットで送信レートを、同時実行数の上限で並行数を制限する。
+    成功した応答ごとにレートと並行数を加算的に増やし、403/429/5xx・タイムアウト・
+    レイテンシの悪化を検知したら乗算的に減らす（AIMD）ことで、
+    固定の待機時間を使わずに相手先の許容量付近で送信する。
+    429/403 に Retry-After がある場合はその時刻まで送信を止める
+    """
+
+    # スロットリングとみなすステータスコード
+    THROTTLE_STATUSES = frozenset({403, 429})
+
+    def __init__(
+        self,
+        initial_rate: float = 0.5,
+        min_rate: float = 0.05,
+        max_rate: float = 2.0,
+        max_concurrency: int = 3,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        latency_target_s: float = 2.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """レート制限器を初期化
+
+        Args:
+            initial_rate: 初期の送信レート（リクエスト/秒）
+            min_rate: 送信レートの下限
+            max_rate: 送信レートの上限
+            max_concurrency: 同時実行数の上限
+            increase_step: 成功1回あたりのレートの増加量
+            decrease_factor: 輻輳検知時にレートと並行数に掛ける係数
+            latency_target_s: これを超えるレイテンシ（EWMA）を輻輳とみなす閾値
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.min_rate = max(0.001, min_rate)
+        self.max_rate = max(self.min_rate, max_rate)
+        self.initial_rate = min(self.max_rate, max(self.min_rate, initial_rate))
+        self.max_concurrency = max(1, max_concurrency)
+        self.increase_step = increase_step
+        self.decrease_factor = min(0.99, max(0.01, decrease_factor))
+        self.latency_target_s = latency_target_s
+        self._clock = clock
+        # 状態の変化（スロットの解放・レート変更）を待機中のリクエストに知らせるイベント
+        self._changed: Optional[asyncio.Event] = None
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._rate = self.initial_rate
+        self._concurrency = 1.0
+        self._tokens = 1.0
+        self._last_refill = self._clock()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self._latency_ewma: Optional[float] = None
+
+        self._acquired = 0
+        self._successes = 0
+        self._throttled = 0
+        self._errors = 0
+        self._increases = 0
+        self._decreases = 0
+        self._wait_s = 0.0
+
+    @property
+    def rate(self) -> float:
+        """現在の送信レート（リクエスト/秒）"""
+        return self._rate
+
+    @property
+    def concurrency_limit(self) -> int:
+        """現在の同時実行数の上限"""
+        return int(self._concurrency)
+
+    async def acquire(self) -> float:
+        """送信の許可を得るまで待機
+
+        同時実行数・Retry-After・トークンのいずれかで送信できない場合は、
+        状態が変わるか次のトークンが貯まるまで待つ
+
+        Returns:
+            float: 待機した秒数
+        """
+        started = self._clock()
+        while True:
+            now = self._clock()
+            self._refill(now)
+            if self._in_flight >= self.concurrency_limit:
+                delay: Optional[float] = None
+            elif now < self._blocked_until:
+                delay = self._blocked_until - now
+            elif self._tokens < 1.0:
+                delay = (1.0 - self._tokens) / self._rate
+            else:
+                self._tokens -= 1.0
+                self._in_flight += 1
+                break
+
+            if self._changed is None:
+                self._changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+        waited = self._clock() - started
+        self._acquired += 1
+        self._wait_s += waited
+        return waited
+
+    def try_acquire(self) -> bool:
+        """待たずに送信の許可を得る（ヘッジなど、すぐ送れない場合は送らないリクエスト用）
+
+        Returns:
+            bool: 許可を得た場合True
+        """
+        now = self._clock()
+        self._refill(now)
+        if (
+            self._in_flight >= self.concurrency_limit
+            or now < self._blocked_until
+            or self._tokens < 1.0
+        ):
+            return False
+        self._tokens -= 1.0
+        self._in_flight += 1
+        self._acquired += 1
+        return True
+
+    def abandon(self) -> None:
+        """結果を記録せずに送信枠を返す（呼び出し側の都合でキャンセルしたリクエスト用）"""
+        self._in_flight = max(0, self._in_flight - 1)
+        self._notify()
+
+    def release(
+        self,
+        status_code: Optional[int],
+        latency_s: float,
+        retry_after_s: Optional[float] = None,
+    ) -> None:
+        """送信結果を記録し、レートと並行数を調整
+
+        Args:
+            status_code: 応答のステータスコード（タイムアウト・接続エラーの場合はNone）
+            latency_s: 応答までの秒数
+            retry_after_s: Retry-After ヘッダーの秒数
+        """
+        now = self._clock()
+        self._in_flight = max(0, self._in_flight - 1)
+        if self._latency_ewma is None:
+            self._latency_ewma = latency_s
+        else:
+            self._latency_ewma += 0.2 * (latency_s - self._latency_ewma)
+
+        throttled = status_code in self.THROTTLE_STATUSES
+        failed = status_code is None or status_code >= 500
+        slow = self._latency_ewma > self.latency_target_s
+        if throttled:
+            self._throttled += 1
+            if retry_after_s:
+                self._blocked_until = max(self._blocked_until, now + retry_after_s)
+        elif failed:
+            self._errors += 1
+        elif 200 <= status_code < 300:
+            self._successes += 1
+
+        if throttled or failed or slow:
+            self._decrease(now)
+        elif 200 <= status_code < 300:
+            # 加算的増加（並行数は上限に達するまで1往復あたり約1ずつ増やす）
+            self._rate = min(self.max_rate, self._rate + self.increase_step)
+            self._concurrency = min(
+                float(self.max_concurrency), self._concurrency + 1.0 / self._concurrency
+            )
+            self._increases += 1
+
+        self._notify()
+
+    def reset(self) -> None:
+        """状態を初期値に戻す（テスト用）"""
+        self._reset_state()
+        self._notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """現在のレート・並行数と調整回数の統計を取得
+
+        Returns:
+            Dict[str, Any]: 統計情報
+        """
+        now = self._clock()
+        return {
+            "rate_per_s": round(self._rate, 3),
+            "min_rate_per_s": self.min_rate,
+            "max_rate_per_s": self.max_rate,
+            "concurrency_limit": self.concurrency_limit,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "latency_ewma_s": (
+                round(self._latency_ewma, 3) if self._latency_ewma is not None else None
+            ),
+            "latency_target_s": self.latency_target_s,
+            "blocked_for_s": round(max(0.0, self._blocked_until - now), 3),
+            "acquired": self._acquired,
+            "successes": self._successes,
+            "throttled": self._throttled,
+            "errors": self._errors,
+            "increases": self._increases,
+            "decreases": self._decreases,
+            "total_wait_s": round(self._wait_s, 3),
+        }
+
+    def _refill(self, now: float) -> None:
+        # バケットの容量は現在の並行数（並行して送信を始められる数）
+        capacity = float(self.concurrency_limit)
+        self._tokens = min(capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def _decrease(self, now: float) -> None:
+        # 同時に送信していたリクエストの失敗で何度も下げないよう、
+        # 減少は1往復（レイテンシ、最低1秒）あたり1回まで
+        guard_s = max(1.0, self._latency_ewma or 0.0)
+        if now - self._last_decrease < guard_s:
+            return
+        self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+        self._concurrency = max(1.0, self._concurrency * self.decrease_factor)
+        self._tokens = min(self._tokens, float(self.concurrency_limit))
+        self._last_decrease = now
+        self._decreases += 1
+        logger.warning(
+            f"Outbound rate decreased to {self._rate:.3f}/s "
+            f"(concurrency {self.concurrency_limit})"
+        )
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
@@ -0,0 +1,540 @@
+"""
+Redisプロトコル互換ストアを用いた共有キューバックエンド
+複数のuvicornワーカーや複数コンテナで1つの楽曲キューを共有する
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import AbstractSet, Any, Callable, Dict, List, Optional, Tuple, Union
+
+import redis
+
+from ..models.track import QueuedTrack, Track
+from .config import QueueConfig
+from .queue import LeaseTable, LowWatermarkListeners, filter_valid_tracks, poll_for_size
+
+logger = logging.getLogger(__name__)
+
+
+# 楽曲を追加する。mode=push は容量超過分を古い順に破棄し、
+# mode=fill は容量に空きがある分だけ追加する（既存の楽曲を押し出さない）
+_ENQUEUE_SCRIPT = """
+local cap = tonumber(ARGV[1])
+local reject = ARGV[2] == '1'
+local fill = ARGV[3] == 'fill'
+local added, rejected, dropped = 0, 0, 0
+for i = 4, #ARGV, 2 do
+  local id = ARGV[i]
+  local exists = redis.call('SISMEMBER', KEYS[1], id) == 1
+  if exists and reject then
+    rejected = rejected + 1
+  elseif fill and not exists and redis.call('SCARD', KEYS[1]) >= cap then
+    dropped = dropped + 1
+  else
+    redis.call('SADD', KEYS[1], id)
+    redis.call('HSET', KEYS[2], id, ARGV[i + 1])
+    redis.call('ZADD', KEYS[3], redis.call('INCR', KEYS[4]), id)
+    added = added + 1
+  end
+end
+local over = redis.call('SCARD', KEYS[1]) - cap
+if over > 0 then
+  local oldest = redis.call('ZPOPMIN', KEYS[3], over)
+  for j = 1, #oldest, 2 do
+    redis.call('SREM', KEYS[1], oldest[j])
+    redis.call('HDEL', KEYS[2], oldest[j])
+    dropped = dropped + 1
+  end
+end
+if not fill then
+  redis.call('HINCRBY', KEYS[5], 'enqueue_count', added)
+  redis.call('HINCRBY', KEYS[5], 'duplicate_rejected', rejected)
+end
+redis.call('HINCRBY', KEYS[5], 'dropped_count', dropped)
+return {added, rejected, dropped, redis.call('SCARD', KEYS[1])}
+"""
+
+# 取り出したIDの楽曲データを削除して返す共通処理
+_TAKE_IDS = """
+local function take(ids)
+  if #ids == 0 then
+    return {}
+  end
+  local payloads = redis.call('HMGET', KEYS[2], unpack(ids))
+  redis.call('HDEL', KEYS[2], unpack(ids))
+  redis.call('ZREM', KEYS[3], unpack(ids))
+  redis.call('SREM', KEYS[1], unpack(ids))
+  redis.call('HINCRBY', KEYS[4], 'dequeue_count', #ids)
+  return payloads
+end
+"""
+
+# サーバー側でランダムにn件を取り出す
+_POP_RANDOM_SCRIPT = _TAKE_IDS + """
+return take(redis.call('SPOP', KEYS[1], tonumber(ARGV[1])))
+"""
+
+# サーバー側で古い順にn件を取り出す
+_POP_OLDEST_SCRIPT = _TAKE_IDS + """
+local popped = redis.call('ZPOPMIN', KEYS[3], tonumber(ARGV[1]))
+local ids = {}
+for j = 1, #popped, 2 do
+  ids[#ids + 1] = popped[j]
+end
+return take(ids)
+"""
+
+# 除外IDを読み飛ばしながらランダムにn件を取り出す（除外対象は残す）
+_POP_RANDOM_EXCLUDING_SCRIPT = _TAKE_IDS + """
+local n = tonumber(ARGV[1])
+local excluded = {}
+for i = 2, #ARGV do
+  excluded[ARGV[i]] = true
+end
+local sample = redis.call('SRANDMEMBER', KEYS[1], n + #ARGV - 1)
+local ids = {}
+for _, id in ipairs(sample) do
+  if #ids >= n then
+    break
+  end
+  if not excluded[id] then
+    ids[#ids + 1] = id
+  end
+end
+return take(ids)
+"""
+
+# 補充ワーカーの担当権を取得または延長する（保持者が自分の場合のみ延長）
+_WORKER_ROLE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+  return 1
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+  return 1
+end
+return 0
+"""
+
+
+class RedisQueueBackend:
+    """Redisプロトコル互換ストア上の楽曲キュー
+
+    楽曲IDの集合・楽曲データのハッシュ・追加順のソート済み集合で構成し、
+    追加・取り出しはLuaスクリプトでサーバー側の単一操作として実行する。
+    集合で管理するため同一IDの楽曲は1件のみ保持される
+    （重複拒否しない場合は既存の楽曲を更新して末尾に移動する）。
+
+    リースはプロセス内で保持し、期限切れ時に容量の空きがある分だけ共有キューに戻す。
+    各操作はストアへの往復を待つため、イベントループ上からは call_backend() 経由で呼び出す
+    """
+
+    # 各操作がネットワーク越しの応答を待つ（call_backend() がスレッドで実行する）
+    blocking_io = True
+
+    def __init__(
+        self,
+        client: "redis.Redis",
+        prefix: str = "otodoki:queue",
+        max_capacity: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        reject_duplicates: Optional[bool] = None,
+        lease_ttl_s: Optional[float] = None,
+    ):
+        """バックエンドを初期化
+
+        Args:
+            client: Redisクライアント（テストではスタンドインサーバーのクライアントを注入）
+            prefix: キー名のプレフィックス
+            max_capacity: キューの最大容量（None時は設定から取得）
+            low_watermark: 低水位マーク（None時は設定から取得）
+            reject_duplicates: キュー内の楽曲IDと重複する追加を拒否するか
+            lease_ttl_s: リースの有効期間（秒、0でリース無効）
+        """
+        self._client = client
+        self._max_capacity = max_capacity or QueueConfig.get_max_capacity()
+        self._low_watermark = low_watermark or QueueConfig.get_low_watermark()
+        self._reject_duplicates = (
+            reject_duplicates
+            if reject_duplicates is not None
+            else QueueConfig.get_reject_duplicates()
+        )
+
+        self._ids_key = f"{prefix}:ids"
+        self._data_key = f"{prefix}:data"
+        self._order_key = f"{prefix}:order"
+        self._seq_key = f"{prefix}:seq"
+        self._stats_key = f"{prefix}:stats"
+        self._worker_key = f"{prefix}:worker"
+        self._worker_token = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._worker_role_ttl_ms = QueueConfig.get_worker_role_ttl_ms()
+
+        self._enqueue_script = client.register_script(_ENQUEUE_SCRIPT)
+        self._pop_random_script = client.register_script(_POP_RANDOM_SCRIPT)
+        self._pop_oldest_script = client.register_script(_POP_OLDEST_SCRIPT)
+        self._pop_random_excluding_script = client.register_script(
+            _POP_RANDOM_EXCLUDING_SCRIPT
+        )
+        self._worker_role_script = client.register_script(_WORKER_ROLE_SCRIPT)
+
+        if lease_ttl_s is None:
+            lease_ttl_s = QueueConfig.get_lease_ttl_ms() / 1000.0
+        self._lease_lock = threading.Lock()
+        self._leases: Optional[LeaseTable] = (
+            LeaseTable(lease_ttl_s) if lease_ttl_s > 0 else None
+        )
+        self._lease_acked_count = 0
+        self._lease_returned_count = 0
+        self._last_warning_time = 0.0
+        self._low_watermark_listeners = LowWatermarkListeners()
+
+        logger.info(
+            f"RedisQueueBackend initialized - prefix: {prefix}, "
+            f"max_capacity: {self._max_capacity}, "
+            f"low_watermark: {self._low_watermark}"
+        )
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisQueueBackend":
+        """接続URLからバックエンドを生成
+
+        Args:
+            url: redis://host:port/db 形式の接続URL
+            **kwargs: コンストラクタに渡す追加引数
+
+        Returns:
+            RedisQueueBackend: バックエンドのインスタンス
+        """
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def enqueue(
+        self, items: List[Union[Track, QueuedTrack]], reject_duplicates: Optional[bool] = None
+    ) -> int:
+        """複数のTrackアイテムをキューに追加
+
+        Args:
+            items: 追加するTrackのリスト
+            reject_duplicates: キュー内に既に存在する楽曲IDを拒否するか
+
+        Returns:
+            int: 実際に追加された件数
+        """
+        if not items:
+            return 0
+
+        valid_items = filter_valid_tracks(items)
+        if not valid_items:
+            logger.debug("No valid items to enqueue")
+            return 0
+
+        if reject_duplicates is None:
+            reject_duplicates = self._reject_duplicates
+
+        added, rejected, dropped, current_size = self._run_enqueue(
+            valid_items, reject_duplicates, mode="push"
+        )
+
+        logger.debug(
+            f"Enqueued {added} items, current size: {current_size}, "
+            f"dropped: {dropped}, duplicates rejected: {rejected}"
+        )
+        self._check_low_watermark(current_size)
+        return added
+
+    def dequeue(self, n: Optional[int] = None) -> List[QueuedTrack]:
+        """キューから古い順にn件を取り出し"""
+        if n is None:
+            n = QueueConfig.get_dequeue_default_n()
+        if n <= 0:
+            return []
+
+        payloads = self._pop_oldest_script(
+            keys=self._pop_keys(), args=[n]
+        )
+        self._publish_removed(len(payloads))
+        return self._decode(payloads)
+
+    def dequeue_random(self, n: Optional[int] = None) -> List[QueuedTrack]:
+        """キューからランダムにn件を取り出し（サーバー側でアトミックに実行）"""
+        if n is None:
+            n = QueueConfig.get_dequeue_default_n()
+        if n <= 0:
+            return []
+
+        payloads = self._pop_random_script(
+            keys=self._pop_keys(), args=[n]
+        )
+        self._publish_removed(len(payloads))
+        return self._decode(payloads)
+
+    def bulk_dequeue(self, count: int) -> List[QueuedTrack]:
+        """指定された数の楽曲をキューから一括取得（ランダム）"""
+        return self.dequeue_random(count)
+
+    def dequeue_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str]
+    ) -> List[QueuedTrack]:
+        """除外IDを読み飛ばしながらランダムにn件を取り出し
+
+        除外対象の楽曲はキューに残したまま、サーバー側の単一操作で取り出す
+        """
+        if n <= 0:
+            return []
+
+        payloads = self._pop_random_excluding_script(
+            keys=self._pop_keys(), args=[n, *exclude_ids]
+        )
+        self._publish_removed(len(payloads))
+        return self._decode(payloads)
+
+    def lease_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str], ttl_s: Optional[float] = None
+    ) -> Tuple[Optional[str], List[QueuedTrack]]:
+        """除外IDを読み飛ばしながらランダムにn件をリースとして取り出し"""
+        self._expire_leases()
+        tracks = self.dequeue_random_excluding(n, exclude_ids)
+        if self._leases is None or not tracks:
+            return None, tracks
+
+        with self._lease_lock:
+            lease_id = self._leases.add(tracks, ttl_s)
+        return lease_id, tracks
+
+    def ack(self, lease_id: Optional[str]) -> int:
+        """リースを確定し、楽曲を配信済みとして破棄"""
+        if lease_id is None or self._leases is None:
+            return 0
+
+        with self._lease_lock:
+            tracks = self._leases.pop(lease_id)
+            if tracks is None:
+                return 0
+            self._lease_acked_count += len(tracks)
+        return len(tracks)
+
+    def release(self, lease_id: Optional[str]) -> int:
+        """リースを取り消し、楽曲を共有キューに戻す"""
+        if lease_id is None or self._leases is None:
+            return 0
+
+        with self._lease_lock:
+            tracks = self._leases.pop(lease_id)
+        return self._return_tracks(tracks) if tracks else 0
+
+    async def wait_for_size(self, n: int, timeout: float) -> bool:
+        """キューにn件以上が揃うまで待機（他プロセスの追加を検知するため一定間隔で確認）"""
+        return await poll_for_size(
+            lambda: asyncio.to_thread(self.size), min(n, self._max_capacity), timeout)
+
+    async def take(
+        self,
+        n: int,
+        timeout: float,
+        exclude_ids: AbstractSet[str] = frozenset(),
+    ) -> List[QueuedTrack]:
+        """n件揃うまで（最大timeout秒）待ってからランダムに取り出し"""
+        if n <= 0:
+            return []
+        await self.wait_for_size(n, timeout)
+        return await asyncio.to_thread(self.dequeue_random_excluding, n, exclude_ids)
+
+    def contains(self, track_id: Union[str, int]) -> bool:
+        """指定されたIDの楽曲がキューに含まれているかチェック"""
+        return bool(self._client.sismember(self._ids_key, str(track_id)))
+
+    def snapshot(self, include_leased: bool = False) -> List[QueuedTrack]:
+        """キュー内の楽曲を取り出さずに追加順で取得
+
+        Args:
+            include_leased: Trueの場合はこのプロセスがリース中（ack前）の楽曲も末尾に含める
+        """
+        ids = self._client.zrange(self._order_key, 0, -1)
+        tracks = self._decode(self._client.hmget(self._data_key, ids)) if ids else []
+        if include_leased and self._leases is not None:
+            with self._lease_lock:
+                tracks.extend(self._leases.tracks())
+        return tracks
+
+    def re_enqueue(self, items: List[Union[Track, QueuedTrack]]) -> int:
+        """楽曲を再度キューに戻す（末尾に追加）"""
+        return self.enqueue(items)
+
+    def max_cap(self) -> int:
+        """キューの最大容量を取得（別名）"""
+        return self.capacity()
+
+    def size(self) -> int:
+        """現在のキューサイズを取得"""
+        self._expire_leases()
+        return int(self._client.scard(self._ids_key))
+
+    def capacity(self) -> int:
+        """キューの最大容量を取得"""
+        return self._max_capacity
+
+    def clear(self) -> int:
+        """キューをクリア
+
+        Returns:
+            int: クリア前のサイズ
+        """
+        pipe = self._client.pipeline(transaction=True)
+        pipe.scard(self._ids_key)
+        pipe.delete(self._ids_key, self._data_key, self._order_key)
+        previous_size, _ = pipe.execute()
+
+        logger.info(f"Queue cleared, removed {previous_size} items")
+        self._low_watermark_listeners.publish(int(previous_size), 0)
+        return int(previous_size)
+
+    def add_low_watermark_listener(
+        self, threshold: int, callback: Callable[[int], None]
+    ) -> None:
+        """キューサイズが閾値を下回ったときに呼び出すリスナーを登録
+
+        このプロセスでの取り出しのみを検知する（他プロセスの取り出しは補充ワーカーの
+        予備の確認間隔で検知する）
+        """
+        self._low_watermark_listeners.add(threshold, callback)
+
+    def remove_low_watermark_listener(self, callback: Callable[[int], None]) -> None:
+        """登録したリスナーを解除"""
+        self._low_watermark_listeners.remove(callback)
+
+    def stats(self) -> Dict[str, Any]:
+        """キューの統計情報を取得（共有カウンタはパイプラインで一括取得）"""
+        self._expire_leases()
+
+        pipe = self._client.pipeline(transaction=False)
+        pipe.scard(self._ids_key)
+        pipe.hgetall(self._stats_key)
+        current_size, counters = pipe.execute()
+        current_size = int(current_size)
+        counters = {
+            (key.decode() if isinstance(key, bytes) else key): int(value)
+            for key, value in counters.items()
+        }
+
+        with self._lease_lock:
+            lease_active = len(self._leases) if self._leases is not None else 0
+            leased_tracks = self._leases.leased_tracks if self._leases is not None else 0
+
+        return {
+            "backend": "redis",
+            "current_size": current_size,
+            "max_capacity": self._max_capacity,
+            "low_watermark": self._low_watermark,
+            "enqueue_count": counters.get("enqueue_count", 0),
+            "dequeue_count": counters.get("dequeue_count", 0),
+            "dropped_count": counters.get("dropped_count", 0),
+            "duplicate_rejected": counters.get("duplicate_rejected", 0),
+            "is_low": current_size <= self._low_watermark,
+            "utilization": round(current_size / self._max_capacity * 100, 2) if self._max_capacity > 0 else 0,
+            "lease_enabled": self._leases is not None,
+            "lease_ttl_s": self._leases.ttl_s if self._leases is not None else 0,
+            "lease_active": lease_active,
+            "leased_tracks": leased_tracks,
+            "lease_acked": self._lease_acked_count,
+            "lease_returned": self._lease_returned_count,
+        }
+
+    def try_acquire_worker_role(self) -> bool:
+        """補充ワーカーの担当権を取得または延長（全プロセスで1つのみ）
+
+        担当権は有効期間付きで保持し、担当プロセスが延長しなくなると
+        期限切れ後に別プロセスが引き継ぐ
+
+        Returns:
+            bool: このプロセスが担当する場合True
+        """
+        try:
+            return bool(self._worker_role_script(
+                keys=[self._worker_key],
+                args=[self._worker_token, self._worker_role_ttl_ms],
+            ))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to acquire queue worker role: {e}")
+            return False
+
+    def close(self) -> None:
+        """接続を閉じる（共有キューのデータは残す）"""
+        self._client.close()
+
+    def _run_enqueue(
+        self, items: List[QueuedTrack], reject_duplicates: bool, mode: str
+    ) -> Tuple[int, int, int, int]:
+        args: List[Any] = [
+            self._max_capacity,
+            "1" if reject_duplicates else "0",
+            mode,
+        ]
+        for item in items:
+            args.append(str(item.id))
+            args.append(item.to_json())
+
+        result = self._enqueue_script(
+            keys=[
+                self._ids_key,
+                self._data_key,
+                self._order_key,
+                self._seq_key,
+                self._stats_key,
+            ],
+            args=args,
+        )
+        added, rejected, dropped, current_size = (int(value) for value in result)
+        return added, rejected, dropped, current_size
+
+    def _publish_removed(self, removed: int) -> None:
+        """取り出し後のサイズを確認して低水位リスナーに通知（リスナー登録時のみ問い合わせる）"""
+        if not removed or not self._low_watermark_listeners:
+            return
+        current_size = int(self._client.scard(self._ids_key))
+        self._low_watermark_listeners.publish(current_size + removed, current_size)
+
+    def _pop_keys(self) -> List[str]:
+        return [self._ids_key, self._data_key, self._order_key, self._stats_key]
+
+    def _decode(self, payloads: List[Optional[bytes]]) -> List[QueuedTrack]:
+        tracks = []
+        for payload in payloads:
+            if payload is None:
+                continue
+            try:
+                tracks.append(QueuedTrack.from_json(payload))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Failed to decode queued track: {e}")
+        return tracks
+
+    def _expire_leases(self) -> None:
+        """期限切れリースの楽曲を共有キューに戻す"""
+        if self._leases is None:
+            return
+        with self._lease_lock:
+            expired = self._leases.expire()
+        if expired:
+            returned = self._return_tracks(expired)
+            logger.info(
+                f"Returned {returned}/{len(expired)} tracks from expired leases")
+
+    def _return_tracks(self, tracks: List[QueuedTrack]) -> int:
+        """リースから外れた楽曲を、既存IDと容量を考慮して共有キューに戻す"""
+        added, _, _, _ = self._run_enqueue(tracks, True, mode="fill")
+        with self._lease_lock:
+            self._lease_returned_count += added
+        return added
+
+    def _check_low_watermark(self, current_size: int) -> None:
+        """低水位マークのチェックと警告出力（60秒間隔）"""
+        if current_size <= self._low_watermark:
+            current_time = time.time()
+            if current_time - self._last_warning_time >= 60:
+                logger.warning(
+                    f"Queue size ({current_size}) is below low watermark ({self._low_watermark}). "
+                    f"Consider triggering refill process."
+                )
+                self._last_warning_time = current_time
@@ -0,0 +1,744 @@
+"""
+共有メモリを用いた単一ホスト向け共有キューバックエンド
+同一ホスト上の複数のuvicornワーカープロセスで外部サービスなしに1つの楽曲キューを共有する
+"""
+
+import fcntl
+import logging
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import AbstractSet, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from ..models.track import QueuedTrack, Track
+from .config import QueueConfig
+from .queue import LeaseTable, LowWatermarkListeners, filter_valid_tracks, poll_for_size
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"OTQ2"
+# 楽曲IDの索引を持たない旧形式（接続時に作り直す）
+_LEGACY_MAGIC = b"OTQ1"
+# magic, capacity, slot_size, head, count, enqueue, dequeue, dropped, duplicate_rejected
+_HEADER = struct.Struct("<4sIIIIQQQQ")
+_HEADER_SIZE = 64
+# ヘッダーの末尾に置く、索引の削除済みエントリ数
+_TOMBSTONES_OFFSET = _HEADER.size
+# 各スロット: ID長, ペイロード長, ID(固定長), ペイロード（シリアライズ済みTrack）
+_SLOT_HEADER = struct.Struct("<BH")
+_ID_MAX_BYTES = 64
+# スロットの後ろに置く楽曲IDの索引（線形探索のハッシュ表）。
+# 各エントリはスロット番号+1で、0は空き、_DELETED は削除済み
+_INDEX_ENTRY = struct.Struct("<I")
+_DELETED = 0xFFFFFFFF
+
+
+def _index_entries(capacity: int) -> int:
+    """索引のエントリ数（容量の2倍以上の2のべき乗）"""
+    return 1 << max(1, (2 * capacity - 1).bit_length())
+
+
+def _segment_size(capacity: int, slot_size: int) -> int:
+    return _HEADER_SIZE + capacity * slot_size + _index_entries(capacity) * _INDEX_ENTRY.size
+
+
+def _open_shared_memory(**kwargs: Any) -> Tuple[shared_memory.SharedMemory, bool]:
+    """resource_trackerに登録しない状態で共有メモリを開く
+
+    セグメントの寿命をどのプロセスの終了とも切り離すため。
+    track引数のないPython 3.12以前では、開いた後でこのセグメントの登録だけを解除する
+
+    Returns:
+        Tuple[SharedMemory, bool]: (共有メモリ, track=False で開けた場合True)
+    """
+    try:
+        return shared_memory.SharedMemory(track=False, **kwargs), True  # type: ignore[call-arg]
+    except TypeError:
+        shm = shared_memory.SharedMemory(**kwargs)
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        return shm, False
+
+
+class SharedMemoryQueueBackend:
+    """共有メモリ上のリングバッファによる楽曲キュー
+
+    固定長スロットの配列にシリアライズ済みのTrackを保持する。
+    先頭（最古）から取り出すFIFOに加え、ランダム取り出しは選んだスロットへ
+    先頭スロットを移してから先頭を進めることでO(1)で行う。
+    重複確認のため、スロットの後ろに楽曲IDからスロットを引く索引を共有メモリ上に持つ。
+    プロセス間の排他はロックファイルのflock、プロセス内はthreading.Lockで行う。
+
+    リースはプロセス内で保持し、期限切れ時に容量の空きがある分だけ共有キューに戻す
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        max_capacity: Optional[int] = None,
+        slot_bytes: Optional[int] = None,
+        low_watermark: Optional[int] = None,
+        reject_duplicates: Optional[bool] = None,
+        lease_ttl_s: Optional[float] = None,
+        lock_dir: Optional[str] = None,
+    ):
+        """共有メモリに接続（存在しなければ作成）
+
+        Args:
+            name: 共有メモリセグメント名（None時は設定から取得）
+            max_capacity: スロット数（None時は設定から取得、既存セグメントでは無視）
+            slot_bytes: 1スロットのバイト数（None時は設定から取得、既存セグメントでは無視）
+            low_watermark: 低水位マーク（None時は設定から取得）
+            reject_duplicates: キュー内の楽曲IDと重複する追加を拒否するか
+            lease_ttl_s: リースの有効期間（秒、0でリース無効）
+            lock_dir: ロックファイルを置くディレクトリ（None時は一時ディレクトリ）
+        """
+        self._name = name or QueueConfig.get_shm_name()
+        capacity = max_capacity or QueueConfig.get_max_capacity()
+        slot_size = slot_bytes or QueueConfig.get_shm_slot_bytes()
+        self._low_watermark = low_watermark or QueueConfig.get_low_watermark()
+        self._reject_duplicates = (
+            reject_duplicates
+            if reject_duplicates is not None
+            else QueueConfig.get_reject_duplicates()
+        )
+
+        lock_base = os.path.join(lock_dir or tempfile.gettempdir(), self._name)
+        self._lock_fd = os.open(f"{lock_base}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        self._worker_lock_path = f"{lock_base}.worker.lock"
+        self._worker_lock_fd: Optional[int] = None
+        self._closed = False
+        self._thread_lock = threading.RLock()
+
+        with self._locked():
+            self._attach(_segment_size(capacity, slot_size))
+            magic = bytes(self._buf[:4])
+            if magic == _LEGACY_MAGIC:
+                # 旧形式のセグメントには索引の領域がないため作り直す（キューの内容は失われる）
+                logger.warning(
+                    f"Recreating shared memory queue {self._name} created without an id index")
+                self._buf = None
+                self._shm.close()
+                self._unlink_segment()
+                self._attach(_segment_size(capacity, slot_size))
+                magic = bytes(self._buf[:4])
+
+            if magic != _MAGIC:
+                _HEADER.pack_into(
+                    self._buf, 0, _MAGIC, capacity, slot_size, 0, 0, 0, 0, 0, 0
+                )
+            else:
+                capacity, slot_size = struct.unpack_from("<II", self._buf, 4)
+            self._capacity = capacity
+            self._slot_size = slot_size
+            self._index_offset = _HEADER_SIZE + capacity * slot_size
+            self._index_mask = _index_entries(capacity) - 1
+            if magic != _MAGIC:
+                self._reset_index()
+
+        self._payload_max = slot_size - _SLOT_HEADER.size - _ID_MAX_BYTES
+
+        if lease_ttl_s is None:
+            lease_ttl_s = QueueConfig.get_lease_ttl_ms() / 1000.0
+        self._leases: Optional[LeaseTable] = (
+            LeaseTable(lease_ttl_s) if lease_ttl_s > 0 else None
+        )
+        self._lease_acked_count = 0
+        self._lease_returned_count = 0
+        self._last_warning_time = 0.0
+        self._low_watermark_listeners = LowWatermarkListeners()
+
+        logger.info(
+            f"SharedMemoryQueueBackend attached - name: {self._name}, "
+            f"capacity: {self._capacity}, slot_bytes: {self._slot_size}"
+        )
+
+    # ------------------------------------------------------------------
+    # QueueBackend インターフェース
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self, items: List[Union[Track, QueuedTrack]], reject_duplicates: Optional[bool] = None
+    ) -> int:
+        """複数のTrackアイテムをキューに追加（容量超過時は最古から上書き）"""
+        if not items:
+            return 0
+
+        valid_items = filter_valid_tracks(items)
+        if not valid_items:
+            logger.debug("No valid items to enqueue")
+            return 0
+
+        if reject_duplicates is None:
+            reject_duplicates = self._reject_duplicates
+
+        records = self._serialize(valid_items)
+        with self._locked():
+            added, rejected, dropped = self._write_records(
+                records, reject_duplicates, evict=True
+            )
+            self._bump(enqueue=added, duplicate_rejected=rejected, dropped=dropped)
+            current_size = self._count()
+
+        logger.debug(
+            f"Enqueued {added} items, current size: {current_size}, "
+            f"dropped: {dropped}, duplicates rejected: {rejected}"
+        )
+        self._check_low_watermark(current_size)
+        return added
+
+    def dequeue(self, n: Optional[int] = None) -> List[QueuedTrack]:
+        """キューから古い順にn件を取り出し"""
+        if n is None:
+            n = QueueConfig.get_dequeue_default_n()
+        if n <= 0:
+            return []
+
+        payloads = []
+        with self._locked():
+            head, count = self._head(), self._count()
+            for _ in range(min(n, count)):
+                payloads.append(self._read_payload(head))
+                self._index_delete(self._index_position(head))
+                head = (head + 1) % self._capacity
+                count -= 1
+            self._set_position(head, count)
+            self._maybe_rebuild_index()
+            self._bump(dequeue=len(payloads))
+
+        self._check_low_watermark(count)
+        self._low_watermark_listeners.publish(count + len(payloads), count)
+        return self._decode(payloads)
+
+    def dequeue_random(self, n: Optional[int] = None) -> List[QueuedTrack]:
+        """キューからランダムにn件を取り出し"""
+        if n is None:
+            n = QueueConfig.get_dequeue_default_n()
+        if n <= 0:
+            return []
+
+        payloads = []
+        with self._locked():
+            for _ in range(min(n, self._count())):
+                slot = self._slot_at(random.randrange(self._count()))
+                payloads.append(self._read_payload(slot))
+                self._remove_slot(slot)
+            self._maybe_rebuild_index()
+            self._bump(dequeue=len(payloads))
+            current_size = self._count()
+
+        self._check_low_watermark(current_size)
+        self._low_watermark_listeners.publish(current_size + len(payloads), current_size)
+        return self._decode(payloads)
+
+    def bulk_dequeue(self, count: int) -> List[QueuedTrack]:
+        """指定された数の楽曲をキューから一括取得（ランダム）"""
+        return self.dequeue_random(count)
+
+    def dequeue_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str]
+    ) -> List[QueuedTrack]:
+        """除外IDを読み飛ばしながらランダムにn件を取り出し（除外対象は残す）"""
+        if n <= 0:
+            return []
+
+        # ロック保持中はIDを復号せずバイト列のまま比較する
+        excluded = {str(track_id).encode() for track_id in exclude_ids}
+        with self._locked():
+            head, count = self._head(), self._count()
+            swapped: Dict[int, int] = {}
+            chosen: Set[int] = set()
+            payloads = []
+            for i in range(count):
+                if len(chosen) >= n:
+                    break
+                j = random.randrange(i, count)
+                offset = swapped.get(j, j)
+                swapped[j] = swapped.get(i, i)
+
+                slot = (head + offset) % self._capacity
+                if excluded and self._read_id_bytes(slot) in excluded:
+                    continue
+                chosen.add(slot)
+                payloads.append(self._read_payload(slot))
+
+            self._remove_slots(chosen)
+            self._maybe_rebuild_index()
+            self._bump(dequeue=len(payloads))
+            current_size = self._count()
+
+        self._check_low_watermark(current_size)
+        self._low_watermark_listeners.publish(current_size + len(payloads), current_size)
+        return self._decode(payloads)
+
+    def lease_random_excluding(
+        self, n: int, exclude_ids: AbstractSet[str], ttl_s: Optional[float] = None
+    ) -> Tuple[Optional[str], List[QueuedTrack]]:
+        """除外IDを読み飛ばしながらランダムにn件をリースとして取り出し"""
+        self._expire_leases()
+        tracks = self.dequeue_random_excluding(n, exclude_ids)
+        if self._leases is None or not tracks:
+            return None, tracks
+
+        with self._thread_lock:
+            lease_id = self._leases.add(tracks, ttl_s)
+        return lease_id, tracks
+
+    def ack(self, lease_id: Optional[str]) -> int:
+        """リースを確定し、楽曲を配信済みとして破棄"""
+        if lease_id is None or self._leases is None:
+            return 0
+
+        with self._thread_lock:
+            tracks = self._leases.pop(lease_id)
+            if tracks is None:
+                return 0
+            self._lease_acked_count += len(tracks)
+        return len(tracks)
+
+    def release(self, lease_id: Optional[str]) -> int:
+        """リースを取り消し、楽曲を共有キューに戻す"""
+        if lease_id is None or self._leases is None:
+            return 0
+
+        with self._thread_lock:
+            tracks = self._leases.pop(lease_id)
+        return self._return_tracks(tracks) if tracks else 0
+
+    async def wait_for_size(self, n: int, timeout: float) -> bool:
+        """キューにn件以上が揃うまで待機（他プロセスの追加を検知するため一定間隔で確認）"""
+        return await poll_for_size(self.size, min(n, self._capacity), timeout)
+
+    async def take(
+        self,
+        n: int,
+        timeout: float,
+        exclude_ids: AbstractSet[str] = frozenset(),
+    ) -> List[QueuedTrack]:
+        """n件揃うまで（最大timeout秒）待ってからランダムに取り出し"""
+        if n <= 0:
+            return []
+        await self.wait_for_size(n, timeout)
+        return self.dequeue_random_excluding(n, exclude_ids)
+
+    def contains(self, track_id: Union[str, int]) -> bool:
+        """指定されたIDの楽曲がキューに含まれているかチェック（索引を参照）"""
+        with self._locked():
+            return self._has_id(str(track_id).encode())
+
+    def snapshot(self, include_leased: bool = False) -> List[QueuedTrack]:
+        """キュー内の楽曲を取り出さずに追加順で取得
+
+        Args:
+            include_leased: Trueの場合はこのプロセスがリース中（ack前）の楽曲も末尾に含める
+        """
+        with self._locked():
+            head, capacity = self._head(), self._capacity
+            payloads = [
+                self._read_payload((head + offset) % capacity)
+                for offset in range(self._count())
+            ]
+        tracks = self._decode(payloads)
+        if include_leased and self._leases is not None:
+            with self._thread_lock:
+                tracks.extend(self._leases.tracks())
+        return tracks
+
+    def re_enqueue(self, items: List[Union[Track, QueuedTrack]]) -> int:
+        """楽曲を再度キューに戻す（末尾に追加）"""
+        return self.enqueue(items)
+
+    def max_cap(self) -> int:
+        """キューの最大容量を取得（別名）"""
+        return self.capacity()
+
+    def size(self) -> int:
+        """現在のキューサイズを取得
+
+        件数は整列済みの4バイト値のため、ロックを取らずに読み取る
+        （リクエストごとに数回呼ばれるため、取り出し側とロックを奪い合わないようにする）
+        """
+        self._expire_leases()
+        return self._count()
+
+    def capacity(self) -> int:
+        """キューの最大容量（スロット数）を取得"""
+        return self._capacity
+
+    def clear(self) -> int:
+        """キューをクリア
+
+        Returns:
+            int: クリア前のサイズ
+        """
+        with self._locked():
+            previous_size = self._count()
+            self._set_position(0, 0)
+            self._reset_index()
+
+        logger.info(f"Queue cleared, removed {previous_size} items")
+        self._low_watermark_listeners.publish(previous_size, 0)
+        return previous_size
+
+    def add_low_watermark_listener(
+        self, threshold: int, callback: Callable[[int], None]
+    ) -> None:
+        """キューサイズが閾値を下回ったときに呼び出すリスナーを登録
+
+        このプロセスでの取り出しのみを検知する（他プロセスの取り出しは補充ワーカーの
+        予備の確認間隔で検知する）
+        """
+        self._low_watermark_listeners.add(threshold, callback)
+
+    def remove_low_watermark_listener(self, callback: Callable[[int], None]) -> None:
+        """登録したリスナーを解除"""
+        self._low_watermark_listeners.remove(callback)
+
+    def stats(self) -> Dict[str, Any]:
+        """キューの統計情報を取得（カウンタは全プロセスで共有）"""
+        self._expire_leases()
+        with self._locked():
+            (
+                _, _, _, _, current_size,
+                enqueue_count, dequeue_count, dropped_count, duplicate_rejected,
+            ) = _HEADER.unpack_from(self._buf, 0)
+
+        with self._thread_lock:
+            lease_active = len(self._leases) if self._leases is not None else 0
+            leased_tracks = self._leases.leased_tracks if self._leases is not None else 0
+
+        return {
+            "backend": "shm",
+            "current_size": current_size,
+            "max_capacity": self._capacity,
+            "low_watermark": self._low_watermark,
+            "enqueue_count": enqueue_count,
+            "dequeue_count": dequeue_count,
+            "dropped_count": dropped_count,
+            "duplicate_rejected": duplicate_rejected,
+            "is_low": current_size <= self._low_watermark,
+            "utilization": round(current_size / self._capacity * 100, 2) if self._capacity > 0 else 0,
+            "lease_enabled": self._leases is not None,
+            "lease_ttl_s": self._leases.ttl_s if self._leases is not None else 0,
+            "lease_active": lease_active,
+            "leased_tracks": leased_tracks,
+            "lease_acked": self._lease_acked_count,
+            "lease_returned": self._lease_returned_count,
+        }
+
+    def try_acquire_worker_role(self) -> bool:
+        """補充ワーカーの担当権を取得（ホスト内で1プロセスのみ）
+
+        担当プロセスが終了するとOSがflockを解放し、別プロセスが引き継ぐ
+        """
+        if self._worker_lock_fd is not None:
+            return True
+
+        fd = os.open(self._worker_lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        self._worker_lock_fd = fd
+        logger.info(f"Acquired queue worker role (pid: {os.getpid()})")
+        return True
+
+    def close(self) -> None:
+        """共有メモリとロックファイルから切断（セグメントは残す）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._shm.close()
+        os.close(self._lock_fd)
+        if self._worker_lock_fd is not None:
+            os.close(self._worker_lock_fd)
+            self._worker_lock_fd = None
+
+    def unlink(self) -> None:
+        """共有メモリセグメントを削除"""
+        self._unlink_segment()
+
+    # ------------------------------------------------------------------
+    # 内部処理（_locked() 内で呼び出すこと）
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _attach(self, size: int) -> None:
+        try:
+            self._shm, self._track_disabled = _open_shared_memory(
+                name=self._name, create=True, size=size)
+        except FileExistsError:
+            self._shm, self._track_disabled = _open_shared_memory(name=self._name)
+        self._buf = self._shm.buf
+
+    def _unlink_segment(self) -> None:
+        if not self._track_disabled:
+            # Python 3.12以前の unlink() は登録の解除も行うため、このセグメントを登録し直してから削除する
+            resource_tracker.register(self._shm._name, "shared_memory")  # type: ignore[attr-defined]
+        self._shm.unlink()
+
+    def _head(self) -> int:
+        return struct.unpack_from("<I", self._buf, 12)[0]
+
+    def _count(self) -> int:
+        return struct.unpack_from("<I", self._buf, 16)[0]
+
+    def _set_position(self, head: int, count: int) -> None:
+        struct.pack_into("<II", self._buf, 12, head, count)
+
+    def _bump(
+        self, enqueue: int = 0, dequeue: int = 0, dropped: int = 0,
+        duplicate_rejected: int = 0,
+    ) -> None:
+        counters = list(struct.unpack_from("<QQQQ", self._buf, 20))
+        counters[0] += enqueue
+        counters[1] += dequeue
+        counters[2] += dropped
+        counters[3] += duplicate_rejected
+        struct.pack_into("<QQQQ", self._buf, 20, *counters)
+
+    def _slot_at(self, offset: int) -> int:
+        return (self._head() + offset) % self._capacity
+
+    def _slot_offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * self._slot_size
+
+    def _read_id(self, slot: int) -> str:
+        return str(self._read_id_bytes(slot), "utf-8")
+
+    def _read_id_bytes(self, slot: int) -> bytes:
+        base = self._slot_offset(slot)
+        id_len = self._buf[base]
+        id_start = base + _SLOT_HEADER.size
+        return self._buf[id_start:id_start + id_len].tobytes()
+
+    def _read_payload(self, slot: int) -> bytes:
+        base = self._slot_offset(slot)
+        _, payload_len = _SLOT_HEADER.unpack_from(self._buf, base)
+        payload_start = base + _SLOT_HEADER.size + _ID_MAX_BYTES
+        return self._buf[payload_start:payload_start + payload_len].tobytes()
+
+    def _write_slot(self, slot: int, track_id: bytes, payload: bytes) -> None:
+        base = self._slot_offset(slot)
+        _SLOT_HEADER.pack_into(self._buf, base, len(track_id), len(payload))
+        id_start = base + _SLOT_HEADER.size
+        payload_start = id_start + _ID_MAX_BYTES
+        self._buf[id_start:id_start + len(track_id)] = track_id
+        self._buf[payload_start:payload_start + len(payload)] = payload
+
+    def _copy_slot(self, src: int, dst: int) -> None:
+        src_base, dst_base = self._slot_offset(src), self._slot_offset(dst)
+        self._buf[dst_base:dst_base + self._slot_size] = (
+            self._buf[src_base:src_base + self._slot_size]
+        )
+
+    def _remove_slot(self, slot: int) -> None:
+        """指定スロットに先頭スロットを移して先頭を進める
+
+        索引の作り直しは呼び出し側が一括削除の後に _maybe_rebuild_index() で行う
+        """
+        head, count = self._head(), self._count()
+        removed = self._index_position(slot)
+        moved = self._index_position(head) if slot != head else None
+        if slot != head:
+            self._copy_slot(head, slot)
+        self._set_position((head + 1) % self._capacity, count - 1)
+
+        self._index_delete(removed)
+        if moved is not None:
+            self._set_index_entry(moved, slot + 1)
+
+    def _remove_slots(self, slots: Set[int]) -> None:
+        """複数スロットを削除（移動してくる先頭スロットも削除対象の場合を考慮）"""
+        pending = set(slots)
+        while pending:
+            slot = pending.pop()
+            head = self._head()
+            if slot != head and head in pending:
+                # 先頭も削除対象なので、移動後のスロットを改めて削除対象とする
+                pending.discard(head)
+                pending.add(slot)
+            self._remove_slot(slot)
+
+    def _slot_has_id(self, slot: int, track_id: bytes) -> bool:
+        """スロットがキュー内にあり、指定IDの楽曲を保持しているか"""
+        if (slot - self._head()) % self._capacity >= self._count():
+            return False
+        base = self._slot_offset(slot)
+        id_start = base + _SLOT_HEADER.size
+        return self._buf[id_start:id_start + self._buf[base]] == track_id
+
+    def _index_entry(self, position: int) -> int:
+        return _INDEX_ENTRY.unpack_from(self._buf, self._index_offset + position * _INDEX_ENTRY.size)[0]
+
+    def _set_index_entry(self, position: int, value: int) -> None:
+        _INDEX_ENTRY.pack_into(self._buf, self._index_offset + position * _INDEX_ENTRY.size, value)
+
+    def _index_probe(self, track_id: bytes) -> Iterator[Tuple[int, int]]:
+        """IDのハッシュ位置から空きエントリの手前までの (位置, 値) を返す"""
+        mask = self._index_mask
+        position = zlib.crc32(track_id) & mask
+        while True:
+            value = self._index_entry(position)
+            if value == 0:
+                return
+            yield position, value
+            position = (position + 1) & mask
+
+    def _has_id(self, track_id: bytes) -> bool:
+        return any(
+            value != _DELETED and self._slot_has_id(value - 1, track_id)
+            for _, value in self._index_probe(track_id)
+        )
+
+    def _index_position(self, slot: int) -> Optional[int]:
+        """スロットを指す索引エントリの位置"""
+        for position, value in self._index_probe(self._read_id_bytes(slot)):
+            if value == slot + 1:
+                return position
+        return None
+
+    def _index_add(self, track_id: bytes, slot: int) -> None:
+        mask = self._index_mask
+        position = zlib.crc32(track_id) & mask
+        while True:
+            value = self._index_entry(position)
+            if value == 0 or value == _DELETED:
+                break
+            position = (position + 1) & mask
+        if value == _DELETED:
+            self._set_tombstones(self._tombstones() - 1)
+        self._set_index_entry(position, slot + 1)
+
+    def _index_delete(self, position: Optional[int]) -> None:
+        if position is None:
+            return
+        self._set_index_entry(position, _DELETED)
+        self._set_tombstones(self._tombstones() + 1)
+
+    def _tombstones(self) -> int:
+        return struct.unpack_from("<I", self._buf, _TOMBSTONES_OFFSET)[0]
+
+    def _set_tombstones(self, tombstones: int) -> None:
+        struct.pack_into("<I", self._buf, _TOMBSTONES_OFFSET, tombstones)
+
+    def _maybe_rebuild_index(self) -> None:
+        """削除済みエントリが索引の1/4を超えたら作り直す（探索が長くならないよう空きを保つ）"""
+        if self._tombstones() > (self._index_mask + 1) // 4:
+            self._reset_index()
+
+    def _reset_index(self) -> None:
+        """索引を消去し、キュー内のスロットから作り直す"""
+        size = (self._index_mask + 1) * _INDEX_ENTRY.size
+        self._buf[self._index_offset:self._index_offset + size] = bytes(size)
+        self._set_tombstones(0)
+        head, capacity = self._head(), self._capacity
+        for offset in range(self._count()):
+            slot = (head + offset) % capacity
+            self._index_add(self._read_id_bytes(slot), slot)
+
+    def _serialize(self, items: List[QueuedTrack]) -> List[Tuple[bytes, bytes]]:
+        records = []
+        for item in items:
+            track_id = str(item.id).encode()
+            payload = item.to_json()
+            if len(track_id) > _ID_MAX_BYTES or len(payload) > self._payload_max:
+                logger.warning(
+                    f"Track {item.id} does not fit into a queue slot, skipping")
+                continue
+            records.append((track_id, payload))
+        return records
+
+    def _write_records(
+        self, records: List[Tuple[bytes, bytes]], reject_duplicates: bool, evict: bool
+    ) -> Tuple[int, int, int]:
+        """レコードを末尾に書き込む
+
+        Args:
+            records: (ID, ペイロード) のリスト
+            reject_duplicates: キュー内（および同一バッチ内）の重複IDを拒否するか
+            evict: 満杯時に最古のスロットを上書きするか（Falseなら追加を諦める）
+
+        Returns:
+            Tuple[int, int, int]: (追加件数, 重複拒否件数, 破棄件数)
+        """
+        added = rejected = dropped = 0
+
+        for track_id, payload in records:
+            # 書き込んだレコードも索引に載るため、同一バッチ内の重複も拒否される
+            if reject_duplicates and self._has_id(track_id):
+                rejected += 1
+                continue
+
+            head, count = self._head(), self._count()
+            if count >= self._capacity:
+                dropped += 1
+                if not evict:
+                    continue
+                self._index_delete(self._index_position(head))
+                head = (head + 1) % self._capacity
+                count -= 1
+
+            slot = (head + count) % self._capacity
+            self._write_slot(slot, track_id, payload)
+            self._set_position(head, count + 1)
+            self._index_add(track_id, slot)
+            added += 1
+
+        self._maybe_rebuild_index()
+        return added, rejected, dropped
+
+    def _decode(self, payloads: List[bytes]) -> List[QueuedTrack]:
+        tracks = []
+        for payload in payloads:
+            try:
+                tracks.append(QueuedTrack.from_json(payload))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Failed to decode queued track: {e}")
+        return tracks
+
+    def _expire_leases(self) -> None:
+        """期限切れリースの楽曲を共有キューに戻す"""
+        if self._leases is None:
+            return
+        with self._thread_lock:
+            expired = self._leases.expire()
+        if expired:
+            returned = self._return_tracks(expired)
+            logger.info(
+                f"Returned {returned}/{len(expired)} tracks from expired leases")
+
+    def _return_tracks(self, tracks: List[QueuedTrack]) -> int:
+        """リースから外れた楽曲を、既存IDと容量を考慮して共有キューに戻す"""
+        records = self._serialize(tracks)
+        with self._locked():
+            added, _, dropped = self._write_records(records, True, evict=False)
+            self._bump(dropped=dropped)
+            self._lease_returned_count += added
+        return added
+
+    def _check_low_watermark(self, current_size: int) -> None:
+        """低水位マークのチェックと警告出力（60秒間隔）"""
+        if current_size <= self._low_watermark:
+            current_time = time.time()
+            if current_time - self._last_warning_time >= 60:
+                logger.warning(
+                    f"Queue size ({current_size}) is below low watermark ({self._low_watermark}). "
+                    f"Consider triggering refill process."
+                )
+                self._last_warning_time = current_time
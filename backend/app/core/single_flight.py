@@ -0,0 +1,79 @@
+"""
+シングルフライトモジュール
+同じキーの非同期呼び出しが重なった場合に、実行中の1回の結果を共有する
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """実行中の呼び出しと、その結果を待っている呼び出し元の数"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """同じキーの同時呼び出しを1回の実行にまとめる
+
+    実行中の呼び出しがあれば新たに実行せず、その結果（例外を含む）を共有する。
+    完了した呼び出しの結果は保持しない（キャッシュではない）。
+    待っている呼び出し元がすべてキャンセルされた場合のみ実行中の処理もキャンセルする
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """同じキーの呼び出しが実行中ならその結果を待ち、なければ fn を実行
+
+        Args:
+            key: 同一の呼び出しとみなすキー
+            fn: 実行するコルーチン関数
+
+        Returns:
+            T: fn の結果（同時に呼び出した全員が同じオブジェクトを受け取る）
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self._executed += 1
+        else:
+            self._coalesced += 1
+            logger.debug(f"Coalesced with in-flight call: {key}")
+
+        flight.waiters += 1
+        try:
+            # 1人の呼び出し元のキャンセルが他の呼び出し元に波及しないようにする
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """実行回数とまとめた回数の統計を取得
+
+        Returns:
+            dict: 統計情報
+        """
+        return {
+            "executed": self._executed,
+            "coalesced": self._coalesced,
+            "in_flight": len(self._flights),
+        }
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,303 @@
+"""
+キュースナップショットモジュール
+キューの内容をディスクに保存し、再起動時に読み込んでキューを温めた状態で起動する
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..models.track import QueuedTrack, Track
+from .config import QueueConfig
+from .queue_backend import QueueBackend
+
+logger = logging.getLogger(__name__)
+
+# ジャーナルの行形式: "+<楽曲JSON>" は追加、"-<楽曲ID>" は削除
+_ADD = "+"
+_REMOVE = "-"
+
+
+class QueueSnapshotter:
+    """キューのスナップショットを保存・読み込みする
+
+    全体スナップショットは一時ファイルに書いてから置き換えることで原子的に保存し、
+    その間の保存では前回からの追加・削除のみを同じファイルに追記する。
+    追記が一定回数に達したら全体スナップショットで書き直してファイルを圧縮する
+
+    複数プロセスで起動した場合に同じスナップショットを各プロセスのキューへ重複して
+    読み込んだり、同じファイルへ同時に書き込んだりしないよう、読み込み・定期保存は
+    担当権（try_acquire_ownership）を持つ1プロセスのみが行う。
+    ファイルの読み書き自体も排他ロック（"<path>.lock"）の下で行う
+    """
+
+    def __init__(
+        self,
+        queue_manager: QueueBackend,
+        path: str,
+        full_every: Optional[int] = None,
+    ):
+        """スナップショッターを初期化
+
+        Args:
+            queue_manager: 対象のキューバックエンド
+            path: スナップショットファイルのパス
+            full_every: 差分追記を何回行うごとに全体スナップショットにするか
+                （None時は設定から取得）
+        """
+        self.queue_manager = queue_manager
+        self.path = path
+        self._full_every = max(
+            1, full_every if full_every is not None else QueueConfig.get_snapshot_full_every()
+        )
+        self._lock = threading.Lock()
+        self._owner_lock_path = f"{path}.owner.lock"
+        self._owner_lock_fd: Optional[int] = None
+        # 前回保存時点のキュー内の楽曲ID（None時は次回を全体スナップショットにする）
+        self._saved_ids: Optional[set] = None
+        self._saves_since_full = 0
+
+        self._full_count = 0
+        self._incremental_count = 0
+        self._total_save_ms = 0.0
+        self._last_save: Dict[str, Any] = {}
+        self._last_load: Dict[str, Any] = {}
+
+    def try_acquire_ownership(self) -> bool:
+        """スナップショットの読み込み・保存の担当権を取得
+
+        キューの補充ワーカー担当権を持ち、かつ "<path>.owner.lock" のflockを
+        取得できたプロセスのみが担当する。プロセス内キューは補充ワーカー担当権を
+        常に持つため、flockにより同じパスを使うプロセスのうち1つに絞られる。
+        補充ワーカー担当権を失った場合はflockを解放し、新しい担当プロセスに引き継ぐ
+
+        Returns:
+            bool: 担当権を持つ場合True
+        """
+        if not self.queue_manager.try_acquire_worker_role():
+            self.release_ownership()
+            return False
+        if self._owner_lock_fd is not None:
+            return True
+
+        self._ensure_directory()
+        fd = os.open(self._owner_lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        self._owner_lock_fd = fd
+        logger.info(f"Acquired queue snapshot ownership (pid: {os.getpid()})")
+        return True
+
+    def release_ownership(self) -> None:
+        """スナップショットの担当権を解放"""
+        if self._owner_lock_fd is None:
+            return
+        os.close(self._owner_lock_fd)
+        self._owner_lock_fd = None
+        # 担当が替わった後は他プロセスの書き込みを前提にできないため全体保存からやり直す
+        with self._lock:
+            self._saved_ids = None
+
+    def load(self) -> int:
+        """スナップショットを読み込んでキューに追加
+
+        途中で書き込みが途切れた行は読み飛ばす
+
+        Returns:
+            int: キューに追加した楽曲数
+        """
+        started = time.perf_counter()
+        try:
+            with self._file_lock(), open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            logger.info(f"No queue snapshot found at {self.path}")
+            return 0
+        except OSError as e:
+            logger.warning(f"Failed to read queue snapshot: {e}")
+            return 0
+
+        tracks: Dict[str, Track] = {}
+        skipped = 0
+        for line in lines:
+            try:
+                if line.startswith(_ADD):
+                    track = Track.model_validate_json(line[1:])
+                    # 再追加された楽曲は末尾に移す
+                    tracks.pop(str(track.id), None)
+                    tracks[str(track.id)] = track
+                elif line.startswith(_REMOVE):
+                    tracks.pop(line[1:], None)
+                elif line:
+                    skipped += 1
+            except ValueError:
+                skipped += 1
+
+        loaded = self.queue_manager.enqueue(list(tracks.values()), reject_duplicates=True)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self._last_load = {
+            "loaded_tracks": loaded,
+            "skipped_lines": skipped,
+            "duration_ms": round(elapsed_ms, 2),
+        }
+        logger.info(
+            f"Loaded {loaded} tracks from queue snapshot in {elapsed_ms:.1f}ms "
+            f"(skipped lines: {skipped})"
+        )
+        return loaded
+
+    def save(self, full: bool = False) -> Dict[str, Any]:
+        """キューの内容を保存
+
+        Args:
+            full: Trueの場合は差分にかかわらず全体スナップショットを保存
+
+        Returns:
+            dict: 保存結果（種別・書き込み件数・バイト数・所要時間）
+        """
+        with self._lock:
+            started = time.perf_counter()
+            # リース中の楽曲はack前にプロセスが落ちると失われるため、保存対象に含める
+            # （復元後に再配信される可能性はあるが、取りこぼすよりは重複を許容する）
+            tracks = self.queue_manager.snapshot(include_leased=True)
+            current_ids = {str(track.id) for track in tracks}
+
+            if (
+                full
+                or self._saved_ids is None
+                or self._saves_since_full >= self._full_every
+            ):
+                kind = "full"
+                lines = [_ADD + self._encode(track) for track in tracks]
+                written = self._write_full(lines)
+                self._saves_since_full = 0
+                self._full_count += 1
+            else:
+                kind = "incremental"
+                lines = [_REMOVE + track_id for track_id in self._saved_ids - current_ids]
+                lines.extend(
+                    _ADD + self._encode(track)
+                    for track in tracks
+                    if str(track.id) not in self._saved_ids
+                )
+                written = self._append(lines)
+                self._saves_since_full += 1
+                self._incremental_count += 1
+
+            self._saved_ids = current_ids
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._total_save_ms += elapsed_ms
+            self._last_save = {
+                "kind": kind,
+                "records": len(lines),
+                "bytes": written,
+                "duration_ms": round(elapsed_ms, 2),
+                "saved_at": time.time(),
+            }
+
+        logger.debug(
+            f"Saved {kind} queue snapshot: {len(lines)} records, {written} bytes "
+            f"in {elapsed_ms:.1f}ms"
+        )
+        return dict(self._last_save)
+
+    async def run_periodic(self, interval_s: float) -> None:
+        """一定間隔でスナップショットを保存（ファイル書き込みはスレッドで実行）
+
+        担当権（try_acquire_ownership）を持つプロセスのみが保存する
+
+        Args:
+            interval_s: 保存間隔（秒）
+        """
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                if self.try_acquire_ownership():
+                    await asyncio.to_thread(self.save)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to save queue snapshot: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """スナップショットの統計情報を取得
+
+        Returns:
+            dict: 保存・読み込みのコストを含む統計情報
+        """
+        try:
+            file_bytes = os.path.getsize(self.path)
+        except OSError:
+            file_bytes = 0
+
+        saves = self._full_count + self._incremental_count
+        return {
+            "path": self.path,
+            "file_bytes": file_bytes,
+            "full_saves": self._full_count,
+            "incremental_saves": self._incremental_count,
+            "avg_save_ms": round(self._total_save_ms / saves, 2) if saves else 0,
+            "last_save": dict(self._last_save),
+            "last_load": dict(self._last_load),
+        }
+
+    def _encode(self, track: QueuedTrack) -> str:
+        return track.to_json().decode("utf-8")
+
+    def _write_full(self, lines: List[str]) -> int:
+        """プロセスごとの一時ファイルに書き込んでから置き換える"""
+        data = self._join(lines)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._file_lock():
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        return len(data)
+
+    def _append(self, lines: List[str]) -> int:
+        if not lines:
+            return 0
+        data = self._join(lines)
+        with self._file_lock(), open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(data)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """スナップショットファイルの読み書きを他プロセスと排他する"""
+        self._ensure_directory()
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _ensure_directory(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _join(self, lines: List[str]) -> bytes:
+        return "".join(line + "\n" for line in lines).encode("utf-8")
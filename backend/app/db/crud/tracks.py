@@ -1,9 +1,10 @@
 """Track cache CRUD helpers."""
 from __future__ import annotations
 
-from typing import Optional
+from datetime import datetime
+from typing import Mapping, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import case, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import TrackCache
@@ -64,3 +65,55 @@ class TrackCacheCRUD:
         await session.flush()
         await session.refresh(track)
         return track
+
+    @staticmethod
+    async def list_stale(
+        session: AsyncSession,
+        *,
+        updated_before: datetime,
+        limit: int,
+    ) -> list[str]:
+        """Return external ids of rows not updated since ``updated_before``, oldest first."""
+        result = await session.execute(
+            select(TrackCache.external_id)
+            .where(TrackCache.updated_at < updated_before)  # type: ignore[arg-type, operator]
+            .order_by(TrackCache.updated_at, TrackCache.id)  # type: ignore[arg-type]
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def bulk_refresh_media(
+        session: AsyncSession,
+        *,
+        checked: Sequence[str],
+        refreshed: Mapping[str, tuple[str | None, str | None]],
+    ) -> int:
+        """Rewrite preview/artwork URLs for a batch of rows in one UPDATE statement.
+
+        ``refreshed`` maps external ids to their current ``(preview_url, artwork_url)``;
+        a ``None`` URL keeps the stored value. Every row in ``checked`` has its
+        ``updated_at`` bumped, so rows missing upstream are not revalidated on every run.
+        """
+        if not checked:
+            return 0
+        values: dict = {"updated_at": func.now()}
+        for column, index in (("preview_url", 0), ("artwork_url", 1)):
+            urls = {
+                external_id: media[index]
+                for external_id, media in refreshed.items()
+                if media[index]
+            }
+            if urls:
+                values[column] = case(
+                    urls,
+                    value=TrackCache.external_id,
+                    else_=getattr(TrackCache, column),
+                )
+        result = await session.execute(
+            update(TrackCache)
+            .where(TrackCache.external_id.in_(checked))  # type: ignore[attr-defined]
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount or 0
@@ -3,37 +3,51 @@
 アプリケーション全体で共有するシングルトンインスタンスを管理
 """
 
+import asyncio
 import logging
 from functools import lru_cache
 from typing import AsyncGenerator, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .core.queue import QueueManager, queue_self_check
+from .core.queue import queue_self_check
+from .core.config import QueueConfig, WorkerConfig
+from .core.queue_backend import QueueBackend, create_queue_backend
+from .core.snapshot import QueueSnapshotter
+from .services.track_refresh import TrackCacheRefresher
 from .services.worker import QueueReplenishmentWorker
 from .db.session import AsyncSessionMaker
 
 logger = logging.getLogger(__name__)
 
 # グローバルインスタンス
-_queue_manager: Optional[QueueManager] = None
+_queue_manager: Optional[QueueBackend] = None
 _worker: Optional[QueueReplenishmentWorker] = None
+_snapshotter: Optional[QueueSnapshotter] = None
+_snapshot_task: Optional[asyncio.Task] = None
+_track_refresher: Optional[TrackCacheRefresher] = None
+_track_refresh_task: Optional[asyncio.Task] = None
 
 
 @lru_cache()
-def get_queue_manager() -> QueueManager:
-    """QueueManagerのシングルトンインスタンスを取得
+def get_queue_manager() -> QueueBackend:
+    """キューバックエンドのシングルトンインスタンスを取得
+
+    QUEUE_BACKEND に応じてプロセス内キューまたは共有キューを生成する
 
     Returns:
-        QueueManager: キューマネージャーのインスタンス
+        QueueBackend: キューバックエンドのインスタンス
     """
     global _queue_manager
     if _queue_manager is None:
-        _queue_manager = QueueManager()
+        _queue_manager = create_queue_backend()
         logger.info("QueueManager singleton instance created")
 
-        # セルフチェック実行
-        if queue_self_check(_queue_manager):
+        # セルフチェック実行（共有キューに既存データがある場合は
+        # 他プロセスの楽曲を取り出さないようスキップ）
+        if _queue_manager.size() > 0:
+            logger.info("Queue already has data, skipping self-check")
+        elif queue_self_check(_queue_manager):
             logger.info("QueueManager self-check passed")
         else:
             logger.error("QueueManager self-check failed")
@@ -50,17 +64,46 @@ def get_worker() -> Optional[QueueReplenishmentWorker]:
     return _worker
 
 
+def get_snapshotter() -> Optional[QueueSnapshotter]:
+    """キュースナップショッターを取得
+
+    Returns:
+        Optional[QueueSnapshotter]: スナップショッター（無効時はNone）
+    """
+    return _snapshotter
+
+
+def get_track_refresher() -> Optional[TrackCacheRefresher]:
+    """楽曲キャッシュの一括更新ジョブを取得
+
+    Returns:
+        Optional[TrackCacheRefresher]: 一括更新ジョブ（無効時はNone）
+    """
+    return _track_refresher
+
+
 def initialize_dependencies() -> None:
     """依存関係の初期化
 
     アプリケーション起動時に呼び出して必要なインスタンスを作成
     """
-    global _worker
+    global _worker, _snapshotter, _track_refresher
 
     logger.info("Initializing application dependencies")
 
     # QueueManagerの初期化
     queue_manager = get_queue_manager()
+
+    # スナップショットから復元（共有キューに既存データがある場合はそれを使う）
+    # 複数プロセスで重複して読み込まないよう、担当権を取得したプロセスのみが読み込む
+    snapshot_path = QueueConfig.get_snapshot_path()
+    if snapshot_path:
+        _snapshotter = QueueSnapshotter(queue_manager, snapshot_path)
+        if not _snapshotter.try_acquire_ownership():
+            logger.info("Queue snapshot is owned by another process; skipping load")
+        elif queue_manager.size() == 0:
+            _snapshotter.load()
+
     stats = queue_manager.stats()
     logger.info(f"QueueManager initialized with stats: {stats}")
 
@@ -68,14 +111,30 @@ def initialize_dependencies() -> None:
     _worker = QueueReplenishmentWorker(queue_manager)
     logger.info("QueueReplenishmentWorker created")
 
+    # 楽曲キャッシュの一括更新（共有キューでは補充担当プロセスのみが実行）
+    if WorkerConfig.get_track_refresh_interval_s() > 0:
+        _track_refresher = TrackCacheRefresher(should_run=queue_manager.try_acquire_worker_role)
+
 
 async def start_background_tasks() -> None:
     """バックグラウンドタスクを開始"""
-    global _worker
+    global _worker, _snapshot_task, _track_refresh_task
     if _worker:
         await _worker.start()
         logger.info("Background worker started")
 
+    if _snapshotter:
+        _snapshot_task = asyncio.create_task(
+            _snapshotter.run_periodic(QueueConfig.get_snapshot_interval_s())
+        )
+        logger.info("Queue snapshot task started")
+
+    if _track_refresher:
+        _track_refresh_task = asyncio.create_task(
+            _track_refresher.run_periodic(WorkerConfig.get_track_refresh_interval_s())
+        )
+        logger.info("TrackCache refresh task started")
+
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI の依存性として AsyncSession を提供"""
@@ -88,21 +147,54 @@ def cleanup_dependencies() -> None:
 
     アプリケーション終了時にリソースをクリーンアップ
     """
-    global _queue_manager, _worker
+    global _queue_manager, _worker, _snapshotter, _track_refresher
 
     if _queue_manager is not None:
         stats = _queue_manager.stats()
         logger.info(f"Cleaning up QueueManager - final stats: {stats}")
+        # 共有バックエンドは接続を閉じる（共有データ自体は他プロセスのために残す）
+        close = getattr(_queue_manager, "close", None)
+        if callable(close):
+            close()
         _queue_manager = None
 
     if _worker is not None:
         logger.info("Cleaning up worker reference")
         _worker = None
 
+    if _snapshotter is not None:
+        _snapshotter.release_ownership()
+        _snapshotter = None
+    _track_refresher = None
+
 
 async def stop_background_tasks() -> None:
     """バックグラウンドタスクを停止"""
-    global _worker
+    global _worker, _snapshot_task, _track_refresh_task
     if _worker:
         await _worker.stop()
         logger.info("Background worker stopped")
+
+    if _snapshot_task is not None:
+        _snapshot_task.cancel()
+        try:
+            await _snapshot_task
+        except asyncio.CancelledError:
+            pass
+        _snapshot_task = None
+
+    if _track_refresh_task is not None:
+        _track_refresh_task.cancel()
+        try:
+            await _track_refresh_task
+        except asyncio.CancelledError:
+            pass
+        _track_refresh_task = None
+
+    # 終了時の全体スナップショット（担当権を持つプロセスのみ）
+    if _snapshotter and _snapshotter.try_acquire_ownership():
+        try:
+            result = await asyncio.to_thread(_snapshotter.save, True)
+            logger.info(f"Saved queue snapshot on shutdown: {result}")
+        except Exception as e:
+            logger.error(f"Failed to save queue snapshot on shutdown: {e}")
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 import time
 import logging
@@ -16,14 +16,18 @@ from .api.routes import (
 )
 from .dependencies import (
     get_queue_manager,
+    get_snapshotter,
+    get_track_refresher,
     get_worker,
     initialize_dependencies,
     cleanup_dependencies,
     start_background_tasks,
     stop_background_tasks
 )
-from .core.queue import QueueManager
+from .core.http import close_http_client, start_http_client
+from .core.queue_backend import QueueBackend
 from .core.rate_limit import global_rate_limiter
+from .services.itunes_api import shutdown_clean_executor
 from .services.suggestions import SuggestionsService, check_rate_limit
 from .models.suggestions import SuggestionsResponse
 from .db.session import dispose_engine
@@ -48,11 +52,15 @@ async def lifespan(app: FastAPI):
     config = SuggestionsConfig()
     global_rate_limiter.initialize(config.get_rate_limit_per_sec(), 1)
 
+    # iTunes API・Apple Music RSS への接続を使い回す共有HTTPクライアント
+    await start_http_client()
     await start_background_tasks()
     yield
     # 終了時
     logger.info("Shutting down otodoki2 API application")
     await stop_background_tasks()
+    shutdown_clean_executor()
+    await close_http_client()
     cleanup_dependencies()
     await dispose_engine()
 
@@ -127,13 +135,17 @@ def read_health():
 
 
 @app.get("/queue/stats")
-def get_queue_stats(queue_manager: QueueManager = Depends(get_queue_manager)):
+def get_queue_stats(queue_manager: QueueBackend = Depends(get_queue_manager)):
     """キューの統計情報を取得"""
-    return queue_manager.stats()
+    stats = queue_manager.stats()
+    snapshotter = get_snapshotter()
+    if snapshotter is not None:
+        stats["snapshot"] = snapshotter.stats()
+    return stats
 
 
 @app.get("/queue/health")
-def get_queue_health(queue_manager: QueueManager = Depends(get_queue_manager)):
+def get_queue_health(queue_manager: QueueBackend = Depends(get_queue_manager)):
     """キューの健全性チェック"""
     stats = queue_manager.stats()
     return {
@@ -151,7 +163,11 @@ def get_worker_stats():
     worker = get_worker()
     if worker is None:
         return {"error": "Worker not initialized"}
-    return worker.stats
+    stats = worker.stats
+    track_refresher = get_track_refresher()
+    if track_refresher is not None:
+        stats["track_refresh"] = track_refresher.stats()
+    return stats
 
 
 @app.post("/worker/trigger-refill")
@@ -172,14 +188,18 @@ async def trigger_refill():
 
 @app.get("/api/v1/tracks/suggestions", response_model=SuggestionsResponse)
 async def get_track_suggestions(
+    background_tasks: BackgroundTasks,
     limit: Optional[int] = Query(
         None, ge=1, le=50, description="返却する楽曲数（1-50）"),
     excludeIds: Optional[str] = Query(None, description="除外する楽曲IDのカンマ区切り文字列"),
-    queue_manager: QueueManager = Depends(get_queue_manager)
-) -> SuggestionsResponse:
+    wait_ms: Optional[int] = Query(
+        None, ge=0, description="楽曲がlimit件に満たない場合に補充を待つ最大時間（ミリ秒）"),
+    queue_manager: QueueBackend = Depends(get_queue_manager)
+) -> Response:
     """楽曲提供APIエンドポイント
 
     キューから指定された数の楽曲を取得し、excludeIdsで指定された楽曲を除外して返す。
+    wait_msを指定すると、キューが不足している場合に補充を待ってから返す（ロングポーリング）。
     必要に応じて補充ワーカーをトリガーする。
     """
     # レート制限チェック
@@ -219,12 +239,16 @@ async def get_track_suggestions(
         # SuggestionsServiceでリクエスト処理
         worker = get_worker()
         suggestions_service = SuggestionsService(queue_manager, worker)
-        response = await suggestions_service.get_suggestions(
+        # キュー投入時にシリアライズ済みの楽曲JSONを連結して返す
+        # （response_modelはAPIドキュメント用で、Responseを直接返すため再検証されない）
+        body = await suggestions_service.get_suggestions_json(
             validated_limit,
             exclude_ids,
+            background_tasks=background_tasks,
+            wait_ms=wait_ms,
         )
 
-        return response
+        return Response(content=body, media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error in get_track_suggestions: {e}")
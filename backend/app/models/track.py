@@ -3,7 +3,9 @@
 iTunes APIやキューシステムで使用する最小限のTrackモデル
 """
 
-from typing import Optional, Union
+import json
+import sys
+from typing import Any, Dict, Optional, Union
 from pydantic import BaseModel, Field
 
 
@@ -68,3 +70,150 @@ class Track(BaseModel):
             bool: preview_urlが存在すれば True
         """
         return bool(self.preview_url)
+
+
+class QueuedTrack:
+    """キュー保持用の軽量な楽曲レコード
+
+    pydanticモデルの代わりに__slots__のみを持つオブジェクトでキューに保持し、
+    メモリ使用量と生成コストを抑える。アーティスト名とジャンルはintern化して
+    同じ文字列を共有する。検証はTrackとして受け取った時点で済んでいるため、
+    APIの境界で to_track() によりTrackへ変換する
+    """
+
+    _FIELDS = (
+        "id", "title", "artist", "artwork_url", "preview_url",
+        "album", "duration_ms", "genre",
+    )
+    __slots__ = _FIELDS + ("_suggestion_json",)
+
+    def __init__(
+        self,
+        id: Union[str, int],
+        title: str,
+        artist: str,
+        artwork_url: Optional[str] = None,
+        preview_url: Optional[str] = None,
+        album: Optional[str] = None,
+        duration_ms: Optional[int] = None,
+        genre: Optional[str] = None,
+    ):
+        self.id = id
+        self.title = title
+        self.artist = sys.intern(artist)
+        self.artwork_url = artwork_url
+        self.preview_url = preview_url
+        self.album = album
+        self.duration_ms = duration_ms
+        self.genre = sys.intern(genre) if genre else genre
+        self._suggestion_json: Optional[bytes] = None
+
+    @classmethod
+    def from_track(cls, track: Track) -> "QueuedTrack":
+        """TrackからQueuedTrackを作成
+
+        Args:
+            track: 検証済みのTrack
+
+        Returns:
+            QueuedTrack: キュー保持用レコード
+        """
+        return cls(
+            track.id, track.title, track.artist, track.artwork_url,
+            track.preview_url, track.album, track.duration_ms, track.genre,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QueuedTrack":
+        """辞書（キューが書き出したJSON）からQueuedTrackを作成
+
+        Args:
+            data: Track情報の辞書
+
+        Returns:
+            QueuedTrack: キュー保持用レコード
+        """
+        return cls(**{name: data[name] for name in cls._FIELDS if name in data})
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> "QueuedTrack":
+        """to_json() で書き出したJSONからQueuedTrackを作成
+
+        Args:
+            data: JSON文字列またはバイト列
+
+        Returns:
+            QueuedTrack: キュー保持用レコード
+        """
+        return cls.from_dict(json.loads(data))
+
+    def to_track(self) -> Track:
+        """検証を省略してTrackに変換
+
+        Returns:
+            Track: Trackインスタンス
+        """
+        return Track.model_construct(**self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換
+
+        Returns:
+            dict: Track情報の辞書
+        """
+        return {name: getattr(self, name) for name in self._FIELDS}
+
+    def to_json(self) -> bytes:
+        """共有キューやスナップショットに保存するためのJSONに変換（None項目は省略）
+
+        Returns:
+            bytes: UTF-8のJSONバイト列
+        """
+        return json.dumps(
+            {name: getattr(self, name) for name in self._FIELDS
+             if getattr(self, name) is not None},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    def suggestion_json(self) -> bytes:
+        """楽曲提供APIのレスポンスに埋め込むJSON断片を取得（初回生成後はキャッシュ）
+
+        FastAPIがSuggestionsResponseをシリアライズした結果と同じバイト列になるよう、
+        全項目をフィールド順に出力する
+
+        Returns:
+            bytes: UTF-8のJSONバイト列
+        """
+        if self._suggestion_json is None:
+            self._suggestion_json = json.dumps(
+                {
+                    "id": self.id,
+                    "title": self.title,
+                    "artist": self.artist,
+                    "artwork_url": self.artwork_url,
+                    "preview_url": self.preview_url,
+                    "album": self.album,
+                    "duration_ms": self.duration_ms,
+                    "genre": self.genre,
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode("utf-8")
+        return self._suggestion_json
+
+    def is_valid_for_playback(self) -> bool:
+        """再生可能かチェック
+
+        Returns:
+            bool: preview_urlが存在すれば True
+        """
+        return bool(self.preview_url)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, QueuedTrack):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"QueuedTrack(id={self.id!r}, title={self.title!r}, artist={self.artist!r})"
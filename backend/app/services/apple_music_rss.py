@@ -4,6 +4,10 @@ from typing import Any, Dict, Optional
 
 import httpx
 
+from ..core.config import WorkerConfig
+from ..core.http import borrow_http_client
+from ..core.single_flight import SingleFlight
+
 
 class AppleMusicRSSClientError(RuntimeError):
     """Raised when the Apple Music RSS client fails to fetch data."""
@@ -14,27 +18,54 @@ class AppleMusicRSSClient:
 
     BASE_URL = "https://rss.applemarketingtools.com/api/v2"
 
+    # Concurrent requests for the same feed share one upstream call
+    # (shared by every client in the process).
+    _single_flight = SingleFlight()
+
     def __init__(
         self,
         timeout: float = 10.0,
         transport: Optional[httpx.AsyncBaseTransport] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        base_url: Optional[str] = None,
     ) -> None:
         self._timeout = timeout
+        # OTODOKI_APPLE_RSS_BASE_URL can point the client at a local stand-in server.
+        self._base_url = (base_url or WorkerConfig.get_apple_rss_base_url()).rstrip("/")
         self._transport = transport
+        # Falls back to the application's shared pooled client when not injected.
+        self._http_client = http_client
 
     async def get_top_songs(
         self, country: str = "jp", limit: int = 100
     ) -> Dict[str, Any]:
         """Fetch the most played songs from the Apple Music RSS feed."""
-        url = f"{self.BASE_URL}/{country}/music/most-played/{limit}/songs.json"
+        url = f"{self._base_url}/{country}/music/most-played/{limit}/songs.json"
+        return await self._single_flight.do(url, lambda: self._fetch(url))
+
+    @classmethod
+    def single_flight_stats(cls) -> Dict[str, Any]:
+        """Return how many feed requests were executed and coalesced."""
+        return cls._single_flight.stats()
 
+    async def _fetch(self, url: str) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient(
-                timeout=self._timeout,
-                follow_redirects=True,
-                transport=self._transport,
-            ) as client:
-                response = await client.get(url)
+            if self._transport is not None:
+                session = httpx.AsyncClient(
+                    timeout=self._timeout,
+                    follow_redirects=True,
+                    transport=self._transport,
+                )
+            else:
+                session = borrow_http_client(
+                    self._http_client,
+                    timeout=self._timeout,
+                    follow_redirects=True,
+                )
+            async with session as client:
+                response = await client.get(
+                    url, timeout=self._timeout, follow_redirects=True
+                )
                 response.raise_for_status()
                 return response.json()
         except httpx.HTTPError as exc:
@@ -0,0 +1,328 @@
+"""
+楽曲取り込みパイプラインモジュール
+キーワード生成 → iTunes検索 → クリーニング → キュー投入 を
+上限付きキューでつないだ段階ごとの非同期タスクとして実行する
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from ..models.track import Track
+
+logger = logging.getLogger(__name__)
+
+# 各段階の終了を後段に伝える番兵
+_DONE = object()
+
+
+class StageStats:
+    """パイプラインの1段階の処理件数と処理時間"""
+
+    def __init__(self, concurrency: int = 1):
+        self.concurrency = concurrency
+        self.processed = 0
+        self.produced = 0
+        self.errors = 0
+        self.busy_s = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "produced": self.produced,
+            "errors": self.errors,
+            "busy_s": round(self.busy_s, 3),
+            # 1タスクが処理に費やした時間あたりの処理件数
+            "throughput_per_s": (
+                round(self.processed / self.busy_s, 2) if self.busy_s > 0 else 0
+            ),
+        }
+
+
+class IngestionPipeline:
+    """段階ごとに並行数と上限付きキューを持つ楽曲取り込みパイプライン
+
+    keywords → fetchers（並行数 fetch_concurrency）→ cleaner → enqueuer の順に
+    上限付きの asyncio.Queue でつなぐ。後段が詰まると前段の put() が待たされるため、
+    キーワード生成やAPI呼び出しが消費を追い越して進みすぎない。
+    キーワード生成とiTunes検索・クリーニング・キュー投入は重なって実行され、
+    必要数を投入した時点で残りの段階を打ち切る。
+    整形済みで投入しなかった楽曲は最大 max_surplus 件・max_surplus_age_s 秒まで保持し、
+    次回の実行で先に投入する（重複の再確認は enqueue が投入の直前に行う）
+    """
+
+    def __init__(
+        self,
+        next_keyword: Callable[[], Awaitable[Optional[str]]],
+        fetch: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+        clean: Callable[[List[Dict[str, Any]]], Union[List[Track], Awaitable[List[Track]]]],
+        enqueue: Callable[[List[Track]], Union[int, Awaitable[int]]],
+        queue_size: int = 4,
+        max_surplus: int = 1000,
+        max_surplus_age_s: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """パイプラインを初期化
+
+        Args:
+            next_keyword: 次の検索キーワードを返すコルーチン関数（生成できなければNone）
+            fetch: キーワードでiTunes APIを検索するコルーチン関数
+            clean: 検索結果をTrackに整形・フィルタリングする関数
+                （コルーチン関数の場合は完了を待つ間に他の段階が進む）
+            enqueue: Trackをキューに追加し、追加件数を返す関数（コルーチン関数も可）
+            queue_size: 段階間のキューの上限
+            max_surplus: 次回の実行に回す整形済み楽曲の上限（超えた分は古いものから捨てる）
+            max_surplus_age_s: 次回の実行に回す楽曲を保持する期間（秒、過ぎたものは捨てる）
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self._next_keyword = next_keyword
+        self._fetch = fetch
+        self._clean = clean
+        self._enqueue = enqueue
+        self._queue_size = max(1, queue_size)
+        self._max_surplus = max(0, max_surplus)
+        self._max_surplus_age_s = max_surplus_age_s
+        self._clock = clock
+        # (保持を始めた時刻, 楽曲) のバッチを古い順に保持
+        self._surplus: List[Tuple[float, List[Track]]] = []
+
+        self._stages: Dict[str, StageStats] = {
+            "keywords": StageStats(),
+            "fetch": StageStats(),
+            "clean": StageStats(),
+            "enqueue": StageStats(),
+        }
+        self._runs = 0
+        self._last_run: Dict[str, Any] = {}
+
+    async def run(self, need: int, fetch_concurrency: int = 1, max_fetches: int = 3) -> int:
+        """必要数を投入するまでパイプラインを実行
+
+        Args:
+            need: キューに追加する楽曲数
+            fetch_concurrency: 同時に実行するiTunes検索の数
+            max_fetches: 生成を試みるキーワード数の上限（失敗も数える）
+
+        Returns:
+            int: キューに追加した楽曲数
+        """
+        if need <= 0:
+            return 0
+
+        fetch_concurrency = max(1, fetch_concurrency)
+        self._stages["fetch"].concurrency = fetch_concurrency
+        started = time.monotonic()
+
+        # 前回の実行で余った楽曲を先に投入し、足りない分だけ検索する
+        surplus = self._take_surplus()
+        carried = sum(len(tracks) for _, tracks in surplus)
+        filled = 0
+        for kept_at, tracks in surplus:
+            filled = await self._enqueue_batch(tracks, need, filled, kept_at)
+        if filled < need:
+            filled = await self._run_stages(need, filled, fetch_concurrency, max_fetches)
+
+        self._runs += 1
+        self._last_run = {
+            "need": need,
+            "filled": filled,
+            "carried_over": carried,
+            "surplus": self._surplus_size(),
+            "fetch_concurrency": fetch_concurrency,
+            "duration_s": round(time.monotonic() - started, 3),
+        }
+        return filled
+
+    def stats(self) -> Dict[str, Any]:
+        """段階ごとの処理件数・スループットを取得
+
+        Returns:
+            dict: 統計情報
+        """
+        return {
+            "runs": self._runs,
+            "queue_size": self._queue_size,
+            "surplus": self._surplus_size(),
+            "stages": {name: stage.to_dict() for name, stage in self._stages.items()},
+            "last_run": dict(self._last_run),
+        }
+
+    async def _run_stages(
+        self, need: int, filled: int, fetch_concurrency: int, max_fetches: int
+    ) -> int:
+        keywords: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        fetched: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        cleaned: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+
+        tasks = [
+            asyncio.create_task(self._produce_keywords(keywords, max_fetches, fetch_concurrency)),
+            *(
+                asyncio.create_task(self._fetch_worker(keywords, fetched))
+                for _ in range(fetch_concurrency)
+            ),
+            asyncio.create_task(self._clean_worker(fetched, cleaned, fetch_concurrency)),
+        ]
+        try:
+            return await self._enqueue_worker(cleaned, need, filled)
+        finally:
+            # 必要数に達した場合は生成・検索中の段階を打ち切る
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # 整形済みで投入を待っていた楽曲は捨てずに次回の実行に回す
+            while not cleaned.empty():
+                tracks = cleaned.get_nowait()
+                if tracks is not _DONE:
+                    self._keep_surplus(tracks)
+
+    async def _produce_keywords(
+        self, keywords: asyncio.Queue, max_fetches: int, fetch_concurrency: int
+    ) -> None:
+        stage = self._stages["keywords"]
+        for _ in range(max_fetches):
+            started = time.monotonic()
+            try:
+                keyword = await self._next_keyword()
+            except Exception as e:
+                logger.warning(f"Keyword generation failed: {e}")
+                stage.errors += 1
+                keyword = None
+            finally:
+                stage.processed += 1
+                stage.busy_s += time.monotonic() - started
+
+            if keyword is None:
+                continue
+            stage.produced += 1
+            await keywords.put(keyword)
+
+        # 打ち切り（キャンセル）時は後段も同時にキャンセルされるため、番兵は正常終了時のみ送る
+        for _ in range(fetch_concurrency):
+            await keywords.put(_DONE)
+
+    async def _fetch_worker(self, keywords: asyncio.Queue, fetched: asyncio.Queue) -> None:
+        stage = self._stages["fetch"]
+        while True:
+            keyword = await keywords.get()
+            if keyword is _DONE:
+                break
+
+            started = time.monotonic()
+            try:
+                raw_tracks = await self._fetch(keyword)
+            except Exception as e:
+                logger.warning(f"Failed to fetch tracks with keyword {keyword}: {e}")
+                stage.errors += 1
+                raw_tracks = []
+            finally:
+                stage.processed += 1
+                stage.busy_s += time.monotonic() - started
+
+            if not raw_tracks:
+                logger.info(f"キーワード '{keyword}' でトラックが見つかりませんでした。")
+                continue
+            stage.produced += 1
+            await fetched.put((keyword, raw_tracks))
+
+        await fetched.put(_DONE)
+
+    async def _clean_worker(
+        self, fetched: asyncio.Queue, cleaned: asyncio.Queue, fetch_concurrency: int
+    ) -> None:
+        stage = self._stages["clean"]
+        remaining = fetch_concurrency
+        while remaining:
+            item = await fetched.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+
+            keyword, raw_tracks = item
+            started = time.monotonic()
+            try:
+                tracks = self._clean(raw_tracks)
+                if inspect.isawaitable(tracks):
+                    tracks = await tracks
+            except Exception as e:
+                logger.warning(f"Failed to clean tracks for keyword {keyword}: {e}")
+                stage.errors += 1
+                tracks = []
+            finally:
+                stage.processed += 1
+                stage.busy_s += time.monotonic() - started
+
+            if not tracks:
+                logger.info(f"キーワード '{keyword}' で有効なトラックが見つかりませんでした。")
+                continue
+            stage.produced += 1
+            await cleaned.put(tracks)
+
+        await cleaned.put(_DONE)
+
+    async def _enqueue_worker(self, cleaned: asyncio.Queue, need: int, filled: int) -> int:
+        while filled < need:
+            tracks = await cleaned.get()
+            if tracks is _DONE:
+                break
+            filled = await self._enqueue_batch(tracks, need, filled)
+        return filled
+
+    async def _enqueue_batch(
+        self, tracks: List[Track], need: int, filled: int, kept_at: Optional[float] = None
+    ) -> int:
+        """必要数に達するまで楽曲を投入し、余った楽曲は次回の実行に回す（kept_at は持ち越した楽曲の保持開始時刻）"""
+        stage = self._stages["enqueue"]
+        while tracks and filled < need:
+            # キュー内の重複で拒否された分は、同じバッチの残りから補う
+            chunk, tracks = tracks[:need - filled], tracks[need - filled:]
+            started = time.monotonic()
+            try:
+                added = self._enqueue(chunk)
+                if inspect.isawaitable(added):
+                    added = await added
+            except Exception as e:
+                logger.warning(f"Failed to enqueue tracks: {e}")
+                stage.errors += 1
+                added = 0
+            finally:
+                stage.processed += 1
+                stage.busy_s += time.monotonic() - started
+
+            filled += added
+            stage.produced += added
+            logger.info(f"Added {added} tracks to queue (total filled: {filled}/{need})")
+
+        self._keep_surplus(tracks, kept_at)
+        return filled
+
+    def _keep_surplus(self, tracks: List[Track], kept_at: Optional[float] = None) -> None:
+        if not tracks:
+            return
+        self._surplus.append((self._clock() if kept_at is None else kept_at, tracks))
+        self._surplus.sort(key=lambda batch: batch[0])
+        excess = self._surplus_size() - self._max_surplus
+        while excess > 0:
+            # 古い検索結果から捨てる
+            oldest_at, oldest = self._surplus[0]
+            if len(oldest) <= excess:
+                self._surplus.pop(0)
+                excess -= len(oldest)
+            else:
+                self._surplus[0] = (oldest_at, oldest[excess:])
+                excess = 0
+
+    def _take_surplus(self) -> List[Tuple[float, List[Track]]]:
+        """保持している楽曲を取り出す（保持期間を過ぎたものは捨てる）"""
+        surplus, self._surplus = self._surplus, []
+        cutoff = self._clock() - self._max_surplus_age_s
+        fresh = [(kept_at, tracks) for kept_at, tracks in surplus if kept_at >= cutoff]
+        expired = sum(len(tracks) for kept_at, tracks in surplus if kept_at < cutoff)
+        if expired:
+            logger.info(f"Discarded {expired} surplus tracks kept longer than {self._max_surplus_age_s:.0f}s")
+        return fresh
+
+    def _surplus_size(self) -> int:
+        return sum(len(tracks) for _, tracks in self._surplus)
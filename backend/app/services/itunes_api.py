@@ -6,16 +6,164 @@ iTunes Search API統合モジュール
 import asyncio
 import logging
 import random
-from typing import List, Dict, Any, Optional, Set
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Sequence, Set, Tuple
 
 import httpx
 
 from ..models.track import Track
 from ..core.config import WorkerConfig
+from ..core.dedup import SlidingWindowDedup
+from ..core.hedging import HedgeDeclined, RequestHedger
+from ..core.http import borrow_http_client
+from ..core.rate_limit import AdaptiveRateLimiter
+from ..core.single_flight import SingleFlight
+from .search_cache import SearchCache, normalize_search_params
+from .search_stream import SearchResultParser
+from .song_signature import song_signature
 
 logger = logging.getLogger(__name__)
 
+# search_tracks のすべての呼び出し元で共有する送信レート制限器
+_search_rate_limiter: Optional[AdaptiveRateLimiter] = None
+
+# 検索結果の整形処理をイベントループの外で実行するプール（inline の場合は作らない）
+_clean_executor: Optional[Executor] = None
+
+# 整形済みの候補（重複排除インデックスでの trackId と、曲名・アーティスト名のシグネチャの
+# ビット位置、Track）
+_Candidate = Tuple[Tuple[int, ...], Tuple[int, ...], Track]
+
+
+def get_search_rate_limiter() -> AdaptiveRateLimiter:
+    """iTunes Search APIへの送信レート制限器を取得（プロセス内で共有）
+
+    Returns:
+        AdaptiveRateLimiter: 送信レート制限器
+    """
+    global _search_rate_limiter
+    if _search_rate_limiter is None:
+        _search_rate_limiter = AdaptiveRateLimiter(
+            initial_rate=WorkerConfig.get_itunes_rate_initial(),
+            min_rate=WorkerConfig.get_itunes_rate_min(),
+            max_rate=WorkerConfig.get_itunes_rate_max(),
+            max_concurrency=WorkerConfig.get_itunes_max_concurrency(),
+            latency_target_s=WorkerConfig.get_http_timeout_s() / 2,
+        )
+    return _search_rate_limiter
+
+
+def get_clean_executor() -> Optional[Executor]:
+    """検索結果の整形処理に使うプールを取得（プロセス内で共有）
+
+    Returns:
+        Optional[Executor]: スレッドまたはプロセスのプール（inline の場合はNone）
+    """
+    global _clean_executor
+    if _clean_executor is None:
+        mode = WorkerConfig.get_clean_executor()
+        workers = WorkerConfig.get_clean_workers()
+        if mode == "thread":
+            _clean_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="track-clean")
+        elif mode == "process":
+            _clean_executor = ProcessPoolExecutor(max_workers=workers)
+    return _clean_executor
+
+
+def shutdown_clean_executor() -> None:
+    """整形処理のプールを終了（アプリケーション終了時）"""
+    global _clean_executor
+    if _clean_executor is not None:
+        _clean_executor.shutdown(wait=False, cancel_futures=True)
+        _clean_executor = None
+        logger.info("Track clean executor shut down")
+
+
+def _optimize_artwork_url(artwork_url: Optional[str]) -> str:
+    """アートワークURLを高解像度に最適化
+
+    Args:
+        artwork_url: 元のアートワークURL
+
+    Returns:
+        str: 最適化されたURL
+    """
+    if artwork_url and "100x100" in artwork_url:
+        # 100x100を600x600に変更
+        return artwork_url.replace("100x100", "600x600")
+    return artwork_url if artwork_url else ""
+
+
+def _prepare_tracks(
+    raw_tracks: List[Dict[str, Any]], hasher: Callable[[str], Tuple[int, ...]]
+) -> Tuple[List[_Candidate], int]:
+    """検索結果の検証・正規化・Trackの作成と、重複排除キーのハッシュ計算
+
+    重複排除インデックスの状態は参照しないため、スレッドやプロセスのプールでも実行できる
+
+    Args:
+        raw_tracks: iTunes APIからの生データ
+        hasher: 重複排除キーをビット位置に変換する関数（SlidingWindowDedup.hasher()）
+
+    Returns:
+        Tuple[List[_Candidate], int]: 整形済みの候補と、必須フィールドの不足などで除外した件数
+    """
+    candidates: List[_Candidate] = []
+    skipped_count = 0
+
+    for raw_track in raw_tracks:
+        try:
+            # 必須フィールドのチェック
+            track_id: Optional[Any] = raw_track.get("trackId")
+            track_name: Optional[str] = raw_track.get("trackName")
+            artist_name: Optional[str] = raw_track.get("artistName")
+            preview_url: Optional[str] = raw_track.get("previewUrl")
+            artwork_url: Optional[str] = raw_track.get("artworkUrl100")
+
+            if not all([track_id, track_name, artist_name, preview_url, artwork_url]):
+                skipped_count += 1
+                continue
+
+            track_id_str = str(track_id)
+
+            # 別アルバム・別エディションの同じ曲を検出するためのシグネチャ（title + artistベース）
+            # 正規化：NFKC・小文字化、リマスター表記やfeat.などの装飾の除去、空白・記号の除去
+            signature = song_signature(track_name, artist_name)
+
+            # Trackオブジェクト作成（アートワークURLは高解像度化）
+            track = Track(
+                id=track_id_str,
+                title=track_name if track_name else "",
+                artist=artist_name if artist_name else "",
+                artwork_url=_optimize_artwork_url(artwork_url if artwork_url else ""),
+                preview_url=preview_url,
+                album=raw_track.get("collectionName"),
+                duration_ms=raw_track.get("trackTimeMillis"),
+                genre=raw_track.get("primaryGenreName")
+            )
+
+            candidates.append((
+                hasher(f"id:{track_id_str}"),
+                hasher(f"sig:{signature}"),
+                track,
+            ))
+
+        except Exception as e:
+            logger.warning(f"Failed to process track data: {e}")
+            skipped_count += 1
+            continue
+
+    return candidates, skipped_count
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After ヘッダー（秒数形式）を秒に変換"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except (TypeError, ValueError):
+        return None
+
 
 class iTunesApiClient:
     """iTunes Search APIクライアント
@@ -23,10 +171,44 @@ class iTunesApiClient:
     楽曲データの検索、取得、整形機能を提供する
     """
 
-    def __init__(self):
-        """クライアントを初期化"""
+    # 同じパラメータの同時検索を1回のリクエストにまとめる（プロセス内のすべてのクライアントで共有）
+    _single_flight = SingleFlight()
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[SearchCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        hedger: Optional[RequestHedger] = None,
+        clean_executor: Optional[Executor] = None,
+    ):
+        """クライアントを初期化
+
+        Args:
+            http_client: リクエストに使うHTTPクライアント
+                （未指定の場合はアプリケーションの共有クライアントを使う）
+            cache: 検索結果キャッシュ（未指定の場合は設定値から作成、TTLが0なら無効）
+            rate_limiter: 送信レート制限器（未指定の場合はプロセス内で共有する制限器を使う）
+            hedger: ヘッジリクエストの設定（未指定の場合は設定値から作成、予算が0なら無効）
+            clean_executor: 整形処理を実行するプール（未指定の場合はプロセス内で共有するプールを使う）
+        """
         self.config = WorkerConfig()
-        self.base_url = "https://itunes.apple.com/search"
+        self.http_client = http_client
+        if cache is None and self.config.get_search_cache_ttl_s() > 0:
+            cache = SearchCache(
+                max_entries=self.config.get_search_cache_max_entries(),
+                ttl_s=self.config.get_search_cache_ttl_s(),
+                path=self.config.get_search_cache_path(),
+            )
+        self.cache: Optional[SearchCache] = cache
+        self.rate_limiter = rate_limiter or get_search_rate_limiter()
+        self.clean_executor = clean_executor if clean_executor is not None else get_clean_executor()
+        self.hedger = hedger or RequestHedger(
+            percentile=self.config.get_hedge_percentile(),
+            budget_pct=self.config.get_hedge_budget_pct(),
+        )
+        self.base_url = self.config.get_itunes_search_url()
+        self.lookup_url = self.config.get_itunes_lookup_url()
         self.timeout = httpx.Timeout(
             connect=2.0,
             read=self.config.get_http_timeout_s(),
@@ -34,12 +216,13 @@ class iTunesApiClient:
             pool=5.0
         )
 
-        # 重複排除用のIDセット（最近取得したトラックID）
-        self._recent_track_ids: Set[str] = set()
-        # 別アルバムの同じ曲を検出するための(title, artist)のセット
-        self._recent_track_signatures: Set[tuple[str, str]] = set()
-        self._track_id_cleanup_interval = timedelta(minutes=1) # 1分間に変更
-        self._last_cleanup = datetime.now()
+        # 重複排除用のインデックス（一定期間内に取得したトラックIDと、
+        # 別アルバムの同じ曲を検出するための(title, artist)のシグネチャ）
+        self._recent_tracks = SlidingWindowDedup(
+            window_s=self.config.get_dedup_window_s(),
+            capacity=self.config.get_dedup_capacity(),
+            fp_rate=self.config.get_dedup_fp_rate(),
+        )
 
         logger.info("iTunes API client initialized")
 
@@ -91,27 +274,86 @@ class iTunesApiClient:
 
         term_for_log = params.get("term", "[no term]")
 
+        # 同じパラメータの検索はキャッシュから返す（整形・重複排除は呼び出し側で同様に行う）
+        if self.cache is not None:
+            cached = self.cache.get(params)
+            if cached is not None:
+                logger.info(f"iTunes API cache hit: term='{term_for_log}', {len(cached)} tracks")
+                return cached
+
+        # 同じパラメータの検索が実行中なら、新たにリクエストせずその結果を共有する
+        results = await self._single_flight.do(
+            normalize_search_params(params),
+            lambda: self._request_with_retries(params, term_for_log),
+        )
+        return list(results)
+
+    @classmethod
+    def single_flight_stats(cls) -> Dict[str, Any]:
+        """検索リクエストの実行回数とまとめた回数を取得
+
+        Returns:
+            Dict[str, Any]: 統計情報
+        """
+        return cls._single_flight.stats()
+
+    async def lookup_tracks(self, track_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """iTunes Lookup APIで楽曲IDをまとめて照会
+
+        検索と同じ送信レート制限器を通し、キャッシュ・ヘッジ・リトライは行わない
+
+        Args:
+            track_ids: 楽曲ID（1回あたり最大200件）
+
+        Returns:
+            List[Dict[str, Any]]: 見つかった楽曲データ（配信終了などで見つからないIDは含まれない）
+
+        Raises:
+            httpx.HTTPError: API呼び出しエラー（スロットリングを含む成功以外の応答）
+        """
+        if not track_ids:
+            return []
+        params = {
+            "id": ",".join(track_ids[:200]),
+            "country": self.config.get_country().lower(),
+        }
+        response, results = await self._send_once(params, url=self.lookup_url)
+        response.raise_for_status()
+        return results or []
+
+    async def _request_with_retries(self, params: Dict[str, Any], term_for_log: str) -> List[Dict[str, Any]]:
+        """リトライ付きでiTunes Search APIを呼び出し、成功した結果をキャッシュに保存"""
         # リトライロジック付きでAPIコール
         retry_count = 0
         max_retries = self.config.get_retry_max()
 
         while retry_count <= max_retries:
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    logger.debug(f"Searching iTunes API with params: {params}")
-                    response = await client.get(self.base_url, params=params)
-
-                    # 4xxエラーはリトライしない
-                    if 400 <= response.status_code < 500:
-                        logger.warning(f"iTunes API 4xx error: {response.status_code} for term '{term_for_log}'")
+                # 応答が遅れた場合は同じリクエストをもう1本送り、先に返った応答を使う
+                response, results = await self.hedger.run(
+                    lambda hedge: self._send_once(params, hedge=hedge))
+
+                # スロットリングは制限器が減速（Retry-Afterがあればその時刻まで停止）してからリトライ
+                if response.status_code in AdaptiveRateLimiter.THROTTLE_STATUSES:
+                    retry_count += 1
+                    logger.warning(
+                        f"iTunes API throttled: {response.status_code} for term '{term_for_log}' "
+                        f"(attempt {retry_count}/{max_retries + 1})")
+                    if retry_count > max_retries:
                         return []
+                    continue
 
-                    response.raise_for_status()
-                    data = response.json()
+                # 4xxエラーはリトライしない
+                if 400 <= response.status_code < 500:
+                    logger.warning(f"iTunes API 4xx error: {response.status_code} for term '{term_for_log}'")
+                    return []
 
-                    results = data.get("results", [])
-                    logger.info(f"iTunes API success: term='{term_for_log}', found {len(results)} tracks")
-                    return results
+                response.raise_for_status()
+                results = results or []
+                logger.info(f"iTunes API success: term='{term_for_log}', found {len(results)} tracks")
+                if self.cache is not None:
+                    self.cache.set(params, results)
+                return results
 
             except httpx.TimeoutException as e:
                 retry_count += 1
@@ -149,72 +391,182 @@ class iTunesApiClient:
 
         return []
 
-    def clean_and_filter_tracks(self, raw_tracks: List[Dict[str, Any]]) -> List[Track]:
+    async def _send_once(
+        self, params: Dict[str, Any], hedge: bool = False, url: Optional[str] = None
+    ) -> Tuple[httpx.Response, Optional[List[Dict[str, Any]]]]:
+        """送信レート制限器を通してiTunes Search APIに1回リクエスト
+
+        送信レートと同時実行数は応答に応じて制限器が調整する（AIMD）。
+        ヘッジは送信枠を待たず、すぐに送れない場合は送らない。
+        成功した応答の本文は受信しながら解析し、整形に使うフィールドだけを残す
+
+        Args:
+            params: 検索パラメータ
+            hedge: ヘッジとして送るリクエストか
+            url: 送信先のURL（未指定の場合は検索APIのURL）
+
+        Returns:
+            Tuple[httpx.Response, Optional[List[Dict[str, Any]]]]:
+                応答と検索結果（成功以外の応答ではNone）
+
+        Raises:
+            HedgeDeclined: ヘッジをすぐに送れない場合
+        """
+        if not hedge:
+            await self.rate_limiter.acquire()
+        elif not self.rate_limiter.try_acquire():
+            raise HedgeDeclined()
+
+        started = time.monotonic()
+        status_code: Optional[int] = None
+        retry_after: Optional[float] = None
+        cancelled = False
+        try:
+            async with borrow_http_client(self.http_client, timeout=self.timeout) as client:
+                logger.debug(f"Searching iTunes API with params: {params} (hedge={hedge})")
+                async with client.stream(
+                    "GET", url or self.base_url, params=params, timeout=self.timeout
+                ) as response:
+                    status_code = response.status_code
+                    if not response.is_success:
+                        # エラー応答は小さいため読み切って接続を再利用できるようにする
+                        await response.aread()
+                        if status_code in AdaptiveRateLimiter.THROTTLE_STATUSES:
+                            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                        return response, None
+
+                    parser = SearchResultParser()
+                    results: List[Dict[str, Any]] = []
+                    async for chunk in response.aiter_bytes():
+                        results.extend(parser.feed(chunk))
+                    results.extend(parser.close())
+            return response, results
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if cancelled:
+                # ヘッジで負けたリクエストのキャンセルは上流の輻輳として扱わない
+                self.rate_limiter.abandon()
+            else:
+                self.rate_limiter.release(status_code, time.monotonic() - started, retry_after)
+
+    def clean_and_filter_tracks(
+        self, raw_tracks: List[Dict[str, Any]], record_seen: bool = True
+    ) -> List[Track]:
         """iTunes APIの生データを整形し、重複排除とフィルタリングを行う
 
         Args:
             raw_tracks: iTunes APIからの生データ
+            record_seen: Trueの場合は残った楽曲を重複排除インデックスに記録する
+                （Falseの場合は確認のみ行い、使った楽曲を mark_tracks_seen() で記録する）
 
         Returns:
             List[Track]: 整形済みTrackオブジェクトのリスト
         """
-        cleaned_tracks = []
-        skipped_count = 0
-        duplicate_count = 0
+        candidates, skipped_count = _prepare_tracks(raw_tracks, self._recent_tracks.hasher())
+        return self._filter_duplicates(candidates, skipped_count, len(raw_tracks), record_seen)
 
-        for raw_track in raw_tracks:
-            try:
-                # 必須フィールドのチェック
-                track_id: Optional[Any] = raw_track.get("trackId")
-                track_name: Optional[str] = raw_track.get("trackName")
-                artist_name: Optional[str] = raw_track.get("artistName")
-                preview_url: Optional[str] = raw_track.get("previewUrl")
-                artwork_url: Optional[str] = raw_track.get("artworkUrl100")
-
-                if not all([track_id, track_name, artist_name, preview_url, artwork_url]):
-                    skipped_count += 1
-                    continue
+    async def clean_and_filter_tracks_async(
+        self, raw_tracks: List[Dict[str, Any]], record_seen: bool = True
+    ) -> List[Track]:
+        """clean_and_filter_tracks の整形処理をプールで実行する版
 
-                # 重複チェック（trackIdベース）
-                track_id_str = str(track_id)
-                if track_id_str in self._recent_track_ids:
-                    duplicate_count += 1
-                    continue
+        検証・正規化・Trackの作成と重複排除キーのハッシュ計算はスレッドまたはプロセスの
+        プールで実行し、重複排除インデックスの参照と更新はイベントループ上で行う
+        （OTODOKI_CLEAN_EXECUTOR が inline の場合はイベントループ上ですべて実行）
 
-                # 別アルバムの同じ曲を検出（title + artistベース）
-                # 正規化：小文字化、前後の空白削除
-                normalized_title = track_name.strip().lower()
-                normalized_artist = artist_name.strip().lower()
-                track_signature = (normalized_title, normalized_artist)
-                
-                if track_signature in self._recent_track_signatures:
-                    duplicate_count += 1
-                    logger.debug(f"Skipped duplicate song from different album: '{track_name}' by '{artist_name}'")
-                    continue
+        Args:
+            raw_tracks: iTunes APIからの生データ
+            record_seen: Trueの場合は残った楽曲を重複排除インデックスに記録する
 
-                # アートワークURLの高解像度化
-                optimized_artwork_url = self._optimize_artwork_url(artwork_url if artwork_url else "")
-
-                # Trackオブジェクト作成
-                track = Track(
-                    id=track_id_str,
-                    title=track_name if track_name else "",
-                    artist=artist_name if artist_name else "",
-                    artwork_url=optimized_artwork_url,
-                    preview_url=preview_url,
-                    album=raw_track.get("collectionName"),
-                    duration_ms=raw_track.get("trackTimeMillis"),
-                    genre=raw_track.get("primaryGenreName")
-                )
-
-                cleaned_tracks.append(track)
-                self._recent_track_ids.add(track_id_str)
-                self._recent_track_signatures.add(track_signature)
+        Returns:
+            List[Track]: 整形済みTrackオブジェクトのリスト
+        """
+        executor = self.clean_executor
+        if executor is None or not raw_tracks:
+            return self.clean_and_filter_tracks(raw_tracks, record_seen)
 
-            except Exception as e:
-                logger.warning(f"Failed to process track data: {e}")
-                skipped_count += 1
+        loop = asyncio.get_running_loop()
+        candidates, skipped_count = await loop.run_in_executor(
+            executor, _prepare_tracks, raw_tracks, self._recent_tracks.hasher())
+        return self._filter_duplicates(candidates, skipped_count, len(raw_tracks), record_seen)
+
+    def filter_unseen_tracks(self, tracks: List[Track]) -> List[Track]:
+        """重複排除インデックスに記録済みの楽曲と、リスト内で重複する楽曲を除く
+
+        clean_and_filter_tracks(record_seen=False) の後、キューへ投入する直前に
+        もう一度確認するために使う（同時に整形した別の検索結果や、前回の実行から
+        持ち越した楽曲が、その間に記録された楽曲と重複している場合があるため）
+
+        Args:
+            tracks: 確認する楽曲
+
+        Returns:
+            List[Track]: 未記録の楽曲（元の順序）
+        """
+        hasher = self._recent_tracks.hasher()
+        unseen = []
+        batch_keys: Set[Tuple[int, ...]] = set()
+        for track in tracks:
+            keys = (hasher(f"id:{track.id}"), hasher(f"sig:{song_signature(track.title, track.artist)}"))
+            if any(key in batch_keys or self._recent_tracks.contains_positions(key) for key in keys):
                 continue
+            batch_keys.update(keys)
+            unseen.append(track)
+        if len(unseen) < len(tracks):
+            logger.info(f"Skipped {len(tracks) - len(unseen)} tracks seen since cleaning")
+        return unseen
+
+    def mark_tracks_seen(self, tracks: List[Track]) -> None:
+        """楽曲を重複排除インデックスに記録
+
+        clean_and_filter_tracks(record_seen=False) で取得した楽曲のうち、
+        実際にキューへ追加したものだけを記録するために使う
+
+        Args:
+            tracks: 記録する楽曲
+        """
+        hasher = self._recent_tracks.hasher()
+        for track in tracks:
+            self._recent_tracks.add_positions(hasher(f"id:{track.id}"))
+            self._recent_tracks.add_positions(hasher(f"sig:{song_signature(track.title, track.artist)}"))
+
+    def _filter_duplicates(
+        self,
+        candidates: List[_Candidate],
+        skipped_count: int,
+        raw_count: int,
+        record_seen: bool = True,
+    ) -> List[Track]:
+        """整形済みの候補から最近取得した楽曲を除く（record_seen時は残りを重複排除インデックスに記録）"""
+        cleaned_tracks = []
+        duplicate_count = 0
+        # 記録しない場合も、同じ検索結果内の重複は除く
+        batch_keys: Set[Tuple[int, ...]] = set()
+
+        for id_positions, signature_positions, track in candidates:
+            # 重複チェック（trackIdベース）
+            if id_positions in batch_keys or self._recent_tracks.contains_positions(id_positions):
+                duplicate_count += 1
+                continue
+
+            # 別アルバムの同じ曲を検出（title + artistベース）
+            if (
+                signature_positions in batch_keys
+                or self._recent_tracks.contains_positions(signature_positions)
+            ):
+                duplicate_count += 1
+                logger.debug(f"Skipped duplicate song from different album: '{track.title}' by '{track.artist}'")
+                continue
+
+            cleaned_tracks.append(track)
+            if record_seen:
+                self._recent_tracks.add_positions(id_positions)
+                self._recent_tracks.add_positions(signature_positions)
+            else:
+                batch_keys.add(id_positions)
+                batch_keys.add(signature_positions)
 
         # ログ出力
         if skipped_count > 0:
@@ -222,13 +574,18 @@ class iTunesApiClient:
         if duplicate_count > 0:
             logger.info(f"Skipped {duplicate_count} duplicate tracks")
 
-        logger.info(f"Processed {len(cleaned_tracks)} valid tracks from {len(raw_tracks)} raw records")
-
-        # 定期的なクリーンアップ
-        self._cleanup_track_ids()
+        logger.info(f"Processed {len(cleaned_tracks)} valid tracks from {raw_count} raw records")
 
         return cleaned_tracks
 
+    def dedup_stats(self) -> Dict[str, Any]:
+        """重複排除インデックスの統計情報を取得
+
+        Returns:
+            Dict[str, Any]: 統計情報
+        """
+        return self._recent_tracks.stats()
+
     def _optimize_artwork_url(self, artwork_url: Optional[str]) -> str:
         """アートワークURLを高解像度に最適化
 
@@ -238,20 +595,4 @@ class iTunesApiClient:
         Returns:
             str: 最適化されたURL
         """
-        if artwork_url and "100x100" in artwork_url:
-            # 100x100を600x600に変更
-            return artwork_url.replace("100x100", "600x600")
-        return artwork_url if artwork_url else ""
-
-    def _cleanup_track_ids(self) -> None:
-        """古いトラックIDと楽曲シグネチャをクリーンアップ"""
-        current_time = datetime.now()
-        if (current_time - self._last_cleanup) >= self._track_id_cleanup_interval:
-            # 簡単な実装：一定時間後に全てクリア
-            old_id_count = len(self._recent_track_ids)
-            old_sig_count = len(self._recent_track_signatures)
-            self._recent_track_ids.clear()
-            self._recent_track_signatures.clear()
-            self._last_cleanup = current_time
-            if old_id_count > 0 or old_sig_count > 0:
-                logger.debug(f"Cleaned up {old_id_count} track IDs and {old_sig_count} track signatures from memory")
+        return _optimize_artwork_url(artwork_url)
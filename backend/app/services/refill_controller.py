@@ -0,0 +1,218 @@
+"""
+補充コントローラーモジュール
+キューの取り出し量から需要を予測し、補充の開始時期・補充数・並行数を決める
+"""
+
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class RefillPlan:
+    """補充の判断結果
+
+    Attributes:
+        should_refill: 今すぐ補充を始めるべきか
+        size: 補充する楽曲数
+        concurrency: 並行して実行する補充の数
+        time_to_empty_s: 現在の需要でキューが空になるまでの予測時間（秒、需要がなければNone）
+        reason: 判断理由
+    """
+
+    should_refill: bool
+    size: int
+    concurrency: int
+    time_to_empty_s: Optional[float]
+    reason: str
+
+
+class RefillController:
+    """需要予測に基づく補充コントローラー
+
+    キューの取り出し件数（累計カウンタ）の増分から取り出しレートを指数移動平均（EWMA）で
+    推定する。補充にかかる時間（リードタイム）の後に目標水位を下回ると予測される時点で
+    補充を開始し、目標水位に予測期間分の需要を加えた量まで一度に補充する。
+    1回のiTunes API呼び出しで得られる楽曲数も推定し、補充が間に合わない場合のみ並行数を増やす
+    """
+
+    def __init__(
+        self,
+        max_cap: int,
+        target_level: int,
+        min_batch: int,
+        horizon_s: float = 60.0,
+        max_concurrency: int = 3,
+        rate_tau_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """コントローラーを初期化
+
+        Args:
+            max_cap: キューの最大容量
+            target_level: 維持したい最低キューサイズ（目標水位）
+            min_batch: 1回の補充の最小楽曲数（少量の補充でAPIを呼ばないため）
+            horizon_s: 1回の補充でまかなう需要の期間（秒）
+            max_concurrency: 補充の最大並行数
+            rate_tau_s: 取り出しレートのEWMAの時定数（秒）
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.max_cap = max_cap
+        self.target_level = target_level
+        self.min_batch = max(1, min_batch)
+        self.horizon_s = horizon_s
+        self.max_concurrency = max(1, max_concurrency)
+        self._rate_tau_s = rate_tau_s
+        self._clock = clock
+
+        self._last_count: Optional[int] = None
+        self._last_time = 0.0
+        self._rate = 0.0
+
+        # 補充1回あたりの所要時間とAPI呼び出し1回あたりの追加件数（初期値は控えめな想定）
+        self._lead_time_s = 5.0
+        self._yield_per_call = float(self.min_batch)
+
+        self._plans = 0
+        self._refills = 0
+        self._api_calls = 0
+        self._tracks_added = 0
+        self._last_plan: Optional[RefillPlan] = None
+
+    @property
+    def dequeue_rate(self) -> float:
+        """推定取り出しレート（件/秒）"""
+        return self._rate
+
+    @property
+    def lead_time_s(self) -> float:
+        """推定リードタイム（補充1回の所要時間、秒）"""
+        return self._lead_time_s
+
+    def observe(self, dequeue_count: int) -> None:
+        """取り出し件数の累計カウンタを記録してレートを更新
+
+        観測間隔が不規則でも同じ時定数で平滑化されるよう、経過時間に応じた係数を使う。
+        カウンタが減った場合（共有キューの再作成など）は基準値のみ更新する
+
+        Args:
+            dequeue_count: キューの取り出し件数の累計
+        """
+        now = self._clock()
+        if self._last_count is None or dequeue_count < self._last_count:
+            self._last_count = dequeue_count
+            self._last_time = now
+            return
+
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return
+
+        sample = (dequeue_count - self._last_count) / elapsed
+        alpha = 1.0 - math.exp(-elapsed / self._rate_tau_s)
+        self._rate += alpha * (sample - self._rate)
+        self._last_count = dequeue_count
+        self._last_time = now
+
+    def observe_refill(self, added: int, api_calls: int, duration_s: float) -> None:
+        """補充の結果を記録してリードタイムとAPI呼び出しあたりの追加件数を更新
+
+        Args:
+            added: 追加された楽曲数
+            api_calls: iTunes API呼び出し回数
+            duration_s: 補充の所要時間（秒）
+        """
+        self._refills += 1
+        self._api_calls += api_calls
+        self._tracks_added += added
+        self._lead_time_s += 0.3 * (duration_s - self._lead_time_s)
+        if api_calls > 0:
+            self._yield_per_call += 0.3 * (added / api_calls - self._yield_per_call)
+            self._yield_per_call = max(1.0, self._yield_per_call)
+
+    def plan(self, current_size: int, requested: bool = False) -> RefillPlan:
+        """現在のキューサイズから補充の要否・補充数・並行数を決める
+
+        Args:
+            current_size: 現在のキューサイズ
+            requested: 楽曲提供リクエストから補充を要求されたか
+                （Trueの場合は予測にかかわらず補充する）
+
+        Returns:
+            RefillPlan: 補充の判断結果
+        """
+        rate = self._rate
+        room = max(0, self.max_cap - current_size)
+        time_to_empty = current_size / rate if rate > 0 else None
+        # リードタイム後の予測サイズ
+        projected = current_size - rate * self._lead_time_s
+
+        if room == 0:
+            should_refill, reason = False, "queue is full"
+        elif projected < self.target_level:
+            should_refill, reason = True, "projected below target"
+        elif requested:
+            should_refill, reason = True, "requested"
+        else:
+            should_refill, reason = False, "above target"
+
+        # 目標水位に予測期間分の需要を上乗せした水準まで補充する
+        deficit = self.target_level + rate * self.horizon_s - projected
+        size = min(room, max(self.min_batch, math.ceil(deficit)))
+
+        # 通常は逐次補充で必要数に達した時点で止める（API呼び出しが最小になる）。
+        # リードタイム内に空になる予測の場合のみ並行して補充する
+        concurrency = 1
+        if should_refill and time_to_empty is not None and time_to_empty < self._lead_time_s:
+            concurrency = min(
+                self.max_concurrency,
+                max(1, math.ceil(size / self._yield_per_call)),
+            )
+            reason = "running dry"
+
+        plan = RefillPlan(
+            should_refill=should_refill,
+            size=size if should_refill else 0,
+            concurrency=concurrency,
+            time_to_empty_s=round(time_to_empty, 1) if time_to_empty is not None else None,
+            reason=reason,
+        )
+        self._plans += 1
+        self._last_plan = plan
+        return plan
+
+    def seconds_until_refill(self, current_size: int) -> Optional[float]:
+        """現在の需要が続いた場合に補充を始めるべき時刻までの秒数
+
+        Args:
+            current_size: 現在のキューサイズ
+
+        Returns:
+            Optional[float]: 秒数（需要がなければNone）
+        """
+        if self._rate <= 0:
+            return None
+        until_target = (current_size - self.target_level) / self._rate
+        return max(0.0, until_target - self._lead_time_s)
+
+    def stats(self) -> Dict[str, Any]:
+        """予測値と判断結果の統計情報を取得
+
+        Returns:
+            dict: 統計情報
+        """
+        return {
+            "dequeue_rate_per_s": round(self._rate, 3),
+            "lead_time_s": round(self._lead_time_s, 2),
+            "yield_per_call": round(self._yield_per_call, 1),
+            "target_level": self.target_level,
+            "min_batch": self.min_batch,
+            "horizon_s": self.horizon_s,
+            "max_concurrency": self.max_concurrency,
+            "plans": self._plans,
+            "refills": self._refills,
+            "api_calls": self._api_calls,
+            "tracks_added": self._tracks_added,
+            "last_plan": asdict(self._last_plan) if self._last_plan else None,
+        }
@@ -0,0 +1,223 @@
+"""
+iTunes検索結果キャッシュモジュール
+正規化した検索パラメータをキーに、検索結果をTTL付きで保持する
+メモリ上のLRUと、任意のSQLiteファイルの2段構成
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_search_params(params: Mapping[str, Any]) -> str:
+    """検索パラメータをキャッシュキーに正規化
+
+    キーの順序・前後の空白・連続する空白・大文字小文字の違いを同一視する
+
+    Args:
+        params: iTunes Search APIに渡すパラメータ
+
+    Returns:
+        str: キャッシュキー
+    """
+    normalized = {
+        str(key).strip().lower(): " ".join(str(value).split()).casefold()
+        for key, value in params.items()
+        if value is not None
+    }
+    return json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+class SearchCache:
+    """iTunes検索結果のTTL付きキャッシュ
+
+    メモリ上のLRU（件数上限付き）で保持し、path を指定した場合はSQLiteにも書き込む。
+    メモリにない場合はSQLiteを参照し、見つかればメモリに戻す（再起動後もキャッシュを使える）
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_s: float = 1800.0,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """キャッシュを初期化
+
+        Args:
+            max_entries: メモリに保持するエントリ数の上限
+            ttl_s: エントリの有効期間（秒）
+            path: SQLiteファイルのパス（Noneまたは空の場合はメモリのみ）
+            clock: 現在時刻を返す関数（テスト用）
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.path = path or None
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (有効期限, 検索結果)
+        self._memory: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._disk_errors = 0
+
+        if self.path:
+            self._open_db()
+
+    def get(self, params: Mapping[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """検索結果を取得
+
+        Args:
+            params: 検索パラメータ
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: キャッシュされた検索結果（ない・期限切れの場合はNone）
+        """
+        key = normalize_search_params(params)
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, results = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    return list(results)
+                del self._memory[key]
+                self._expired += 1
+
+            entry = self._disk_get(key, now)
+            if entry is not None:
+                self._remember(key, entry)
+                self._disk_hits += 1
+                return list(entry[1])
+
+            self._misses += 1
+            return None
+
+    def set(self, params: Mapping[str, Any], results: List[Dict[str, Any]]) -> None:
+        """検索結果を保存
+
+        Args:
+            params: 検索パラメータ
+            results: iTunes Search APIの検索結果
+        """
+        if self.ttl_s <= 0:
+            return
+        key = normalize_search_params(params)
+        entry = (self._clock() + self.ttl_s, list(results))
+        with self._lock:
+            self._remember(key, entry)
+            self._disk_set(key, entry)
+
+    def clear(self) -> None:
+        """すべてのエントリを削除"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute("DELETE FROM search_cache")
+                except sqlite3.Error as e:
+                    self._disk_errors += 1
+                    logger.warning(f"Failed to clear search cache file: {e}")
+
+    def close(self) -> None:
+        """SQLiteの接続を閉じる"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計情報を取得
+
+        Returns:
+            dict: 統計情報
+        """
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "disk_enabled": self._db is not None,
+                "hits": hits,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "disk_errors": self._disk_errors,
+            }
+
+    def _remember(self, key: str, entry: Tuple[float, List[Dict[str, Any]]]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    def _open_db(self) -> None:
+        try:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS search_cache ("
+                    "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, results TEXT NOT NULL)"
+                )
+                # 起動時に期限切れのエントリを削除
+                self._db.execute(
+                    "DELETE FROM search_cache WHERE expires_at <= ?", (self._clock(),)
+                )
+            logger.info(f"Search cache file opened: {self.path}")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open search cache file {self.path}: {e}")
+            self._db = None
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT expires_at, results FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            expires_at, results = row
+            if expires_at <= now:
+                with self._db:
+                    self._db.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._expired += 1
+                return None
+            return expires_at, json.loads(results)
+        except (sqlite3.Error, ValueError) as e:
+            self._disk_errors += 1
+            logger.warning(f"Failed to read search cache file: {e}")
+            return None
+
+    def _disk_set(self, key: str, entry: Tuple[float, List[Dict[str, Any]]]) -> None:
+        if self._db is None:
+            return
+        try:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, expires_at, results) VALUES (?, ?, ?)",
+                    (key, entry[0], json.dumps(entry[1], ensure_ascii=False)),
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self._disk_errors += 1
+            logger.warning(f"Failed to write search cache file: {e}")
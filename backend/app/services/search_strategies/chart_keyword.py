@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
 
+import httpx
+
 from .base import BaseSearchStrategy
 from ..apple_music_rss import AppleMusicRSSClient, AppleMusicRSSClientError
 
@@ -14,10 +16,11 @@ class ChartKeywordSearchStrategy(BaseSearchStrategy):
         country: str = "jp",
         limit: int = 100,
         client: Optional[AppleMusicRSSClient] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
     ) -> None:
         self._country = country
         self._limit = limit
-        self._client = client or AppleMusicRSSClient()
+        self._client = client or AppleMusicRSSClient(http_client=http_client)
 
     async def generate_params(self) -> Dict[str, Any]:
         keywords = await self._generate_keywords()
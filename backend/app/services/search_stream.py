@@ -0,0 +1,210 @@
+"""
+iTunes検索結果のストリーミング解析モジュール
+応答本文を受信しながら results 配列の要素を1件ずつ取り出し、必要なフィールドだけを残す
+"""
+
+import codecs
+import json
+import logging
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# clean_and_filter_tracks が参照する検索結果のフィールド
+SEARCH_RESULT_FIELDS = (
+    "trackId",
+    "trackName",
+    "artistName",
+    "previewUrl",
+    "artworkUrl100",
+    "collectionName",
+    "trackTimeMillis",
+    "primaryGenreName",
+)
+
+_WHITESPACE = " \t\n\r"
+_SKIP = re.compile(r"[ \t\n\r]*")
+
+# 解析の状態
+_EXPECT_OBJECT = 0  # 最上位の "{" を待つ
+_EXPECT_KEY = 1  # 最上位のキー（または "}"）を待つ
+_EXPECT_VALUE = 2  # 最上位の値を待つ
+_IN_RESULTS = 3  # results 配列の要素（または "]"）を待つ
+_DONE = 4  # 最上位のオブジェクトを読み終えた
+
+
+class SearchResultParser:
+    """iTunes Search APIの応答本文を逐次解析する
+
+    {"resultCount": N, "results": [{...}, ...]} の形式の本文を任意の位置で区切った
+    チャンクとして受け取り、読み終えた results の要素を fields のフィールドだけに絞って返す。
+    本文全体や不要なフィールドを保持しないため、1回の検索で使うメモリが少なくて済む
+    """
+
+    def __init__(self, fields: Optional[Sequence[str]] = SEARCH_RESULT_FIELDS):
+        """パーサーを初期化
+
+        Args:
+            fields: 残すフィールド（Noneの場合はすべて残す）
+        """
+        self.fields = tuple(fields) if fields is not None else None
+        self.result_count: Optional[int] = None
+        self.parsed = 0
+        # JSONDecoder.raw_decode と同じC実装のスキャナを直接使う
+        self._scan = json.JSONDecoder().scan_once
+        self._loads = json.loads
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _EXPECT_OBJECT
+        self._key: Optional[str] = None
+        self._seen_results = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """本文のチャンクを追加し、読み終えた検索結果を取得
+
+        Args:
+            chunk: 応答本文の続き
+
+        Returns:
+            List[Any]: このチャンクで読み終えた検索結果
+
+        Raises:
+            ValueError: 本文がJSONとして不正な場合
+        """
+        self._buffer += self._text.decode(chunk)
+        return self._parse()
+
+    def close(self) -> List[Any]:
+        """本文の終わりを通知し、残りの検索結果を取得
+
+        Returns:
+            List[Any]: 最後に読み終えた検索結果
+
+        Raises:
+            ValueError: 本文が途中で終わっている、またはJSONとして不正な場合
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        results = self._parse(final=True)
+        if self._state != _DONE or self._buffer.strip(_WHITESPACE):
+            raise ValueError("Incomplete iTunes search response")
+        if not self._seen_results:
+            logger.debug("iTunes search response has no results field")
+        return results
+
+    def _project(self, item: Any) -> Any:
+        if self.fields is None or not isinstance(item, dict):
+            return item
+        return {key: item[key] for key in self.fields if key in item}
+
+    def _decode(self, buffer: str, pos: int, final: bool):
+        """pos から始まる値を1つ読む（チャンクの終わりで切れている場合はNone）"""
+        try:
+            value, end = self._scan(buffer, pos)
+        except (StopIteration, json.JSONDecodeError):
+            if final:
+                raise ValueError("Malformed iTunes search response") from None
+            return None
+        # 数値などはチャンクの終わりで途切れていても読めてしまうため、続きの文字を待つ
+        if end >= len(buffer) and not final and not isinstance(value, (dict, list, str)):
+            return None
+        return value, end
+
+    def _decode_batch(self, buffer: str, pos: int) -> Optional[Tuple[List[Any], int]]:
+        """pos から、バッファ内で読み終えている要素をまとめて読む
+
+        要素を1件ずつ読むよりも、チャンク内の要素を1回で読む方が速い（キー文字列も共有される）。
+        最後の要素の終わりと思われる "}" までを配列として読み、読めなければNoneを返す。
+        区切りが文字列やネストしたオブジェクトの途中だった場合は配列として閉じないため、
+        読めた場合の区切りは常に要素の境界になる
+        """
+        end = len(buffer)
+        for _ in range(3):
+            end = buffer.rfind("}", pos, end)
+            if end < 0:
+                return None
+            after = _SKIP.match(buffer, end + 1).end()
+            if after < len(buffer) and buffer[after] in ",]":
+                try:
+                    return self._loads("[" + buffer[pos:end + 1] + "]"), end + 1
+                except ValueError:
+                    return None
+        return None
+
+    def _parse(self, final: bool = False) -> List[Any]:
+        results: List[Any] = []
+        buffer = self._buffer
+        size = len(buffer)
+        skip = _SKIP.match
+        pos = 0
+        while True:
+            pos = skip(buffer, pos).end()
+            if pos >= size or self._state == _DONE:
+                break
+            char = buffer[pos]
+
+            if self._state == _IN_RESULTS:
+                # 要素ごとの処理は検索1回で数百回になるため、この分岐を最初に置く
+                if char == ",":
+                    pos += 1
+                elif char == "]":
+                    self._state = _EXPECT_KEY
+                    pos += 1
+                else:
+                    batch = self._decode_batch(buffer, pos)
+                    if batch is not None:
+                        items, pos = batch
+                    else:
+                        decoded = self._decode(buffer, pos, final)
+                        if decoded is None:
+                            break
+                        items, pos = [decoded[0]], decoded[1]
+                    results.extend(self._project(item) for item in items)
+                    self.parsed += len(items)
+
+            elif self._state == _EXPECT_OBJECT:
+                if char != "{":
+                    raise ValueError(f"Unexpected character at top level: {char!r}")
+                self._state = _EXPECT_KEY
+                pos += 1
+
+            elif self._state == _EXPECT_KEY:
+                if char == ",":
+                    pos += 1
+                elif char == "}":
+                    self._state = _DONE
+                    pos += 1
+                else:
+                    decoded = self._decode(buffer, pos, final)
+                    if decoded is None:
+                        break
+                    key, end = decoded
+                    colon = skip(buffer, end).end()
+                    if colon >= size:
+                        if final:
+                            raise ValueError("Incomplete iTunes search response")
+                        break
+                    if not isinstance(key, str) or buffer[colon] != ":":
+                        raise ValueError("Malformed iTunes search response")
+                    self._key = key
+                    self._state = _EXPECT_VALUE
+                    pos = colon + 1
+
+            elif self._state == _EXPECT_VALUE:
+                if self._key == "results" and char == "[":
+                    self._seen_results = True
+                    self._state = _IN_RESULTS
+                    pos += 1
+                else:
+                    # results 以外（resultCount など）は値全体を読んでから次のキーへ
+                    decoded = self._decode(buffer, pos, final)
+                    if decoded is None:
+                        break
+                    value, pos = decoded
+                    if self._key == "resultCount" and isinstance(value, int):
+                        self.result_count = value
+                    self._state = _EXPECT_KEY
+
+        # 読み終えた部分を捨て、途中の値だけを次のチャンクに持ち越す
+        self._buffer = buffer[pos:]
+        return results
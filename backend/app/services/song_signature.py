@@ -0,0 +1,126 @@
+"""
+楽曲シグネチャ正規化モジュール
+曲名・アーティスト名の表記ゆれ（全角/半角、リマスター表記、feat.表記、空白など）を吸収し、
+別アルバム・別エディションの同じ曲を同一視するための正規形を作る
+"""
+
+import functools
+import re
+import unicodedata
+from typing import Any, Dict
+
+# 同じ曲の別エディションを表す装飾（括弧内や " - " 以降にある場合は取り除く）
+_DECORATION = re.compile(
+    r"remaster|\bsingle\b|\balbum\b|radio edit|\boriginal\b|\bmono\b|\bstereo\b|\bbonus\b"
+    r"|\bexplicit\b|\bclean\b|\bedition\b|\bversion\b|\bver\b|\bedit\b|\bfrom\b"
+    r"|\bfeat\b|\bft\b|\bfeaturing\b|\bwith\b|\bcv\b"
+    r"|主題歌|テーマ|挿入歌|cmソング|タイアップ|オープニング|エンディング|イメージソング|応援ソング"
+)
+
+# 装飾に見えても別の録音・別の曲として扱う表記
+_DISTINCT = re.compile(
+    r"\blive\b|remix|acoustic|instrumental|\binst\b|karaoke|off vocal|\bcover\b|\bdemo\b"
+    r"|english|ライブ|カラオケ|弾き語り"
+)
+
+# 括弧で囲まれた部分（全角括弧はNFKCで半角になる。『』「」は曲名の一部のことが多いため対象外）
+_BRACKETED = re.compile(r"\s*[(\[【]([^()\[\]【】]*)[)\]】]")
+
+# " - Single Version" のような末尾の補足
+_DASH_SUFFIX = re.compile(r"\s+[-–—]\s+(.+)$")
+
+# 括弧の外にある feat. 以降のクレジット
+_FEATURING = re.compile(r"\s+(?:feat\.?|ft\.|featuring)\s+.*$")
+
+# 複数アーティストの区切り
+_ARTIST_SEPARATOR = re.compile(r"\s*(?:&|,|、|/|×|\s+x\s+|\s+and\s+)\s*")
+
+# 空白・記号（かな・漢字・英数字以外）
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _normalize(text: str) -> str:
+    """NFKC正規化（全角英数・半角カナなどの統一）と大文字小文字の統一"""
+    return unicodedata.normalize("NFKC", text).casefold().strip()
+
+
+def _is_decoration(text: str) -> bool:
+    return bool(_DECORATION.search(text)) and not _DISTINCT.search(text)
+
+
+def _compact(text: str, fallback: str) -> str:
+    """空白・記号を取り除く（すべて記号の場合は元の表記を残す）"""
+    compacted = _NON_WORD.sub("", text)
+    return compacted or _NON_WORD.sub("", fallback) or fallback
+
+
+@functools.lru_cache(maxsize=65536)
+def canonical_title(title: str) -> str:
+    """曲名を正規形に変換
+
+    NFKC正規化・小文字化の後、括弧や " - " 以降のリマスター・シングルバージョン・
+    feat.・タイアップなどの装飾を取り除き、空白と記号を詰める。
+    ライブ・リミックス・インストなどの表記は別の録音として残す
+
+    Args:
+        title: 曲名
+
+    Returns:
+        str: 正規化した曲名
+    """
+    normalized = _normalize(title)
+    stripped = _BRACKETED.sub(
+        lambda m: "" if _is_decoration(m.group(1)) else m.group(0), normalized)
+    suffix = _DASH_SUFFIX.search(stripped)
+    if suffix and _is_decoration(suffix.group(1)):
+        stripped = stripped[:suffix.start()]
+    stripped = _FEATURING.sub("", stripped)
+    return _compact(stripped, normalized)
+
+
+@functools.lru_cache(maxsize=16384)
+def canonical_artist(artist: str) -> str:
+    """アーティスト名を正規形に変換
+
+    NFKC正規化・小文字化の後、feat. 以降やCVなどの追加クレジットを取り除き、
+    複数アーティストは区切り記号によらず名前順に並べる
+
+    Args:
+        artist: アーティスト名
+
+    Returns:
+        str: 正規化したアーティスト名
+    """
+    normalized = _normalize(artist)
+    stripped = _BRACKETED.sub(
+        lambda m: "" if _is_decoration(m.group(1)) else m.group(0), normalized)
+    stripped = _FEATURING.sub("", stripped)
+    names = {_NON_WORD.sub("", name) for name in _ARTIST_SEPARATOR.split(stripped)}
+    names.discard("")
+    return "&".join(sorted(names)) if names else _compact(normalized, normalized)
+
+
+def song_signature(title: str, artist: str) -> str:
+    """別アルバムの同じ曲を同一視するためのシグネチャを作成
+
+    Args:
+        title: 曲名
+        artist: アーティスト名
+
+    Returns:
+        str: 正規化した曲名とアーティスト名をつないだシグネチャ
+    """
+    return f"{canonical_title(title)}\x1f{canonical_artist(artist)}"
+
+
+def cache_stats() -> Dict[str, Any]:
+    """正規化結果のメモ化の統計を取得
+
+    Returns:
+        dict: 曲名・アーティスト名ごとのヒット数・ミス数・件数
+    """
+    stats = {}
+    for name, fn in (("title", canonical_title), ("artist", canonical_artist)):
+        info = fn.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+    return stats
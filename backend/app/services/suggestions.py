@@ -1,23 +1,28 @@
 """
 楽曲提供サービスモジュール
-キューから楽曲を取得し、フィルタリング、再エンキューを管理
+キューから楽曲を取得し、除外フィルタリングと補充トリガーを管理
 """
 
 import asyncio
+import json
 import logging
 import uuid
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional, TypeVar
 
-from ..core.queue import QueueManager
+from fastapi import BackgroundTasks
+
+from ..core.queue_backend import QueueBackend, call_backend
 from ..core.config import SuggestionsConfig, WorkerConfig
 from ..core.rate_limit import global_rate_limiter
-from ..models.track import Track
+from ..models.track import QueuedTrack, Track
 from ..models.suggestions import SuggestionsResponse, SuggestionsMeta
 from ..services.worker import QueueReplenishmentWorker
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class SuggestionsService:
     """楽曲提供サービス
@@ -25,7 +30,7 @@ class SuggestionsService:
     キューからの楽曲取得、フィルタリング、補充トリガーを管理
     """
 
-    def __init__(self, queue_manager: QueueManager, worker: Optional[QueueReplenishmentWorker] = None):
+    def __init__(self, queue_manager: QueueBackend, worker: Optional[QueueReplenishmentWorker] = None):
         """サービスを初期化
 
         Args:
@@ -39,50 +44,108 @@ class SuggestionsService:
 
         logger.info("SuggestionsService initialized")
 
-    async def get_suggestions(self, limit: int, exclude_ids: List[str]) -> SuggestionsResponse:
+    async def get_suggestions(
+        self,
+        limit: int,
+        exclude_ids: List[str],
+        background_tasks: Optional[BackgroundTasks] = None,
+        wait_ms: Optional[int] = None,
+    ) -> SuggestionsResponse:
         """楽曲提供メインロジック
 
+        取り出した楽曲はリースとして保持し、レスポンス送信後に ack する。
+        途中で失敗した場合はリースを取り消して楽曲をキューに戻す
+
         Args:
             limit: 返却する楽曲数
             exclude_ids: 除外する楽曲IDリスト
+            background_tasks: レスポンス送信後に ack を実行するためのタスク
+                （None時はレスポンス構築直後に ack する）
+            wait_ms: キューの楽曲がlimit件に満たない場合に補充を待つ最大時間（ミリ秒）
+                （None/0時は待たずに返す）
 
         Returns:
             SuggestionsResponse: 楽曲提供レスポンス
         """
+        return await self._serve(
+            limit, exclude_ids, background_tasks, self._build_response, wait_ms
+        )
+
+    async def get_suggestions_json(
+        self,
+        limit: int,
+        exclude_ids: List[str],
+        background_tasks: Optional[BackgroundTasks] = None,
+        wait_ms: Optional[int] = None,
+    ) -> bytes:
+        """楽曲提供をシリアライズ済みのJSONで返す
+
+        get_suggestions() と同じ処理を行い、キュー投入時に生成済みの楽曲JSONと
+        メタデータを連結してレスポンスボディを作る（pydanticの検証・変換を行わない）
+
+        Args:
+            limit: 返却する楽曲数
+            exclude_ids: 除外する楽曲IDリスト
+            background_tasks: レスポンス送信後に ack を実行するためのタスク
+            wait_ms: キューの楽曲がlimit件に満たない場合に補充を待つ最大時間（ミリ秒）
+
+        Returns:
+            bytes: SuggestionsResponse形式のJSONバイト列
+        """
+        return await self._serve(
+            limit, exclude_ids, background_tasks, self._render_json, wait_ms
+        )
+
+    async def _serve(
+        self,
+        limit: int,
+        exclude_ids: List[str],
+        background_tasks: Optional[BackgroundTasks],
+        render: Callable[[List[QueuedTrack], int, int, bool], T],
+        wait_ms: Optional[int] = None,
+    ) -> T:
+        """楽曲を供給し、render でレスポンスを構築する共通処理"""
         request_id = str(uuid.uuid4())[:8]
 
         logger.info(
             f"[{request_id}] Suggestions request: limit={limit}, "
-            f"exclude_count={len(exclude_ids)}"
+            f"exclude_count={len(exclude_ids)}, wait_ms={wait_ms}"
         )
 
         # 1. 入力バリデーション
         validated_limit = self._validate_limit(limit)
         validated_exclude_ids = self._validate_exclude_ids(exclude_ids)
+        validated_wait_ms = self._validate_wait_ms(wait_ms)
 
         # 2. キューサイズ確認
-        queue_size_before = self.queue_manager.size()
+        queue_size_before = await call_backend(self.queue_manager.size)
         logger.info(f"[{request_id}] Queue size before: {queue_size_before}")
 
-        # 3. 楽曲供給ロジック
-        delivered_tracks, unused_tracks = await self._supply_tracks(
-            request_id, validated_limit, validated_exclude_ids
+        # 3. 楽曲供給ロジック（除外楽曲はキューに残る）
+        lease_id, delivered_tracks = await self._supply_tracks(
+            request_id, validated_limit, validated_exclude_ids, validated_wait_ms
         )
 
-        # 4. 未使用楽曲の再エンキュー
-        if unused_tracks:
-            await self._re_enqueue_unused_tracks(request_id, unused_tracks)
-
-        # 5. 返却後のキューサイズと補充トリガー判定
-        queue_size_after = self.queue_manager.size()
-        refill_triggered = await self._check_and_trigger_refill(
-            request_id, queue_size_after
-        )
+        try:
+            # 4. 返却後のキューサイズと補充要求（補充の完了は待たない）
+            queue_size_after = await call_backend(self.queue_manager.size)
+            refill_triggered = self._request_refill(request_id, queue_size_after)
 
-        # 6. レスポンス構築
-        response = self._build_response(
-            delivered_tracks, validated_limit, queue_size_after, refill_triggered
-        )
+            # 5. レスポンス構築
+            response = render(
+                delivered_tracks, validated_limit, queue_size_after, refill_triggered
+            )
+        except BaseException:
+            returned = await call_backend(self.queue_manager.release, lease_id)
+            logger.warning(
+                f"[{request_id}] Request failed, returned {returned} leased tracks")
+            raise
+
+        # 6. リースの確定（レスポンス送信後、未送信ならリース期限切れで返却される）
+        if background_tasks is not None:
+            background_tasks.add_task(self.queue_manager.ack, lease_id)
+        else:
+            await call_backend(self.queue_manager.ack, lease_id)
 
         logger.info(
             f"[{request_id}] Request completed: delivered={len(delivered_tracks)}, "
@@ -112,6 +175,26 @@ class SuggestionsService:
 
         return validated
 
+    def _validate_wait_ms(self, wait_ms: Optional[int]) -> int:
+        """wait_ms値をバリデーションし、0〜最大待機時間にクリップ
+
+        Args:
+            wait_ms: 入力されたwait_ms値
+
+        Returns:
+            int: 正規化されたwait_ms値
+        """
+        if not wait_ms:
+            return 0
+
+        max_wait_ms = self.config.get_max_wait_ms()
+        validated = max(0, min(wait_ms, max_wait_ms))
+
+        if validated != wait_ms:
+            logger.debug(f"wait_ms adjusted: {wait_ms} -> {validated}")
+
+        return validated
+
     def _validate_exclude_ids(self, exclude_ids: List[str]) -> List[str]:
         """exclude_idsをバリデーションし正規化
 
@@ -137,111 +220,71 @@ class SuggestionsService:
         return valid_ids
 
     async def _supply_tracks(
-        self, request_id: str, limit: int, exclude_ids: List[str]
-    ) -> Tuple[List[Track], List[Track]]:
+        self, request_id: str, limit: int, exclude_ids: List[str], wait_ms: int = 0
+    ) -> Tuple[Optional[str], List[QueuedTrack]]:
         """楽曲供給ロジック
 
+        除外IDに該当する楽曲はキューに残したまま、単一の操作で
+        ランダムにlimit件をリースとして取り出す。wait_msが指定され、
+        キューの楽曲がlimit件に満たない場合は補充されるまで最大wait_ms待つ
+
         Args:
             request_id: リクエストID
             limit: 必要な楽曲数
             exclude_ids: 除外IDリスト
+            wait_ms: 最大待機時間（ミリ秒）
 
         Returns:
-            Tuple[List[Track], List[Track]]: (返却用楽曲, 未使用楽曲)
+            Tuple[Optional[str], List[QueuedTrack]]: (リースID, 返却用楽曲)
         """
-        delivered_tracks = []
-        unused_tracks = []
-
-        # 最大取り出し数（取りすぎ防止）
-        max_dequeue = limit + 2 * limit  # limit + 2×limit
-        total_dequeued = 0
-
-        while len(delivered_tracks) < limit and total_dequeued < max_dequeue:
-            # 残り必要数
-            need = limit - len(delivered_tracks)
-            # 今回取り出す数（バッファ含む）
-            fetch_count = min(need + 5, max_dequeue - total_dequeued)
-
-            if fetch_count <= 0:
-                break
-
-            # キューから取り出し
-            tracks = self.queue_manager.bulk_dequeue(fetch_count)
-            if not tracks:
-                logger.warning(
-                    f"[{request_id}] Queue exhausted, no more tracks available")
-                break
-
-            total_dequeued += len(tracks)
-
-            # フィルタリング
-            for track in tracks:
-                if len(delivered_tracks) >= limit:
-                    # 上限到達、残りは未使用
-                    unused_tracks.append(track)
-                elif str(track.id) in exclude_ids:
-                    # 除外対象、未使用に追加
-                    unused_tracks.append(track)
-                    logger.debug(f"[{request_id}] Excluded track: {track.id}")
-                else:
-                    # 返却対象
-                    delivered_tracks.append(track)
+        if wait_ms > 0:
+            queue_size = await call_backend(self.queue_manager.size)
+            if queue_size < limit:
+                # 待機中に補充されるよう、先にワーカーへ補充を要求しておく
+                self._request_refill(request_id, queue_size, force=True)
+                logger.info(f"[{request_id}] Waiting up to {wait_ms}ms for {limit} tracks")
+                await self.queue_manager.wait_for_size(limit, wait_ms / 1000)
+
+        lease_id, delivered_tracks = await call_backend(
+            self.queue_manager.lease_random_excluding, limit, frozenset(exclude_ids)
+        )
 
-            logger.debug(
-                f"[{request_id}] Batch processed: fetched={len(tracks)}, "
-                f"delivered_so_far={len(delivered_tracks)}, "
-                f"unused_so_far={len(unused_tracks)}"
-            )
+        if len(delivered_tracks) < limit:
+            logger.warning(
+                f"[{request_id}] Queue exhausted, no more tracks available")
 
         logger.info(
-            f"[{request_id}] Supply completed: delivered={len(delivered_tracks)}, "
-            f"unused={len(unused_tracks)}, total_dequeued={total_dequeued}"
+            f"[{request_id}] Supply completed: delivered={len(delivered_tracks)}"
         )
 
-        return delivered_tracks, unused_tracks
+        return lease_id, delivered_tracks
 
-    async def _re_enqueue_unused_tracks(self, request_id: str, unused_tracks: List[Track]) -> None:
-        """未使用楽曲を再エンキュー
-
-        Args:
-            request_id: リクエストID
-            unused_tracks: 再エンキューする楽曲リスト
-        """
-        try:
-            if unused_tracks:
-                added_count = self.queue_manager.re_enqueue(unused_tracks)
-                logger.info(
-                    f"[{request_id}] Re-enqueued {added_count}/{len(unused_tracks)} unused tracks"
-                )
-        except Exception as e:
-            logger.error(
-                f"[{request_id}] Failed to re-enqueue unused tracks: {e}")
-            # 再エンキュー失敗は致命的ではないため、継続
-
-    async def _check_and_trigger_refill(self, request_id: str, queue_size_after: int) -> bool:
-        """補充トリガーのチェックと実行
+    def _request_refill(
+        self, request_id: str, queue_size_after: int, force: bool = False
+    ) -> bool:
+        """補充が必要ならワーカーに要求（補充の完了は待たない）
 
         Args:
             request_id: リクエストID
             queue_size_after: 返却後のキューサイズ
+            force: Trueの場合は閾値にかかわらず要求する
 
         Returns:
-            bool: 補充トリガーを実行した場合True
+            bool: 補充を要求した場合True
         """
         min_threshold = self.worker_config.get_min_threshold()
 
-        if queue_size_after < min_threshold:
+        if force or queue_size_after < min_threshold:
             if self.worker:
                 try:
-                    # 補充トリガー実行（同期的に実行して失敗を即座に検出）
-                    success = await self.worker.trigger_refill()
-                    if success:
-                        logger.info(f"[{request_id}] Refill triggered successfully")
+                    requested = self.worker.request_refill()
+                    if requested:
+                        logger.info(f"[{request_id}] Refill requested")
                     else:
-                        logger.info(f"[{request_id}] Refill already in progress")
-                    return success
+                        logger.info(f"[{request_id}] Worker is not running, refill not requested")
+                    return requested
                 except Exception as e:
-                    logger.error(f"[{request_id}] Refill trigger failed: {e}")
+                    logger.error(f"[{request_id}] Refill request failed: {e}")
                     return False
             else:
                 logger.warning(
@@ -249,9 +292,8 @@ class SuggestionsService:
 
         return False
 
-
     def _build_response(
-        self, delivered_tracks: List[Track], requested: int,
+        self, delivered_tracks: List[QueuedTrack], requested: int,
         queue_size_after: int, refill_triggered: bool
     ) -> SuggestionsResponse:
         """レスポンスを構築
@@ -269,13 +311,15 @@ class SuggestionsService:
         formatted_tracks = []
         for track in delivered_tracks:
             # Issue #6の整形仕様に準拠した形式
-            formatted_track = Track(
+            # （キュー投入時に検証済みのため、ここでは再検証せずにTrackへ変換する）
+            formatted_track = Track.model_construct(
                 id=track.id,
                 title=track.title,
                 artist=track.artist,
                 artwork_url=track.artwork_url,  # artworkUrl100 or artworkUrl600
                 preview_url=track.preview_url,
                 album=track.album,  # collectionName
+                duration_ms=track.duration_ms,  # trackTimeMillis
                 genre=track.genre   # primaryGenreName
             )
             formatted_tracks.append(formatted_track)
@@ -291,6 +335,42 @@ class SuggestionsService:
 
         return SuggestionsResponse(data=formatted_tracks, meta=meta)
 
+    def _render_json(
+        self, delivered_tracks: List[QueuedTrack], requested: int,
+        queue_size_after: int, refill_triggered: bool
+    ) -> bytes:
+        """キャッシュ済みの楽曲JSONを連結してレスポンスボディを構築
+
+        _build_response() の結果をFastAPIがシリアライズした場合と同じ形式になる
+
+        Args:
+            delivered_tracks: 返却する楽曲リスト
+            requested: リクエストされた楽曲数
+            queue_size_after: 返却後のキューサイズ
+            refill_triggered: 補充トリガーが実行されたか
+
+        Returns:
+            bytes: JSONバイト列
+        """
+        meta = json.dumps(
+            {
+                "requested": requested,
+                "delivered": len(delivered_tracks),
+                "queue_size_after": queue_size_after,
+                "refill_triggered": refill_triggered,
+                "ts": datetime.utcnow().isoformat() + "Z",
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+        return b"".join((
+            b'{"data":[',
+            b",".join(track.suggestion_json() for track in delivered_tracks),
+            b'],"meta":',
+            meta,
+            b"}",
+        ))
+
 
 def check_rate_limit() -> Tuple[bool, float]:
     """グローバルレート制限をチェック
@@ -0,0 +1,188 @@
+"""
+楽曲キャッシュ一括更新モジュール
+TrackCache に保存したプレビューURL・アートワークURLは上流で変わることがあるため、
+一定期間更新していない行をiTunes Lookup APIでまとめて照会し、バッチごとに1回のUPDATEで書き戻す
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.config import WorkerConfig
+from ..db.crud import TrackCacheCRUD
+from ..db.session import AsyncSessionMaker
+from .itunes_api import _optimize_artwork_url, iTunesApiClient
+
+logger = logging.getLogger(__name__)
+
+
+class TrackCacheRefresher:
+    """TrackCache のプレビュー・アートワークURLを一括で再検証する定期ジョブ
+
+    最終更新が古い行から順に最大 max_rows 行を選び、batch_size 件（最大200件）ずつ
+    Lookup APIで照会する。照会は concurrency 件まで並行して実行し、結果はバッチごとに
+    CASE式を使った1回のUPDATEで書き戻す（上流で見つからない行はURLを残して更新日時だけ進める）
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession] = AsyncSessionMaker,
+        itunes_client: Optional[iTunesApiClient] = None,
+        max_age_s: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        should_run: Optional[Callable[[], bool]] = None,
+    ):
+        """一括更新ジョブを初期化
+
+        Args:
+            session_maker: データベースセッションの作成に使うファクトリ
+            itunes_client: Lookup APIの呼び出しに使うクライアント（未指定の場合は初回実行時に作成）
+            max_age_s: 再検証するまでの期間（秒、未指定の場合は設定値）
+            batch_size: Lookup API 1回あたりの楽曲ID数（未指定の場合は設定値、最大200）
+            concurrency: 同時に実行するバッチ数（未指定の場合は設定値）
+            max_rows: 1回の実行で再検証する最大行数（未指定の場合は設定値）
+            should_run: 実行するかを判定する関数（共有キューで補充担当のプロセスだけが実行するため）
+        """
+        self._session_maker = session_maker
+        self._itunes_client = itunes_client
+        self.max_age_s = max_age_s if max_age_s is not None else WorkerConfig.get_track_refresh_max_age_s()
+        self.batch_size = min(200, max(1, batch_size or WorkerConfig.get_track_refresh_batch_size()))
+        self.concurrency = max(1, concurrency or WorkerConfig.get_track_refresh_concurrency())
+        self.max_rows = max(1, max_rows or WorkerConfig.get_track_refresh_max_rows())
+        self._should_run = should_run
+
+        self._runs = 0
+        self._rows_checked = 0
+        self._rows_refreshed = 0
+        self._rows_missing = 0
+        self._failed_batches = 0
+        self._last_run: Dict[str, Any] = {}
+
+    @property
+    def itunes_client(self) -> iTunesApiClient:
+        if self._itunes_client is None:
+            self._itunes_client = iTunesApiClient()
+        return self._itunes_client
+
+    async def refresh_once(self) -> Dict[str, Any]:
+        """古い行を1回分まとめて再検証
+
+        Returns:
+            Dict[str, Any]: 照会した行数・更新した行数・見つからなかった行数・1秒あたりの更新行数など
+        """
+        started = time.perf_counter()
+        updated_before = datetime.now(timezone.utc) - timedelta(seconds=self.max_age_s)
+        async with self._session_maker() as session:
+            external_ids = await TrackCacheCRUD.list_stale(
+                session, updated_before=updated_before, limit=self.max_rows)
+
+        batches = [
+            external_ids[start:start + self.batch_size]
+            for start in range(0, len(external_ids), self.batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        outcomes = await asyncio.gather(*(self._refresh_batch(batch, semaphore) for batch in batches))
+
+        elapsed = time.perf_counter() - started
+        succeeded = [outcome for outcome in outcomes if outcome is not None]
+        checked = sum(refreshed + missing for refreshed, missing in succeeded)
+        refreshed = sum(refreshed for refreshed, _ in succeeded)
+        missing = sum(missing for _, missing in succeeded)
+        failed = len(outcomes) - len(succeeded)
+
+        self._runs += 1
+        self._rows_checked += checked
+        self._rows_refreshed += refreshed
+        self._rows_missing += missing
+        self._failed_batches += failed
+        self._last_run = {
+            "stale_rows": len(external_ids),
+            "rows_checked": checked,
+            "rows_refreshed": refreshed,
+            "rows_missing": missing,
+            "batches": len(batches),
+            "failed_batches": failed,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(refreshed / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        if external_ids:
+            logger.info(
+                f"TrackCache refresh: {refreshed}/{len(external_ids)} rows refreshed "
+                f"({missing} missing upstream, {failed}/{len(batches)} batches failed) "
+                f"in {elapsed:.2f}s ({self._last_run['rows_per_s']} rows/s)")
+        return dict(self._last_run)
+
+    async def _refresh_batch(
+        self, external_ids: List[str], semaphore: asyncio.Semaphore
+    ) -> Optional[Tuple[int, int]]:
+        """1バッチを照会して書き戻す（失敗した場合はNoneを返し、次回の実行で再検証する）"""
+        async with semaphore:
+            # iTunesの楽曲ID以外（数字でないID）は照会せず、見つからなかった行として扱う
+            track_ids = [external_id for external_id in external_ids if external_id.isdigit()]
+            try:
+                results = await self.itunes_client.lookup_tracks(track_ids)
+            except httpx.HTTPError as e:
+                logger.warning(f"TrackCache refresh lookup failed for {len(track_ids)} ids: {e}")
+                return None
+
+            wanted = set(external_ids)
+            media: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+            for result in results:
+                external_id = str(result.get("trackId") or "")
+                if external_id in wanted:
+                    media[external_id] = (
+                        result.get("previewUrl") or None,
+                        _optimize_artwork_url(result.get("artworkUrl100")) or None,
+                    )
+
+            try:
+                async with self._session_maker() as session:
+                    await TrackCacheCRUD.bulk_refresh_media(
+                        session, checked=external_ids, refreshed=media)
+                    await session.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"TrackCache refresh update failed for {len(external_ids)} rows: {e}")
+                return None
+            return len(media), len(external_ids) - len(media)
+
+    async def run_periodic(self, interval_s: float) -> None:
+        """一定間隔で一括更新を実行
+
+        Args:
+            interval_s: 実行間隔（秒）
+        """
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                if self._should_run is None or self._should_run():
+                    await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to refresh TrackCache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """一括更新の統計情報を取得
+
+        Returns:
+            dict: 累計の照会・更新行数と直近の実行結果（1秒あたりの更新行数を含む）
+        """
+        return {
+            "max_age_s": self.max_age_s,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "runs": self._runs,
+            "rows_checked": self._rows_checked,
+            "rows_refreshed": self._rows_refreshed,
+            "rows_missing": self._rows_missing,
+            "failed_batches": self._failed_batches,
+            "last_run": dict(self._last_run),
+        }
@@ -0,0 +1,529 @@
+"""
+上流APIスタンドインモジュール
+iTunes Search APIとApple Music RSSの応答をバージョン付きのコーパスに記録し、
+ローカルのASGIサーバーとして再生する（ネットワークなしで補充処理の負荷試験を行うため）。
+遅延・スロットリング（403/429）・エラー応答を設定に応じて注入できる
+"""
+
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import httpx
+
+from .search_cache import normalize_search_params
+
+logger = logging.getLogger(__name__)
+
+# コーパスの形式のバージョン（互換性のない変更をしたら上げる）
+CORPUS_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+
+# スタンドインが受け付けるパス（上流のURLのパス部分と同じ）
+SEARCH_PATH = "/search"
+LOOKUP_PATH = "/lookup"
+RSS_PATH_PREFIX = "/api/v2"
+STATS_PATH = "/_standin/stats"
+FAULTS_PATH = "/_standin/faults"
+
+MISS_POLICIES = ("fallback", "404")
+
+
+def search_key(params: Mapping[str, Any]) -> str:
+    """検索パラメータからコーパスのキーを作成（検索キャッシュと同じ正規化）"""
+    return f"search:{normalize_search_params(params)}"
+
+
+def lookup_key(params: Mapping[str, Any]) -> str:
+    """Lookup APIのパラメータからコーパスのキーを作成"""
+    return f"lookup:{normalize_search_params(params)}"
+
+
+def rss_key(path: str) -> str:
+    """RSSフィードのパス（/api/v2 以降）からコーパスのキーを作成"""
+    return f"rss:/{path.strip('/')}"
+
+
+@dataclass
+class RecordedResponse:
+    """記録した上流の応答
+
+    Attributes:
+        status: ステータスコード
+        content_type: Content-Type ヘッダー
+        body: 応答本文
+    """
+
+    status: int
+    content_type: str
+    body: bytes
+
+
+class RecordedCorpus:
+    """記録した応答のコーパス
+
+    ディレクトリに manifest.json（形式・コーパスのバージョン・エントリー一覧）と
+    応答本文のファイルを置く。本文は読み込み時にすべてメモリに載せる
+    """
+
+    def __init__(self, path: str, version: Optional[str] = None):
+        """コーパスを初期化（既存のコーパスがあれば読み込む）
+
+        Args:
+            path: コーパスのディレクトリ
+            version: コーパスのバージョン（新規作成時のみ使う。未指定の場合は作成日時）
+
+        Raises:
+            ValueError: 対応していない形式のコーパスの場合
+        """
+        self.path = path
+        self.version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._responses: Dict[str, RecordedResponse] = {}
+
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            self._load(manifest_path)
+
+    def _load(self, manifest_path: str) -> None:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != CORPUS_FORMAT:
+            raise ValueError(
+                f"Unsupported corpus format {manifest.get('format')!r} in {manifest_path} "
+                f"(expected {CORPUS_FORMAT})")
+        self.version = manifest["version"]
+        self.created_at = manifest.get("created_at", self.created_at)
+        for key, entry in manifest.get("entries", {}).items():
+            with open(os.path.join(self.path, entry["body"]), "rb") as f:
+                body = f.read()
+            self._entries[key] = entry
+            self._responses[key] = RecordedResponse(entry["status"], entry["content_type"], body)
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    def keys(self, kind: Optional[str] = None) -> List[str]:
+        """記録済みのキーを取得
+
+        Args:
+            kind: "search"・"lookup"・"rss" のいずれか（未指定の場合はすべて）
+
+        Returns:
+            List[str]: ソート済みのキー
+        """
+        prefix = f"{kind}:" if kind else ""
+        return sorted(key for key in self._responses if key.startswith(prefix))
+
+    def get(self, key: str) -> Optional[RecordedResponse]:
+        """キーに対応する応答を取得（記録がなければNone）"""
+        return self._responses.get(key)
+
+    def fallback(self, key: str) -> Optional[RecordedResponse]:
+        """記録がないキーの代わりに、同じ種類の記録済み応答を1つ選ぶ
+
+        同じキーには常に同じ応答を返す（再生結果を再現できるようにする）
+
+        Args:
+            key: 記録がないキー
+
+        Returns:
+            Optional[RecordedResponse]: 代わりの応答（同じ種類の記録がなければNone）
+        """
+        candidates = self.keys(key.split(":", 1)[0])
+        if not candidates:
+            return None
+        return self._responses[candidates[zlib.crc32(key.encode("utf-8")) % len(candidates)]]
+
+    def add(self, key: str, response: RecordedResponse, request: Any = None) -> None:
+        """応答を記録してディスクに書き出す
+
+        Args:
+            key: コーパスのキー
+            response: 記録する応答
+            request: 記録のもとになったリクエスト（検索パラメータまたはパス。確認用）
+        """
+        body_file = os.path.join("bodies", f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.json")
+        os.makedirs(os.path.join(self.path, "bodies"), exist_ok=True)
+        with open(os.path.join(self.path, body_file), "wb") as f:
+            f.write(response.body)
+
+        self._entries[key] = {
+            "kind": key.split(":", 1)[0],
+            "request": request,
+            "status": response.status,
+            "content_type": response.content_type,
+            "body": body_file,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._responses[key] = response
+        self.save()
+
+    def save(self) -> None:
+        """manifest.json を書き出す（途中で中断しても壊れないよう置き換えで書く）"""
+        os.makedirs(self.path, exist_ok=True)
+        manifest = {
+            "format": CORPUS_FORMAT,
+            "version": self.version,
+            "created_at": self.created_at,
+            "entries": self._entries,
+        }
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+
+class CorpusRecorder:
+    """本物の上流APIに問い合わせて応答をコーパスに記録する"""
+
+    def __init__(
+        self,
+        corpus: RecordedCorpus,
+        search_url: str = "https://itunes.apple.com/search",
+        rss_base_url: str = "https://rss.applemarketingtools.com/api/v2",
+        http_client: Optional[httpx.AsyncClient] = None,
+        lookup_url: str = "https://itunes.apple.com/lookup",
+    ):
+        """レコーダーを初期化
+
+        Args:
+            corpus: 記録先のコーパス
+            search_url: iTunes Search APIのURL
+            rss_base_url: Apple Music RSSのベースURL
+            http_client: 上流への接続に使うクライアント（未指定の場合は記録ごとに作成）
+            lookup_url: iTunes Lookup APIのURL
+        """
+        self.corpus = corpus
+        self.search_url = search_url
+        self.lookup_url = lookup_url
+        self.rss_base_url = rss_base_url.rstrip("/")
+        self.http_client = http_client
+
+    async def record_search(self, params: Mapping[str, Any]) -> RecordedResponse:
+        """検索結果を記録
+
+        Args:
+            params: iTunes Search APIに渡すパラメータ
+
+        Returns:
+            RecordedResponse: 記録した応答
+
+        Raises:
+            httpx.HTTPError: 上流の呼び出しに失敗した場合（成功以外の応答は記録しない）
+        """
+        response = await self._fetch(self.search_url, dict(params))
+        self.corpus.add(search_key(params), response, request=dict(params))
+        return response
+
+    async def record_lookup(self, params: Mapping[str, Any]) -> RecordedResponse:
+        """楽曲IDの照会結果を記録
+
+        Args:
+            params: iTunes Lookup APIに渡すパラメータ
+
+        Returns:
+            RecordedResponse: 記録した応答
+
+        Raises:
+            httpx.HTTPError: 上流の呼び出しに失敗した場合（成功以外の応答は記録しない）
+        """
+        response = await self._fetch(self.lookup_url, dict(params))
+        self.corpus.add(lookup_key(params), response, request=dict(params))
+        return response
+
+    async def record_rss(self, path: str) -> RecordedResponse:
+        """RSSフィードを記録
+
+        Args:
+            path: ベースURL以降のパス（例: "/jp/music/most-played/100/songs.json"）
+
+        Returns:
+            RecordedResponse: 記録した応答
+
+        Raises:
+            httpx.HTTPError: 上流の呼び出しに失敗した場合（成功以外の応答は記録しない）
+        """
+        key = rss_key(path)
+        response = await self._fetch(f"{self.rss_base_url}{key[len('rss:'):]}", None)
+        self.corpus.add(key, response, request=key[len("rss:"):])
+        return response
+
+    async def _fetch(self, url: str, params: Optional[Dict[str, Any]]) -> RecordedResponse:
+        if self.http_client is not None:
+            response = await self.http_client.get(url, params=params)
+        else:
+            async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
+                response = await client.get(url, params=params)
+        response.raise_for_status()
+        return RecordedResponse(
+            response.status_code,
+            response.headers.get("content-type", "application/json"),
+            response.content,
+        )
+
+
+@dataclass
+class FaultProfile:
+    """スタンドインが注入する障害の設定
+
+    Attributes:
+        latency_ms: 応答までの基本の遅延（ミリ秒）
+        jitter_ms: 遅延に加える一様乱数の幅（ミリ秒）
+        throttle_rate: スロットリング応答を返す割合（0〜1）
+        throttle_status: スロットリング応答のステータスコード（403 または 429）
+        retry_after_s: スロットリング応答の Retry-After（秒、0の場合は付けない）
+        max_rps: 1秒あたりの最大リクエスト数（超えた分はスロットリング応答、0の場合は無制限）
+        error_rate: エラー応答を返す割合（0〜1）
+        error_status: エラー応答のステータスコード
+        miss_policy: 記録がないリクエストの扱い（"fallback": 同じ種類の記録で代用、"404": Not Found）
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    throttle_rate: float = 0.0
+    throttle_status: int = 429
+    retry_after_s: float = 0.0
+    max_rps: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    miss_policy: str = "fallback"
+
+    def __post_init__(self) -> None:
+        for name in ("throttle_rate", "error_rate"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+        for name in ("latency_ms", "jitter_ms", "retry_after_s", "max_rps"):
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must not be negative")
+        if self.miss_policy not in MISS_POLICIES:
+            raise ValueError(f"miss_policy must be one of {MISS_POLICIES}")
+
+
+class UpstreamStandin:
+    """記録した応答を返すiTunes Search API・Apple Music RSSのスタンドイン（ASGIアプリ）
+
+    /search・/lookup・/api/v2/... は上流と同じパスで応答する。recorder を指定した場合は
+    記録がないリクエストを上流に問い合わせて記録する（記録モード）。
+    /_standin/stats で統計を取得し、/_standin/faults に JSON を PUT すると障害の設定を変更できる
+    """
+
+    def __init__(
+        self,
+        corpus: RecordedCorpus,
+        faults: Optional[FaultProfile] = None,
+        recorder: Optional[CorpusRecorder] = None,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        """スタンドインを初期化
+
+        Args:
+            corpus: 再生するコーパス
+            faults: 注入する障害の設定（未指定の場合は障害なし）
+            recorder: 記録がないリクエストを上流から記録するレコーダー（記録モード）
+            seed: 遅延・障害の乱数シード（負荷試験を再現するため）
+            clock: 現在時刻を返す関数（テスト用）
+            sleep: 遅延に使う関数（テスト用）
+        """
+        self.corpus = corpus
+        self.faults = faults or FaultProfile()
+        self.recorder = recorder
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._sleep = sleep
+
+        # max_rps のトークンバケット（1秒分までのバーストを許す）
+        self._tokens = 0.0
+        self._refilled_at: Optional[float] = None
+
+        self._stats = {
+            "requests": 0,
+            "hits": 0,
+            "misses": 0,
+            "fallbacks": 0,
+            "recorded": 0,
+            "not_found": 0,
+            "throttled": 0,
+            "errors": 0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """再生の統計を取得
+
+        Returns:
+            Dict[str, Any]: リクエスト数・ヒット数・注入した障害の数など
+        """
+        return {
+            "corpus_version": self.corpus.version,
+            "corpus_entries": len(self.corpus),
+            "faults": asdict(self.faults),
+            **self._stats,
+        }
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"]
+        if path == STATS_PATH:
+            await _send_json(send, 200, self.stats())
+            return
+        if path == FAULTS_PATH and scope["method"] == "PUT":
+            await self._update_faults(receive, send)
+            return
+
+        if path in (SEARCH_PATH, LOOKUP_PATH):
+            query = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+            params = dict(query)
+            kind = path.lstrip("/")
+            key = search_key(params) if kind == "search" else lookup_key(params)
+            record = functools.partial(self._record, kind, params)
+        elif path.startswith(f"{RSS_PATH_PREFIX}/"):
+            feed_path = path[len(RSS_PATH_PREFIX):]
+            key = rss_key(feed_path)
+            record = functools.partial(self._record, "rss", feed_path)
+        else:
+            await _send_body(send, 404, "text/plain", b"Not Found")
+            return
+
+        self._stats["requests"] += 1
+        await self._delay()
+
+        throttled, retry_after = self._should_throttle()
+        if throttled:
+            self._stats["throttled"] += 1
+            headers = [(b"retry-after", f"{retry_after:g}".encode())] if retry_after else []
+            await _send_body(send, self.faults.throttle_status, "text/plain", b"", headers)
+            return
+        if self._random.random() < self.faults.error_rate:
+            self._stats["errors"] += 1
+            await _send_body(send, self.faults.error_status, "text/plain", b"")
+            return
+
+        response = await self._lookup(key, record)
+        if response is None:
+            self._stats["not_found"] += 1
+            await _send_body(send, 404, "text/plain", b"Not Found")
+            return
+        await _send_body(send, response.status, response.content_type, response.body)
+
+    async def _lookup(
+        self, key: str, record: Callable[[], Awaitable[RecordedResponse]]
+    ) -> Optional[RecordedResponse]:
+        """キーに対応する応答を探す（記録モードでは上流から記録し、再生モードでは設定に応じて代用）"""
+        response = self.corpus.get(key)
+        if response is not None:
+            self._stats["hits"] += 1
+            return response
+
+        self._stats["misses"] += 1
+        if self.recorder is not None:
+            try:
+                response = await record()
+            except httpx.HTTPError as e:
+                logger.warning(f"Stand-in failed to record {key}: {e}")
+                return None
+            self._stats["recorded"] += 1
+            return response
+
+        if self.faults.miss_policy == "fallback":
+            response = self.corpus.fallback(key)
+            if response is not None:
+                self._stats["fallbacks"] += 1
+            return response
+        return None
+
+    async def _record(self, kind: str, request: Any) -> RecordedResponse:
+        if kind == "search":
+            return await self.recorder.record_search(request)
+        if kind == "lookup":
+            return await self.recorder.record_lookup(request)
+        return await self.recorder.record_rss(request)
+
+    async def _delay(self) -> None:
+        delay_ms = self.faults.latency_ms + self._random.uniform(0.0, self.faults.jitter_ms)
+        if delay_ms > 0:
+            await self._sleep(delay_ms / 1000)
+
+    def _should_throttle(self) -> Tuple[bool, float]:
+        """スロットリング応答を返すかを判定し、Retry-After の秒数とともに返す"""
+        faults = self.faults
+        if faults.max_rps > 0:
+            now = self._clock()
+            if self._refilled_at is None:
+                self._tokens = faults.max_rps
+            else:
+                elapsed = now - self._refilled_at
+                self._tokens = min(faults.max_rps, self._tokens + elapsed * faults.max_rps)
+            self._refilled_at = now
+            if self._tokens < 1.0:
+                return True, faults.retry_after_s
+            self._tokens -= 1.0
+        if self._random.random() < faults.throttle_rate:
+            return True, faults.retry_after_s
+        return False, 0.0
+
+    async def _update_faults(self, receive: Callable, send: Callable) -> None:
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        try:
+            changes = json.loads(body or b"{}")
+            self.faults = dataclasses.replace(self.faults, **changes)
+        except (TypeError, ValueError) as e:
+            await _send_json(send, 400, {"error": str(e)})
+            return
+        logger.info(f"Stand-in faults updated: {asdict(self.faults)}")
+        await _send_json(send, 200, asdict(self.faults))
+
+    @staticmethod
+    async def _lifespan(receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+async def _send_body(
+    send: Callable, status: int, content_type: str, body: bytes,
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode()),
+            *(headers or []),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send: Callable, status: int, payload: Dict[str, Any]) -> None:
+    await _send_body(send, status, "application/json",
+                     json.dumps(payload, ensure_ascii=False).encode("utf-8"))
@@ -9,9 +9,13 @@ import time
 from collections import deque
 from typing import Optional, Deque, Dict, Any, List, Tuple
 
-from ..core.queue import QueueManager
-from ..core.config import WorkerConfig
+from ..core.queue_backend import QueueBackend, call_backend
+from ..core.config import QueueConfig, WorkerConfig
+from ..models.track import Track
+from ..services.apple_music_rss import AppleMusicRSSClient
 from ..services.itunes_api import iTunesApiClient
+from ..services.ingestion import IngestionPipeline
+from ..services.refill_controller import RefillController, RefillPlan
 from ..services.search_strategies import get_strategy, BaseSearchStrategy
 
 logger = logging.getLogger(__name__)
@@ -25,7 +29,7 @@ class QueueReplenishmentWorker:
     必要に応じてiTunes APIから楽曲データを取得・補充する
     """
 
-    def __init__(self, queue_manager: QueueManager):
+    def __init__(self, queue_manager: QueueBackend):
         """ワーカーを初期化
 
         Args:
@@ -64,6 +68,44 @@ class QueueReplenishmentWorker:
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self._refill_lock = asyncio.Lock()
+        # ワーカーループを起こすイベント（補充要求・低水位通知で設定）
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 楽曲提供リクエストからの補充要求（複数の要求は1回の補充にまとめる）
+        self._refill_requested = False
+        self._refill_request_count = 0
+        self._refill_request_coalesced = 0
+        self._low_watermark_wakeups = 0
+        self._fallback_wakeups = 0
+
+        # 需要予測に基づいて補充の開始時期・補充数・並行数を決める
+        max_cap = self.config.get_max_cap()
+        self.refill_controller = RefillController(
+            max_cap=max_cap,
+            target_level=int(max_cap * 0.7),
+            min_batch=self.config.get_batch_size(),
+            horizon_s=self.config.get_refill_horizon_s(),
+            max_concurrency=self.config.get_refill_max_concurrency(),
+        )
+        # 補充結果の記録用（iTunes API呼び出し回数と追加件数の累計）
+        self._api_calls = 0
+        self._tracks_added = 0
+
+        # キーワード生成 → iTunes検索 → クリーニング → キュー投入 の取り込みパイプライン
+        self._pipeline = IngestionPipeline(
+            next_keyword=self._next_keyword,
+            fetch=self._search_keyword,
+            clean=self._clean_tracks,
+            enqueue=self._enqueue_tracks,
+            queue_size=self.config.get_ingest_queue_size(),
+            # 持ち越した楽曲は重複排除の期間・プレビューURLの再検証期間を過ぎる前に使い切る
+            max_surplus_age_s=min(
+                self.config.get_dedup_window_s(),
+                self.config.get_track_refresh_max_age_s() or float("inf"),
+            ),
+        )
+        # 共有キュー利用時に補充を担当しているか（担当外のプロセスは取り出しのみ行う）
+        self._is_leader = False
 
         # サーキットブレーカー機能
         self._consecutive_failures = 0
@@ -85,6 +127,10 @@ class QueueReplenishmentWorker:
             return
 
         self._running = True
+        self._loop = asyncio.get_running_loop()
+        # キューが補充の閾値を下回った時点で起こされるよう通知を購読する
+        self.queue_manager.add_low_watermark_listener(
+            self._refill_threshold(), self._on_low_watermark)
         self._task = asyncio.create_task(self._worker_loop())
         logger.info("Queue replenishment worker started")
 
@@ -95,6 +141,7 @@ class QueueReplenishmentWorker:
             return
 
         self._running = False
+        self.queue_manager.remove_low_watermark_listener(self._on_low_watermark)
 
         if self._task and not self._task.done():
             self._task.cancel()
@@ -111,6 +158,11 @@ class QueueReplenishmentWorker:
         Returns:
             bool: 補充が実行された場合True
         """
+        if not await self._check_worker_role():
+            logger.info(
+                "Another process owns the queue worker role, skipping one-shot trigger")
+            return False
+
         if self._refill_lock.locked():
             logger.info(
                 "Refill already in progress, skipping one-shot trigger")
@@ -120,29 +172,72 @@ class QueueReplenishmentWorker:
             logger.info("One-shot queue refill triggered")
             return await self._attempt_refill()
 
+    def request_refill(self) -> bool:
+        """ワーカーループに補充を要求（補充の完了を待たずに返る）
+
+        既に要求済みで未処理の場合は同じ補充にまとめる。補充はワーカーループが
+        担当権・サーキットブレーカーを確認したうえで実行する
+
+        Returns:
+            bool: 要求を受け付けた場合True（ワーカー停止中はFalse）
+        """
+        if not self._running:
+            return False
+
+        self._refill_request_count += 1
+        if self._refill_requested:
+            self._refill_request_coalesced += 1
+        else:
+            self._refill_requested = True
+            self._wakeup.set()
+        return True
+
+    def _on_low_watermark(self, current_size: int) -> None:
+        """キューが補充の閾値を下回ったときにワーカーループを起こす
+
+        取り出しを行ったスレッドから呼び出されるため、イベントループ経由で設定する
+        """
+        loop = self._loop
+        if loop is None or not self._running:
+            return
+        self._low_watermark_wakeups += 1
+        try:
+            loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            # ループが既に閉じている
+            pass
+
     async def _worker_loop(self) -> None:
         """メインワーカーループ"""
         logger.info("Worker loop started")
 
         while self._running:
             try:
+                # 共有キューの補充担当でなければ待機（担当が停止すれば引き継ぐ）
+                if not await self._check_worker_role():
+                    await self._sleep_interval()
+                    continue
+
                 # サーキットブレーカーチェック
                 if self._should_skip_due_to_failures():
                     await self._sleep_interval()
                     continue
 
-                # キューサイズチェック
-                current_size = self.queue_manager.size()
-                # 補充の閾値をワーカーの最大容量の70%に設定（キュー管理と一致させる）
-                max_cap = self.config.get_max_cap()
-                refill_threshold = int(max_cap * 0.7)
+                # 需要を予測して補充を判断（補充要求があれば予測にかかわらず補充する）
+                requested = self._refill_requested
+                self._refill_requested = False
+                await self._observe_demand()
+                current_size = await call_backend(self.queue_manager.size)
+                plan = self.refill_controller.plan(current_size, requested=requested)
 
-                if current_size < refill_threshold:
+                if plan.should_refill:
                     logger.info(
-                        f"Queue size ({current_size}) below threshold ({refill_threshold}), attempting refill")
+                        f"Queue size ({current_size}), refill planned: size={plan.size}, "
+                        f"concurrency={plan.concurrency}, reason={plan.reason}, "
+                        f"time_to_empty={plan.time_to_empty_s}s")
 
                     async with self._refill_lock:
-                        success = await self._attempt_refill()
+                        success = await self._run_refill(plan)
                         if success:
                             self._consecutive_failures = 0
                         else:
@@ -150,7 +245,7 @@ class QueueReplenishmentWorker:
                             self._last_failure_time = time.time()
                 else:
                     logger.debug(
-                        f"Queue size ({current_size}) above threshold ({refill_threshold}), no refill needed")
+                        f"Queue size ({current_size}), no refill needed ({plan.reason})")
 
                 await self._sleep_interval()
 
@@ -165,120 +260,203 @@ class QueueReplenishmentWorker:
 
         logger.info("Worker loop ended")
 
-    async def _attempt_refill(self) -> bool:
+    async def _observe_demand(self) -> None:
+        """キューの取り出し件数を補充コントローラーに記録"""
+        stats = await call_backend(self.queue_manager.stats)
+        dequeue_count = stats.get("dequeue_count", 0)
+        self.refill_controller.observe(int(dequeue_count))
+
+    async def _run_refill(self, plan: RefillPlan) -> bool:
+        """補充コントローラーの判断に従って補充を実行
+
+        Args:
+            plan: 補充の判断結果（並行数はiTunes検索の同時実行数として使う）
+
+        Returns:
+            bool: 補充が成功した場合True
+        """
+        started = time.monotonic()
+        calls_before = self._api_calls
+        added_before = self._tracks_added
+
+        success = await self._attempt_refill(plan.size, fetch_concurrency=plan.concurrency)
+
+        self.refill_controller.observe_refill(
+            added=self._tracks_added - added_before,
+            api_calls=self._api_calls - calls_before,
+            duration_s=time.monotonic() - started,
+        )
+        return success
+
+    def _refill_threshold(self) -> int:
+        """補充の閾値（ワーカーの最大容量の70%、キュー管理と一致させる）"""
+        return int(self.config.get_max_cap() * 0.7)
+
+    async def _check_worker_role(self) -> bool:
+        """キューバックエンドに補充ワーカーの担当権を問い合わせる（取得・延長を兼ねる）
+
+        Returns:
+            bool: このプロセスが補充を担当する場合True
+        """
+        is_leader = await call_backend(self.queue_manager.try_acquire_worker_role)
+        if is_leader != self._is_leader:
+            logger.info(
+                f"Queue worker role changed: {'leader' if is_leader else 'standby'}")
+            self._is_leader = is_leader
+        return is_leader
+
+    async def _renew_worker_role(self) -> None:
+        """補充の実行中、担当権の有効期間内に延長を繰り返す
+
+        補充が担当権の有効期間より長引いても、他プロセスが担当を引き継いで
+        同時に補充を始めないようにする
+        """
+        interval_s = max(0.1, QueueConfig.get_worker_role_ttl_ms() / 3000)
+        while True:
+            await asyncio.sleep(interval_s)
+            if not await self._check_worker_role():
+                logger.warning("Lost the queue worker role while a refill was running")
+
+    async def _attempt_refill(
+        self, need: Optional[int] = None, fetch_concurrency: Optional[int] = None
+    ) -> bool:
         """キューの補充を試行
 
+        キーワード生成・iTunes検索・クリーニング・キュー投入を段階ごとの
+        パイプラインで重ねて実行する
+
+        Args:
+            need: 補充する楽曲数（None時は設定の補充単位）
+            fetch_concurrency: 同時に実行するiTunes検索の数（None時は設定の最大並行数）
+
         Returns:
             bool: 補充が成功した場合True
         """
+        renewal = asyncio.create_task(self._renew_worker_role())
         try:
-            current_size = self.queue_manager.size()
+            current_size = await call_backend(self.queue_manager.size)
             max_cap = self.config.get_max_cap()
-            batch_size = self.config.get_batch_size()
+            if need is None:
+                need = self.config.get_batch_size()
+            if fetch_concurrency is None:
+                fetch_concurrency = self.config.get_refill_max_concurrency()
 
             # 必要な補充数を計算
-            need = min(batch_size, max_cap - current_size)
+            need = min(need, max_cap - current_size)
             if need <= 0:
                 logger.debug(
                     f"Queue is at capacity ({current_size}/{max_cap}), no refill needed")
                 return True
 
-            filled = 0
-            attempts = 0
-            max_attempts = 3
-
-            while filled < need and attempts < max_attempts:
-                current_keyword: Optional[str] = None
-                try:
-                    # キーワードキューが阾値以下の場合、検索戦略から新しいキーワードセットを補充
-                    keyword_threshold = int(self._keyword_queue_max_size * 0.7)
-                    if len(self._keyword_queue) <= keyword_threshold:
-                        logger.info("キーワードキューが空です。検索戦略から新しいキーワードを生成します。")
-                        success, generated_params = await self._generate_keywords_with_fallback()
-
-                        if success:
-                            if "terms" in generated_params and isinstance(generated_params["terms"], list):
-                                for term in generated_params["terms"]:
-                                    self._keyword_queue.append(term)
-                                logger.info(
-                                    f"キーワードキューに{len(generated_params['terms'])}個のキーワードを追加しました。")
-                            elif "term" in generated_params and isinstance(generated_params["term"], str):
-                                self._keyword_queue.append(
-                                    generated_params["term"])
-                                logger.info("キーワードキューに1個のキーワードを追加しました。")
-                            else:
-                                logger.warning(
-                                    f"検索戦略からの予期しないフォーマットです: {generated_params}")
-                                attempts += 1
-                                continue
-                        else:
-                            logger.warning("キーワードの生成に失敗しました。")
-                            attempts += 1
-                            continue
-
-                    if not self._keyword_queue:
-                        logger.warning("キーワードキューが空のままです。")
-                        attempts += 1
-                        continue
-
-                    current_keyword = self._keyword_queue.popleft()
-                    logger.info(f"キューからキーワードを使用します: {current_keyword}")
-
-                    raw_tracks = await self.itunes_client.search_tracks(custom_params={"term": current_keyword}, limit=500)
-                    if not raw_tracks:
-                        logger.info(
-                            f"キーワード '{current_keyword}' でトラックが見つかりませんでした。短い遅延を追加します。")
-                        await asyncio.sleep(1)
-                        attempts += 1
-                        continue
-
-                    cleaned_tracks = self.itunes_client.clean_and_filter_tracks(
-                        raw_tracks)
-                    if not cleaned_tracks:
-                        logger.info(
-                            f"キーワード '{current_keyword}' で有効なトラックが見つかりませんでした。短い遅延を追加します。")
-                        await asyncio.sleep(1)
-                        attempts += 1
-                        continue
-
-                    # キューに追加（必要数まで）
-                    tracks_to_add = cleaned_tracks[:need - filled]
-                    added_count = self.queue_manager.enqueue(tracks_to_add)
-                    filled += added_count
-
-                    logger.info(
-                        f"Added {added_count} tracks to queue (total filled: {filled}/{need})")
-
-                    # 目標達成チェック
-                    if filled >= need:
-                        break
-
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to fetch tracks with keyword {current_keyword}: {e}")
-
-                attempts += 1
-
-                # API連続呼び出しを避けるために2秒待機
-                if filled < need and attempts < max_attempts:
-                    logger.debug(
-                        "Waiting for 2 seconds before next API call...")
-                    await asyncio.sleep(2)
+            # キーワード生成の試行回数の上限（並行数に応じて増やす）
+            max_fetches = max(3, fetch_concurrency * 2)
+            filled = await self._pipeline.run(
+                need, fetch_concurrency=fetch_concurrency, max_fetches=max_fetches)
 
             # 結果ログ
-            final_size = self.queue_manager.size()
+            final_size = await call_backend(self.queue_manager.size)
             if filled > 0:
                 logger.info(
                     f"Refill completed: added {filled} tracks, queue size: {current_size} -> {final_size}")
                 return True
             else:
                 logger.warning(
-                    f"Refill failed: no tracks added after {attempts} attempts")
+                    f"Refill failed: no tracks added after {max_fetches} attempts")
                 return False
 
         except Exception as e:
             logger.error(f"Error during queue refill: {e}")
             return False
+        finally:
+            renewal.cancel()
+
+    async def _next_keyword(self) -> Optional[str]:
+        """パイプラインのキーワード段階: キーワードキューから次の検索キーワードを取り出す
+
+        キーワードキューが閾値以下の場合は検索戦略から新しいキーワードを生成する
+
+        Returns:
+            Optional[str]: 検索キーワード（生成に失敗した場合None）
+        """
+        keyword_threshold = int(self._keyword_queue_max_size * 0.7)
+        if len(self._keyword_queue) <= keyword_threshold:
+            if not await self._refill_keyword_queue():
+                return None
+
+        if not self._keyword_queue:
+            logger.warning("キーワードキューが空のままです。")
+            return None
+
+        keyword = self._keyword_queue.popleft()
+        logger.info(f"キューからキーワードを使用します: {keyword}")
+        return keyword
+
+    async def _search_keyword(self, keyword: str) -> List[Dict[str, Any]]:
+        """パイプラインの検索段階: キーワードでiTunes APIを検索"""
+        self._api_calls += 1
+        return await self.itunes_client.search_tracks(
+            custom_params={"term": keyword}, limit=500)
+
+    async def _clean_tracks(self, raw_tracks: List[Dict[str, Any]]) -> List[Track]:
+        """パイプラインのクリーニング段階: 検索結果をTrackに整形・フィルタリング
+
+        整形処理はプールで実行し、その間もイベントループはAPIリクエストを処理できる。
+        必要数を超えて使われない楽曲もあるため、ここでは重複排除インデックスに記録しない
+        """
+        return await self.itunes_client.clean_and_filter_tracks_async(raw_tracks, record_seen=False)
+
+    async def _enqueue_tracks(self, tracks: List[Track]) -> int:
+        """パイプラインの投入段階: 重複排除インデックスで再確認してからキューに追加し、
+        実際に追加した楽曲だけを重複排除インデックスに記録"""
+        tracks = self.itunes_client.filter_unseen_tracks(tracks)
+        if not tracks:
+            return 0
+        if getattr(self.queue_manager, "blocking_io", False):
+            added_tracks = await asyncio.to_thread(self._enqueue_new_tracks, tracks)
+        else:
+            added_tracks = self._enqueue_new_tracks(tracks)
+        self.itunes_client.mark_tracks_seen(added_tracks)
+        self._tracks_added += len(added_tracks)
+        return len(added_tracks)
+
+    def _enqueue_new_tracks(self, tracks: List[Track]) -> List[Track]:
+        """キューにないIDの楽曲を追加し、追加した楽曲を返す（blocking_io なバックエンドではまとめてスレッドで実行する）"""
+        new_tracks = [track for track in tracks if not self.queue_manager.contains(track.id)]
+        if not new_tracks:
+            return []
+        added = self.queue_manager.enqueue(new_tracks, reject_duplicates=True)
+        if added == len(new_tracks):
+            return new_tracks
+        # 確認の後に他の経路で同じIDが追加された場合は、キューにある楽曲を追加済みとみなす
+        return [track for track in new_tracks if self.queue_manager.contains(track.id)]
+
+    async def _refill_keyword_queue(self) -> bool:
+        """検索戦略から新しいキーワードを生成してキーワードキューに追加
+
+        Returns:
+            bool: キーワードを追加できた場合True
+        """
+        logger.info("キーワードキューが空です。検索戦略から新しいキーワードを生成します。")
+        success, generated_params = await self._generate_keywords_with_fallback()
+
+        if not success:
+            logger.warning("キーワードの生成に失敗しました。")
+            return False
+
+        if "terms" in generated_params and isinstance(generated_params["terms"], list):
+            for term in generated_params["terms"]:
+                self._keyword_queue.append(term)
+            logger.info(
+                f"キーワードキューに{len(generated_params['terms'])}個のキーワードを追加しました。")
+        elif "term" in generated_params and isinstance(generated_params["term"], str):
+            self._keyword_queue.append(
+                generated_params["term"])
+            logger.info("キーワードキューに1個のキーワードを追加しました。")
+        else:
+            logger.warning(
+                f"検索戦略からの予期しないフォーマットです: {generated_params}")
+            return False
+        return True
 
     def _should_skip_due_to_failures(self) -> bool:
         """連続失敗によるスキップ判定
@@ -302,14 +480,38 @@ class QueueReplenishmentWorker:
         return False
 
     async def _sleep_interval(self) -> None:
-        """ポーリング間隔の待機"""
-        interval_ms = self.config.get_poll_interval_ms()
+        """次の確認までの待機（補充要求・低水位通知があれば直ちに再開）
 
-        # 連続失敗時は間隔を延長
+        補充を担当していてキューが閾値を下回ったままの場合はポーリング間隔で補充を続ける。
+        それ以外は低水位通知を待ち、通知を取りこぼした場合に備えて予備の間隔で確認する
+        """
         if self._consecutive_failures >= self._max_failures:
-            interval_ms *= self._failure_backoff_multiplier
+            # 連続失敗時は間隔を延長
+            interval_ms = (
+                self.config.get_poll_interval_ms() * self._failure_backoff_multiplier
+            )
+        elif self._is_leader:
+            current_size = await call_backend(self.queue_manager.size)
+            if current_size < self._refill_threshold():
+                interval_ms = self.config.get_poll_interval_ms()
+            else:
+                interval_ms = self.config.get_fallback_interval_ms()
+                # 需要予測で補充開始時刻が近ければそれまでに起きる
+                until_refill = self.refill_controller.seconds_until_refill(current_size)
+                if until_refill is not None:
+                    interval_ms = min(
+                        interval_ms,
+                        max(self.config.get_poll_interval_ms(), until_refill * 1000),
+                    )
+        else:
+            interval_ms = self.config.get_fallback_interval_ms()
 
-        await asyncio.sleep(interval_ms / 1000.0)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=interval_ms / 1000.0)
+        except asyncio.TimeoutError:
+            self._fallback_wakeups += 1
+        finally:
+            self._wakeup.clear()
 
     async def _generate_keywords_with_fallback(self) -> Tuple[bool, Dict[str, Any]]:
         """
@@ -424,13 +626,54 @@ class QueueReplenishmentWorker:
         """ワーカーの統計情報を取得"""
         stats_data = {
             "running": getattr(self, "_running", False),
+            "worker_role": "leader" if getattr(self, "_is_leader", False) else "standby",
             "consecutive_failures": getattr(self, "_consecutive_failures", 0),
             "max_failures": getattr(self, "_max_failures", 0),
             "refill_in_progress": (
                 getattr(self, "_refill_lock", None)
                 and self._refill_lock.locked()
             ),
+            "refill_requested": getattr(self, "_refill_requested", False),
+            "refill_request_count": getattr(self, "_refill_request_count", 0),
+            "refill_request_coalesced": getattr(self, "_refill_request_coalesced", 0),
+            "low_watermark_wakeups": getattr(self, "_low_watermark_wakeups", 0),
+            "fallback_wakeups": getattr(self, "_fallback_wakeups", 0),
             "poll_interval_ms": self.config.get_poll_interval_ms(),
+            "fallback_interval_ms": self.config.get_fallback_interval_ms(),
+            "refill_controller": (
+                self.refill_controller.stats()
+                if getattr(self, "refill_controller", None) is not None
+                else {}
+            ),
+            "ingestion": (
+                self._pipeline.stats()
+                if getattr(self, "_pipeline", None) is not None
+                else {}
+            ),
+            "search_rate_limiter": (
+                self.itunes_client.rate_limiter.stats()
+                if getattr(self, "itunes_client", None) is not None
+                else {}
+            ),
+            "search_hedging": (
+                self.itunes_client.hedger.stats()
+                if getattr(self, "itunes_client", None) is not None
+                else {}
+            ),
+            "single_flight": {
+                "itunes_search": iTunesApiClient.single_flight_stats(),
+                "apple_music_rss": AppleMusicRSSClient.single_flight_stats(),
+            },
+            "track_dedup": (
+                self.itunes_client.dedup_stats()
+                if getattr(self, "itunes_client", None) is not None
+                else {}
+            ),
+            "search_cache": (
+                self.itunes_client.cache.stats()
+                if getattr(getattr(self, "itunes_client", None), "cache", None) is not None
+                else {}
+            ),
             "min_threshold": self.config.get_min_threshold(),
             "batch_size": self.config.get_batch_size(),
             "max_cap": self.config.get_max_cap(),
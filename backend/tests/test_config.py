@@ -74,10 +74,26 @@ class TestQueueConfig:
                 "max_capacity": 500,
                 "dequeue_default_n": 15,
                 "low_watermark": 50,
+                "reject_duplicates": False,
+                "lease_ttl_ms": 30000,
+                "backend": "memory",
             }
             
             assert settings == expected
     
+    def test_reject_duplicates_parsing(self):
+        """重複拒否フラグの解釈テスト"""
+        with patch.dict(os.environ, {}, clear=True):
+            assert QueueConfig.get_reject_duplicates() is False
+
+        for value in ("1", "true", "TRUE", "yes", "on"):
+            with patch.dict(os.environ, {"QUEUE_REJECT_DUPLICATES": value}, clear=True):
+                assert QueueConfig.get_reject_duplicates() is True
+
+        for value in ("0", "false", "no", "invalid"):
+            with patch.dict(os.environ, {"QUEUE_REJECT_DUPLICATES": value}, clear=True):
+                assert QueueConfig.get_reject_duplicates() is False
+
     def test_mixed_valid_invalid_values(self):
         """一部有効・一部無効な値の混在テスト"""
         env_vars = {
@@ -151,6 +167,21 @@ class TestWorkerConfig:
             assert WorkerConfig.get_http_timeout_s() == 1.0  # 最小値
             assert WorkerConfig.get_retry_max() == 0  # 最小値
     
+    def test_worker_fallback_interval_capped_by_role_ttl(self):
+        """予備の確認間隔が補充担当権の有効期間の半分以下に制限されるテスト"""
+        with patch.dict(os.environ, {}, clear=True):
+            assert WorkerConfig.get_fallback_interval_ms() == 5000
+
+        env_vars = {
+            "OTODOKI_FALLBACK_INTERVAL_MS": "60000",
+            "QUEUE_WORKER_ROLE_TTL_MS": "10000",
+        }
+        with patch.dict(os.environ, env_vars, clear=True):
+            assert WorkerConfig.get_fallback_interval_ms() == 5000
+
+        with patch.dict(os.environ, {"OTODOKI_FALLBACK_INTERVAL_MS": "invalid"}, clear=True):
+            assert WorkerConfig.get_fallback_interval_ms() == 5000
+
     def test_worker_terms_parsing(self):
         """iTunes検索キーワードのパースのテスト"""
         test_cases = [
@@ -171,8 +202,22 @@ class TestWorkerConfig:
             settings = WorkerConfig.get_all_settings()
             
             expected_keys = {
-                "itunes_terms", "country", "min_threshold", "batch_size",
-                "max_cap", "poll_interval_ms", "http_timeout_s", "retry_max",
+                "itunes_terms", "country", "itunes_search_url", "itunes_lookup_url",
+                "apple_rss_base_url",
+                "min_threshold", "batch_size",
+                "max_cap", "poll_interval_ms", "fallback_interval_ms",
+                "refill_horizon_s", "refill_max_concurrency", "ingest_queue_size",
+                "http_timeout_s", "http_max_connections", "http_max_keepalive",
+                "http_keepalive_expiry_s", "http2_enabled",
+                "itunes_rate_initial", "itunes_rate_min", "itunes_rate_max",
+                "itunes_max_concurrency",
+                "hedge_percentile", "hedge_budget_pct",
+                "dedup_window_s", "dedup_capacity", "dedup_fp_rate",
+                "clean_executor", "clean_workers",
+                "track_refresh_interval_s", "track_refresh_max_age_s", "track_refresh_batch_size",
+                "track_refresh_concurrency", "track_refresh_max_rows",
+                "search_cache_ttl_s", "search_cache_max_entries", "search_cache_path",
+                "retry_max",
                 "search_strategy", "search_genres", "search_years"
             }
             assert set(settings.keys()) == expected_keys
@@ -0,0 +1,162 @@
+"""
+スライディングウィンドウ重複排除（SlidingWindowDedup）のテスト
+"""
+
+import pytest
+
+from app.core.dedup import BloomFilter, SlidingWindowDedup
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_bloom_filter_false_positive_rate():
+    """想定件数まで追加しても偽陽性率がおおむね指定値に収まること"""
+    bloom = BloomFilter(capacity=10000, fp_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"id:{i}")
+
+    assert all(f"id:{i}" in bloom for i in range(10000))
+    false_positives = sum(f"other:{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    # 想定件数と偽陽性率から決まる大きさ（約1.2KB/1000件）
+    assert bloom.size_bytes < 13000
+
+
+def test_keys_are_remembered_for_at_least_the_window():
+    """追加したキーは期間中ずっと重複と判定され、2期間後には忘れられること"""
+    clock = FakeClock()
+    dedup = SlidingWindowDedup(window_s=3600, capacity=1000, clock=clock)
+
+    clock.now = 3500
+    dedup.add("id:1")
+    assert "id:1" in dedup
+
+    # 切り替え後も1つ前の世代として残る（1分ごとに全消去していた従来と異なる）
+    clock.now = 3600 + 3500
+    assert "id:1" in dedup
+    assert dedup.stats()["rotations"] == 1
+
+    clock.now = 2 * 3600 + 1
+    assert "id:1" not in dedup
+
+
+def test_idle_longer_than_two_windows_forgets_everything():
+    """2期間以上経過した場合はすべて忘れること"""
+    clock = FakeClock()
+    dedup = SlidingWindowDedup(window_s=60, capacity=100, clock=clock)
+    dedup.add("a")
+    clock.now = 1000
+    assert "a" not in dedup
+    assert dedup.stats()["previous_count"] == 0
+
+
+def test_memory_is_bounded_by_capacity():
+    """想定件数を超えたら期間の途中でも世代を切り替え、メモリ使用量が増えないこと"""
+    clock = FakeClock()
+    dedup = SlidingWindowDedup(window_s=3600, capacity=100, fp_rate=0.01, clock=clock)
+    memory = dedup.stats()["memory_bytes"]
+
+    for i in range(1000):
+        dedup.add(f"id:{i}")
+
+    stats = dedup.stats()
+    assert stats["memory_bytes"] == memory
+    assert stats["early_rotations"] == 9
+    assert stats["current_count"] == 100
+    # 直近の2世代分は覚えている
+    assert "id:999" in dedup and "id:850" in dedup
+
+
+@pytest.mark.parametrize("title, artist", [
+    ("Same Song", "Same Artist"),
+    ("  same song ", "SAME ARTIST"),
+])
+def test_itunes_client_dedup_survives_beyond_one_minute(title, artist, monkeypatch):
+    """iTunesクライアントが1分を超えても同じ曲を再び返さないこと"""
+    from app.services import itunes_api
+
+    clock = FakeClock()
+    monkeypatch.setattr(itunes_api.SlidingWindowDedup, "__init__",
+                        _with_clock(itunes_api.SlidingWindowDedup.__init__, clock))
+    client = itunes_api.iTunesApiClient()
+    raw = [{
+        "trackId": 1, "trackName": "Same Song", "artistName": "Same Artist",
+        "previewUrl": "https://example.com/p.m4a", "artworkUrl100": "https://example.com/a.jpg",
+    }]
+    assert len(client.clean_and_filter_tracks(raw)) == 1
+
+    clock.now += 120
+    again = [dict(raw[0], trackId=2, trackName=title, artistName=artist)]
+    assert client.clean_and_filter_tracks(raw) == []
+    assert client.clean_and_filter_tracks(again) == []
+    assert client.dedup_stats()["current_count"] == 2
+
+
+def test_itunes_client_records_only_marked_tracks():
+    """record_seen=False の場合は確認のみ行い、mark_tracks_seen() した楽曲だけを除外すること"""
+    from app.services.itunes_api import iTunesApiClient
+
+    client = iTunesApiClient()
+    raw = [
+        {
+            "trackId": i, "trackName": f"Song {i}", "artistName": "Artist",
+            "previewUrl": f"https://example.com/{i}.m4a", "artworkUrl100": "https://example.com/a.jpg",
+        }
+        for i in range(1, 4)
+    ]
+    # 同じ検索結果内の重複は記録しない場合も除く
+    tracks = client.clean_and_filter_tracks(raw + [dict(raw[0], trackId=99)], record_seen=False)
+    assert [track.id for track in tracks] == ["1", "2", "3"]
+    assert client.dedup_stats()["current_count"] == 0
+
+    # 使わなかった楽曲は次の検索でも返る
+    client.mark_tracks_seen(tracks[:1])
+    assert [track.id for track in client.clean_and_filter_tracks(raw, record_seen=False)] == ["2", "3"]
+    assert client.clean_and_filter_tracks([dict(raw[0], trackId=99)]) == []
+
+
+@pytest.mark.asyncio
+async def test_worker_rechecks_dedup_before_enqueue(monkeypatch):
+    """同時に整形した検索結果も投入直前に再確認し、実際に追加した楽曲だけを記録すること"""
+    from app.core.queue import QueueManager
+    from app.services.worker import QueueReplenishmentWorker
+
+    monkeypatch.setenv("GEMINI_API_KEY", "dummy-key")
+    queue = QueueManager(max_capacity=100, low_watermark=1)
+    worker = QueueReplenishmentWorker(queue)
+    client = worker.itunes_client
+
+    def raw(track_id: int, title: str) -> dict:
+        return {
+            "trackId": track_id, "trackName": title, "artistName": "Artist",
+            "previewUrl": f"https://example.com/{track_id}.m4a", "artworkUrl100": "https://example.com/a.jpg",
+        }
+
+    # 同時に整形した2つの検索結果（別アルバムの同じ曲を含む）
+    first = client.clean_and_filter_tracks([raw(1, "Song A"), raw(2, "Song B")], record_seen=False)
+    second = client.clean_and_filter_tracks([raw(3, "Song A (Remastered)"), raw(4, "Song C")], record_seen=False)
+    assert len(first) == len(second) == 2
+
+    assert await worker._enqueue_tracks(first) == 2
+    assert await worker._enqueue_tracks(second) == 1
+    assert {track.id for track in queue.snapshot()} == {"1", "2", "4"}
+
+    # キューに既にある楽曲は追加されず、記録もされない
+    queued_elsewhere = client.clean_and_filter_tracks([raw(5, "Song D")], record_seen=False)
+    queue.enqueue(queued_elsewhere)
+    fresh = client.clean_and_filter_tracks([raw(6, "Song E")], record_seen=False)
+    assert await worker._enqueue_tracks(queued_elsewhere + fresh) == 1
+    assert client.filter_unseen_tracks(queued_elsewhere + fresh) == queued_elsewhere
+
+
+def _with_clock(init, clock):
+    def patched(self, *args, **kwargs):
+        kwargs["clock"] = clock
+        init(self, *args, **kwargs)
+    return patched
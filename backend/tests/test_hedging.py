@@ -0,0 +1,156 @@
+"""
+ヘッジリクエスト（RequestHedger）のテスト
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.hedging import HedgeDeclined, RequestHedger, _censored_percentile
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.services.itunes_api import iTunesApiClient
+
+
+class _Upstream:
+    """呼び出しごとに指定した遅延で応答するテスト用の上流"""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.started = 0
+        self.cancelled = 0
+
+    async def call(self, hedge: bool) -> str:
+        delay = self.delays[self.started % len(self.delays)]
+        self.started += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return "hedge" if hedge else "primary"
+
+
+async def _warm_up(hedger: RequestHedger, count: int, delay: float = 0.01) -> None:
+    upstream = _Upstream([delay])
+    for _ in range(count):
+        await hedger.run(upstream.call)
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_until_enough_samples():
+    """観測数が足りない間はヘッジしないこと"""
+    hedger = RequestHedger(min_samples=5, budget_pct=100)
+    upstream = _Upstream([0.05])
+    assert hedger.hedge_delay() is None
+    assert await hedger.run(upstream.call) == "primary"
+    assert upstream.started == 1
+    assert hedger.stats()["hedges"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stalled_request_is_hedged_and_loser_cancelled():
+    """パーセンタイルを超えて遅れたら2本目を送り、先に返った方を使って残りをキャンセルすること"""
+    hedger = RequestHedger(percentile=90, min_samples=5, budget_pct=100, min_delay_s=0.01)
+    await _warm_up(hedger, 10)
+
+    upstream = _Upstream([1.0, 0.01])
+    result = await asyncio.wait_for(hedger.run(upstream.call), 0.5)
+
+    assert result == "hedge"
+    assert upstream.started == 2
+    assert upstream.cancelled == 1
+    stats = hedger.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["hedge_rate"] == pytest.approx(1 / 11, abs=0.001)
+
+
+@pytest.mark.asyncio
+async def test_budget_caps_extra_load():
+    """ヘッジの本数が予算（元のリクエスト数の割合）を超えないこと"""
+    hedger = RequestHedger(percentile=90, min_samples=5, budget_pct=10, min_delay_s=0.01)
+    await _warm_up(hedger, 10)
+
+    upstream = _Upstream([0.05])
+    for _ in range(20):
+        await hedger.run(upstream.call)
+
+    stats = hedger.stats()
+    assert stats["hedges"] <= stats["calls"] * 0.10
+    assert stats["hedges"] >= 1
+    assert stats["budget_exhausted"] > 0
+
+
+@pytest.mark.asyncio
+async def test_declined_hedge_waits_for_primary():
+    """ヘッジをすぐに送れない場合は元のリクエストの応答を待つこと"""
+    hedger = RequestHedger(percentile=90, min_samples=5, budget_pct=100, min_delay_s=0.01)
+    await _warm_up(hedger, 10)
+
+    async def call(hedge: bool) -> str:
+        if hedge:
+            raise HedgeDeclined()
+        await asyncio.sleep(0.05)
+        return "primary"
+
+    assert await hedger.run(call) == "primary"
+    stats = hedger.stats()
+    assert stats["hedges"] == 0
+    assert stats["declined"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedging_cuts_tail_latency():
+    """一部のリクエストが停滞する場合に、呼び出し元から見たp99が停滞時間より短くなること"""
+    hedger = RequestHedger(percentile=90, min_samples=10, budget_pct=20, min_delay_s=0.01)
+    # 20本に1本が0.3秒停滞する上流
+    upstream = _Upstream([0.01] * 19 + [0.3])
+    for _ in range(60):
+        await hedger.run(upstream.call)
+
+    stats = hedger.stats()
+    assert stats["hedges"] >= 2
+    assert stats["p99_s"] < 0.2
+
+
+def test_censored_percentile():
+    """打ち切りデータを「少なくともその時間」として扱うこと"""
+    observed = [(0.01 * i, True) for i in range(1, 101)]
+    assert _censored_percentile(observed, 99) == pytest.approx(0.99)
+    # 裾がすべて打ち切りの場合は推定できない
+    censored = [(0.01, True)] * 90 + [(0.5, False)] * 10
+    assert _censored_percentile(censored, 99) is None
+
+
+@pytest.mark.asyncio
+async def test_search_tracks_uses_hedge_response():
+    """iTunes検索で元のリクエストが停滞した場合にヘッジの応答を使うこと"""
+    limiter = AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10)
+    hedger = RequestHedger(percentile=90, min_samples=5, budget_pct=100, min_delay_s=0.01)
+    await _warm_up(hedger, 10)
+    # 並行数は1から始まるため、成功を記録して2本同時に送れるようにする
+    for _ in range(3):
+        await limiter.acquire()
+        limiter.release(200, 0.01)
+    client = iTunesApiClient(rate_limiter=limiter, hedger=hedger)
+    client.cache = None
+
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json={"results": [{"trackId": 7}]})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client.http_client = http_client
+        results = await asyncio.wait_for(client.search_tracks({"term": "hedge"}), 0.5)
+
+    assert results == [{"trackId": 7}]
+    assert hedger.stats()["hedge_wins"] == 1
+    # キャンセルされたリクエストは輻輳として扱わず、送信枠も返される
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0
+    assert stats["errors"] == 0
@@ -0,0 +1,100 @@
+"""
+共有HTTPクライアント（app.core.http）のテスト
+"""
+
+import os
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.core import http
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.services.apple_music_rss import AppleMusicRSSClient
+from app.services import itunes_api
+from app.services.itunes_api import iTunesApiClient
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """処理したリクエストを記録するテスト用トランスポート"""
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.requests: list[httpx.Request] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200, json=self.payload)
+
+
+@pytest.fixture(autouse=True)
+def _unthrottled_rate_limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    """送信レート制限で待たされないよう、共有の制限器を十分に緩いものに差し替える"""
+    monkeypatch.setattr(
+        itunes_api,
+        "_search_rate_limiter",
+        AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10),
+    )
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_and_pool_limits():
+    """共有クライアントの開始・終了と設定値の反映"""
+    env_vars = {
+        "OTODOKI_HTTP_MAX_CONNECTIONS": "8",
+        "OTODOKI_HTTP_MAX_KEEPALIVE": "20",
+        "OTODOKI_HTTP_KEEPALIVE_EXPIRY_S": "12",
+    }
+    with patch.dict(os.environ, env_vars, clear=True):
+        assert http.get_http_client() is None
+        client = await http.start_http_client()
+        try:
+            assert http.get_http_client() is client
+            assert await http.start_http_client() is client
+            pool = client._transport._pool  # type: ignore[attr-defined]
+            assert pool._max_connections == 8
+            assert pool._max_keepalive_connections == 8  # 最大接続数に制限
+            assert pool._keepalive_expiry == 12.0
+        finally:
+            await http.close_http_client()
+        assert http.get_http_client() is None
+        assert client.is_closed
+
+
+def test_http2_requires_h2_package():
+    """h2パッケージがない場合はHTTP/2を有効にしない"""
+    with patch.dict(os.environ, {"OTODOKI_HTTP2": "true"}, clear=True):
+        with patch.object(http, "http2_available", return_value=False):
+            with patch("httpx.AsyncClient") as mock_client:
+                http.create_http_client()
+                assert mock_client.call_args.kwargs["http2"] is False
+
+
+@pytest.mark.asyncio
+async def test_clients_reuse_injected_client():
+    """注入したクライアントを呼び出しごとに作り直さず、閉じずに使い回す"""
+    transport = _CountingTransport({"results": [{"trackId": 1}], "feed": {"results": []}})
+    async with httpx.AsyncClient(transport=transport) as shared:
+        itunes = iTunesApiClient(http_client=shared)
+        rss = AppleMusicRSSClient(http_client=shared)
+
+        with patch("httpx.AsyncClient") as mock_client:
+            assert await itunes.search_tracks({"term": "a"}) == [{"trackId": 1}]
+            assert await itunes.search_tracks({"term": "b"}) == [{"trackId": 1}]
+            await rss.get_top_songs()
+            mock_client.assert_not_called()
+
+        assert not shared.is_closed
+        assert len(transport.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_clients_use_shared_client_from_lifespan():
+    """注入しない場合はアプリケーションの共有クライアントを使う"""
+    transport = _CountingTransport({"results": []})
+    with patch.object(http, "_http_client", httpx.AsyncClient(transport=transport)):
+        try:
+            await iTunesApiClient().search_tracks({"term": "a"})
+            assert len(transport.requests) == 1
+        finally:
+            await http._http_client.aclose()
@@ -0,0 +1,235 @@
+"""
+楽曲取り込みパイプライン（IngestionPipeline）のテスト
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.queue import QueueManager
+from app.models.track import Track
+from app.services.ingestion import IngestionPipeline
+
+
+def _raw_tracks(keyword: str, count: int) -> list[dict]:
+    return [{"trackId": f"{keyword}-{i}"} for i in range(count)]
+
+
+def _clean(raw_tracks: list[dict]) -> list[Track]:
+    return [
+        Track(id=raw["trackId"], title="Song", artist="Artist",
+              preview_url="https://example.com/p.m4a")
+        for raw in raw_tracks
+    ]
+
+
+class _Source:
+    """キーワード生成と検索の呼び出しを記録するテスト用の取得元"""
+
+    def __init__(self, per_fetch: int = 10, fetch_delay: float = 0.0):
+        self.per_fetch = per_fetch
+        self.fetch_delay = fetch_delay
+        self.generated = 0
+        self.fetched: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def next_keyword(self):
+        self.generated += 1
+        return f"kw{self.generated}"
+
+    async def fetch(self, keyword: str) -> list[dict]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.fetch_delay)
+        finally:
+            self.in_flight -= 1
+        self.fetched.append(keyword)
+        return _raw_tracks(keyword, self.per_fetch)
+
+
+def _make_pipeline(source: _Source, queue: QueueManager, **kwargs) -> IngestionPipeline:
+    return IngestionPipeline(
+        next_keyword=source.next_keyword,
+        fetch=source.fetch,
+        clean=_clean,
+        enqueue=lambda tracks: queue.enqueue(tracks, reject_duplicates=True),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_fills_need_and_stops_remaining_stages():
+    """必要数に達したら残りの段階を打ち切ること"""
+    queue = QueueManager(max_capacity=100, low_watermark=1)
+    source = _Source(per_fetch=10, fetch_delay=0.01)
+    pipeline = _make_pipeline(source, queue)
+
+    filled = await pipeline.run(25, fetch_concurrency=1, max_fetches=10)
+
+    assert filled == 25
+    assert queue.size() == 25
+    assert len(source.fetched) < 10
+
+    stats = pipeline.stats()
+    assert stats["runs"] == 1
+    assert stats["last_run"]["filled"] == 25
+    assert set(stats["stages"]) == {"keywords", "fetch", "clean", "enqueue"}
+    assert stats["stages"]["enqueue"]["produced"] == 25
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetchers_overlap_searches():
+    """検索を並行して実行し、逐次実行より早く補充できること"""
+    queue = QueueManager(max_capacity=100, low_watermark=1)
+    source = _Source(per_fetch=10, fetch_delay=0.1)
+    pipeline = _make_pipeline(source, queue)
+
+    started = time.perf_counter()
+    filled = await pipeline.run(30, fetch_concurrency=3, max_fetches=3)
+    elapsed = time.perf_counter() - started
+
+    assert filled == 30
+    assert source.max_in_flight == 3
+    assert elapsed < 0.25  # 逐次なら0.3秒以上
+    assert pipeline.stats()["stages"]["fetch"]["concurrency"] == 3
+
+
+@pytest.mark.asyncio
+async def test_surplus_tracks_are_carried_to_next_run():
+    """並行検索で必要数を超えた整形済みの楽曲を捨てず、次回の実行で先に投入すること"""
+    queue = QueueManager(max_capacity=100, low_watermark=1)
+    source = _Source(per_fetch=10, fetch_delay=0.01)
+    pipeline = _make_pipeline(source, queue)
+
+    assert await pipeline.run(25, fetch_concurrency=3, max_fetches=3) == 25
+    assert len(source.fetched) == 3
+    assert pipeline.stats()["surplus"] == 5
+
+    # 余りで足りる場合は検索しない
+    assert await pipeline.run(5, fetch_concurrency=3, max_fetches=3) == 5
+    assert len(source.fetched) == 3
+    assert pipeline.stats()["last_run"]["carried_over"] == 5
+    assert pipeline.stats()["surplus"] == 0
+    assert {track.id for track in queue.snapshot()} == {
+        f"kw{n}-{i}" for n in range(1, 4) for i in range(10)
+    }
+
+
+@pytest.mark.asyncio
+async def test_surplus_expires_and_is_rechecked_by_enqueue():
+    """保持期間を過ぎた余りは捨て、持ち越した楽曲も投入段階の確認を通ること"""
+    queue = QueueManager(max_capacity=100, low_watermark=1)
+    source = _Source(per_fetch=10)
+    now = [0.0]
+    seen: set = set()
+
+    def enqueue_unseen(tracks: list[Track]) -> int:
+        # 投入の直前に、その間に記録された楽曲を除く
+        fresh = [track for track in tracks if track.id not in seen]
+        seen.update(track.id for track in fresh)
+        return queue.enqueue(fresh, reject_duplicates=True)
+
+    pipeline = IngestionPipeline(
+        next_keyword=source.next_keyword,
+        fetch=source.fetch,
+        clean=_clean,
+        enqueue=enqueue_unseen,
+        max_surplus_age_s=60,
+        clock=lambda: now[0],
+    )
+
+    assert await pipeline.run(5, fetch_concurrency=1, max_fetches=1) == 5
+    assert pipeline.stats()["surplus"] == 5
+
+    # 持ち越した楽曲のうち、別経路で記録されたものは投入されない
+    seen.update({"kw1-5", "kw1-6"})
+    now[0] = 30
+    assert await pipeline.run(2, fetch_concurrency=1, max_fetches=0) == 2
+    assert {"kw1-7", "kw1-8"} <= {track.id for track in queue.snapshot()}
+    assert pipeline.stats()["surplus"] == 1
+
+    # 保持期間を過ぎた余りは捨てる（保持開始時刻は持ち越しても変わらない）
+    now[0] = 61
+    assert await pipeline.run(1, fetch_concurrency=1, max_fetches=0) == 0
+    assert pipeline.stats()["last_run"]["carried_over"] == 0
+    assert pipeline.stats()["surplus"] == 0
+
+
+@pytest.mark.asyncio
+async def test_async_clean_stage_is_awaited():
+    """整形段階がコルーチン関数の場合は完了を待ってから投入すること"""
+    queue = QueueManager(max_capacity=100, low_watermark=1)
+    source = _Source(per_fetch=10)
+
+    async def offloaded_clean(raw_tracks: list[dict]) -> list[Track]:
+        return await asyncio.to_thread(_clean, raw_tracks)
+
+    pipeline = IngestionPipeline(
+        next_keyword=source.next_keyword,
+        fetch=source.fetch,
+        clean=offloaded_clean,
+        enqueue=lambda tracks: queue.enqueue(tracks, reject_duplicates=True),
+    )
+
+    assert await pipeline.run(20, fetch_concurrency=2, max_fetches=4) == 20
+    assert queue.size() == 20
+    assert pipeline.stats()["stages"]["clean"]["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_backpressure_limits_work_ahead():
+    """後段が詰まっている間は前段が上限を超えて先行しないこと"""
+    queue = QueueManager(max_capacity=1000, low_watermark=1)
+    source = _Source(per_fetch=1)
+    release = asyncio.Event()
+
+    async def blocked_fetch(keyword: str):
+        await release.wait()
+        return await source.fetch(keyword)
+
+    pipeline = IngestionPipeline(
+        next_keyword=source.next_keyword,
+        fetch=blocked_fetch,
+        clean=_clean,
+        enqueue=lambda tracks: queue.enqueue(tracks, reject_duplicates=True),
+        queue_size=2,
+    )
+    run = asyncio.create_task(pipeline.run(1000, fetch_concurrency=1, max_fetches=100))
+    await asyncio.sleep(0.05)
+
+    # 検索中の1件 + キューの上限2件 + put() 待ちの1件 までしか生成されない
+    assert source.generated <= 4
+
+    release.set()
+    assert await run == 100
+    assert source.generated == 100
+
+
+@pytest.mark.asyncio
+async def test_stage_errors_are_counted_and_skipped():
+    """段階の失敗は記録され、他のキーワードの処理は続くこと"""
+    queue = QueueManager(max_capacity=100, low_watermark=1)
+    source = _Source(per_fetch=5)
+    original_fetch = source.fetch
+
+    async def flaky_fetch(keyword: str):
+        if keyword == "kw1":
+            raise RuntimeError("network error")
+        return await original_fetch(keyword)
+
+    pipeline = IngestionPipeline(
+        next_keyword=source.next_keyword,
+        fetch=flaky_fetch,
+        clean=_clean,
+        enqueue=lambda tracks: queue.enqueue(tracks, reject_duplicates=True),
+    )
+
+    filled = await pipeline.run(100, fetch_concurrency=2, max_fetches=3)
+
+    assert filled == 10
+    stages = pipeline.stats()["stages"]
+    assert stages["fetch"]["errors"] == 1
+    assert stages["keywords"]["processed"] == 3
@@ -2,15 +2,30 @@
 iTunes API clientのテスト
 """
 
-import pytest
-from unittest.mock import AsyncMock, Mock, patch
-import httpx
+import asyncio
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+import httpx
+import pytest
 
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.services import itunes_api
 from app.services.itunes_api import iTunesApiClient
 from app.models.track import Track
 
 
+@pytest.fixture(autouse=True)
+def _unthrottled_rate_limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    """送信レート制限で待たされないよう、共有の制限器を十分に緩いものに差し替える"""
+    monkeypatch.setattr(
+        itunes_api,
+        "_search_rate_limiter",
+        AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10),
+    )
+
+
 class TestiTunesApiClient:
     """iTunesApiClientクラスのテスト"""
     
@@ -117,6 +132,34 @@ class TestiTunesApiClient:
         tracks_second = client.clean_and_filter_tracks(raw_tracks)
         assert len(tracks_second) == 0
     
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("executor_cls", [ThreadPoolExecutor, ProcessPoolExecutor])
+    async def test_clean_and_filter_tracks_async_offloads_to_pool(self, executor_cls):
+        """プールで整形した結果が同期版と同じで、重複排除がイベントループ上で適用されること"""
+        raw_tracks = [
+            {
+                "trackId": 100 + i,
+                "trackName": f"Song {i % 3}",
+                "artistName": "Artist",
+                "previewUrl": f"https://example.com/{i}.m4a",
+                "artworkUrl100": f"https://example.com/{i}/100x100bb.jpg",
+            }
+            for i in range(6)
+        ] + [{"trackId": 999, "trackName": "Missing Preview"}]
+
+        with executor_cls(max_workers=1) as executor:
+            client = iTunesApiClient(clean_executor=executor)
+            # 同時に整形しても、同じ曲は片方の呼び出しにだけ含まれる
+            first, second = await asyncio.gather(
+                client.clean_and_filter_tracks_async(raw_tracks),
+                client.clean_and_filter_tracks_async(raw_tracks),
+            )
+
+        expected = iTunesApiClient().clean_and_filter_tracks(raw_tracks)
+        assert first == expected
+        assert [track.title for track in first] == ["Song 0", "Song 1", "Song 2"]
+        assert second == []
+
     def test_clean_and_filter_tracks_cross_album_duplicate_removal(self):
         """別アルバムの同じ曲の重複排除のテスト"""
         client = iTunesApiClient()
@@ -176,10 +219,9 @@ class TestiTunesApiClient:
     @pytest.mark.asyncio
     async def test_search_tracks_success(self):
         """iTunes API検索成功のテスト"""
-        client = iTunesApiClient()
-        
         # モックレスポンス
         mock_response_data = {
+            "resultCount": 1,
             "results": [
                 {
                     "trackId": 12345,
@@ -188,61 +230,92 @@ class TestiTunesApiClient:
                 }
             ]
         }
-        
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_response = Mock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = mock_response_data
-            mock_response.raise_for_status.return_value = None
-            
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=mock_response_data))
+
+        async with httpx.AsyncClient(transport=transport) as http_client:
+            client = iTunesApiClient(http_client=http_client)
             results = await client.search_tracks({"term": "test"}, limit=50)
-            
-            assert len(results) == 1
-            assert results[0]["trackId"] == 12345
-    
+
+        assert len(results) == 1
+        assert results[0]["trackId"] == 12345
+
+    @pytest.mark.asyncio
+    async def test_search_tracks_keeps_only_used_fields(self):
+        """応答のうち整形に使うフィールドだけを残すこと"""
+        raw = {
+            "wrapperType": "track",
+            "trackId": 1,
+            "trackName": "Song",
+            "artistName": "Artist",
+            "previewUrl": "https://example.com/p.m4a",
+            "artworkUrl100": "https://example.com/a100x100.jpg",
+            "collectionName": "Album",
+            "trackViewUrl": "https://music.apple.com/jp/album/1",
+            "releaseDate": "2020-01-01T12:00:00Z",
+        }
+        transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"resultCount": 1, "results": [raw]}))
+
+        async with httpx.AsyncClient(transport=transport) as http_client:
+            client = iTunesApiClient(http_client=http_client)
+            results = await client.search_tracks({"term": "fields"})
+
+        assert set(results[0]) == {
+            "trackId", "trackName", "artistName", "previewUrl", "artworkUrl100", "collectionName"}
+        assert len(client.clean_and_filter_tracks(results)) == 1
+
     @pytest.mark.asyncio
     async def test_search_tracks_4xx_error(self):
         """iTunes API 4xxエラーのテスト"""
-        client = iTunesApiClient()
-        
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_response = Mock()
-            mock_response.status_code = 404
-            
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
-            
+        transport = httpx.MockTransport(lambda request: httpx.Response(404))
+
+        async with httpx.AsyncClient(transport=transport) as http_client:
+            client = iTunesApiClient(http_client=http_client)
             results = await client.search_tracks({"term": "test"})
-            
-            # 4xxエラーの場合は空リストを返す
-            assert results == []
-    
+
+        # 4xxエラーの場合は空リストを返す
+        assert results == []
+
     @pytest.mark.asyncio
     async def test_search_tracks_timeout_retry(self):
         """タイムアウト時のリトライテスト"""
-        client = iTunesApiClient()
-        
-        with patch('httpx.AsyncClient') as mock_client:
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
             # 最初の2回はタイムアウト、3回目は成功
-            mock_client.return_value.__aenter__.return_value.get = AsyncMock(
-                side_effect=[
-                    httpx.TimeoutException("timeout"),
-                    httpx.TimeoutException("timeout"),
-                    Mock(
-                        status_code=200,
-                        json=lambda: {"results": [{"trackId": 123}]},
-                        raise_for_status=lambda: None
-                    )
-                ]
-            )
-            
+            calls.append(request)
+            if len(calls) <= 2:
+                raise httpx.ReadTimeout("timeout", request=request)
+            return httpx.Response(200, json={"results": [{"trackId": 123}]})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            client = iTunesApiClient(http_client=http_client)
             with patch('asyncio.sleep') as mock_sleep:
                 results = await client.search_tracks({"term": "test"})
-                
+
                 # リトライが実行され、最終的に成功
                 assert len(results) == 1
                 assert results[0]["trackId"] == 123
-                
+
                 # sleep が呼ばれている（リトライの待機）
                 assert mock_sleep.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_search_tracks_throttled_retry(self):
+        """429は送信レート制限器に記録され、減速してからリトライされること"""
+        limiter = AdaptiveRateLimiter(initial_rate=100, max_rate=100, max_concurrency=2)
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, json={"results": [{"trackId": 123}]}),
+        ]
+        transport = httpx.MockTransport(lambda request: responses.pop(0))
+
+        async with httpx.AsyncClient(transport=transport) as http_client:
+            client = iTunesApiClient(http_client=http_client, rate_limiter=limiter)
+            results = await client.search_tracks({"term": "throttled"})
+
+        assert results == [{"trackId": 123}]
+        stats = limiter.stats()
+        assert stats["throttled"] == 1
+        assert stats["decreases"] == 1
+        assert stats["rate_per_s"] < 100
@@ -3,10 +3,13 @@ QueueManagerのユニットテスト
 基本操作、容量制御、スレッドセーフ性を検証
 """
 
+import asyncio
 import threading
 import time
 from unittest.mock import patch
 
+import pytest
+
 from app.core.queue import QueueManager, queue_self_check
 from app.models.track import Track
 
@@ -30,6 +33,7 @@ class TestQueueManager:
         assert stats["enqueue_count"] == 0
         assert stats["dequeue_count"] == 0
         assert stats["dropped_count"] == 0
+        assert stats["duplicate_rejected"] == 0
     
     def test_basic_enqueue_dequeue(self):
         """基本的なenqueue/dequeueのテスト"""
@@ -234,6 +238,362 @@ class TestQueueManager:
         assert stats["dequeue_count"] == 25
         assert stats["is_low"]  # 5 <= 10 (low_watermark)
 
+    def test_random_dequeue_removes_sampled_items(self):
+        """ランダム取り出しで取得した楽曲だけが削除されることのテスト"""
+        tracks = [
+            Track(id=f"{i:03d}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(50)
+        ]
+        self.queue_manager.enqueue(tracks)
+
+        sampled = self.queue_manager.dequeue_random(20)
+        sampled_ids = {track.id for track in sampled}
+        assert len(sampled_ids) == 20
+        assert self.queue_manager.size() == 30
+
+        remaining = self.queue_manager.dequeue(100)
+        remaining_ids = [track.id for track in remaining]
+        assert sampled_ids.isdisjoint(remaining_ids)
+        assert len(remaining_ids) == 30
+        # 残りはFIFO順序を保つ
+        assert remaining_ids == sorted(remaining_ids)
+
+    def test_capacity_drop_after_random_dequeue(self):
+        """ランダム取り出し後も容量超過時は最古の楽曲からドロップされるテスト"""
+        small_queue = QueueManager(max_capacity=5, low_watermark=1)
+        small_queue.enqueue([
+            Track(id=f"00{i}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(1, 6)
+        ])
+        taken = {track.id for track in small_queue.dequeue_random(2)}
+
+        small_queue.enqueue([
+            Track(id=f"0{i}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(10, 14)
+        ])
+        assert small_queue.size() == 5
+        assert small_queue.stats()["dropped_count"] == 2
+
+        expected = [
+            f"00{i}" for i in range(1, 6) if f"00{i}" not in taken
+        ][2:] + [f"0{i}" for i in range(10, 14)]
+        assert [track.id for track in small_queue.dequeue(5)] == expected
+
+    def test_random_dequeue_repeated_keeps_order_consistent(self):
+        """ランダム取り出しを繰り返しても内部順序が破綻しないことのテスト"""
+        queue = QueueManager(max_capacity=1000, low_watermark=0)
+        for round_index in range(20):
+            queue.enqueue([
+                Track(
+                    id=f"{round_index:02d}{i:03d}",
+                    title="Song",
+                    artist="Artist",
+                )
+                for i in range(50)
+            ])
+            queue.dequeue_random(45)
+
+        assert queue.size() == 100
+        remaining = queue.dequeue(1000)
+        assert len(remaining) == 100
+        assert len({track.id for track in remaining}) == 100
+        assert [t.id for t in remaining] == sorted(t.id for t in remaining)
+
+    def test_contains_uses_id_index(self):
+        """IDインデックスによる所属判定のテスト"""
+        self.queue_manager.enqueue([
+            Track(id=123, title="Song", artist="Artist"),
+            Track(id="abc", title="Song", artist="Artist"),
+        ])
+        assert self.queue_manager.contains("123")
+        assert self.queue_manager.contains(123)
+        assert self.queue_manager.contains("abc")
+        assert not self.queue_manager.contains("missing")
+
+        self.queue_manager.dequeue(1)
+        assert not self.queue_manager.contains(123)
+        self.queue_manager.dequeue_random(1)
+        assert not self.queue_manager.contains("abc")
+
+    def test_contains_with_repeated_ids(self):
+        """重複許可モードで同一IDが複数ある場合の所属判定テスト"""
+        track = Track(id="dup", title="Song", artist="Artist")
+        self.queue_manager.enqueue([track, track])
+        assert self.queue_manager.size() == 2
+
+        self.queue_manager.dequeue(1)
+        assert self.queue_manager.contains("dup")
+        self.queue_manager.dequeue(1)
+        assert not self.queue_manager.contains("dup")
+
+    def test_enqueue_reject_duplicates(self):
+        """重複拒否モードのenqueueテスト"""
+        tracks = [
+            Track(id="001", title="Song 1", artist="Artist 1"),
+            Track(id="002", title="Song 2", artist="Artist 2"),
+        ]
+        assert self.queue_manager.enqueue(tracks) == 2
+
+        again = [
+            Track(id="002", title="Song 2", artist="Artist 2"),
+            Track(id="003", title="Song 3", artist="Artist 3"),
+            Track(id="003", title="Song 3", artist="Artist 3"),
+        ]
+        added = self.queue_manager.enqueue(again, reject_duplicates=True)
+        assert added == 1
+        assert self.queue_manager.size() == 3
+
+        stats = self.queue_manager.stats()
+        assert stats["duplicate_rejected"] == 2
+        assert stats["enqueue_count"] == 3
+
+    def test_reject_duplicates_default_from_constructor(self):
+        """コンストラクタで重複拒否を既定にした場合のテスト"""
+        queue = QueueManager(
+            max_capacity=10, low_watermark=1, reject_duplicates=True
+        )
+        track = Track(id="001", title="Song", artist="Artist")
+        assert queue.enqueue([track]) == 1
+        assert queue.enqueue([track]) == 0
+        # 明示指定で重複許可に上書きできる
+        assert queue.enqueue([track], reject_duplicates=False) == 1
+        assert queue.stats()["duplicate_rejected"] == 1
+
+    def test_dequeue_random_excluding(self):
+        """除外ID付きランダム取り出しのテスト"""
+        tracks = [
+            Track(id=f"{i:03d}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(20)
+        ]
+        self.queue_manager.enqueue(tracks)
+        exclude = {f"{i:03d}" for i in range(0, 20, 2)}
+
+        result = self.queue_manager.dequeue_random_excluding(5, exclude)
+        assert len(result) == 5
+        assert all(track.id not in exclude for track in result)
+        assert self.queue_manager.size() == 15
+
+        # 除外対象はキューに残り、統計は取り出した分のみ加算される
+        for track_id in exclude:
+            assert self.queue_manager.contains(track_id)
+        stats = self.queue_manager.stats()
+        assert stats["enqueue_count"] == 20
+        assert stats["dequeue_count"] == 5
+
+    def test_dequeue_random_excluding_keeps_fifo_order(self):
+        """除外対象を読み飛ばしてもFIFO順序が保たれることのテスト"""
+        tracks = [
+            Track(id=f"{i:03d}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(10)
+        ]
+        self.queue_manager.enqueue(tracks)
+        exclude = {f"{i:03d}" for i in range(8)}
+
+        result = self.queue_manager.dequeue_random_excluding(5, exclude)
+        assert sorted(track.id for track in result) == ["008", "009"]
+
+        remaining = self.queue_manager.dequeue(10)
+        assert [track.id for track in remaining] == [f"{i:03d}" for i in range(8)]
+
+    def test_dequeue_random_excluding_edge_cases(self):
+        """除外ID付きランダム取り出しの境界値テスト"""
+        assert self.queue_manager.dequeue_random_excluding(5, set()) == []
+
+        self.queue_manager.enqueue([
+            Track(id="001", title="Song", artist="Artist"),
+        ])
+        assert self.queue_manager.dequeue_random_excluding(0, set()) == []
+        assert self.queue_manager.dequeue_random_excluding(5, {"001"}) == []
+        assert self.queue_manager.size() == 1
+
+
+class TestQueueLeases:
+    """リース（ack/期限切れ返却）のテストクラス"""
+
+    def _make_tracks(self, count: int) -> list[Track]:
+        return [
+            Track(id=f"{i:03d}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(count)
+        ]
+
+    def test_lease_and_ack(self):
+        """リースしたトラックをackすると破棄されるテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1, lease_ttl_s=30)
+        queue.enqueue(self._make_tracks(10))
+
+        lease_id, tracks = queue.lease_random_excluding(4, set())
+        assert lease_id is not None
+        assert len(tracks) == 4
+        assert queue.size() == 6
+
+        stats = queue.stats()
+        assert stats["lease_enabled"] is True
+        assert stats["lease_ttl_s"] == 30
+        assert stats["lease_active"] == 1
+        assert stats["leased_tracks"] == 4
+
+        assert queue.ack(lease_id) == 4
+        assert queue.ack(lease_id) == 0  # 二重ackは無視
+        stats = queue.stats()
+        assert stats["lease_active"] == 0
+        assert stats["leased_tracks"] == 0
+        assert stats["lease_acked"] == 4
+        assert queue.size() == 6
+
+    def test_release_returns_tracks(self):
+        """リース取り消しでトラックがキューに戻るテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1, lease_ttl_s=30)
+        queue.enqueue(self._make_tracks(10))
+
+        lease_id, tracks = queue.lease_random_excluding(3, set())
+        assert queue.release(lease_id) == 3
+        assert queue.size() == 10
+        for track in tracks:
+            assert queue.contains(track.id)
+        assert queue.stats()["lease_returned"] == 3
+
+    def test_expired_lease_returns_tracks(self):
+        """期限切れのリースがキューに戻るテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1, lease_ttl_s=0.05)
+        queue.enqueue(self._make_tracks(5))
+
+        lease_id, tracks = queue.lease_random_excluding(5, set())
+        assert queue.size() == 0
+
+        time.sleep(0.1)
+        assert queue.size() == 5
+        assert queue.ack(lease_id) == 0  # 期限切れ後のackは無効
+        stats = queue.stats()
+        assert stats["lease_active"] == 0
+        assert stats["lease_returned"] == 5
+
+    def test_expired_lease_skips_requeued_duplicates(self):
+        """期限切れ返却時に既にキューにあるIDは戻さないテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1, lease_ttl_s=0.05)
+        tracks = self._make_tracks(2)
+        queue.enqueue(tracks)
+
+        queue.lease_random_excluding(2, set())
+        queue.enqueue(tracks[:1])
+
+        time.sleep(0.1)
+        assert queue.size() == 2
+        assert queue.stats()["lease_returned"] == 1
+
+    def test_lease_disabled(self):
+        """リース無効時は通常の取り出しと同じ動作になるテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1, lease_ttl_s=0)
+        queue.enqueue(self._make_tracks(5))
+
+        lease_id, tracks = queue.lease_random_excluding(2, set())
+        assert lease_id is None
+        assert len(tracks) == 2
+        assert queue.ack(lease_id) == 0
+        assert queue.release(lease_id) == 0
+        assert queue.stats()["lease_enabled"] is False
+
+
+class TestQueueLongPoll:
+    """take()/wait_for_size() による待機取り出しのテストクラス"""
+
+    def _make_tracks(self, start: int, count: int) -> list[Track]:
+        return [
+            Track(id=f"{i:03d}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(start, start + count)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_take_wakes_on_enqueue(self):
+        """別タスクからの追加で待機中のtake()が再開されるテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1)
+        queue.enqueue(self._make_tracks(0, 2))
+
+        async def producer():
+            await asyncio.sleep(0.05)
+            queue.enqueue(self._make_tracks(2, 3))
+
+        started = time.perf_counter()
+        tracks, _ = await asyncio.gather(queue.take(5, timeout=5.0), producer())
+        assert len(tracks) == 5
+        assert time.perf_counter() - started < 1.0
+        assert queue.size() == 0
+
+    @pytest.mark.asyncio
+    async def test_take_wakes_on_enqueue_from_thread(self):
+        """別スレッドからの追加で待機中のtake()が再開されるテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1)
+        timer = threading.Timer(0.05, queue.enqueue, args=(self._make_tracks(0, 3),))
+        timer.start()
+        try:
+            tracks = await queue.take(3, timeout=5.0)
+        finally:
+            timer.join()
+        assert len(tracks) == 3
+
+    @pytest.mark.asyncio
+    async def test_take_timeout_returns_partial_batch(self):
+        """タイムアウト時はその時点の楽曲を返すテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1)
+        queue.enqueue(self._make_tracks(0, 2))
+
+        started = time.perf_counter()
+        tracks = await queue.take(5, timeout=0.05, exclude_ids={"000"})
+        assert time.perf_counter() - started >= 0.04
+        assert [track.id for track in tracks] == ["001"]
+        assert queue.size() == 1
+
+    @pytest.mark.asyncio
+    async def test_wait_for_size_caps_at_capacity(self):
+        """容量を超える件数を待つ場合は満杯で待機を終えるテスト"""
+        queue = QueueManager(max_capacity=3, low_watermark=1)
+        queue.enqueue(self._make_tracks(0, 3))
+        assert await queue.wait_for_size(10, timeout=1.0) is True
+        assert await QueueManager(max_capacity=3).wait_for_size(1, timeout=0.01) is False
+
+
+class TestLowWatermarkListeners:
+    """低水位通知のテストクラス"""
+
+    def _make_tracks(self, count: int, prefix: str = "") -> list[Track]:
+        return [
+            Track(id=f"{prefix}{i:03d}", title=f"Song {i}", artist=f"Artist {i}")
+            for i in range(count)
+        ]
+
+    def test_listener_fires_once_on_crossing(self):
+        """閾値をまたいだ取り出しでのみ通知されるテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1, lease_ttl_s=30)
+        queue.enqueue(self._make_tracks(10))
+        calls = []
+        queue.add_low_watermark_listener(5, calls.append)
+
+        queue.dequeue(3)  # 10 -> 7
+        assert calls == []
+        queue.lease_random_excluding(3, set())  # 7 -> 4
+        assert calls == [4]
+        queue.dequeue_random(2)  # 4 -> 2（閾値未満のまま）
+        assert calls == [4]
+
+        queue.enqueue(self._make_tracks(8, prefix="b"))  # 2 -> 10
+        queue.dequeue_random_excluding(6, set())  # 10 -> 4
+        assert calls == [4, 4]
+
+        queue.remove_low_watermark_listener(calls.append)
+        queue.enqueue(self._make_tracks(10, prefix="c"))
+        queue.clear()
+        assert calls == [4, 4]
+
+    def test_listener_errors_do_not_break_dequeue(self):
+        """リスナーの例外が取り出しに影響しないテスト"""
+        queue = QueueManager(max_capacity=100, low_watermark=1)
+        queue.enqueue(self._make_tracks(3))
+
+        def failing(size: int) -> None:
+            raise RuntimeError("listener failed")
+
+        queue.add_low_watermark_listener(3, failing)
+        assert len(queue.dequeue(1)) == 1
+
 
 class TestQueueSelfCheck:
     """queue_self_check関数のテスト"""
@@ -0,0 +1,111 @@
+"""
+適応型レート制限器（AdaptiveRateLimiter）のテスト
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.rate_limit import AdaptiveRateLimiter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_limiter(clock: FakeClock, **kwargs) -> AdaptiveRateLimiter:
+    kwargs.setdefault("initial_rate", 1.0)
+    kwargs.setdefault("min_rate", 0.1)
+    kwargs.setdefault("max_rate", 2.0)
+    kwargs.setdefault("max_concurrency", 4)
+    kwargs.setdefault("increase_step", 0.1)
+    kwargs.setdefault("latency_target_s", 1.0)
+    return AdaptiveRateLimiter(clock=clock, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_additive_increase_on_success():
+    """成功ごとにレートと並行数が加算的に増え、上限で止まること"""
+    clock = FakeClock()
+    limiter = _make_limiter(clock)
+
+    for _ in range(20):
+        clock.now += 1.0
+        await limiter.acquire()
+        limiter.release(200, 0.1)
+
+    assert limiter.rate == pytest.approx(2.0)
+    assert limiter.concurrency_limit == 4
+    assert limiter.stats()["increases"] == 20
+
+
+@pytest.mark.asyncio
+async def test_multiplicative_decrease_once_per_round_trip():
+    """スロットリングでレートと並行数が半減し、同時に返った失敗では1回しか下げないこと"""
+    clock = FakeClock()
+    limiter = _make_limiter(clock, initial_rate=2.0)
+    limiter._concurrency = 4.0
+
+    limiter.release(429, 0.2)
+    limiter.release(429, 0.2)
+    assert limiter.rate == pytest.approx(1.0)
+    assert limiter.concurrency_limit == 2
+
+    clock.now += 1.0
+    limiter.release(503, 0.2)
+    assert limiter.rate == pytest.approx(0.5)
+    assert limiter.concurrency_limit == 1
+
+    stats = limiter.stats()
+    assert stats["throttled"] == 2
+    assert stats["errors"] == 1
+    assert stats["decreases"] == 2
+
+    # 下限より下げない
+    for _ in range(10):
+        clock.now += 1.0
+        limiter.release(None, 0.2)
+    assert limiter.rate == pytest.approx(0.1)
+
+
+def test_high_latency_counts_as_congestion():
+    """成功でもレイテンシが目標を超えたら減速すること"""
+    clock = FakeClock()
+    limiter = _make_limiter(clock)
+    limiter.release(200, 5.0)
+    assert limiter.rate == pytest.approx(0.5)
+    assert limiter.stats()["successes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_paces_by_rate_and_concurrency():
+    """トークンがなくなるとレートに応じて待ち、並行数の上限では解放を待つこと"""
+    limiter = AdaptiveRateLimiter(initial_rate=20.0, max_rate=20.0, max_concurrency=1)
+
+    assert await limiter.acquire() == pytest.approx(0.0, abs=0.01)
+    second = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.1)
+    assert not second.done()  # 並行数1のため解放待ち
+
+    limiter.release(204, 0.01)
+    started = time.monotonic()
+    await asyncio.wait_for(second, 1.0)
+    assert time.monotonic() - started < 0.1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_blocks_sending():
+    """Retry-After の間は送信を止めること"""
+    limiter = AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0, max_concurrency=2)
+    await limiter.acquire()
+    limiter.release(429, 0.01, retry_after_s=0.2)
+
+    started = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - started >= 0.18
+    assert limiter.stats()["total_wait_s"] >= 0.18
@@ -0,0 +1,194 @@
+"""
+共有キューバックエンド（RedisQueueBackend）のテスト
+スタンドインサーバー（fakeredis）を用いてオフラインで検証
+"""
+
+import asyncio
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from app.core.queue import QueueManager
+from app.core.queue_backend import QueueBackend, call_backend
+from app.core.redis_queue import RedisQueueBackend
+from app.models.track import Track
+
+
+def _make_tracks(count: int, prefix: str = "") -> list[Track]:
+    return [
+        Track(
+            id=f"{prefix}{i:03d}",
+            title=f"Song {i}",
+            artist=f"Artist {i}",
+            preview_url=f"https://example.com/{i}.m4a",
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def server() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+
+def _backend(server: fakeredis.FakeServer, **kwargs) -> RedisQueueBackend:
+    kwargs.setdefault("max_capacity", 100)
+    kwargs.setdefault("low_watermark", 10)
+    kwargs.setdefault("lease_ttl_s", 30)
+    return RedisQueueBackend(fakeredis.FakeRedis(server=server), **kwargs)
+
+
+def test_backends_satisfy_protocol(server):
+    """両バックエンドがQueueBackendプロトコルを満たすこと"""
+    assert isinstance(QueueManager(max_capacity=10, low_watermark=1), QueueBackend)
+    assert isinstance(_backend(server), QueueBackend)
+
+
+def test_enqueue_and_fifo_dequeue(server):
+    """追加と古い順の取り出し"""
+    queue = _backend(server)
+    assert queue.enqueue(_make_tracks(5)) == 5
+    assert queue.size() == 5
+    assert queue.contains("001")
+    assert queue.contains(1) is False
+
+    result = queue.dequeue(2)
+    assert [track.id for track in result] == ["000", "001"]
+    assert result[0].preview_url == "https://example.com/0.m4a"
+    assert queue.size() == 3
+    assert not queue.contains("001")
+
+
+def test_random_dequeue_is_shared_between_processes(server):
+    """同じストアに接続した複数インスタンスが1つのキューを共有すること"""
+    producer = _backend(server)
+    consumer_a = _backend(server)
+    consumer_b = _backend(server)
+    producer.enqueue(_make_tracks(30))
+
+    taken_a = consumer_a.dequeue_random(10)
+    taken_b = consumer_b.bulk_dequeue(10)
+    ids = {track.id for track in taken_a} | {track.id for track in taken_b}
+    assert len(ids) == 20
+    assert producer.size() == 10
+
+    stats = producer.stats()
+    assert stats["backend"] == "redis"
+    assert stats["enqueue_count"] == 30
+    assert stats["dequeue_count"] == 20
+
+
+def test_capacity_drop_and_duplicates(server):
+    """容量超過時の古い楽曲の破棄と重複拒否"""
+    queue = _backend(server, max_capacity=3)
+    queue.enqueue(_make_tracks(3))
+    assert queue.enqueue(_make_tracks(5)[3:]) == 2
+    assert queue.size() == 3
+    assert [track.id for track in queue.dequeue(3)] == ["002", "003", "004"]
+
+    queue.enqueue(_make_tracks(2))
+    assert queue.enqueue(_make_tracks(3), reject_duplicates=True) == 1
+    stats = queue.stats()
+    assert stats["dropped_count"] == 2
+    assert stats["duplicate_rejected"] == 2
+
+
+def test_dequeue_random_excluding(server):
+    """除外対象を残したままランダムに取り出すこと"""
+    queue = _backend(server)
+    queue.enqueue(_make_tracks(10))
+    exclude = {f"{i:03d}" for i in range(7)}
+
+    result = queue.dequeue_random_excluding(5, exclude)
+    assert sorted(track.id for track in result) == ["007", "008", "009"]
+    assert queue.size() == 7
+    for track_id in exclude:
+        assert queue.contains(track_id)
+
+
+def test_lease_release_and_expiry(server):
+    """リースの取り消しと期限切れ返却"""
+    queue = _backend(server, lease_ttl_s=0.05)
+    queue.enqueue(_make_tracks(6))
+
+    lease_id, tracks = queue.lease_random_excluding(3, set())
+    assert len(tracks) == 3
+    assert queue.release(lease_id) == 3
+    assert queue.size() == 6
+
+    lease_id, tracks = queue.lease_random_excluding(4, set())
+    assert queue.stats()["leased_tracks"] == 4
+    time.sleep(0.1)
+    assert queue.size() == 6
+    assert queue.ack(lease_id) == 0
+    assert queue.stats()["lease_returned"] == 7
+
+
+def test_clear(server):
+    """クリア"""
+    queue = _backend(server)
+    queue.enqueue(_make_tracks(4))
+    assert queue.clear() == 4
+    assert queue.size() == 0
+    assert queue.dequeue_random(3) == []
+
+
+def test_worker_role_is_held_by_single_process(server):
+    """補充ワーカーの担当権は1つのバックエンドのみが保持し、期限切れで引き継がれること"""
+    first = _backend(server)
+    second = _backend(server)
+    first._worker_role_ttl_ms = 100
+
+    assert first.try_acquire_worker_role() is True
+    assert first.try_acquire_worker_role() is True  # 保持者による延長
+    assert second.try_acquire_worker_role() is False
+
+    time.sleep(0.15)
+    assert second.try_acquire_worker_role() is True
+    assert first.try_acquire_worker_role() is False
+
+
+@pytest.mark.asyncio
+async def test_store_calls_run_off_the_event_loop(server):
+    """イベントループ上からの呼び出しはスレッドで実行され、ループを止めないこと"""
+    queue = _backend(server)
+    queue.enqueue(_make_tracks(3))
+    threads = []
+    scard = queue._client.scard
+
+    def recording_scard(*args):
+        threads.append(threading.get_ident())
+        return scard(*args)
+
+    queue._client.scard = recording_scard
+    assert await call_backend(queue.size) == 3
+    assert await queue.wait_for_size(3, timeout=0.1) is True
+    assert len(await queue.take(2, timeout=0.1)) == 2
+
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_worker_role_is_renewed_during_long_refill(server, monkeypatch):
+    """担当権の有効期間より長い補充の間も、担当権が他プロセスに移らないこと"""
+    from app.services.worker import QueueReplenishmentWorker
+
+    monkeypatch.setenv("GEMINI_API_KEY", "dummy-key")
+    monkeypatch.setenv("QUEUE_WORKER_ROLE_TTL_MS", "300")
+    leader = _backend(server)
+    standby = _backend(server)
+    worker = QueueReplenishmentWorker(leader)
+    assert await worker._check_worker_role() is True
+
+    async def slow_run(need, fetch_concurrency=1, max_fetches=3):
+        await asyncio.sleep(0.8)
+        return need
+
+    monkeypatch.setattr(worker._pipeline, "run", slow_run)
+    refill = asyncio.create_task(worker._attempt_refill(need=5))
+    for _ in range(3):
+        await asyncio.sleep(0.25)
+        assert standby.try_acquire_worker_role() is False
+    assert await refill is True
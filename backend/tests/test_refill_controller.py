@@ -0,0 +1,133 @@
+"""
+補充コントローラー（RefillController）のテスト
+"""
+
+import pytest
+
+from app.services.refill_controller import RefillController
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _make_controller(clock: FakeClock, **kwargs) -> RefillController:
+    kwargs.setdefault("max_cap", 300)
+    kwargs.setdefault("target_level", 210)
+    kwargs.setdefault("min_batch", 30)
+    kwargs.setdefault("horizon_s", 60.0)
+    kwargs.setdefault("max_concurrency", 3)
+    kwargs.setdefault("rate_tau_s", 10.0)
+    return RefillController(clock=clock, **kwargs)
+
+
+def _feed_rate(controller: RefillController, clock: FakeClock, rate: float, seconds: int) -> None:
+    """一定のレートで取り出された状態を1秒ごとに記録"""
+    count = 0
+    controller.observe(count)
+    for _ in range(seconds):
+        clock.now += 1.0
+        count += int(rate)
+        controller.observe(count)
+
+
+def test_ewma_converges_to_dequeue_rate():
+    """取り出しレートがEWMAで推定されること"""
+    clock = FakeClock()
+    controller = _make_controller(clock)
+    _feed_rate(controller, clock, rate=5, seconds=60)
+    assert controller.dequeue_rate == pytest.approx(5.0, rel=0.01)
+
+
+def test_counter_reset_only_rebases():
+    """カウンタが減った場合はレートを壊さずに基準値のみ更新すること"""
+    clock = FakeClock()
+    controller = _make_controller(clock)
+    _feed_rate(controller, clock, rate=5, seconds=60)
+    rate = controller.dequeue_rate
+
+    clock.now += 1.0
+    controller.observe(0)
+    assert controller.dequeue_rate == rate
+
+
+def test_idle_queue_refills_only_to_target():
+    """需要がない場合は目標水位を下回った時のみ最小単位で補充すること"""
+    clock = FakeClock()
+    controller = _make_controller(clock)
+    controller.observe(0)
+
+    plan = controller.plan(250)
+    assert plan.should_refill is False
+    assert plan.time_to_empty_s is None
+    assert controller.seconds_until_refill(250) is None
+
+    plan = controller.plan(200)
+    assert plan.should_refill is True
+    assert plan.size == 30
+    assert plan.concurrency == 1
+
+
+def test_busy_queue_refills_early_and_larger():
+    """需要が多い場合は目標水位を下回る前に、予測期間分の需要を含めて補充すること"""
+    clock = FakeClock()
+    controller = _make_controller(clock)
+    _feed_rate(controller, clock, rate=4, seconds=60)
+
+    # リードタイム（初期値5秒）後に目標水位を下回る予測
+    plan = controller.plan(225)
+    assert plan.should_refill is True
+    assert plan.reason == "projected below target"
+    # 目標210 + 4件/秒 * 60秒 - 予測205 ≒ 245件だが、空き容量75件に制限される
+    assert plan.size == 75
+
+    assert controller.plan(290).should_refill is False
+    assert controller.seconds_until_refill(290) == pytest.approx((290 - 210) / 4 - 5, rel=0.05)
+
+
+def test_running_dry_uses_concurrency():
+    """リードタイム内に空になる予測の場合のみ並行して補充すること"""
+    clock = FakeClock()
+    controller = _make_controller(clock)
+    _feed_rate(controller, clock, rate=20, seconds=60)
+    controller.observe_refill(added=30, api_calls=1, duration_s=5.0)
+
+    plan = controller.plan(50)
+    assert plan.should_refill is True
+    assert plan.reason == "running dry"
+    assert plan.concurrency == 3
+    assert plan.size == 250
+
+
+def test_requested_refill_and_full_queue():
+    """補充要求時は予測にかかわらず補充し、満杯時は補充しないこと"""
+    clock = FakeClock()
+    controller = _make_controller(clock)
+    controller.observe(0)
+
+    plan = controller.plan(280, requested=True)
+    assert plan.should_refill is True
+    assert plan.size == 20  # 空き容量まで
+    assert controller.plan(300, requested=True).should_refill is False
+
+
+def test_stats_expose_forecast_and_decisions():
+    """統計情報に予測値と直近の判断が含まれること"""
+    clock = FakeClock()
+    controller = _make_controller(clock)
+    controller.observe(0)
+    controller.plan(100)
+    controller.observe_refill(added=60, api_calls=2, duration_s=3.0)
+
+    stats = controller.stats()
+    assert stats["plans"] == 1
+    assert stats["refills"] == 1
+    assert stats["api_calls"] == 2
+    assert stats["tracks_added"] == 60
+    assert stats["last_plan"]["should_refill"] is True
+    assert stats["last_plan"]["size"] == 110
+    assert stats["lead_time_s"] < 5.0
@@ -0,0 +1,115 @@
+"""
+iTunes検索結果キャッシュ（SearchCache）のテスト
+"""
+
+import httpx
+import pytest
+
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.services import itunes_api
+from app.services.itunes_api import iTunesApiClient
+from app.services.search_cache import SearchCache, normalize_search_params
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+RESULTS = [{"trackId": 1, "trackName": "Song"}]
+
+
+@pytest.fixture(autouse=True)
+def _unthrottled_rate_limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    """送信レート制限で待たされないよう、共有の制限器を十分に緩いものに差し替える"""
+    monkeypatch.setattr(
+        itunes_api,
+        "_search_rate_limiter",
+        AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10),
+    )
+
+
+def test_key_normalization():
+    """パラメータの順序・空白・大文字小文字の違いを同じキーとして扱うこと"""
+    a = normalize_search_params({"term": " Official  髭男dism ", "media": "music", "limit": 50})
+    b = normalize_search_params({"limit": "50", "MEDIA": "music", "term": "official 髭男DISM"})
+    assert a == b
+    assert a != normalize_search_params({"term": "official", "media": "music", "limit": 50})
+
+
+def test_ttl_and_lru_eviction():
+    """期限切れのエントリを返さず、上限を超えたら最も古く使われたエントリを追い出すこと"""
+    clock = FakeClock()
+    cache = SearchCache(max_entries=2, ttl_s=60, clock=clock)
+
+    cache.set({"term": "a"}, RESULTS)
+    cache.set({"term": "b"}, RESULTS)
+    assert cache.get({"term": "a"}) == RESULTS  # a を最近使用に
+    cache.set({"term": "c"}, RESULTS)  # b が追い出される
+    assert cache.get({"term": "b"}) is None
+
+    clock.now += 61
+    assert cache.get({"term": "a"}) is None
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expired"] == 1
+    assert stats["hit_rate"] == pytest.approx(1 / 3, abs=0.001)
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """SQLiteに保存したエントリを別インスタンスから読めること"""
+    clock = FakeClock()
+    path = str(tmp_path / "search_cache.sqlite3")
+    first = SearchCache(ttl_s=60, path=path, clock=clock)
+    first.set({"term": "yoasobi"}, RESULTS)
+    first.close()
+
+    second = SearchCache(ttl_s=60, path=path, clock=clock)
+    assert second.get({"term": "YOASOBI"}) == RESULTS
+    assert second.get({"term": "YOASOBI"}) == RESULTS
+    stats = second.stats()
+    assert stats["disk_enabled"] is True
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+
+    clock.now += 61
+    third = SearchCache(ttl_s=60, path=path, clock=clock)
+    assert third.get({"term": "yoasobi"}) is None
+    second.close()
+    third.close()
+
+
+@pytest.mark.asyncio
+async def test_search_tracks_serves_cached_results():
+    """同じパラメータの2回目の検索はAPIを呼ばずにキャッシュから返し、同じ整形処理を通ること"""
+    raw = [{
+        "trackId": 12345,
+        "trackName": "Test Song",
+        "artistName": "Test Artist",
+        "previewUrl": "https://example.com/preview.m4a",
+        "artworkUrl100": "https://example.com/artwork100x100.jpg",
+    }]
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"results": raw})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = iTunesApiClient(http_client=http_client, cache=SearchCache(ttl_s=60))
+        first = await client.search_tracks({"term": "test"})
+        second = await client.search_tracks({"term": " TEST "})
+
+    assert len(requests) == 1
+    assert first == second == raw
+    # キャッシュから返した結果も重複排除される
+    assert len(client.clean_and_filter_tracks(first)) == 1
+    assert client.clean_and_filter_tracks(second) == []
+    assert client.cache is not None and client.cache.stats()["hits"] == 1
@@ -0,0 +1,95 @@
+"""
+iTunes検索結果のストリーミング解析（SearchResultParser）のテスト
+"""
+
+import json
+
+import pytest
+
+from app.services.search_stream import SEARCH_RESULT_FIELDS, SearchResultParser
+
+
+def _result(track_id: int) -> dict:
+    return {
+        "wrapperType": "track",
+        "kind": "song",
+        "trackId": track_id,
+        "trackName": f"夜に駆ける {track_id}",
+        "artistName": "YOASOBI",
+        "collectionName": "THE BOOK",
+        "previewUrl": f"https://example.com/{track_id}.m4a",
+        "artworkUrl100": f"https://example.com/{track_id}/100x100bb.jpg",
+        "trackTimeMillis": 261000 + track_id,
+        "primaryGenreName": "J-Pop",
+        "trackPrice": 255.0,
+        "isStreamable": True,
+        "releaseDate": "2019-12-15T12:00:00Z",
+    }
+
+
+BODY = json.dumps(
+    {"resultCount": 3, "results": [_result(i) for i in range(3)]}, ensure_ascii=False
+).encode("utf-8")
+
+
+def _parse_in_chunks(body: bytes, size: int) -> list:
+    parser = SearchResultParser()
+    results = []
+    for start in range(0, len(body), size):
+        results.extend(parser.feed(body[start:start + size]))
+    results.extend(parser.close())
+    return results
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(BODY)])
+def test_same_results_for_any_chunking(size):
+    """マルチバイト文字や数値の途中で区切られても一括解析と同じ結果になること"""
+    expected = [
+        {key: item[key] for key in SEARCH_RESULT_FIELDS}
+        for item in json.loads(BODY)["results"]
+    ]
+    assert _parse_in_chunks(BODY, size) == expected
+
+
+def test_results_are_yielded_while_streaming():
+    """読み終えた要素は本文の終わりを待たずに返すこと"""
+    parser = SearchResultParser()
+    first_end = BODY.index(b"}") + 1
+    assert parser.feed(BODY[:first_end]) == [
+        {key: _result(0)[key] for key in SEARCH_RESULT_FIELDS}]
+    assert len(parser.feed(BODY[first_end:])) == 2
+    assert parser.close() == []
+    assert parser.result_count == 3
+    assert parser.parsed == 3
+
+
+def test_keys_after_results_and_whitespace():
+    """results 以外のキーが後ろにあっても、整形済みJSONでも解析できること"""
+    body = json.dumps(
+        {"results": [{"trackId": 1, "extra": [1, {"a": "}"}]}], "resultCount": 12},
+        indent=2,
+    ).encode()
+    parser = SearchResultParser(fields=None)
+    results = parser.feed(body) + parser.close()
+    assert results == [{"trackId": 1, "extra": [1, {"a": "}"}]}]
+    assert parser.result_count == 12
+
+
+def test_missing_results_is_empty():
+    """results がない応答は空として扱うこと"""
+    parser = SearchResultParser()
+    assert parser.feed(b'{"errorMessage": "Invalid value(s) for key(s): [media]"}') == []
+    assert parser.close() == []
+
+
+@pytest.mark.parametrize("body", [
+    BODY[:-10],
+    b'[{"trackId": 1}]',
+    b'{"results": [{"trackId": 1}}',
+])
+def test_truncated_or_malformed_body_raises(body):
+    """途中で切れた本文や不正なJSONは ValueError になること"""
+    parser = SearchResultParser()
+    with pytest.raises(ValueError):
+        parser.feed(body)
+        parser.close()
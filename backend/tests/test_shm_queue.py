@@ -0,0 +1,238 @@
+"""
+共有メモリキューバックエンド（SharedMemoryQueueBackend）のテスト
+"""
+
+import asyncio
+import multiprocessing
+import random
+import uuid
+
+import pytest
+
+from app.core.queue_backend import QueueBackend
+from app.core.shm_queue import SharedMemoryQueueBackend
+from app.models.track import Track
+
+
+def _make_tracks(count: int, prefix: str = "") -> list[Track]:
+    return [
+        Track(
+            id=f"{prefix}{i:03d}",
+            title=f"Song {i}",
+            artist=f"Artist {i}",
+            preview_url=f"https://example.com/{i}.m4a",
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def shm_name(tmp_path):
+    name = f"otodoki_test_{uuid.uuid4().hex[:12]}"
+    yield name
+    cleanup = SharedMemoryQueueBackend(name=name, lock_dir=str(tmp_path))
+    cleanup.unlink()
+    cleanup.close()
+
+
+@pytest.fixture
+def make_backend(shm_name, tmp_path):
+    backends = []
+
+    def factory(**kwargs) -> SharedMemoryQueueBackend:
+        kwargs.setdefault("max_capacity", 100)
+        kwargs.setdefault("slot_bytes", 1024)
+        kwargs.setdefault("low_watermark", 10)
+        kwargs.setdefault("lease_ttl_s", 30)
+        backend = SharedMemoryQueueBackend(
+            name=shm_name, lock_dir=str(tmp_path), **kwargs)
+        backends.append(backend)
+        return backend
+
+    yield factory
+    for backend in backends:
+        backend.close()
+
+
+def _enqueue_in_child(name: str, lock_dir: str) -> None:
+    backend = SharedMemoryQueueBackend(name=name, lock_dir=lock_dir)
+    backend.enqueue(_make_tracks(5, prefix="child-"))
+    backend.close()
+
+
+def test_backend_satisfies_protocol(make_backend):
+    """QueueBackendプロトコルを満たすこと"""
+    assert isinstance(make_backend(), QueueBackend)
+
+
+def test_fifo_and_random_dequeue(make_backend):
+    """古い順・ランダムの取り出しで全件が1回ずつ返ること"""
+    queue = make_backend()
+    assert queue.enqueue(_make_tracks(10)) == 10
+
+    oldest = queue.dequeue(2)
+    assert [track.id for track in oldest] == ["000", "001"]
+    assert oldest[0].preview_url == "https://example.com/0.m4a"
+
+    rest = queue.dequeue_random(20)
+    assert sorted(track.id for track in rest) == [f"{i:03d}" for i in range(2, 10)]
+    assert queue.size() == 0
+
+
+def test_capacity_drops_oldest(make_backend):
+    """容量超過時は最古の楽曲から上書きされること"""
+    queue = make_backend(max_capacity=5)
+    queue.enqueue(_make_tracks(8))
+
+    assert queue.size() == 5
+    assert queue.stats()["dropped_count"] == 3
+    assert [track.id for track in queue.dequeue(5)] == [f"{i:03d}" for i in range(3, 8)]
+
+
+def test_reject_duplicates(make_backend):
+    """重複拒否時はキュー内のIDを追加しないこと"""
+    queue = make_backend()
+    queue.enqueue(_make_tracks(3))
+    assert queue.enqueue(_make_tracks(5), reject_duplicates=True) == 2
+    assert queue.size() == 5
+    assert queue.stats()["duplicate_rejected"] == 3
+
+
+def test_random_excluding_keeps_excluded(make_backend):
+    """除外IDはキューに残り、それ以外が取り出されること"""
+    queue = make_backend()
+    queue.enqueue(_make_tracks(20))
+    exclude = frozenset(f"{i:03d}" for i in range(15))
+
+    result = queue.dequeue_random_excluding(10, exclude)
+
+    assert sorted(track.id for track in result) == [f"{i:03d}" for i in range(15, 20)]
+    assert queue.size() == 15
+    assert all(queue.contains(track_id) for track_id in exclude)
+
+
+def test_instances_share_queue_and_counters(make_backend):
+    """同じセグメントに接続したインスタンス間でキューと統計が共有されること"""
+    first = make_backend()
+    second = make_backend(max_capacity=999)
+
+    first.enqueue(_make_tracks(4))
+    assert second.capacity() == 100  # 既存セグメントの容量を使う
+    assert second.size() == 4
+    assert len(second.dequeue_random(3)) == 3
+    assert first.size() == 1
+    assert first.stats()["dequeue_count"] == 3
+
+
+def test_lease_release_and_ack(make_backend):
+    """リースの取り消しでキューに戻り、確定で破棄されること"""
+    queue = make_backend()
+    queue.enqueue(_make_tracks(5))
+
+    lease_id, tracks = queue.lease_random_excluding(3, frozenset())
+    assert len(tracks) == 3
+    assert queue.release(lease_id) == 3
+    assert queue.size() == 5
+
+    lease_id, _ = queue.lease_random_excluding(2, frozenset())
+    assert queue.ack(lease_id) == 2
+    assert queue.size() == 3
+    assert queue.stats()["lease_acked"] == 2
+
+
+def test_oversized_track_is_skipped(make_backend):
+    """スロットに収まらない楽曲は追加されないこと"""
+    queue = make_backend(slot_bytes=256)
+    track = _make_tracks(1)[0]
+    track.title = "x" * 500
+    assert queue.enqueue([track]) == 0
+    assert queue.size() == 0
+
+
+def test_worker_role_is_exclusive(make_backend):
+    """補充ワーカーの担当権は1インスタンスのみが取得でき、解放後に引き継がれること"""
+    first = make_backend()
+    second = make_backend()
+
+    assert first.try_acquire_worker_role() is True
+    assert first.try_acquire_worker_role() is True
+    assert second.try_acquire_worker_role() is False
+
+    first.close()
+    assert second.try_acquire_worker_role() is True
+
+
+@pytest.mark.asyncio
+async def test_take_sees_enqueue_from_other_instance(make_backend):
+    """別インスタンスからの追加をポーリングで検知してtake()が返ること"""
+    queue = make_backend()
+    producer = make_backend()
+
+    async def refill():
+        await asyncio.sleep(0.05)
+        producer.enqueue(_make_tracks(4))
+
+    tracks, _ = await asyncio.gather(queue.take(4, timeout=5.0), refill())
+    assert len(tracks) == 4
+    assert await queue.take(1, timeout=0.05) == []
+
+
+def test_shared_across_processes(make_backend, shm_name, tmp_path):
+    """別プロセスで追加した楽曲を取り出せること"""
+    queue = make_backend()
+    process = multiprocessing.get_context("spawn").Process(
+        target=_enqueue_in_child, args=(shm_name, str(tmp_path)))
+    process.start()
+    process.join(timeout=30)
+
+    assert process.exitcode == 0
+    assert sorted(track.id for track in queue.dequeue(10)) == [
+        f"child-{i:03d}" for i in range(5)
+    ]
+
+
+def test_id_index_stays_consistent(make_backend):
+    """追加・取り出し・上書き・リースを繰り返しても、IDの索引がキューの内容と一致すること"""
+    queue = make_backend(max_capacity=16)
+    rng = random.Random(0)
+    pool = _make_tracks(40)
+
+    for step in range(2000):
+        op = rng.randrange(5)
+        if op == 0:
+            queue.enqueue(rng.sample(pool, 5), reject_duplicates=rng.random() < 0.8)
+        elif op == 1:
+            queue.dequeue(rng.randrange(1, 4))
+        elif op == 2:
+            queue.dequeue_random(rng.randrange(1, 4))
+        elif op == 3:
+            exclude = {track.id for track in rng.sample(pool, 10)}
+            queue.dequeue_random_excluding(rng.randrange(1, 4), exclude)
+        else:
+            lease_id, _ = queue.lease_random_excluding(2, set())
+            queue.release(lease_id)
+
+        queued = {track.id for track in queue.snapshot()}
+        assert {track.id for track in pool if queue.contains(track.id)} == queued, step
+
+    queue.clear()
+    assert not any(queue.contains(track.id) for track in pool)
+
+
+def test_legacy_segment_is_recreated(shm_name, tmp_path):
+    """IDの索引を持たない旧形式のセグメントは作り直されること"""
+    legacy = SharedMemoryQueueBackend(
+        name=shm_name, lock_dir=str(tmp_path), max_capacity=10, slot_bytes=1024)
+    legacy.enqueue(_make_tracks(3))
+    legacy._buf[:4] = b"OTQ1"
+    legacy.close()
+
+    queue = SharedMemoryQueueBackend(
+        name=shm_name, lock_dir=str(tmp_path), max_capacity=10, slot_bytes=1024)
+    try:
+        assert queue.size() == 0
+        assert queue.enqueue(_make_tracks(3)) == 3
+        assert queue.contains("001")
+        assert queue.enqueue(_make_tracks(3), reject_duplicates=True) == 0
+    finally:
+        queue.close()
@@ -0,0 +1,135 @@
+"""
+シングルフライト（SingleFlight）のテスト
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.core.single_flight import SingleFlight
+from app.services.apple_music_rss import AppleMusicRSSClient
+from app.services.itunes_api import iTunesApiClient
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """同じキーの同時呼び出しは1回だけ実行され、全員が同じ結果を受け取ること"""
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": calls}
+
+    results = await asyncio.gather(*(flight.do("feed", fetch) for _ in range(5)))
+    other = await flight.do("other", fetch)
+
+    assert calls == 2
+    assert all(result is results[0] for result in results)
+    assert other == {"value": 2}
+    assert flight.stats() == {"executed": 2, "coalesced": 4, "in_flight": 0}
+
+    # 完了後の呼び出しは新たに実行する（結果は保持しない）
+    await flight.do("feed", fetch)
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_remembered():
+    """例外は同時に呼び出した全員に伝わり、次の呼び出しは再実行されること"""
+    flight = SingleFlight()
+    fail = True
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        if fail:
+            raise RuntimeError("upstream error")
+        return "ok"
+
+    results = await asyncio.gather(
+        flight.do("k", fetch), flight.do("k", fetch), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    fail = False
+    assert await flight.do("k", fetch) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancellation_only_stops_when_no_one_is_waiting():
+    """1人のキャンセルは他の呼び出し元に影響せず、全員がキャンセルしたら実行も止めること"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    started = []
+
+    async def fetch():
+        started.append(1)
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", fetch))
+    second = asyncio.create_task(flight.do("k", fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await second == "done"
+
+    release.clear()
+    lone = asyncio.create_task(flight.do("k", fetch))
+    await asyncio.sleep(0.01)
+    lone.cancel()
+    await asyncio.sleep(0.01)
+    assert flight.stats()["in_flight"] == 0
+    assert len(started) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_tracks_coalesces_identical_searches():
+    """同じパラメータの同時検索は1回のAPI呼び出しにまとめられること"""
+    limiter = AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10)
+    before = iTunesApiClient.single_flight_stats()
+
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"results": [{"trackId": 1}]})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        clients = [iTunesApiClient(http_client=http_client, rate_limiter=limiter) for _ in range(3)]
+        results = await asyncio.gather(
+            clients[0].search_tracks({"term": "YOASOBI"}),
+            clients[1].search_tracks({"term": " yoasobi "}),
+            clients[2].search_tracks({"term": "YOASOBI"}),
+        )
+
+    assert len(requests) == 1
+    assert results == [[{"trackId": 1}]] * 3
+    # 呼び出し元ごとに別のリストを返す
+    assert results[0] is not results[1]
+    after = iTunesApiClient.single_flight_stats()
+    assert after["coalesced"] - before["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rss_client_coalesces_identical_feeds():
+    """同じフィードの同時取得は1回のリクエストにまとめられること"""
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"feed": {"results": []}})
+
+    before = AppleMusicRSSClient.single_flight_stats()
+    client = AppleMusicRSSClient(transport=httpx.MockTransport(handler))
+    payloads = await asyncio.gather(client.get_top_songs(), client.get_top_songs())
+
+    assert len(requests) == 1
+    assert payloads[0] == payloads[1] == {"feed": {"results": []}}
+    assert AppleMusicRSSClient.single_flight_stats()["coalesced"] - before["coalesced"] == 1
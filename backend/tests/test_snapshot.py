@@ -0,0 +1,179 @@
+"""
+キュースナップショット（QueueSnapshotter）のテスト
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.core.queue import QueueManager
+from app.core.snapshot import QueueSnapshotter
+from app.models.track import Track
+
+
+def _make_tracks(count: int, start: int = 0) -> list[Track]:
+    return [
+        Track(
+            id=f"{i:03d}",
+            title=f"Song {i}",
+            artist=f"Artist {i}",
+            preview_url=f"https://example.com/{i}.m4a",
+            duration_ms=180000,
+        )
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "snapshot" / "queue.jsonl")
+
+
+def _queue() -> QueueManager:
+    return QueueManager(max_capacity=100, low_watermark=1, lease_ttl_s=30)
+
+
+def test_full_snapshot_roundtrip(path):
+    """全体スナップショットから追加順と内容が復元されること"""
+    queue = _queue()
+    queue.enqueue(_make_tracks(5))
+    result = QueueSnapshotter(queue, path).save()
+    assert result["kind"] == "full"
+    assert result["records"] == 5
+
+    restored = _queue()
+    assert QueueSnapshotter(restored, path).load() == 5
+    tracks = restored.dequeue(5)
+    assert [track.id for track in tracks] == ["000", "001", "002", "003", "004"]
+    assert tracks[0].duration_ms == 180000
+
+
+def test_incremental_appends_only_changes(path):
+    """2回目以降は追加・削除の差分のみ追記され、復元結果に反映されること"""
+    queue = _queue()
+    queue.enqueue(_make_tracks(5))
+    snapshotter = QueueSnapshotter(queue, path, full_every=10)
+    snapshotter.save()
+
+    queue.dequeue(2)
+    queue.enqueue(_make_tracks(1, start=10))
+    result = snapshotter.save()
+    assert result["kind"] == "incremental"
+    assert result["records"] == 3  # 削除2件 + 追加1件
+
+    restored = _queue()
+    QueueSnapshotter(restored, path).load()
+    assert [track.id for track in restored.snapshot()] == ["002", "003", "004", "010"]
+
+
+def test_full_snapshot_after_incremental_limit(path):
+    """差分追記が上限に達したら全体スナップショットで書き直すこと"""
+    queue = _queue()
+    snapshotter = QueueSnapshotter(queue, path, full_every=2)
+    kinds = []
+    for i in range(4):
+        queue.enqueue(_make_tracks(1, start=i))
+        kinds.append(snapshotter.save()["kind"])
+
+    assert kinds == ["full", "incremental", "incremental", "full"]
+    with open(path, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 4
+    assert snapshotter.stats()["full_saves"] == 2
+
+
+def test_load_skips_truncated_line(path):
+    """書き込み途中で途切れた行は読み飛ばすこと"""
+    queue = _queue()
+    queue.enqueue(_make_tracks(3))
+    QueueSnapshotter(queue, path).save()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('+{"id": "999", "title": "Trunc')
+
+    restored = _queue()
+    snapshotter = QueueSnapshotter(restored, path)
+    assert snapshotter.load() == 3
+    assert snapshotter.stats()["last_load"]["skipped_lines"] == 1
+
+
+def test_load_missing_file(path):
+    """スナップショットが無い場合は何も追加しないこと"""
+    assert QueueSnapshotter(_queue(), path).load() == 0
+
+
+def test_snapshot_keeps_leased_tracks(path):
+    """リース中（ack前）の楽曲も保存され、ack後の差分で削除されること"""
+    queue = _queue()
+    queue.enqueue(_make_tracks(4))
+    lease_id, leased = queue.lease_random_excluding(2, set())
+    snapshotter = QueueSnapshotter(queue, path, full_every=10)
+    assert snapshotter.save(full=True)["records"] == 4
+
+    # ack前にプロセスが落ちた場合もリース中の楽曲が復元される
+    restored = _queue()
+    assert QueueSnapshotter(restored, path).load() == 4
+
+    queue.ack(lease_id)
+    result = snapshotter.save()
+    assert result["kind"] == "incremental"
+    assert result["records"] == 2
+
+    restored = _queue()
+    QueueSnapshotter(restored, path).load()
+    remaining = {track.id for track in restored.snapshot()}
+    assert remaining == {"000", "001", "002", "003"} - {track.id for track in leased}
+
+
+def test_ownership_is_held_by_one_snapshotter(path):
+    """同じパスの担当権は1つのスナップショッターのみが持ち、解放後に引き継げること"""
+    first = QueueSnapshotter(_queue(), path)
+    second = QueueSnapshotter(_queue(), path)
+    try:
+        assert first.try_acquire_ownership() is True
+        assert first.try_acquire_ownership() is True
+        assert second.try_acquire_ownership() is False
+
+        first.release_ownership()
+        assert second.try_acquire_ownership() is True
+        assert first.try_acquire_ownership() is False
+    finally:
+        first.release_ownership()
+        second.release_ownership()
+
+
+@pytest.mark.asyncio
+async def test_run_periodic_skips_without_ownership(path):
+    """担当権を持たないスナップショッターは定期保存を行わないこと"""
+    owner = QueueSnapshotter(_queue(), path)
+    queue = _queue()
+    queue.enqueue(_make_tracks(2))
+    other = QueueSnapshotter(queue, path)
+    try:
+        assert owner.try_acquire_ownership() is True
+        task = asyncio.create_task(other.run_periodic(0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert other.stats()["full_saves"] == 0
+        assert not os.path.exists(path)
+    finally:
+        owner.release_ownership()
+
+
+def test_full_save_uses_per_process_tmp_file(path, monkeypatch):
+    """全体保存の一時ファイルはプロセスごとに別名となり、保存後に残らないこと"""
+    replaced = []
+    real_replace = os.replace
+
+    def record_replace(src, dst):
+        replaced.append(src)
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", record_replace)
+    queue = _queue()
+    queue.enqueue(_make_tracks(2))
+    QueueSnapshotter(queue, path).save()
+
+    assert replaced == [f"{path}.{os.getpid()}.tmp"]
+    assert not os.path.exists(replaced[0])
@@ -0,0 +1,88 @@
+"""
+楽曲シグネチャ正規化（song_signature）のテスト
+"""
+
+import pytest
+
+from app.services.itunes_api import iTunesApiClient
+from app.services.song_signature import (
+    cache_stats,
+    canonical_artist,
+    canonical_title,
+    song_signature,
+)
+
+
+@pytest.mark.parametrize("variant", [
+    "夜に駆ける (Remastered 2021)",
+    "夜に 駆ける - Single Version",
+    "夜に駆ける【TVアニメ『テスト』オープニングテーマ】",
+    "夜に駆ける (feat. Someone)",
+    "夜に駆ける feat. Someone",
+    "夜に駆ける [Album ver.]",
+])
+def test_title_decorations_are_removed(variant):
+    """リマスター・シングルバージョン・タイアップ・feat. などの装飾を取り除くこと"""
+    assert canonical_title(variant) == canonical_title("夜に駆ける")
+
+
+def test_width_case_and_spacing_are_normalized():
+    """全角/半角・大文字小文字・空白と記号の違いを同一視すること"""
+    assert canonical_title("ｱｲﾄﾞﾙ") == canonical_title("アイドル")
+    assert canonical_title("ＰＲＥＴＥＮＤＥＲ") == canonical_title("Pretender")
+    assert canonical_artist("Official 髭男 dism") == canonical_artist("Official髭男dism")
+    assert canonical_artist("ＹＯＡＳＯＢＩ") == canonical_artist("yoasobi")
+
+
+def test_artist_credits_are_normalized():
+    """feat. やCVのクレジットを除き、複数アーティストは順序によらず同一視すること"""
+    assert canonical_artist("A feat. B") == canonical_artist("A")
+    assert canonical_artist("Kana (CV:花澤香菜)") == canonical_artist("Kana")
+    assert canonical_artist("A & B") == canonical_artist("B, A") == canonical_artist("B × A")
+
+
+@pytest.mark.parametrize("variant", [
+    "Lemon (Live)",
+    "Lemon - Remix",
+    "Lemon (Instrumental)",
+    "Lemon (English Ver.)",
+])
+def test_distinct_recordings_are_kept(variant):
+    """ライブ・リミックス・インストなどは別の録音として区別すること"""
+    assert canonical_title(variant) != canonical_title("Lemon")
+
+
+def test_symbol_only_title_is_not_empty():
+    """記号だけの曲名は空にせず、別の曲と区別できること"""
+    assert canonical_title("!!!") == "!!!"
+    assert song_signature("!!!", "X") != song_signature("???", "X")
+
+
+def test_results_are_memoized():
+    """同じ表記の2回目以降はメモ化した結果を使うこと"""
+    before = cache_stats()["title"]["hits"]
+    canonical_title("Memoized Song (Remastered)")
+    canonical_title("Memoized Song (Remastered)")
+    assert cache_stats()["title"]["hits"] == before + 1
+
+
+def test_cross_edition_duplicates_are_filtered():
+    """別アルバム・別エディションの同じ曲は重複として除外されること"""
+    client = iTunesApiClient()
+
+    def raw(track_id: int, title: str, artist: str) -> dict:
+        return {
+            "trackId": track_id,
+            "trackName": title,
+            "artistName": artist,
+            "previewUrl": f"https://example.com/{track_id}.m4a",
+            "artworkUrl100": f"https://example.com/{track_id}/100x100bb.jpg",
+        }
+
+    tracks = client.clean_and_filter_tracks([
+        raw(1, "夜に駆ける", "YOASOBI"),
+        raw(2, "夜に駆ける - Single Version", "ＹＯＡＳＯＢＩ"),
+        raw(3, "夜に駆ける (feat. Guest)", "YOASOBI feat. Guest"),
+        raw(4, "夜に駆ける (Live)", "YOASOBI"),
+    ])
+    assert [track.id for track in tracks] == ["1", "4"]
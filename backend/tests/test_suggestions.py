@@ -5,10 +5,15 @@
 
 import pytest
 import asyncio
+import time
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime
 
+from fastapi import BackgroundTasks
+from fastapi.responses import JSONResponse
+
 from app.services.suggestions import SuggestionsService
+from app.services.worker import QueueReplenishmentWorker
 from app.core.queue import QueueManager
 from app.core.config import SuggestionsConfig
 from app.core.rate_limit import RateLimiter, GlobalRateLimiter
@@ -23,6 +28,7 @@ class TestSuggestionsService:
         """各テストメソッド前の準備"""
         self.queue_manager = QueueManager(max_capacity=100, low_watermark=10)
         self.mock_worker = AsyncMock()
+        self.mock_worker.request_refill = Mock(return_value=True)
         self.service = SuggestionsService(self.queue_manager, self.mock_worker)
 
     def _create_test_tracks(self, count: int, id_prefix: str = "track") -> list[Track]:
@@ -136,9 +142,128 @@ class TestSuggestionsService:
         assert len(response.data) == 0
         assert response.meta.delivered == 0
         assert response.meta.requested == 10
-        # 除外された楽曲は再エンキューされるためキューサイズは元のまま
+        # 除外された楽曲はキューから取り出されないためキューサイズは元のまま
         assert response.meta.queue_size_after == 5
 
+    @pytest.mark.asyncio
+    async def test_get_suggestions_does_not_churn_queue(self):
+        """除外楽曲が再エンキューされず、統計や順序が変化しないことのテスト"""
+        test_tracks = self._create_test_tracks(20)
+        self.queue_manager.enqueue(test_tracks)
+        exclude_ids = [f"track_{i:03d}" for i in range(10)]
+
+        with patch.object(
+            self.queue_manager, "re_enqueue", wraps=self.queue_manager.re_enqueue
+        ) as mock_re_enqueue:
+            response = await self.service.get_suggestions(
+                limit=5, exclude_ids=exclude_ids
+            )
+            mock_re_enqueue.assert_not_called()
+
+        assert len(response.data) == 5
+        stats = self.queue_manager.stats()
+        assert stats["enqueue_count"] == 20
+        assert stats["dequeue_count"] == 5
+
+        # 除外された楽曲は元のFIFO順序のままキューに残っている
+        remaining_ids = [track.id for track in self.queue_manager.dequeue(20)]
+        assert remaining_ids[:10] == exclude_ids
+
+    @pytest.mark.asyncio
+    async def test_get_suggestions_acks_after_response(self):
+        """レスポンス送信後のバックグラウンドタスクでackされるテスト"""
+        self.queue_manager.enqueue(self._create_test_tracks(50))
+        background_tasks = BackgroundTasks()
+
+        response = await self.service.get_suggestions(
+            limit=5, exclude_ids=[], background_tasks=background_tasks
+        )
+        assert len(response.data) == 5
+        assert self.queue_manager.stats()["leased_tracks"] == 5
+
+        await background_tasks()
+        stats = self.queue_manager.stats()
+        assert stats["leased_tracks"] == 0
+        assert stats["lease_acked"] == 5
+
+    @pytest.mark.asyncio
+    async def test_get_suggestions_failure_returns_leased_tracks(self):
+        """レスポンス構築に失敗した場合にリースが取り消されるテスト"""
+        self.queue_manager.enqueue(self._create_test_tracks(50))
+
+        with patch.object(
+            self.service, "_build_response", side_effect=RuntimeError("boom")
+        ):
+            with pytest.raises(RuntimeError):
+                await self.service.get_suggestions(limit=5, exclude_ids=[])
+
+        stats = self.queue_manager.stats()
+        assert stats["current_size"] == 50
+        assert stats["leased_tracks"] == 0
+        assert stats["lease_returned"] == 5
+
+    @pytest.mark.asyncio
+    async def test_get_suggestions_json_matches_model_serialization(self):
+        """シリアライズ済みJSONがSuggestionsResponseのシリアライズ結果と一致するテスト"""
+        tracks = self._create_test_tracks(3)
+        tracks[0].title = "夜に駆ける"
+        tracks[1].album = None
+        tracks[2].duration_ms = 200000
+        self.queue_manager.enqueue(tracks)
+        queued = self.queue_manager.snapshot()
+
+        fixed_now = datetime(2025, 8, 31, 12, 34, 56, 789000)
+        with patch("app.services.suggestions.datetime") as mock_datetime:
+            mock_datetime.utcnow.return_value = fixed_now
+            response = self.service._build_response(queued, 5, 97, False)
+            body = self.service._render_json(queued, 5, 97, False)
+
+        assert body == JSONResponse(response.model_dump(mode="json")).body
+        assert response.data[2].duration_ms == 200000
+
+    @pytest.mark.asyncio
+    async def test_get_suggestions_json_delivers_and_acks(self):
+        """シリアライズ済みJSONでの楽曲提供とリース確定のテスト"""
+        self.queue_manager.enqueue(self._create_test_tracks(50))
+        background_tasks = BackgroundTasks()
+
+        body = await self.service.get_suggestions_json(
+            limit=5, exclude_ids=[], background_tasks=background_tasks
+        )
+        response = SuggestionsResponse.model_validate_json(body)
+        assert response.meta.delivered == 5
+        assert len({track.id for track in response.data}) == 5
+
+        await background_tasks()
+        assert self.queue_manager.stats()["lease_acked"] == 5
+
+    @pytest.mark.asyncio
+    async def test_get_suggestions_long_poll_waits_for_refill(self):
+        """wait_ms指定時は補充を待って満杯のバッチを返すテスト"""
+        tracks = self._create_test_tracks(10)
+        self.queue_manager.enqueue(tracks[:3])
+
+        async def refill():
+            await asyncio.sleep(0.05)
+            self.queue_manager.enqueue(tracks[3:])
+
+        response, _ = await asyncio.gather(
+            self.service.get_suggestions(limit=10, exclude_ids=[], wait_ms=2000),
+            refill(),
+        )
+        assert response.meta.delivered == 10
+
+    @pytest.mark.asyncio
+    async def test_get_suggestions_long_poll_timeout(self):
+        """wait_ms経過後は揃った分だけ返し、上限を超えるwait_msは切り詰めるテスト"""
+        self.queue_manager.enqueue(self._create_test_tracks(3))
+
+        with patch.object(SuggestionsConfig, "get_max_wait_ms", return_value=50):
+            assert self.service._validate_wait_ms(60000) == 50
+            response = await self.service.get_suggestions(
+                limit=10, exclude_ids=[], wait_ms=60000)
+        assert response.meta.delivered == 3
+
     @pytest.mark.asyncio
     async def test_get_suggestions_refill_trigger(self):
         """正常系: 補充トリガーのテスト"""
@@ -146,9 +271,6 @@ class TestSuggestionsService:
         test_tracks = self._create_test_tracks(12)  # 低水位は10
         self.queue_manager.enqueue(test_tracks)
 
-        # ワーカーのモック設定
-        self.mock_worker.trigger_refill.return_value = True
-
         # 多めにリクエストして低水位に
         response = await self.service.get_suggestions(limit=8, exclude_ids=[])
 
@@ -157,19 +279,18 @@ class TestSuggestionsService:
         assert response.meta.queue_size_after == 4  # 12 - 8 = 4 < 10(低水位)
         assert response.meta.refill_triggered is True
 
-        # ワーカーのトリガーが非同期で呼ばれることを確認
-        # 少し待ってからアサート
-        await asyncio.sleep(0.1)
-        self.mock_worker.trigger_refill.assert_called_once()
+        # 補充は待たずにワーカーへ要求のみ行う
+        self.mock_worker.request_refill.assert_called_once_with()
+        self.mock_worker.trigger_refill.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_get_suggestions_worker_failure(self):
-        """異常系: ワーカートリガー失敗時"""
+        """異常系: ワーカーへの補充要求失敗時"""
         test_tracks = self._create_test_tracks(5)
         self.queue_manager.enqueue(test_tracks)
 
         # ワーカーが例外を投げる
-        self.mock_worker.trigger_refill.side_effect = Exception(
+        self.mock_worker.request_refill.side_effect = Exception(
             "Worker failed")
 
         # リクエスト実行（例外が伝播しないことを確認）
@@ -179,6 +300,42 @@ class TestSuggestionsService:
         assert len(response.data) == 5
         assert response.meta.refill_triggered is False  # 失敗したのでFalse
 
+    @pytest.mark.asyncio
+    async def test_get_suggestions_latency_during_slow_refill(self, monkeypatch):
+        """補充に時間がかかってもリクエストは待たされず、補充要求がまとめられるテスト"""
+        monkeypatch.setenv("GEMINI_API_KEY", "dummy-key")
+        monkeypatch.setenv("OTODOKI_POLL_INTERVAL_MS", "60000")
+        monkeypatch.setenv("OTODOKI_MIN_THRESHOLD", "100")
+        worker = QueueReplenishmentWorker(self.queue_manager)
+        refill_started = asyncio.Event()
+
+        async def slow_refill(need=None, fetch_concurrency=None):
+            refill_started.set()
+            await asyncio.sleep(0.5)
+            return True
+
+        self.queue_manager.enqueue(self._create_test_tracks(50))
+        service = SuggestionsService(self.queue_manager, worker)
+        with patch.object(worker, "_attempt_refill", side_effect=slow_refill) as mock_refill, \
+                patch.object(worker, "_check_worker_role", return_value=True):
+            await worker.start()
+            try:
+                await asyncio.wait_for(refill_started.wait(), timeout=1.0)
+                latencies = []
+                for _ in range(10):
+                    started = time.perf_counter()
+                    response = await service.get_suggestions(limit=3, exclude_ids=[])
+                    latencies.append(time.perf_counter() - started)
+                    assert response.meta.refill_triggered is True
+            finally:
+                await worker.stop()
+
+        assert max(latencies) < 0.1
+        # 補充中の要求は1回にまとめられる
+        assert worker.stats["refill_request_count"] == 10
+        assert worker.stats["refill_request_coalesced"] == 9
+        assert mock_refill.call_count == 1
+
     @pytest.mark.asyncio
     async def test_get_suggestions_no_worker(self):
         """異常系: ワーカーなしでの動作"""
@@ -286,6 +443,7 @@ async def test_integration_suggestions_api():
     # セットアップ
     queue_manager = QueueManager(max_capacity=50, low_watermark=5)
     mock_worker = AsyncMock()
+    mock_worker.request_refill = Mock(return_value=True)
     service = SuggestionsService(queue_manager, mock_worker)
 
     # テストデータ準備
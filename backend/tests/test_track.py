@@ -6,7 +6,7 @@ Trackクラスの基本機能とバリデーションを検証
 import pytest
 from pydantic import ValidationError
 
-from app.models.track import Track
+from app.models.track import QueuedTrack, Track
 
 
 class TestTrack:
@@ -195,3 +195,50 @@ class TestTrack:
         )
         assert track_with_empty_optional.artwork_url == ""
         assert track_with_empty_optional.is_valid_for_playback() is False
+
+
+class TestQueuedTrack:
+    """キュー保持用レコード（QueuedTrack）のテストクラス"""
+
+    def _track(self, **overrides) -> Track:
+        data = {
+            "id": "12345",
+            "title": "Test Song",
+            "artist": "Test Artist",
+            "artwork_url": "https://example.com/artwork.jpg",
+            "preview_url": "https://example.com/preview.m4a",
+            "album": "Test Album",
+            "duration_ms": 240000,
+            "genre": "Pop",
+        }
+        data.update(overrides)
+        return Track(**data)
+
+    def test_roundtrip_to_track(self):
+        """Trackとの相互変換で全フィールドが保持されること"""
+        original = self._track()
+        queued = QueuedTrack.from_track(original)
+
+        assert queued.to_track() == original
+        assert not hasattr(queued, "__dict__")
+
+    def test_json_roundtrip_omits_none(self):
+        """JSON変換でNone項目を省略し、復元できること"""
+        queued = QueuedTrack.from_track(self._track(album=None))
+        data = queued.to_json()
+
+        assert b"album" not in data
+        assert QueuedTrack.from_json(data) == queued
+
+    def test_suggestion_json_keeps_duration(self):
+        """楽曲提供API用のJSONに元の楽曲時間を出力すること"""
+        assert b'"duration_ms":240000' in QueuedTrack.from_track(self._track()).suggestion_json()
+        assert b'"duration_ms":null' in QueuedTrack.from_track(self._track(duration_ms=None)).suggestion_json()
+
+    def test_artist_and_genre_are_interned(self):
+        """アーティスト名とジャンルが同一オブジェクトを共有すること"""
+        first = QueuedTrack.from_json(self._track(id="1").model_dump_json())
+        second = QueuedTrack.from_json(self._track(id="2").model_dump_json())
+
+        assert first.artist is second.artist
+        assert first.genre is second.genre
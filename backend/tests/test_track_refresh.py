@@ -0,0 +1,158 @@
+"""
+楽曲キャッシュ一括更新（TrackCacheRefresher）のテスト
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator, Dict, List
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.db.models import TrackCache
+from app.services.itunes_api import iTunesApiClient
+from app.services.search_cache import SearchCache
+from app.services.track_refresh import TrackCacheRefresher
+
+STALE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def engine() -> AsyncGenerator[AsyncEngine, None]:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_maker(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _insert(maker: async_sessionmaker, rows: List[TrackCache]) -> None:
+    async with maker() as session:
+        session.add_all(rows)
+        await session.commit()
+
+
+async def _rows(maker: async_sessionmaker) -> Dict[str, TrackCache]:
+    async with maker() as session:
+        result = await session.execute(select(TrackCache))
+        return {row.external_id: row for row in result.scalars()}
+
+
+def _track(external_id: str, updated_at: datetime = STALE) -> TrackCache:
+    return TrackCache(
+        external_id=external_id,
+        title=f"Song {external_id}",
+        preview_url=f"https://old.example.com/{external_id}.m4a",
+        artwork_url=f"https://old.example.com/{external_id}/600x600bb.jpg",
+        updated_at=updated_at,
+    )
+
+
+def _itunes_client(handler) -> iTunesApiClient:
+    return iTunesApiClient(
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        cache=SearchCache(ttl_s=0),
+        rate_limiter=AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10),
+    )
+
+
+@pytest.mark.asyncio
+async def test_refreshes_stale_rows_in_bulk(engine, session_maker):
+    """古い行だけをLookup APIでまとめて照会し、バッチごとに1回のUPDATEで書き戻すこと"""
+    stale_ids = [str(1000 + i) for i in range(7)]
+    await _insert(session_maker, [_track(i) for i in stale_ids] + [
+        _track("2000", updated_at=datetime.now(timezone.utc)),
+        _track("not-an-itunes-id"),
+    ])
+
+    lookups: List[List[str]] = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        assert request.url.path == "/lookup"
+        ids = request.url.params["id"].split(",")
+        lookups.append(ids)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        # 1004 は配信終了（見つからない）
+        results = [
+            {
+                "trackId": int(track_id),
+                "previewUrl": f"https://new.example.com/{track_id}.m4a",
+                "artworkUrl100": f"https://new.example.com/{track_id}/100x100bb.jpg",
+            }
+            for track_id in ids if track_id != "1004"
+        ]
+        return httpx.Response(200, json={"resultCount": len(results), "results": results})
+
+    updates: List[str] = []
+
+    def count_updates(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("UPDATE"):
+            updates.append(statement)
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count_updates)
+    try:
+        refresher = TrackCacheRefresher(
+            session_maker, _itunes_client(handler),
+            max_age_s=3600, batch_size=3, concurrency=2, max_rows=100,
+        )
+        result = await refresher.refresh_once()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count_updates)
+
+    # 数字以外のIDは照会しない。3件ずつ、同時に2バッチまで
+    assert sorted(track_id for batch in lookups for track_id in batch) == stale_ids
+    assert all(len(batch) <= 3 for batch in lookups)
+    assert max_in_flight == 2
+    assert len(updates) == 3
+
+    assert result["stale_rows"] == 8
+    assert (result["rows_refreshed"], result["rows_missing"], result["failed_batches"]) == (6, 2, 0)
+    assert result["rows_per_s"] > 0
+
+    rows = await _rows(session_maker)
+    assert rows["1000"].preview_url == "https://new.example.com/1000.m4a"
+    assert rows["1000"].artwork_url == "https://new.example.com/1000/600x600bb.jpg"
+    assert rows["1000"].title == "Song 1000"
+    # 見つからない行はURLを残す
+    assert rows["1004"].preview_url == "https://old.example.com/1004.m4a"
+    assert rows["2000"].preview_url == "https://old.example.com/2000.m4a"
+
+    # 照会した行は更新日時が進み、次の実行では対象にならない
+    again = await refresher.refresh_once()
+    assert again["stale_rows"] == 0
+    assert refresher.stats()["rows_refreshed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_failed_lookup_leaves_rows_stale(session_maker):
+    """照会に失敗したバッチは書き戻さず、次回の実行で再検証すること"""
+    await _insert(session_maker, [_track("1000"), _track("1001")])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429)
+
+    refresher = TrackCacheRefresher(session_maker, _itunes_client(handler), max_age_s=3600)
+    result = await refresher.refresh_once()
+
+    assert (result["rows_refreshed"], result["failed_batches"]) == (0, 1)
+    rows = await _rows(session_maker)
+    assert rows["1000"].preview_url == "https://old.example.com/1000.m4a"
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=3600)
+    assert all(row.updated_at.replace(tzinfo=timezone.utc) < cutoff for row in rows.values())
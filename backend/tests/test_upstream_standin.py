@@ -0,0 +1,195 @@
+"""
+上流APIスタンドイン（upstream_standin）のテスト
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.services import itunes_api
+from app.services.apple_music_rss import AppleMusicRSSClient
+from app.services.itunes_api import iTunesApiClient
+from app.services.search_cache import SearchCache
+from app.services.upstream_standin import (
+    CorpusRecorder,
+    FaultProfile,
+    RecordedCorpus,
+    RecordedResponse,
+    UpstreamStandin,
+    rss_key,
+    search_key,
+)
+
+SEARCH_BODY = json.dumps({
+    "resultCount": 1,
+    "results": [{
+        "trackId": 101,
+        "trackName": "夜に駆ける",
+        "artistName": "YOASOBI",
+        "previewUrl": "https://example.com/101.m4a",
+        "artworkUrl100": "https://example.com/101/100x100bb.jpg",
+    }],
+}, ensure_ascii=False).encode("utf-8")
+
+RSS_BODY = json.dumps({"feed": {"results": [{"name": "アイドル", "artistName": "YOASOBI"}]}},
+                      ensure_ascii=False).encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def _unthrottled_rate_limiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    """送信レート制限で待たされないよう、共有の制限器を十分に緩いものに差し替える"""
+    monkeypatch.setattr(
+        itunes_api,
+        "_search_rate_limiter",
+        AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10),
+    )
+
+
+@pytest.fixture
+def corpus(tmp_path) -> RecordedCorpus:
+    corpus = RecordedCorpus(str(tmp_path / "corpus"), version="test-v1")
+    corpus.add(search_key({"term": "YOASOBI", "media": "music"}),
+               RecordedResponse(200, "application/json", SEARCH_BODY))
+    corpus.add(rss_key("/jp/music/most-played/10/songs.json"),
+               RecordedResponse(200, "application/json", RSS_BODY))
+    return corpus
+
+
+def _client(app: UpstreamStandin) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://standin")
+
+
+def test_corpus_is_versioned_and_reloaded(corpus, tmp_path):
+    """記録したコーパスはバージョンとともに保存され、読み直せること"""
+    reloaded = RecordedCorpus(corpus.path)
+    assert reloaded.version == "test-v1"
+    assert len(reloaded) == 2
+    # 検索パラメータは検索キャッシュと同じく順序・空白・大文字小文字を同一視する
+    response = reloaded.get(search_key({"media": "music", "term": " yoasobi "}))
+    assert response is not None and response.body == SEARCH_BODY
+
+    manifest = tmp_path / "corpus" / "manifest.json"
+    data = json.loads(manifest.read_text(encoding="utf-8"))
+    data["format"] = 999
+    manifest.write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(ValueError):
+        RecordedCorpus(corpus.path)
+
+
+@pytest.mark.asyncio
+async def test_replays_recorded_responses_and_misses(corpus):
+    """記録済みの応答を再生し、記録がない検索は設定に応じて代用または404を返すこと"""
+    app = UpstreamStandin(corpus)
+    async with _client(app) as client:
+        hit = await client.get("/search", params={"term": "YOASOBI", "media": "music"})
+        miss = await client.get("/search", params={"term": "unknown"})
+        app.faults = FaultProfile(miss_policy="404")
+        not_found = await client.get("/search", params={"term": "unknown"})
+        stats = (await client.get("/_standin/stats")).json()
+
+    assert hit.status_code == 200 and hit.content == SEARCH_BODY
+    assert miss.status_code == 200 and miss.content == SEARCH_BODY
+    assert not_found.status_code == 404
+    assert stats["corpus_version"] == "test-v1"
+    assert (stats["requests"], stats["hits"], stats["fallbacks"], stats["not_found"]) == (3, 1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_injects_throttling_and_errors(corpus):
+    """スロットリング（Retry-After付き）とエラー応答を設定した割合で返すこと"""
+    app = UpstreamStandin(
+        corpus, FaultProfile(throttle_rate=1.0, throttle_status=403, retry_after_s=2), seed=1)
+    async with _client(app) as client:
+        throttled = await client.get("/search", params={"term": "YOASOBI"})
+        updated = await client.put("/_standin/faults", json={"throttle_rate": 0, "error_rate": 1})
+        error = await client.get("/search", params={"term": "YOASOBI"})
+        invalid = await client.put("/_standin/faults", json={"error_rate": 2})
+
+    assert throttled.status_code == 403
+    assert throttled.headers["retry-after"] == "2"
+    assert updated.status_code == 200 and updated.json()["error_rate"] == 1
+    assert error.status_code == 503
+    assert invalid.status_code == 400
+    assert app.stats()["throttled"] == 1 and app.stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_max_rps_throttles_bursts(corpus):
+    """1秒あたりの上限を超えたリクエストは429を返し、時間が経つと再び受け付けること"""
+    now = [0.0]
+    app = UpstreamStandin(corpus, FaultProfile(max_rps=2), clock=lambda: now[0])
+    async with _client(app) as client:
+        burst = [(await client.get("/search", params={"term": "YOASOBI"})).status_code for _ in range(3)]
+        now[0] = 0.5
+        after = (await client.get("/search", params={"term": "YOASOBI"})).status_code
+
+    assert burst == [200, 200, 429]
+    assert after == 200
+
+
+@pytest.mark.asyncio
+async def test_latency_is_injected(corpus):
+    """設定した遅延（基本値＋ジッター）の後に応答すること"""
+    delays = []
+
+    async def sleep(seconds: float) -> None:
+        delays.append(seconds)
+
+    app = UpstreamStandin(corpus, FaultProfile(latency_ms=100, jitter_ms=50), seed=7, sleep=sleep)
+    async with _client(app) as client:
+        for _ in range(5):
+            await client.get("/search", params={"term": "YOASOBI"})
+
+    assert len(delays) == 5
+    assert all(0.1 <= delay <= 0.15 for delay in delays)
+
+
+@pytest.mark.asyncio
+async def test_record_mode_captures_upstream_on_miss(tmp_path):
+    """記録モードでは記録がないリクエストを上流から取得してコーパスに保存すること"""
+    upstream_requests = []
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        upstream_requests.append(request)
+        if request.url.path == "/search":
+            return httpx.Response(200, content=SEARCH_BODY, headers={"content-type": "text/javascript"})
+        return httpx.Response(200, content=RSS_BODY, headers={"content-type": "application/json"})
+
+    corpus = RecordedCorpus(str(tmp_path / "recorded"), version="rec")
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as upstream_client:
+        recorder = CorpusRecorder(corpus, http_client=upstream_client)
+        app = UpstreamStandin(corpus, recorder=recorder)
+        async with _client(app) as client:
+            first = await client.get("/search", params={"term": "YOASOBI", "limit": "200"})
+            second = await client.get("/search", params={"limit": "200", "term": "yoasobi"})
+            feed = await client.get("/api/v2/jp/music/most-played/10/songs.json")
+
+    assert first.content == second.content == SEARCH_BODY
+    assert first.headers["content-type"] == "text/javascript"
+    assert feed.content == RSS_BODY
+    assert [str(r.url) for r in upstream_requests] == [
+        "https://itunes.apple.com/search?term=YOASOBI&limit=200",
+        "https://rss.applemarketingtools.com/api/v2/jp/music/most-played/10/songs.json",
+    ]
+    assert app.stats()["recorded"] == 2
+    assert len(RecordedCorpus(corpus.path)) == 2
+
+
+@pytest.mark.asyncio
+async def test_clients_point_at_standin_through_config(corpus, monkeypatch):
+    """設定で上流のURLをスタンドインに向けると、両クライアントが記録済みの応答を受け取ること"""
+    monkeypatch.setenv("OTODOKI_ITUNES_SEARCH_URL", "http://standin/search")
+    monkeypatch.setenv("OTODOKI_APPLE_RSS_BASE_URL", "http://standin/api/v2/")
+
+    app = UpstreamStandin(corpus)
+    async with _client(app) as http_client:
+        itunes = iTunesApiClient(http_client=http_client, cache=SearchCache(ttl_s=0))
+        results = await itunes.search_tracks({"term": "YOASOBI"})
+        feed = await AppleMusicRSSClient(http_client=http_client).get_top_songs("jp", 10)
+
+    assert itunes.base_url == "http://standin/search"
+    assert [result["trackId"] for result in results] == [101]
+    assert feed["feed"]["results"][0]["name"] == "アイドル"
+    assert app.stats()["requests"] == 2
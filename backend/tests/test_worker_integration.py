@@ -3,11 +3,13 @@
 モックデータを使用してワーカーの動作を検証
 """
 
+import asyncio
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
 from app.core.queue import QueueManager
+from app.models.track import Track
 from app.services.worker import QueueReplenishmentWorker
 
 
@@ -143,6 +145,39 @@ class TestWorkerIntegration:
             assert success is False
             assert queue_manager.size() == 0  # トラック追加されず
 
+    @pytest.mark.asyncio
+    async def test_worker_wakes_on_low_watermark(self, monkeypatch: pytest.MonkeyPatch):
+        """キューが閾値を下回った時点で、予備の確認間隔を待たずに補充されるテスト"""
+        monkeypatch.setenv("OTODOKI_MAX_CAP", "100")
+        monkeypatch.setenv("OTODOKI_FALLBACK_INTERVAL_MS", "60000")
+        queue_manager = QueueManager(max_capacity=100, low_watermark=10)
+        queue_manager.enqueue([
+            Track(id=str(i), title=f"Song {i}", artist="Artist") for i in range(100)
+        ])
+        worker = QueueReplenishmentWorker(queue_manager)
+        refilled = asyncio.Event()
+
+        async def fake_refill(need=None, fetch_concurrency=None):
+            refilled.set()
+            return True
+
+        with patch.object(worker, "_attempt_refill", side_effect=fake_refill) as mock_refill:
+            await worker.start()
+            try:
+                # 閾値（70件）以上のため補充されず、通知を待つ
+                await asyncio.sleep(0.1)
+                assert mock_refill.call_count == 0
+
+                # 別スレッドからの取り出しで閾値を下回る
+                await asyncio.to_thread(queue_manager.dequeue_random, 40)
+                await asyncio.wait_for(refilled.wait(), timeout=1.0)
+            finally:
+                await worker.stop()
+
+        assert mock_refill.call_count == 1
+        assert worker.stats["low_watermark_wakeups"] == 1
+        assert worker.stats["fallback_wakeups"] == 0
+
     def test_worker_stats(self):
         """ワーカー統計情報のテスト"""
         queue_manager = QueueManager()
@@ -153,10 +188,24 @@ class TestWorkerIntegration:
         # 必要なキーが含まれているかチェック
         expected_keys = {
             "running",
+            "worker_role",
             "consecutive_failures",
             "max_failures",
             "refill_in_progress",
+            "refill_requested",
+            "refill_request_count",
+            "refill_request_coalesced",
+            "low_watermark_wakeups",
+            "fallback_wakeups",
             "poll_interval_ms",
+            "fallback_interval_ms",
+            "refill_controller",
+            "ingestion",
+            "search_rate_limiter",
+            "single_flight",
+            "search_hedging",
+            "track_dedup",
+            "search_cache",
             "min_threshold",
             "batch_size",
             "max_cap",
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+検索結果の整形処理のベンチマークスクリプト
+複数の検索結果（各200件）を同時に整形している間のイベントループの遅延（ラグ）を、
+イベントループ上で整形する方法（inline）と、スレッド・プロセスのプールで整形する方法で比較する
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.rate_limit import AdaptiveRateLimiter  # noqa: E402
+from app.services.itunes_api import iTunesApiClient  # noqa: E402
+from app.services.search_cache import SearchCache  # noqa: E402
+
+PROBE_INTERVAL_S = 0.001
+
+
+def _raw_tracks(batch: int, size: int) -> List[Dict[str, Any]]:
+    """整形に使うフィールドを持つ検索結果（バッチごとに別の楽曲）"""
+    return [
+        {
+            "trackId": batch * size + i + 1,
+            "trackName": f"  楽曲タイトル {batch}-{i}  ",
+            "artistName": f"アーティスト {i % 17}",
+            "previewUrl": f"https://audio-ssl.itunes.apple.com/preview/{batch}/{i}.m4a",
+            "artworkUrl100": f"https://is1-ssl.mzstatic.com/image/thumb/{batch}/{i}/100x100bb.jpg",
+            "collectionName": f"アルバム {batch}",
+            "trackTimeMillis": 180000 + i,
+            "primaryGenreName": "J-Pop",
+        }
+        for i in range(size)
+    ]
+
+
+async def _probe_lag(stop: asyncio.Event, lags: List[float]) -> None:
+    """一定間隔で起床し、予定より遅れた時間をイベントループのラグとして記録"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL_S
+        await asyncio.sleep(PROBE_INTERVAL_S)
+        lags.append(max(0.0, loop.time() - expected) * 1000)
+
+
+async def _run(mode: str, executor: Optional[Executor], fetches: int, batches: int, size: int) -> None:
+    client = iTunesApiClient(
+        cache=SearchCache(ttl_s=0),
+        rate_limiter=AdaptiveRateLimiter(),
+        clean_executor=executor,
+    )
+    # ウォームアップ（プロセスプールの起動を計測に含めない）
+    await client.clean_and_filter_tracks_async(_raw_tracks(10 ** 6, size))
+
+    async def fetcher(index: int) -> int:
+        cleaned = 0
+        for batch in range(batches):
+            raw = _raw_tracks(index * batches + batch, size)
+            if executor is None:
+                cleaned += len(client.clean_and_filter_tracks(raw))
+            else:
+                cleaned += len(await client.clean_and_filter_tracks_async(raw))
+            await asyncio.sleep(0)  # 検索の待ち時間の代わり
+        return cleaned
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_lag(stop, lags))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    cleaned = sum(await asyncio.gather(*(fetcher(i) for i in range(fetches))))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    ordered = sorted(lags)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{mode:<8} lag p50={statistics.median(ordered):6.2f}ms  p99={p99:6.2f}ms  "
+          f"max={ordered[-1]:6.2f}ms  elapsed={elapsed:6.2f}s  tracks={cleaned}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fetches", type=int, default=4, help="同時に整形する検索の数")
+    parser.add_argument("--batches", type=int, default=10, help="検索ごとの整形回数")
+    parser.add_argument("--size", type=int, default=200, help="1回の検索結果の件数")
+    parser.add_argument("--workers", type=int, default=2, help="プールのスレッド・プロセス数")
+    args = parser.parse_args()
+
+    print(f"fetches={args.fetches} batches={args.batches} size={args.size} workers={args.workers}")
+    asyncio.run(_run("inline", None, args.fetches, args.batches, args.size))
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        asyncio.run(_run("thread", executor, args.fetches, args.batches, args.size))
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        asyncio.run(_run("process", executor, args.fetches, args.batches, args.size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+共有HTTPクライアントのベンチマークスクリプト
+自己署名証明書で起動したローカルのHTTPSスタンドインサーバーに対して、
+呼び出しごとに httpx.AsyncClient を作成する従来の方法と、
+keep-alive付きの共有クライアント（app.core.http）の1回あたりのレイテンシを比較する
+"""
+
+import argparse
+import asyncio
+import datetime
+import ipaddress
+import os
+import socket
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Awaitable, Callable, List
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+
+from app.core.config import WorkerConfig  # noqa: E402
+from app.core.http import create_http_client, http2_available  # noqa: E402
+
+PAYLOAD = (
+    b'{"resultCount":1,"results":[{"trackId":1,"trackName":"Song",'
+    b'"artistName":"Artist","previewUrl":"https://example.com/p.m4a",'
+    b'"artworkUrl100":"https://example.com/a100x100.jpg"}]}'
+)
+
+
+def _write_self_signed_cert(directory: str) -> tuple[str, str]:
+    """127.0.0.1 用の自己署名証明書と秘密鍵を書き出す"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+async def _search_app(scope, receive, send) -> None:
+    """iTunes Search APIの代わりに固定のJSONを返すASGIアプリ"""
+    if scope["type"] != "http":
+        return
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": PAYLOAD})
+
+
+def _start_server(cert_path: str, key_path: str) -> tuple[uvicorn.Server, int]:
+    """スタンドインサーバーを別スレッドで起動し、ポート番号を返す"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    config = uvicorn.Config(
+        _search_app, host="127.0.0.1", port=port, log_level="warning",
+        ssl_certfile=cert_path, ssl_keyfile=key_path,
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, port
+
+
+async def _measure(call: Callable[[], Awaitable[None]], requests: int) -> List[float]:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def _report(label: str, latencies: List[float]) -> float:
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<28} p50={p50:7.2f}ms  p99={p99:7.2f}ms  mean={statistics.mean(ordered):7.2f}ms")
+    return p50
+
+
+async def _run(url: str, cert_path: str, requests: int) -> None:
+    ssl_context = ssl.create_default_context(cafile=cert_path)
+    params = {"term": "YOASOBI", "media": "music"}
+
+    async def per_call() -> None:
+        async with httpx.AsyncClient(verify=ssl_context) as client:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+
+    shared = create_http_client(verify=ssl_context)
+
+    async def pooled() -> None:
+        response = await shared.get(url, params=params)
+        response.raise_for_status()
+
+    try:
+        # 初回接続（TLSハンドシェイク）を計測から除く
+        await per_call()
+        await pooled()
+
+        http2 = WorkerConfig.get_http2_enabled() and http2_available()
+        print(f"requests={requests} http2={http2}")
+        per_call_p50 = _report("new client per call", await _measure(per_call, requests))
+        pooled_p50 = _report("shared keep-alive client", await _measure(pooled, requests))
+        print(f"saved per call (p50): {per_call_p50 - pooled_p50:.2f}ms "
+              f"({per_call_p50 / pooled_p50:.1f}x faster)")
+    finally:
+        await shared.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300, help="方式ごとのリクエスト数")
+    args = parser.parse_args()
+
+    if not http2_available():
+        print("h2 パッケージがないため HTTP/1.1 で計測します")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = _write_self_signed_cert(directory)
+        server, port = _start_server(cert_path, key_path)
+        try:
+            asyncio.run(_run(f"https://127.0.0.1:{port}/search", cert_path, args.requests))
+        finally:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
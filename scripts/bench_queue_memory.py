@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+キュー保持形式のベンチマークスクリプト
+pydanticのTrackをそのまま保持する場合と、キュー保持用レコード（QueuedTrack）で
+保持する場合のメモリ使用量・楽曲提供スループットを 1k/10k/100k 件で比較する
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.queue import QueueManager  # noqa: E402
+from app.models.track import QueuedTrack, Track  # noqa: E402
+from app.services.suggestions import SuggestionsService  # noqa: E402
+
+ARTISTS = [f"アーティスト {i}" for i in range(300)]
+GENRES = ["J-Pop", "ロック", "アニメ", "ヒップホップ/ラップ", "エレクトロニック", "R&B/ソウル"]
+
+
+def _iter_raw_records(count: int):
+    """iTunes APIのレスポンスを解析した直後と同様に、文字列を共有しないレコードを1件ずつ生成"""
+    for i in range(count):
+        yield json.loads(json.dumps({
+            "id": str(1_000_000 + i),
+            "title": f"楽曲タイトル {i}",
+            "artist": ARTISTS[i % len(ARTISTS)],
+            "artwork_url": f"https://is1-ssl.mzstatic.com/image/thumb/Music/{i}/600x600bb.jpg",
+            "preview_url": f"https://audio-ssl.itunes.apple.com/itunes-assets/{i}.m4a",
+            "album": f"アルバム {i // 12}",
+            "duration_ms": 180000 + i,
+            "genre": GENRES[i % len(GENRES)],
+        }))
+
+
+def _raw_records(count: int) -> list:
+    return list(_iter_raw_records(count))
+
+
+def _measure_memory(build) -> float:
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / 1024 / 1024
+
+
+def _bench_memory(count: int) -> None:
+    # 生成元の辞書は1件ずつ破棄され、各オブジェクトが保持する文字列のみが残る
+    track_mb = _measure_memory(
+        lambda: [Track(**r) for r in _iter_raw_records(count)])
+    compact_mb = _measure_memory(
+        lambda: [QueuedTrack.from_dict(r) for r in _iter_raw_records(count)])
+    print(
+        f"  memory  {count:>7}: Track {track_mb:>8.2f} MiB, "
+        f"QueuedTrack {compact_mb:>8.2f} MiB ({compact_mb / track_mb:.0%})"
+    )
+
+
+class _TrackListQueue(QueueManager):
+    """従来どおりTrackを保持・返却するキュー（比較用）"""
+
+    def lease_random_excluding(self, n, exclude_ids, ttl_s=None):
+        lease_id, tracks = super().lease_random_excluding(n, exclude_ids, ttl_s)
+        return lease_id, [Track(**track.to_dict()) for track in tracks]
+
+
+def _bench_throughput(count: int, requests: int, limit: int) -> None:
+    logging.disable(logging.CRITICAL)
+    results = {}
+    for name, queue_cls in (("Track", _TrackListQueue), ("QueuedTrack", QueueManager)):
+        queue = queue_cls(max_capacity=count, low_watermark=1, lease_ttl_s=30)
+        tracks = [Track(**r) for r in _raw_records(count)]
+        started = time.perf_counter()
+        queue.enqueue(tracks)
+        enqueue_s = time.perf_counter() - started
+
+        service = SuggestionsService(queue)
+
+        async def serve() -> float:
+            served = 0
+            begin = time.perf_counter()
+            while served < requests:
+                if queue.size() < limit:
+                    queue.enqueue(tracks)
+                response = await service.get_suggestions(limit, [])
+                served += 1
+                assert len(response.data) == limit
+            return time.perf_counter() - begin
+
+        elapsed = asyncio.run(serve())
+        results[name] = (count / enqueue_s, requests / elapsed)
+
+    print(
+        f"  thruput {count:>7}: "
+        + ", ".join(
+            f"{name} enqueue {enq:>9.0f}/s suggestions {req:>6.0f} req/s"
+            for name, (enq, req) in results.items()
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    print("=== Queue Record Benchmark ===")
+    for size in args.sizes:
+        _bench_memory(size)
+    for size in args.sizes:
+        _bench_throughput(size, args.requests, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+iTunes検索結果の解析方法のベンチマークスクリプト
+200件の検索結果の応答本文について、本文全体を response.json() で読む従来の方法と、
+チャンクごとに解析して必要なフィールドだけを残すストリーミング解析（app.services.search_stream）の
+1回あたりのCPU時間・最後のチャンクを受信してから結果がそろうまでの時間・ピークメモリを比較する
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import httpx  # noqa: E402
+
+from app.services.search_stream import SearchResultParser  # noqa: E402
+
+
+def _synthetic_result(i: int) -> Dict[str, Any]:
+    """iTunes Search APIの楽曲1件と同じフィールド構成の検索結果"""
+    collection_id = 1500000000 + i // 12
+    track_id = 1500000000 + i
+    return {
+        "wrapperType": "track",
+        "kind": "song",
+        "artistId": 1487914725 + i % 7,
+        "collectionId": collection_id,
+        "trackId": track_id,
+        "artistName": f"アーティスト {i % 7}",
+        "collectionName": f"アルバム {i // 12}",
+        "trackName": f"楽曲タイトル {i}",
+        "collectionCensoredName": f"アルバム {i // 12}",
+        "trackCensoredName": f"楽曲タイトル {i}",
+        "artistViewUrl": f"https://music.apple.com/jp/artist/artist/{1487914725 + i % 7}?uo=4",
+        "collectionViewUrl": f"https://music.apple.com/jp/album/album/{collection_id}?i={track_id}&uo=4",
+        "trackViewUrl": f"https://music.apple.com/jp/album/album/{collection_id}?i={track_id}&uo=4",
+        "previewUrl": (
+            "https://audio-ssl.itunes.apple.com/itunes-assets/AudioPreview116/v4/"
+            f"{i:02x}/{i:02x}/{i:02x}/mzaf_{track_id}.plus.aac.p.m4a"
+        ),
+        "artworkUrl30": f"https://is1-ssl.mzstatic.com/image/thumb/Music/{collection_id}/source/30x30bb.jpg",
+        "artworkUrl60": f"https://is1-ssl.mzstatic.com/image/thumb/Music/{collection_id}/source/60x60bb.jpg",
+        "artworkUrl100": f"https://is1-ssl.mzstatic.com/image/thumb/Music/{collection_id}/source/100x100bb.jpg",
+        "collectionPrice": 2037.0,
+        "trackPrice": 255.0,
+        "releaseDate": "2021-01-06T12:00:00Z",
+        "collectionExplicitness": "notExplicit",
+        "trackExplicitness": "notExplicit",
+        "discCount": 1,
+        "discNumber": 1,
+        "trackCount": 12,
+        "trackNumber": i % 12 + 1,
+        "trackTimeMillis": 180000 + i * 37,
+        "country": "JPN",
+        "currency": "JPY",
+        "primaryGenreName": "J-Pop",
+        "isStreamable": True,
+    }
+
+
+def _load_corpus(path: str) -> bytes:
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    results = [_synthetic_result(i) for i in range(200)]
+    return json.dumps({"resultCount": len(results), "results": results}, ensure_ascii=False).encode("utf-8")
+
+
+def _chunks(body: bytes, size: int) -> List[bytes]:
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+def _parse_full(chunks: List[bytes]) -> List[Dict[str, Any]]:
+    """従来の方法：本文を読み切ってから response.json() で全フィールドを読む"""
+    response = httpx.Response(200, content=b"".join(chunks))
+    return response.json().get("results", [])
+
+
+def _parse_streaming(chunks: List[bytes]) -> List[Dict[str, Any]]:
+    """ストリーミング解析：チャンクごとに読み終えた要素から必要なフィールドだけを残す"""
+    parser = SearchResultParser()
+    results: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        results.extend(parser.feed(chunk))
+    results.extend(parser.close())
+    return results
+
+
+def _tail_streaming(chunks: List[bytes]) -> float:
+    """最後のチャンクを受信してから結果がそろうまでのCPU時間（ミリ秒）"""
+    parser = SearchResultParser()
+    for chunk in chunks[:-1]:
+        parser.feed(chunk)
+    started = time.process_time()
+    parser.feed(chunks[-1])
+    parser.close()
+    return (time.process_time() - started) * 1000
+
+
+def _tail_full(chunks: List[bytes]) -> float:
+    """従来の方法は本文を読み切るまで解析を始められないため、解析全体が最後のチャンクの後になる"""
+    started = time.process_time()
+    _parse_full(chunks)
+    return (time.process_time() - started) * 1000
+
+
+def _measure(label: str, fn: Callable[[List[bytes]], List[Dict[str, Any]]],
+             tail: Callable[[List[bytes]], float],
+             chunks: List[bytes], iterations: int) -> Dict[str, float]:
+    fn(chunks)  # ウォームアップ
+
+    cpu_times = []
+    for _ in range(iterations):
+        started = time.process_time()
+        fn(chunks)
+        cpu_times.append((time.process_time() - started) * 1000)
+    tail_p50 = statistics.median(tail(chunks) for _ in range(iterations))
+
+    # 結果を保持したままの状態も含めたピークメモリ
+    tracemalloc.start()
+    results = fn(chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    cpu_p50 = statistics.median(cpu_times)
+    print(f"{label:<14} cpu p50={cpu_p50:6.2f}ms  after last chunk p50={tail_p50:6.2f}ms  "
+          f"peak={peak / 1024:7.1f}KiB  retained={retained / 1024:7.1f}KiB")
+    return {"cpu_p50": cpu_p50, "tail_p50": tail_p50, "peak": peak}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default="", help="記録した応答本文のファイル（未指定の場合は200件の合成データ）")
+    parser.add_argument("--chunk-size", type=int, default=16384, help="受信チャンクのバイト数")
+    parser.add_argument("--iterations", type=int, default=200, help="方式ごとの計測回数")
+    args = parser.parse_args()
+
+    body = _load_corpus(args.corpus)
+    chunks = _chunks(body, args.chunk_size)
+    print(f"body={len(body) / 1024:.1f}KiB chunks={len(chunks)} iterations={args.iterations}")
+
+    full = _measure("response.json", _parse_full, _tail_full, chunks, args.iterations)
+    streaming = _measure("streaming", _parse_streaming, _tail_streaming, chunks, args.iterations)
+    print(f"cpu p50 (total): {streaming['cpu_p50'] - full['cpu_p50']:+.2f}ms, "
+          f"after last chunk: {streaming['tail_p50'] - full['tail_p50']:+.2f}ms, "
+          f"peak memory: {full['peak'] / max(1, streaming['peak']):.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
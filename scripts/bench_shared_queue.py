@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+共有メモリキューのベンチマークスクリプト
+複数プロセスで楽曲提供を行い、プロセスごとのキュー（memory）と
+ホスト共有キュー（shm）の取り出しスループットと補充回数を比較する
+
+補充は外部APIを呼ばずに合成楽曲で行い、補充バッチ数を外部API呼び出し回数の目安とする。
+補充の速さに結果が左右されないよう、キューは満杯にしてから計測を始め、計測中も満杯近くに保つ
+（shm は専用の補充プロセス、memory は各プロセスが計測時間外で補充する）。
+補充する楽曲は事前に作成した容量の2倍の楽曲を使い回し、取り出し済みのIDを再投入する。
+取り出し側が楽曲を待たされていないことは、件数が足りなかった応答数（short）で確認できる
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.core.queue import QueueManager  # noqa: E402
+from app.core.shm_queue import SharedMemoryQueueBackend  # noqa: E402
+from app.models.track import Track  # noqa: E402
+from app.services.suggestions import SuggestionsService  # noqa: E402
+
+CAPACITY = 1000
+REFILL_BATCH = 200
+LIMIT = 10
+# 全プロセスの起動を待ってから同時に計測を始めるための猶予（秒）
+START_DELAY = 2.0
+# CPUが少ない環境でも補充プロセスが遅れないよう、取り出し側の優先度を下げる
+CONSUMER_NICE = 5
+
+
+def _make_batch(prefix: str, start: int, count: int = REFILL_BATCH) -> list:
+    return [
+        Track(
+            id=f"{prefix}-{start + i}",
+            title=f"Song {start + i}",
+            artist="Bench Artist",
+            artwork_url="https://example.com/art/600x600bb.jpg",
+            preview_url=f"https://example.com/{start + i}.m4a",
+            album="Bench Album",
+            genre="J-Pop",
+        )
+        for i in range(count)
+    ]
+
+
+def _open_queue(mode: str, shm_name: str, capacity: int):
+    if mode == "shm":
+        return SharedMemoryQueueBackend(name=shm_name, max_capacity=capacity, lease_ttl_s=30)
+    return QueueManager(max_capacity=capacity, lease_ttl_s=30)
+
+
+class _Refiller:
+    """事前に作成した楽曲を順に使い回してキューを満杯にする"""
+
+    def __init__(self, queue, capacity: int, prefix: str):
+        self.queue = queue
+        self.capacity = capacity
+        self.pool = _make_batch(prefix, 0, 2 * capacity)
+        self.position = 0
+        self.batches = 0
+
+    def fill(self) -> int:
+        """キューが満杯近くになるまで補充し、今回補充したバッチ数を返す"""
+        batches = 0
+        while self.queue.size() <= self.capacity - REFILL_BATCH:
+            batch = self.pool[self.position:self.position + REFILL_BATCH]
+            self.position = (self.position + REFILL_BATCH) % len(self.pool)
+            self.queue.enqueue(batch, reject_duplicates=True)
+            batches += 1
+        self.batches += batches
+        return batches
+
+
+def _wait_until(start_at: float) -> None:
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _run_producer(shm_name: str, capacity: int, start_at: float, duration: float,
+                  results) -> None:
+    """共有キューを満杯近くに保つ補充プロセス"""
+    logging.disable(logging.CRITICAL)
+    queue = _open_queue("shm", shm_name, capacity)
+    refiller = _Refiller(queue, capacity, f"p{os.getpid()}")
+
+    _wait_until(start_at)
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if not refiller.fill():
+            time.sleep(0.0005)
+
+    results.put(("producer", refiller.batches))
+    queue.close()
+
+
+def _run_consumer(mode: str, shm_name: str, capacity: int, start_at: float,
+                  duration: float, results) -> None:
+    logging.disable(logging.CRITICAL)
+    queue = _open_queue(mode, shm_name, capacity)
+    service = SuggestionsService(queue)
+    refiller = _Refiller(queue, capacity, f"c{os.getpid()}")
+    served = 0
+    short = 0
+    refill_s = 0.0
+
+    if mode == "memory":
+        refiller.fill()
+
+    async def loop() -> None:
+        nonlocal served, short, refill_s
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            if mode == "memory" and queue.size() <= capacity - REFILL_BATCH:
+                # プロセスごとのキューは自分で補充する（補充時間は計測から除く）
+                started = time.perf_counter()
+                refiller.fill()
+                refill_s += time.perf_counter() - started
+            response = await service.get_suggestions(LIMIT, [])
+            served += len(response.data)
+            if len(response.data) < LIMIT:
+                short += 1
+
+    os.nice(CONSUMER_NICE)
+    _wait_until(start_at)
+    asyncio.run(loop())
+    results.put(("consumer", (served, short, refiller.batches, duration - refill_s)))
+    if mode == "shm":
+        queue.close()
+
+
+def run(mode: str, processes: int, capacity: int, duration: float) -> None:
+    shm_name = f"otodoki_bench_{uuid.uuid4().hex[:8]}"
+    if mode == "shm":
+        # 全プロセスが同じ容量で接続できるよう先に作成し、満杯にしておく
+        queue = SharedMemoryQueueBackend(name=shm_name, max_capacity=capacity)
+        _Refiller(queue, capacity, "prefill").fill()
+        queue.close()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start_at = time.time() + START_DELAY
+    workers = [
+        ctx.Process(target=_run_consumer,
+                    args=(mode, shm_name, capacity, start_at, duration, results))
+        for _ in range(processes)
+    ]
+    if mode == "shm":
+        workers.append(ctx.Process(target=_run_producer,
+                                   args=(shm_name, capacity, start_at, duration, results)))
+    for worker in workers:
+        worker.start()
+    totals = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    if mode == "shm":
+        cleanup = SharedMemoryQueueBackend(name=shm_name)
+        cleanup.unlink()
+        cleanup.close()
+
+    consumers = [result for kind, result in totals if kind == "consumer"]
+    served = sum(c[0] for c in consumers)
+    short = sum(c[1] for c in consumers)
+    refills = sum(c[2] for c in consumers) + sum(
+        result for kind, result in totals if kind == "producer")
+    # プロセスごとに補充を除いた計測時間で割ってから合計する
+    tracks_per_s = sum(c[0] / c[3] for c in consumers if c[3] > 0)
+    print(
+        f"{mode:>6} x{processes} cap={capacity}: {tracks_per_s:>10.0f} tracks/s, "
+        f"{tracks_per_s / LIMIT:>8.0f} req/s, short: {short}, "
+        f"served: {served}, refill batches: {refills}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--capacity", type=int, nargs="+", default=[CAPACITY],
+                        help="キューの容量（重複確認のコストは容量に依存するため複数指定して比較できる）")
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"=== Shared Queue Benchmark (cpus: {os.cpu_count()}) ===")
+    for capacity in args.capacity:
+        for processes in args.processes:
+            for mode in ("memory", "shm"):
+                run(mode, processes, capacity, args.duration)
+
+
+if __name__ == "__main__":
+    main()
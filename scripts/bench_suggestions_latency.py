@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+楽曲提供APIのレイテンシベンチマークスクリプト
+/api/v1/tracks/suggestions をASGIアプリとして直接呼び出し、response_modelで検証・シリアライズする
+従来の経路と、シリアライズ済みJSONを連結する現在の経路の p50/p99 を比較する
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi import BackgroundTasks, FastAPI, Query  # noqa: E402
+
+from app.core.queue import QueueManager  # noqa: E402
+from app.dependencies import get_queue_manager  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.suggestions import SuggestionsResponse  # noqa: E402
+from app.models.track import Track  # noqa: E402
+from app.services.suggestions import SuggestionsService  # noqa: E402
+
+CAPACITY = 1000
+
+
+def _tracks(start: int, count: int) -> List[Track]:
+    return [
+        Track(
+            id=str(1_000_000 + i),
+            title=f"楽曲タイトル {i}",
+            artist=f"アーティスト {i % 300}",
+            artwork_url=f"https://is1-ssl.mzstatic.com/image/thumb/Music/{i}/600x600bb.jpg",
+            preview_url=f"https://audio-ssl.itunes.apple.com/itunes-assets/{i}.m4a",
+            album=f"アルバム {i // 12}",
+            duration_ms=180000 + i,
+            genre="J-Pop",
+        )
+        for i in range(start, start + count)
+    ]
+
+
+LEGACY_PATH = "/bench/legacy-suggestions"
+
+
+def _add_legacy_route(target: FastAPI, queue: QueueManager) -> None:
+    """response_modelで検証・シリアライズする従来の経路（ミドルウェアを揃えるため同じアプリに追加）"""
+
+    @target.get(LEGACY_PATH, response_model=SuggestionsResponse)
+    async def suggestions(
+        background_tasks: BackgroundTasks,
+        limit: Optional[int] = Query(None, ge=1, le=50),
+    ) -> SuggestionsResponse:
+        service = SuggestionsService(queue)
+        return await service.get_suggestions(
+            limit, [], background_tasks=background_tasks)
+
+
+async def _call(path: str, limit: int) -> int:
+    """ASGIアプリを直接呼び出し、ステータスコードを返す（HTTPクライアントの負荷を含めない）"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": f"limit={limit}".encode(), "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            response_complete.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _measure(queue: QueueManager, requests: int, limit: int) -> Dict[str, List[float]]:
+    """2つの経路を交互に呼び出して計測（最初の50回はウォームアップとして除外）"""
+    paths = {"response_model": LEGACY_PATH, "pre-serialized": "/api/v1/tracks/suggestions"}
+    latencies: Dict[str, List[float]] = {name: [] for name in paths}
+    produced = 0
+    for i in range(requests + 50):
+        for name, path in paths.items():
+            if queue.size() < CAPACITY // 2:
+                queue.enqueue(_tracks(produced, CAPACITY // 2))
+                produced += CAPACITY // 2
+            started = time.perf_counter()
+            status = await _call(path, limit)
+            elapsed = time.perf_counter() - started
+            assert status == 200, status
+            if i >= 50:
+                latencies[name].append(elapsed * 1000)
+    return latencies
+
+
+def _report(name: str, latencies: List[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"  {name:<12} p50 {quantiles[49]:>7.3f} ms  p99 {quantiles[98]:>7.3f} ms  "
+        f"mean {statistics.fmean(latencies):>7.3f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"=== Suggestions Latency Benchmark (limit={args.limit}) ===")
+
+    queue = QueueManager(max_capacity=CAPACITY, low_watermark=1)
+    app.dependency_overrides[get_queue_manager] = lambda: queue
+    _add_legacy_route(app, queue)
+
+    for name, latencies in (await _measure(queue, args.requests, args.limit)).items():
+        _report(name, latencies)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+楽曲キャッシュ一括更新のベンチマークスクリプト
+SQLiteに作成した古い TrackCache 行について、楽曲IDごとにLookup APIを呼び出して1行ずつ更新する方法と、
+TrackCacheRefresher（最大200件ずつ照会し、バッチごとに1回のUPDATE）の1秒あたりの更新行数を比較する。
+Lookup APIは外部を呼び出さず、応答ごとに一定の遅延を入れたスタンドインで代用する
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import httpx  # noqa: E402
+from sqlalchemy import update  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from app.core.rate_limit import AdaptiveRateLimiter  # noqa: E402
+from app.db.crud import TrackCacheCRUD  # noqa: E402
+from app.db.models import TrackCache  # noqa: E402
+from app.services.itunes_api import iTunesApiClient  # noqa: E402
+from app.services.search_cache import SearchCache  # noqa: E402
+from app.services.track_refresh import TrackCacheRefresher  # noqa: E402
+
+STALE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _lookup_handler(latency_s: float):
+    """Lookup APIの代わりに、照会したIDの楽曲を一定の遅延の後に返す"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_s)
+        results = [
+            {
+                "trackId": int(track_id),
+                "previewUrl": f"https://new.example.com/{track_id}.m4a",
+                "artworkUrl100": f"https://new.example.com/{track_id}/100x100bb.jpg",
+            }
+            for track_id in request.url.params["id"].split(",")
+        ]
+        return httpx.Response(200, json={"resultCount": len(results), "results": results})
+    return handler
+
+
+async def _prepare(path: str, rows: int) -> async_sessionmaker:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as session:
+        session.add_all(
+            TrackCache(
+                external_id=str(1000000 + i),
+                preview_url=f"https://old.example.com/{i}.m4a",
+                artwork_url=f"https://old.example.com/{i}/600x600bb.jpg",
+                updated_at=STALE,
+            )
+            for i in range(rows)
+        )
+        await session.commit()
+    return maker
+
+
+def _client(latency_s: float) -> iTunesApiClient:
+    return iTunesApiClient(
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(_lookup_handler(latency_s))),
+        cache=SearchCache(ttl_s=0),
+        rate_limiter=AdaptiveRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, max_concurrency=10),
+    )
+
+
+async def _per_row(maker: async_sessionmaker, client: iTunesApiClient, rows: int) -> int:
+    """従来の方法：楽曲IDごとに照会し、1行ずつUPDATEしてコミット"""
+    async with maker() as session:
+        external_ids = await TrackCacheCRUD.list_stale(session, updated_before=datetime.now(timezone.utc), limit=rows)
+    for external_id in external_ids:
+        results = await client.lookup_tracks([external_id])
+        async with maker() as session:
+            await session.execute(
+                update(TrackCache)
+                .where(TrackCache.external_id == external_id)
+                .values(preview_url=results[0]["previewUrl"], updated_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+    return len(external_ids)
+
+
+async def _run(rows: int, latency_ms: float, concurrency: int) -> None:
+    latency_s = latency_ms / 1000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tracks.db")
+
+        maker = await _prepare(path, rows)
+        started = time.perf_counter()
+        refreshed = await _per_row(maker, _client(latency_s), rows)
+        elapsed = time.perf_counter() - started
+        print(f"{'per-row':<10} rows={refreshed}  elapsed={elapsed:6.2f}s  {refreshed / elapsed:8.1f} rows/s")
+
+        maker = await _prepare(path, rows)
+        refresher = TrackCacheRefresher(maker, _client(latency_s), max_age_s=0, concurrency=concurrency, max_rows=rows)
+        result = await refresher.refresh_once()
+        print(f"{'bulk':<10} rows={result['rows_refreshed']}  elapsed={result['elapsed_s']:6.2f}s  "
+              f"{result['rows_per_s']:8.1f} rows/s  batches={result['batches']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000, help="古い TrackCache 行の数")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Lookup API 1回あたりの遅延（ミリ秒）")
+    parser.add_argument("--concurrency", type=int, default=2, help="一括更新で同時に実行するバッチ数")
+    args = parser.parse_args()
+
+    print(f"rows={args.rows} latency={args.latency_ms}ms concurrency={args.concurrency}")
+    asyncio.run(_run(args.rows, args.latency_ms, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+iTunes Search API・Apple Music RSSのスタンドインサーバー
+record: 検索キーワードとRSSフィードを本物の上流APIに問い合わせ、応答をバージョン付きのコーパスに記録する
+serve: 記録したコーパスをローカルのHTTPサーバーで再生する（遅延・スロットリング・エラーを注入可能）。
+       --record-upstream を付けると、記録がないリクエストを上流から取得して記録する
+
+ワーカーは次の設定でスタンドインに向ける:
+  OTODOKI_ITUNES_SEARCH_URL=http://127.0.0.1:8765/search
+  OTODOKI_ITUNES_LOOKUP_URL=http://127.0.0.1:8765/lookup
+  OTODOKI_APPLE_RSS_BASE_URL=http://127.0.0.1:8765/api/v2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# プロジェクトルートをパスに追加（scriptsディレクトリから実行するため）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import uvicorn  # noqa: E402
+
+from app.core.config import WorkerConfig  # noqa: E402
+from app.services.upstream_standin import (  # noqa: E402
+    CorpusRecorder,
+    FaultProfile,
+    RecordedCorpus,
+    UpstreamStandin,
+)
+
+UPSTREAM_SEARCH_URL = "https://itunes.apple.com/search"
+UPSTREAM_RSS_BASE_URL = "https://rss.applemarketingtools.com/api/v2"
+UPSTREAM_LOOKUP_URL = "https://itunes.apple.com/lookup"
+
+
+def _search_params(term: str, country: str, limit: int) -> dict:
+    """iTunesApiClient.search_tracks と同じデフォルトパラメータ"""
+    return {"media": "music", "limit": min(limit, 200), "lang": "ja_jp", "country": country.lower(), "term": term}
+
+
+async def _record(args: argparse.Namespace) -> None:
+    corpus = RecordedCorpus(args.corpus, version=args.version)
+    recorder = CorpusRecorder(corpus, UPSTREAM_SEARCH_URL, UPSTREAM_RSS_BASE_URL)
+    terms = args.terms or WorkerConfig.get_itunes_terms()
+    for term in terms:
+        response = await recorder.record_search(_search_params(term, args.country, args.limit))
+        print(f"search term={term!r}: {len(response.body) / 1024:.1f}KiB")
+        await asyncio.sleep(args.interval)
+    for limit in args.rss_limits:
+        path = f"/{args.country.lower()}/music/most-played/{limit}/songs.json"
+        response = await recorder.record_rss(path)
+        print(f"rss {path}: {len(response.body) / 1024:.1f}KiB")
+    print(f"corpus={args.corpus} version={corpus.version} entries={len(corpus)}")
+
+
+def _serve(args: argparse.Namespace) -> None:
+    corpus = RecordedCorpus(args.corpus, version=args.version)
+    faults = FaultProfile(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        throttle_rate=args.throttle_rate,
+        throttle_status=args.throttle_status,
+        retry_after_s=args.retry_after,
+        max_rps=args.max_rps,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        miss_policy=args.miss,
+    )
+    recorder = (
+        CorpusRecorder(corpus, UPSTREAM_SEARCH_URL, UPSTREAM_RSS_BASE_URL, lookup_url=UPSTREAM_LOOKUP_URL)
+        if args.record_upstream else None
+    )
+    app = UpstreamStandin(corpus, faults, recorder=recorder, seed=args.seed)
+
+    base = f"http://{args.host}:{args.port}"
+    print(f"corpus={args.corpus} version={corpus.version} entries={len(corpus)} "
+          f"mode={'record' if recorder else 'replay'}")
+    print(f"OTODOKI_ITUNES_SEARCH_URL={base}/search")
+    print(f"OTODOKI_ITUNES_LOOKUP_URL={base}/lookup")
+    print(f"OTODOKI_APPLE_RSS_BASE_URL={base}/api/v2")
+    print(f"stats: {base}/_standin/stats (faults can be changed with PUT {base}/_standin/faults)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="上流APIの応答をコーパスに記録")
+    record.add_argument("--corpus", required=True, help="コーパスのディレクトリ")
+    record.add_argument("--version", default=None, help="コーパスのバージョン（新規作成時、未指定の場合は作成日時）")
+    record.add_argument("--terms", nargs="*", default=None, help="検索キーワード（未指定の場合は OTODOKI_ITUNES_TERMS）")
+    record.add_argument("--country", default=WorkerConfig.get_country(), help="対象国")
+    record.add_argument("--limit", type=int, default=200, help="検索1回あたりの取得件数")
+    record.add_argument("--rss-limits", type=int, nargs="*", default=[100], help="記録するRSSフィードの件数")
+    record.add_argument("--interval", type=float, default=3.0, help="検索の間隔（秒、上流のレート制限対策）")
+
+    serve = subparsers.add_parser("serve", help="記録したコーパスを再生")
+    serve.add_argument("--corpus", required=True, help="コーパスのディレクトリ")
+    serve.add_argument("--version", default=None, help="コーパスのバージョン（記録モードで新規作成する場合）")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--record-upstream", action="store_true", help="記録がないリクエストを上流から取得して記録する")
+    serve.add_argument("--latency-ms", type=float, default=0.0, help="応答までの基本の遅延（ミリ秒）")
+    serve.add_argument("--jitter-ms", type=float, default=0.0, help="遅延に加える乱数の幅（ミリ秒）")
+    serve.add_argument("--throttle-rate", type=float, default=0.0, help="スロットリング応答の割合（0〜1）")
+    serve.add_argument("--throttle-status", type=int, choices=[403, 429], default=429)
+    serve.add_argument("--retry-after", type=float, default=0.0, help="スロットリング応答の Retry-After（秒、0の場合は付けない）")
+    serve.add_argument("--max-rps", type=float, default=0.0, help="1秒あたりの最大リクエスト数（0の場合は無制限）")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="エラー応答の割合（0〜1）")
+    serve.add_argument("--error-status", type=int, default=503)
+    serve.add_argument("--miss", choices=["fallback", "404"], default="fallback",
+                       help="記録がないリクエストの扱い（fallback: 記録済みの応答で代用）")
+    serve.add_argument("--seed", type=int, default=None, help="遅延・障害の乱数シード")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        asyncio.run(_record(args))
+    else:
+        _serve(args)
+
+
+if __name__ == "__main__":
+    main()